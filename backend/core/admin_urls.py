@@ -0,0 +1,16 @@
+"""
+Admin URLconf, imported on the first admin request (lazy_include in core.urls).
+"""
+from django.contrib import admin
+
+# Registers the ModelAdmins; a no-op where AdminConfig already ran it at startup
+admin.autodiscover()
+
+# Admin customization for Phantom Banking
+admin.site.site_header = "Phantom Banking Admin"
+admin.site.site_title = "Phantom Banking"
+admin.site.index_title = "Welcome to Phantom Banking Administration"
+admin.site.site_url = "/api/docs/"  # Link to API docs from admin
+
+app_name = 'admin'
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,21 @@
+"""
+Celery application for Phantom Banking background work.
+
+Workers are started with:
+    celery -A core worker -Q settlements,default -l info
+    celery -A core beat -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+app = Celery('phantom_banking')
+
+# Read CELERY_* settings from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Discover tasks.py in all installed apps
+app.autodiscover_tasks()
@@ -2,6 +2,7 @@ import environ
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,11 +26,16 @@ SECRET_KEY = env('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env('DEBUG')
 
+# Production serving mode (phantom_apps.common.startup): precomputed OpenAPI
+# schema, admin and API docs loaded on first use, no development tooling
+PRODUCTION_MODE = env.bool('PRODUCTION_MODE', default=False)
+
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1'])
 
 # Application definition
 DJANGO_APPS = [
-    'django.contrib.admin',
+    # SimpleAdminConfig skips autodiscover; core.admin_urls runs it on the first admin request
+    'django.contrib.admin.apps.SimpleAdminConfig' if PRODUCTION_MODE else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -42,9 +48,11 @@ THIRD_PARTY_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'drf_spectacular',
-    'django_extensions',
 ]
 
+if not PRODUCTION_MODE:
+    THIRD_PARTY_APPS.append('django_extensions')
+
 # Add debug toolbar only in development
 if DEBUG:
     THIRD_PARTY_APPS.append('debug_toolbar')
@@ -54,6 +62,8 @@ LOCAL_APPS = [
     'phantom_apps.wallets', 
     'phantom_apps.transactions',
     'phantom_apps.customers',
+    'phantom_apps.settlements',
+    'phantom_apps.ledger',
     'phantom_apps.common',
     
     # Mock Systems (separate apps)
@@ -64,13 +74,17 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'phantom_apps.common.middleware.TracingMiddleware',  # W3C trace context, request root span
+    'phantom_apps.common.middleware.ServerTimingMiddleware',  # Server-Timing header, slow request log
+    'phantom_apps.common.middleware.PrometheusMetricsMiddleware',  # Route latency histograms
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'phantom_apps.common.middleware.LazySessionMiddleware',  # Saves only on change / sliding refresh
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'phantom_apps.common.middleware.ReplicaStickinessMiddleware',  # Read-your-writes for replica reads
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -115,9 +129,13 @@ if USE_SQLITE:
     }
 else:
     # PostgreSQL configuration with psycopg3 support
+    # DB_POOL_ENABLED switches from persistent per-thread connections to a
+    # process-wide psycopg_pool pool (connections are returned after each request)
+    DB_POOL_ENABLED = env.bool('DB_POOL_ENABLED', default=False)
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            # Django's backend plus DATABASE_CONNECTION_RETRY on connect
+            'ENGINE': 'phantom_apps.common.db.backends.postgresql',
             'NAME': env('DB_NAME', default='phantom_banking_dev'),
             'USER': env('DB_USER', default='phantom_dev'),
             'PASSWORD': env('DB_PASSWORD', default=''),
@@ -129,15 +147,46 @@ else:
                 # Psycopg3 optimizations
                 'server_side_binding': True,
             },
-            'CONN_MAX_AGE': 600,  # Increased for Django 5.2+
+            'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else 600,  # Pooling requires non-persistent connections
             'CONN_HEALTH_CHECKS': True,
-            'ATOMIC_REQUESTS': True,
+            'ATOMIC_REQUESTS': False,  # Views declare transaction policies (common.db.transactions)
             'TEST': {
                 'NAME': 'test_phantom_banking_dev',
                 'CHARSET': 'utf8',
             },
         }
     }
+    if DB_POOL_ENABLED:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': env('DB_POOL_MIN_CONN'),
+            'max_size': env('DB_POOL_MAX_CONN'),
+            'timeout': env.float('DB_POOL_CHECKOUT_TIMEOUT', default=10.0),  # Max wait for a free connection
+            'max_idle': env.float('DB_POOL_MAX_IDLE', default=600.0),
+            'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=3600.0),
+        }
+
+# Read replicas: list/report endpoints opt in via phantom_apps.common.db.routers
+# (read_replica / ReadReplicaMixin). Each replica copies the primary settings
+# with its own host (PostgreSQL) or file (SQLite, for local testing).
+DATABASE_REPLICAS = []
+for index, replica in enumerate(env.list('DB_REPLICAS', default=[]), start=1):
+    alias = f'replica_{index}'
+    replica_config = {**DATABASES['default'], 'ATOMIC_REQUESTS': False, 'TEST': {'MIRROR': 'default'}}
+    if USE_SQLITE:
+        replica_config['NAME'] = BASE_DIR / replica
+    else:
+        host, _, port = replica.partition(':')
+        replica_config.update({'HOST': host, 'PORT': port or DATABASES['default']['PORT']})
+    DATABASES[alias] = replica_config
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['phantom_apps.common.db.routers.PrimaryReplicaRouter']
+
+DATABASE_REPLICA_SETTINGS = {
+    'MAX_LAG_SECONDS': env.float('DB_REPLICA_MAX_LAG_SECONDS', default=5.0),
+    'STICKY_SECONDS': env.int('DB_REPLICA_STICKY_SECONDS', default=15),
+    'LAG_CHECK_INTERVAL': env.float('DB_REPLICA_LAG_CHECK_INTERVAL', default=2.0),
+}
 
 # Database Connection Retry Configuration
 DATABASE_CONNECTION_RETRY = {
@@ -194,7 +243,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'phantom_apps.common.server_timing.TimedJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -210,12 +259,17 @@ REST_FRAMEWORK = {
         'rest_framework.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/hour',
-        'user': '1000/hour'
+        'anon': env('THROTTLE_RATE_ANON', default='100/hour'),
+        'user': env('THROTTLE_RATE_USER', default='1000/hour'),
     },
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
 }
 
+if PRODUCTION_MODE:
+    # Views are inspected only when the schema is built (with PRODUCTION_MODE
+    # off); this keeps drf_spectacular.openapi out of the workers' imports
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'rest_framework.schemas.inspectors.ViewInspector'
+
 # JWT Configuration - Updated for latest simplejwt
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -297,34 +351,70 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Let the frontend read request timings
+CORS_EXPOSE_HEADERS = ['server-timing']
+
 # Redis Configuration for Sessions and Cache
 REDIS_URL = env('REDIS_URL', default='redis://127.0.0.1:6379/1')
 
+REDIS_CONNECTION_POOL_KWARGS = {
+    'max_connections': env('REDIS_MAX_CONNECTIONS', default=50),
+    'retry_on_timeout': True,
+    'health_check_interval': 30,
+}
+
+# orjson everywhere; values are only compressed above COMPRESS_MIN_LENGTH bytes,
+# with a codec chosen per alias (lz4, zstd or zlib from phantom_apps.common.cache_codecs).
+# VERSION 2: entries written by the previous JSON+zlib codec are not readable.
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
         'LOCATION': REDIS_URL,
         'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-            'CONNECTION_POOL_KWARGS': {
-                'max_connections': env('REDIS_MAX_CONNECTIONS', default=50),
-                'retry_on_timeout': True,
-                'health_check_interval': 30,
-            },
-            'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
-            'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
+            'CLIENT_CLASS': 'phantom_apps.common.tracing.TracedRedisClient',
+            'CONNECTION_POOL_KWARGS': REDIS_CONNECTION_POOL_KWARGS,
+            'SERIALIZER': 'phantom_apps.common.cache_codecs.ORJSONSerializer',
+            'COMPRESSOR': env(
+                'CACHE_DEFAULT_COMPRESSOR', default='phantom_apps.common.cache_codecs.Lz4ThresholdCompressor'
+            ),
+            'COMPRESS_MIN_LENGTH': env.int('CACHE_COMPRESS_MIN_LENGTH', default=1024),
         },
         'TIMEOUT': 300,
         'KEY_PREFIX': 'phantom_banking',
-        'VERSION': 1,
-    }
+        'VERSION': 2,
+    },
+    # Sessions are small and read on every browser request: never compressed
+    'sessions': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'phantom_apps.common.tracing.TracedRedisClient',
+            'CONNECTION_POOL_KWARGS': REDIS_CONNECTION_POOL_KWARGS,
+            'SERIALIZER': 'phantom_apps.common.cache_codecs.ORJSONSerializer',
+            'COMPRESSOR': 'django_redis.compressors.identity.IdentityCompressor',
+        },
+        'TIMEOUT': 86400,
+        'KEY_PREFIX': 'phantom_banking_sessions',
+        'VERSION': 2,
+    },
+}
+
+# Read-through cache of wallet balance/status (invalidated when postings commit)
+WALLET_BALANCE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': env.int('WALLET_BALANCE_CACHE_TIMEOUT', default=300),  # seconds
 }
 
 # Session Configuration using Redis
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
-SESSION_CACHE_ALIAS = 'default'
+SESSION_CACHE_ALIAS = 'sessions'
 SESSION_COOKIE_AGE = 86400  # 24 hours
-SESSION_SAVE_EVERY_REQUEST = True
+# Sessions are saved when modified, or when used and last extended more than
+# SESSION_REFRESH_INTERVAL seconds ago (see LazySessionMiddleware)
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = env.int('SESSION_REFRESH_INTERVAL', default=3600)  # seconds
+# Bearer-token requests under these prefixes skip session handling entirely
+SESSIONLESS_PATH_PREFIXES = ['/api/']
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
 
@@ -337,6 +427,232 @@ PHANTOM_BANKING_SETTINGS = {
     'MOCK_FNB_BASE_URL': env('MOCK_FNB_BASE_URL', default='http://localhost:8000/api/v1/mock-fnb'),
     'MOCK_FNB_API_KEY': env('MOCK_FNB_API_KEY', default='dev_key'),
     'MOCK_FNB_API_SECRET': env('MOCK_FNB_API_SECRET', default='dev_secret'),
+    'MOCK_MOBILE_MONEY_BASE_URL': env(
+        'MOCK_MOBILE_MONEY_BASE_URL', default='http://localhost:8000/api/v1/mock-mobile-money'
+    ),
+}
+
+# Transaction fee schedules per payment channel.
+# Each tier is (upper bound of the amount inclusive, or None for the last tier,
+# fixed fee, percentage of the amount). Merchant commission_rate is added to
+# the percentage on credits (collections).
+TRANSACTION_FEE_SCHEDULES = {
+    'default': [
+        (None, str(PHANTOM_BANKING_SETTINGS['DEFAULT_TRANSACTION_FEE']), '0.00'),
+    ],
+    'qr_code': [
+        ('100.00', '0.00', '0.00'),
+        ('5000.00', '0.50', '0.25'),
+        (None, '1.00', '0.50'),
+    ],
+    'eft': [
+        (None, '2.50', '0.00'),
+    ],
+    'mobile_money': [
+        ('500.00', '1.00', '1.00'),
+        (None, '2.00', '0.75'),
+    ],
+    'bank_transfer': [
+        (None, '3.00', '0.00'),
+    ],
+    # Transfers between wallets (charged to the source wallet's merchant)
+    'wallet_transfer': [
+        (None, '0.00', '0.00'),
+    ],
+}
+
+# Velocity scoring of postings (phantom_apps.transactions.risk)
+VELOCITY = {
+    'ENABLED': env.bool('VELOCITY_ENABLED', default=True),
+    # Cache alias whose Redis server holds the counters; other backends use per-worker counters
+    'ALIAS': 'default',
+    # Total rule score at which a posting is flagged for review / blocked
+    'REVIEW_SCORE': env.int('VELOCITY_REVIEW_SCORE', default=50),
+    'BLOCK_SCORE': env.int('VELOCITY_BLOCK_SCORE', default=100),
+    # (name, dimension, metric, window seconds, limit, score). Scores when the posting
+    # takes the metric over the limit. Dimensions: wallet, phone, merchant. Metrics:
+    # count (postings), sum (Pula), distinct (counterparties), amount (this posting).
+    'RULES': [
+        ('wallet_burst', 'wallet', 'count', 60, 10, 50),
+        ('wallet_hourly_count', 'wallet', 'count', 3600, 60, 50),
+        ('wallet_hourly_amount', 'wallet', 'sum', 3600, '20000.00', 50),
+        ('wallet_daily_amount', 'wallet', 'sum', 86400, '50000.00', 100),
+        ('wallet_counterparties', 'wallet', 'distinct', 3600, 10, 50),
+        ('phone_wallets', 'phone', 'distinct', 86400, 5, 50),
+        ('merchant_burst', 'merchant', 'count', 60, 3000, 50),
+        ('large_amount', 'wallet', 'amount', 0, '25000.00', 50),
+    ],
+    # Seconds before Redis is tried again after a failure
+    'REDIS_RETRY': env.int('VELOCITY_REDIS_RETRY', default=30),
+    # Series kept by the per-worker fallback
+    'MAX_MEMORY_SERIES': env.int('VELOCITY_MAX_MEMORY_SERIES', default=100000),
+}
+
+# Signed QR payment codes (phantom_apps.transactions.qr)
+QR_CODES = {
+    # Seconds an issued code stays valid, unless the request asks for less (or more, up to MAX_TTL)
+    'DEFAULT_TTL': env.int('QR_DEFAULT_TTL', default=900),
+    'MAX_TTL': env.int('QR_MAX_TTL', default=86400),
+    # Image widths (pixels) clients may ask for; each is a separate cached image
+    'SIZES': (256, 512, 1024),
+    'DEFAULT_SIZE': 512,
+    # Quiet zone, in modules
+    'BORDER': 4,
+    # Rendered PNGs kept by each worker, and the cache alias shared between workers
+    'MEMORY_CACHE_BYTES': env.int('QR_MEMORY_CACHE_BYTES', default=16 * 1024 * 1024),
+    'ALIAS': 'default',
+}
+
+# Outbound HTTP client (FNB, mobile money) - shared keep-alive pools per host
+OUTBOUND_HTTP_CLIENT = {
+    'POOL_MAXSIZE': env.int('OUTBOUND_HTTP_POOL_MAXSIZE', default=10),
+    'NUM_POOLS': env.int('OUTBOUND_HTTP_NUM_POOLS', default=10),
+    'POOL_TIMEOUT': env.float('OUTBOUND_HTTP_POOL_TIMEOUT', default=5.0),  # seconds waiting for a free connection
+    'CONNECT_TIMEOUT': env.float('OUTBOUND_HTTP_CONNECT_TIMEOUT', default=3.0),  # seconds
+    'READ_TIMEOUT': env.float('OUTBOUND_HTTP_READ_TIMEOUT', default=10.0),  # seconds
+    'MAX_RETRIES': env.int('OUTBOUND_HTTP_MAX_RETRIES', default=2),
+    'BACKOFF_FACTOR': 0.2,  # seconds, doubled per attempt
+    'RETRY_BUDGET_RATIO': 0.1,  # at most ~10% extra load from retries
+    'RETRY_BUDGET_MIN_PER_SECOND': 1.0,
+}
+
+# Celery Configuration (background jobs, end-of-day settlement)
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default=REDIS_URL)
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=REDIS_URL)
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_ACKS_LATE = True  # Redeliver tasks from crashed workers
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ROUTES = {
+    'phantom_apps.settlements.tasks.*': {'queue': 'settlements'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'end-of-day-settlement': {
+        'task': 'phantom_apps.settlements.tasks.run_end_of_day_settlement',
+        'schedule': crontab(hour=23, minute=30),
+    },
+    'ledger-balance-snapshots': {
+        'task': 'phantom_apps.ledger.tasks.take_balance_snapshots',
+        'schedule': crontab(minute=5),
+    },
+}
+
+# End-of-day settlement of merchant collections to their FNB accounts
+SETTLEMENT_SETTINGS = {
+    'SHARD_COUNT': env.int('SETTLEMENT_SHARD_COUNT', default=8),
+    'CHUNK_SIZE': env.int('SETTLEMENT_CHUNK_SIZE', default=1000),
+    # 'eft_file' writes a batch EFT file, 'fnb_api' credits each merchant through the FNB client
+    'PAYOUT_MODE': env('SETTLEMENT_PAYOUT_MODE', default='eft_file'),
+    'EFT_OUTPUT_DIR': BASE_DIR / 'media' / 'settlements',
+}
+
+# Append-only journal (phantom_apps.ledger)
+LEDGER_SETTINGS = {
+    # Journal lines per INSERT when writing batches
+    'BATCH_SIZE': env.int('LEDGER_BATCH_SIZE', default=1000),
+    # Entries younger than this are left to the next snapshot round
+    'SNAPSHOT_SETTLE_SECONDS': env.int('LEDGER_SNAPSHOT_SETTLE_SECONDS', default=60),
+    # Account ids each worker keeps (least recently used dropped first)
+    'ACCOUNT_CACHE_SIZE': env.int('LEDGER_ACCOUNT_CACHE_SIZE', default=100000),
+}
+
+# Per-request instrumentation (phantom_apps.common.server_timing)
+SERVER_TIMING = {
+    'ENABLED': env.bool('SERVER_TIMING_ENABLED', default=True),
+    # Send the Server-Timing response header to every client (staff users always get it);
+    # it exposes query counts and timings, so it is off unless DEBUG
+    'HEADER': env.bool('SERVER_TIMING_HEADER', default=DEBUG),
+    # Requests slower than this (ms) are logged, unless their route has its own threshold
+    'SLOW_REQUEST_MS': env.int('SLOW_REQUEST_MS', default=500),
+    # View name (namespace:url_name) -> threshold in ms
+    'ROUTE_THRESHOLDS_MS': {
+        'api_v1:wallets:wallets-balance': 100,
+        'api_v1:wallets:wallets-balances': 200,
+        'api_v1:transactions:transactions-list': 300,
+        'api_v1:transactions:transactions-detail': 100,
+        'api_v1:merchants:merchants-dashboard': 1000,
+    },
+}
+
+# Prometheus metrics at /api/v1/metrics (gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR)
+METRICS = {
+    'ENABLED': env.bool('METRICS_ENABLED', default=True),
+    # Scrapes must send "Authorization: Bearer <token>"; without a token the
+    # endpoint is only served when DEBUG
+    'AUTH_TOKEN': env('METRICS_AUTH_TOKEN', default=''),
+    # Seconds between DB pool gauge samples per worker
+    'POOL_SAMPLE_INTERVAL': env.float('METRICS_POOL_SAMPLE_INTERVAL', default=5.0),
+}
+
+# Worker startup (phantom_apps.common.startup)
+STARTUP = {
+    # Served at /api/schema/ in PRODUCTION_MODE; build it with
+    # python manage.py spectacular --format openapi-json --file <path>
+    'SCHEMA_FILE': env('OPENAPI_SCHEMA_FILE', default=str(BASE_DIR / 'openapi' / 'schema.json')),
+    # Build URL resolvers, serializer fields and translations before gunicorn forks
+    'WARMUP': env.bool('STARTUP_WARMUP', default=True),
+}
+
+# Distributed tracing (phantom_apps.common.tracing), OTLP/JSON spans with W3C traceparent propagation
+TRACING = {
+    'ENABLED': env.bool('TRACING_ENABLED', default=False),
+    'SERVICE_NAME': env('TRACING_SERVICE_NAME', default='phantom-banking'),
+    # Head sampling of new traces; a caller's sampled flag is always followed
+    'SAMPLE_RATE': env.float('TRACING_SAMPLE_RATE', default=0.01),
+    # 'file' (OTLP/JSON lines), 'otlp' (OTLP/HTTP receiver), 'memory' or 'none'
+    'EXPORTER': env('TRACING_EXPORTER', default='file'),
+    'FILE_PATH': env('TRACING_FILE_PATH', default=str(BASE_DIR / 'logs' / 'traces.jsonl')),
+    'OTLP_ENDPOINT': env('TRACING_OTLP_ENDPOINT', default='http://localhost:4318'),
+    'EXPORT_INTERVAL': env.float('TRACING_EXPORT_INTERVAL', default=5.0),  # seconds between batches
+    'BATCH_SIZE': env.int('TRACING_BATCH_SIZE', default=512),
+    # Spans queued per worker before new ones are dropped
+    'MAX_QUEUE': env.int('TRACING_MAX_QUEUE', default=2048),
+}
+
+# Readiness checks (phantom_apps.common.readiness, /api/v1/health/ready/)
+READINESS = {
+    'CHECKS': env.list('READINESS_CHECKS', default=['database', 'redis', 'fnb', 'mobile_money']),
+    # Failing any of these makes the worker not ready; the others are reported only
+    'CRITICAL': env.list('READINESS_CRITICAL', default=['database', 'redis']),
+    'INTERVAL': env.float('READINESS_INTERVAL', default=5.0),  # seconds between probe rounds
+    'TIMEOUT': env.float('READINESS_TIMEOUT', default=2.0),  # seconds, downstream HTTP probes
+    'HISTORY': env.int('READINESS_HISTORY', default=60),  # probe results kept per dependency
+}
+
+# Slow-query log (phantom_apps.common.db.slow_queries)
+SLOW_QUERIES = {
+    'ENABLED': env.bool('SLOW_QUERY_LOG_ENABLED', default=True),
+    # Executions at least this slow (ms) count as slow and may be EXPLAINed
+    'THRESHOLD_MS': env.float('SLOW_QUERY_THRESHOLD_MS', default=100.0),
+    # Share of slow executions whose plan is captured
+    'EXPLAIN_SAMPLE_RATE': env.float('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', default=0.1),
+    # Seconds before the plan of a fingerprint is captured again
+    'EXPLAIN_INTERVAL': env.int('SLOW_QUERY_EXPLAIN_INTERVAL', default=300),
+    # Fingerprints tracked per worker
+    'MAX_FINGERPRINTS': env.int('SLOW_QUERY_MAX_FINGERPRINTS', default=1000),
+}
+
+# Per-action query budgets (QueryBudgetMixin.query_budgets)
+QUERY_BUDGETS = {
+    # 'off', 'log' (sampled, logs and counts overruns) or 'raise' (tests)
+    'MODE': env('QUERY_BUDGET_MODE', default='log'),
+    # Share of requests checked in 'log' mode
+    'SAMPLE_RATE': env.float('QUERY_BUDGET_SAMPLE_RATE', default=0.05),
+}
+
+# On-demand sampling profiler (/api/v1/profile/, admin only)
+PROFILER = {
+    'ENABLED': env.bool('PROFILER_ENABLED', default=True),
+    # Highest sample rate (Hz) and longest session (seconds) a request may ask for;
+    # keep MAX_DURATION under GUNICORN_TIMEOUT for blocking GETs
+    'SAMPLE_RATE': env.float('PROFILER_SAMPLE_RATE', default=100.0),
+    'MAX_DURATION': env.float('PROFILER_MAX_DURATION', default=20.0),
+    # Frames kept per stack, innermost first
+    'MAX_DEPTH': env.int('PROFILER_MAX_DEPTH', default=96),
+    # Seconds background session results stay in the cache
+    'RESULT_TTL': env.int('PROFILER_RESULT_TTL', default=600),
 }
 
 # Logging Configuration - Enhanced for Django 5.2+
@@ -476,7 +792,8 @@ DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
 
 # Performance Settings for Django 5.2+
 if not DEBUG:
-    # Enable template caching
+    # Enable template caching (explicit loaders replace APP_DIRS)
+    TEMPLATES[0]['APP_DIRS'] = False
     TEMPLATES[0]['OPTIONS']['loaders'] = [
         ('django.template.loaders.cached.Loader', [
             'django.template.loaders.filesystem.Loader',
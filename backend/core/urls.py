@@ -1,4 +1,3 @@
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
@@ -8,11 +7,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from phantom_apps.common.startup import OpenAPISchemaView, lazy_include, lazy_view
 
 def health_check(request):
     """Basic health check endpoint"""
@@ -44,8 +39,8 @@ def api_info(request):
     })
 
 urlpatterns = [
-    # Admin
-    path('admin/', admin.site.urls),
+    # Admin (core.admin_urls is imported on first use)
+    lazy_include('admin/', 'core.admin_urls', 'admin'),
     
     # Health checks and info
     path('health/', health_check, name='health_check'),
@@ -59,10 +54,10 @@ urlpatterns = [
     # API endpoints
     path('api/v1/', include('api.v1.urls')),
     
-    # API Documentation - Updated for latest drf-spectacular
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # API Documentation - precomputed schema in PRODUCTION_MODE, docs views loaded on first use
+    path('api/schema/', OpenAPISchemaView.as_view(), name='schema'),
+    path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
 ]
 
 # Development-specific URLs
@@ -76,12 +71,6 @@ if settings.DEBUG:
         urlpatterns = [
             path('__debug__/', include('debug_toolbar.urls')),
         ] + urlpatterns
-
-# Admin customization for Phantom Banking
-admin.site.site_header = "Phantom Banking Admin"
-admin.site.site_title = "Phantom Banking"
-admin.site.index_title = "Welcome to Phantom Banking Administration"
-admin.site.site_url = "/api/docs/"  # Link to API docs from admin
 ''',
 
         "core/wsgi.py": '''"""
@@ -2,15 +2,24 @@
 WSGI config for core project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+In PRODUCTION_MODE the application is warmed up at import, which gunicorn
+does once in the master (preload_app) before forking the workers.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
 import os
+import time
 
-from django.core.wsgi import get_wsgi_application
+_started = time.perf_counter()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from phantom_apps.common import startup  # noqa: E402
+
+application = startup.instrument(application, import_seconds=time.perf_counter() - _started)
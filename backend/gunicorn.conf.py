@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration.
+
+    gunicorn core.wsgi -c gunicorn.conf.py
+
+Prometheus metrics run in multiprocess mode: workers write their samples
+under PROMETHEUS_MULTIPROC_DIR, which is wiped when this file is loaded, and
+the files of a worker that exits are marked dead so its gauges drop out of
+live sums while its counters keep counting.
+
+With PRODUCTION_MODE the app is preloaded: core.wsgi imports and warms it up
+once in the master and the workers inherit it by fork. Each worker logs its
+startup timings with its first request (phantom_apps.common.startup).
+"""
+import multiprocessing
+import os
+import shutil
+import time
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+production_mode = os.environ.get('PRODUCTION_MODE', '').lower() in ('1', 'true', 'yes', 'on')
+preload_app = os.environ.get('GUNICORN_PRELOAD', str(production_mode)).lower() in ('1', 'true', 'yes', 'on')
+
+# Must be set before anything imports prometheus_client
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/phantom_prometheus')
+# Samples of a previous run would otherwise be merged into this one. Done here
+# rather than in on_starting: a preloaded app is imported (and writes its
+# import and warm-up samples) before on_starting runs, but after this file
+shutil.rmtree(prometheus_dir, ignore_errors=True)
+os.makedirs(prometheus_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    # Read by phantom_apps.common.startup when the worker answers its first request
+    os.environ['PHANTOM_WORKER_FORKED_AT'] = repr(time.time())
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
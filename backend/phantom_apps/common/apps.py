@@ -4,3 +4,16 @@ class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'phantom_apps.common'
     verbose_name = 'Common Utilities'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from django.conf import settings
+        from . import server_timing, tracing
+        from .db import slow_queries
+
+        if settings.SERVER_TIMING['ENABLED']:
+            server_timing.install()
+        if settings.SLOW_QUERIES['ENABLED']:
+            slow_queries.install()
+        if settings.TRACING['ENABLED']:
+            tracing.install()
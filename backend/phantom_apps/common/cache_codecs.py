@@ -0,0 +1,125 @@
+"""
+Serializers and compressors for django_redis cache aliases.
+
+ORJSONSerializer is a drop-in, faster replacement for django_redis'
+JSONSerializer (same JSON on the wire, Decimal/timedelta as strings).
+
+The threshold compressors only compress values longer than
+``COMPRESS_MIN_LENGTH`` bytes (cache OPTIONS) and tag compressed values with a
+one-byte codec marker, so small values such as throttle histories and
+sessions skip the codec entirely on both write and read. JSON never starts
+with a control byte, so untagged values are always raw.
+
+Example alias configuration::
+
+    'OPTIONS': {
+        'SERIALIZER': 'phantom_apps.common.cache_codecs.ORJSONSerializer',
+        'COMPRESSOR': 'phantom_apps.common.cache_codecs.Lz4ThresholdCompressor',
+        'COMPRESS_MIN_LENGTH': 1024,
+    }
+"""
+import datetime
+import decimal
+import zlib
+
+import orjson
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.base import BaseSerializer
+
+def _orjson_default(value):
+    """Types orjson does not handle natively, encoded like DjangoJSONEncoder"""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.timedelta):
+        return duration_iso_string(value)
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class ORJSONSerializer(BaseSerializer):
+    """JSON serializer backed by orjson"""
+
+    options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value):
+        return orjson.dumps(value, default=_orjson_default, option=self.options)
+
+    def loads(self, value):
+        return orjson.loads(value)
+
+class ThresholdCompressor(BaseCompressor):
+    """Compress only values above a size threshold, tagging them with a codec marker"""
+
+    marker = None
+    default_min_length = 1024
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.min_length = int(options.get('COMPRESS_MIN_LENGTH', self.default_min_length))
+        self.level = options.get('COMPRESS_LEVEL')
+
+    def compress(self, value):
+        if len(value) <= self.min_length:
+            return value
+        compressed = self.marker + self._compress(value)
+        # Incompressible payloads (e.g. already-compressed images) are stored raw
+        return compressed if len(compressed) < len(value) else value
+
+    def decompress(self, value):
+        codec = CODECS.get(value[:1])
+        if codec is None:
+            # Untagged values were stored uncompressed
+            raise CompressorError("Value is not compressed")
+        try:
+            return codec(value[1:])
+        except Exception as e:
+            raise CompressorError from e
+
+    def _compress(self, value):
+        raise NotImplementedError
+
+class Lz4ThresholdCompressor(ThresholdCompressor):
+    """LZ4 block compression: very cheap, moderate ratio"""
+
+    marker = b'\x01'
+
+    def _compress(self, value):
+        import lz4.block
+        return lz4.block.compress(value, mode='fast', acceleration=int(self.level or 1))
+
+class ZstdThresholdCompressor(ThresholdCompressor):
+    """Zstandard: better ratio than LZ4 at a little more CPU"""
+
+    marker = b'\x02'
+
+    def _compress(self, value):
+        import pyzstd
+        return pyzstd.compress(value, int(self.level or 3))
+
+class ZlibThresholdCompressor(ThresholdCompressor):
+    """zlib for aliases that must stay dependency-free"""
+
+    marker = b'\x03'
+
+    def _compress(self, value):
+        return zlib.compress(value, int(self.level or 6))
+
+def _lz4_decompress(value):
+    import lz4.block
+    return lz4.block.decompress(value)
+
+def _zstd_decompress(value):
+    import pyzstd
+    return pyzstd.decompress(value)
+
+# Any alias can read values written with any codec (e.g. after a config change)
+CODECS = {
+    Lz4ThresholdCompressor.marker: _lz4_decompress,
+    ZstdThresholdCompressor.marker: _zstd_decompress,
+    ZlibThresholdCompressor.marker: zlib.decompress,
+}
@@ -0,0 +1,84 @@
+"""
+System checks for project conventions.
+"""
+import os
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.views import APIView
+
+from phantom_apps.common.db.transactions import TransactionPolicyMixin
+
+UNSAFE_METHODS = ('post', 'put', 'patch', 'delete')
+
+def _url_callbacks(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _url_callbacks(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+def _writing_handlers(callback):
+    """(method, handler name) pairs of a DRF view callback that may write"""
+    actions = getattr(callback, 'actions', None)
+    if actions:
+        return [(method, name) for method, name in actions.items() if method.upper() not in SAFE_METHODS]
+    return [(method, method) for method in UNSAFE_METHODS if hasattr(callback.cls, method)]
+
+@register(Tags.urls)
+def check_view_transaction_policies(app_configs, **kwargs):
+    """Writing API views must declare a transaction policy"""
+    warnings = []
+    for alias, config in settings.DATABASES.items():
+        if config.get('ATOMIC_REQUESTS'):
+            warnings.append(Warning(
+                f"ATOMIC_REQUESTS is enabled for database '{alias}'",
+                hint="Views declare their own transaction policy (phantom_apps.common.db.transactions).",
+                id='phantom.W001',
+            ))
+
+    seen = set()
+    for callback in _url_callbacks(get_resolver().url_patterns):
+        cls = getattr(callback, 'cls', None)
+        if cls is None or not issubclass(cls, APIView) or not cls.__module__.startswith('phantom_apps.'):
+            continue
+        for method, name in _writing_handlers(callback):
+            if (cls, name) in seen:
+                continue
+            seen.add((cls, name))
+            if getattr(getattr(cls, name, None), 'transaction_policy', None):
+                continue
+            if issubclass(cls, TransactionPolicyMixin) and name in cls.transaction_policies:
+                continue
+            warnings.append(Warning(
+                f"{cls.__module__}.{cls.__name__}.{name} handles {method.upper()} without a transaction policy",
+                hint="Add it to transaction_policies (TransactionPolicyMixin) or use @transaction_policy.",
+                obj=cls,
+                id='phantom.W002',
+            ))
+    return warnings
+
+@register(Tags.urls)
+def check_precomputed_schema(app_configs, **kwargs):
+    """PRODUCTION_MODE serves the OpenAPI schema from a file built ahead of time"""
+    path = settings.STARTUP['SCHEMA_FILE']
+    if not settings.PRODUCTION_MODE or os.path.isfile(path):
+        return []
+    return [Warning(
+        f"PRODUCTION_MODE is on but the OpenAPI schema file {path} does not exist",
+        hint="Build it with: python manage.py spectacular --format openapi-json --file <OPENAPI_SCHEMA_FILE>",
+        id='phantom.W003',
+    )]
+
+@register(Tags.security)
+def check_metrics_token(app_configs, **kwargs):
+    """Outside DEBUG the metrics endpoint only answers scrapes that carry METRICS['AUTH_TOKEN']"""
+    if not settings.METRICS['ENABLED'] or settings.METRICS['AUTH_TOKEN'] or settings.DEBUG:
+        return []
+    return [Warning(
+        "METRICS_AUTH_TOKEN is not set: /api/v1/metrics refuses every scrape",
+        hint="Set METRICS_AUTH_TOKEN and send it as \"Authorization: Bearer <token>\" from Prometheus.",
+        id='phantom.W004',
+    )]
@@ -0,0 +1,23 @@
+"""
+PostgreSQL backend that retries transient connect failures.
+
+Use as ENGINE 'phantom_apps.common.db.backends.postgresql'. Works with and
+without OPTIONS['pool']; with a pool, checkout timeouts are not retried.
+"""
+from django.db.backends.postgresql import base
+
+from phantom_apps.common.db.pool import connect_with_retry
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        fatal_errors = ()
+        if self.pool:
+            from psycopg_pool import PoolTimeout
+            fatal_errors = (PoolTimeout,)
+        parent = super()
+        return connect_with_retry(
+            lambda: parent.get_new_connection(conn_params),
+            transient_errors=(self.Database.OperationalError,),
+            fatal_errors=fatal_errors,
+        )
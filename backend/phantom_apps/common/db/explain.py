@@ -0,0 +1,72 @@
+"""
+EXPLAIN helpers for query-plan regression tests.
+
+``explain(queryset)`` returns a QueryPlan with the planner's total cost
+(PostgreSQL only), the tables read with a full sequential scan, the indexes
+used and the number of sorts that could not use an index.
+"""
+import json
+import re
+
+from django.db import connections
+
+SQLITE_STEP = re.compile(r'\b(SCAN|SEARCH) (\w+)(?: AS \w+)?(?: USING (?:COVERING |INTEGER PRIMARY KEY)?(?:INDEX (\w+))?)?')
+
+class QueryPlan:
+    """Normalised EXPLAIN output"""
+
+    def __init__(self, vendor, total_cost=None, seq_scans=None, indexes=None, sorts=0, raw=''):
+        self.vendor = vendor
+        self.total_cost = total_cost
+        self.seq_scans = seq_scans or []
+        self.indexes = indexes or []
+        self.sorts = sorts
+        self.raw = raw
+
+    def seq_scans_of(self, tables):
+        return [table for table in self.seq_scans if table in tables]
+
+    def as_dict(self):
+        return {
+            'total_cost': self.total_cost,
+            'seq_scans': sorted(set(self.seq_scans)),
+            'indexes': sorted(set(self.indexes)),
+            'sorts': self.sorts,
+        }
+
+def _walk_postgres(node, plan):
+    node_type = node.get('Node Type')
+    if node_type == 'Seq Scan':
+        plan.seq_scans.append(node['Relation Name'])
+    elif node.get('Index Name'):
+        plan.indexes.append(node['Index Name'])
+    if node_type in ('Sort', 'Incremental Sort'):
+        plan.sorts += 1
+    for child in node.get('Plans', []):
+        _walk_postgres(child, plan)
+
+def _parse_sqlite(raw, plan):
+    for line in raw.splitlines():
+        match = SQLITE_STEP.search(line)
+        if match:
+            step, table, index = match.groups()
+            if index:
+                plan.indexes.append(index)
+            elif step == 'SCAN' and 'PRIMARY KEY' not in line:
+                plan.seq_scans.append(table)
+        if 'USE TEMP B-TREE' in line:
+            plan.sorts += 1
+
+def explain(queryset):
+    """EXPLAIN a queryset on the database it would run on"""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        raw = queryset.explain(format='json')
+        root = json.loads(raw)[0]['Plan']
+        plan = QueryPlan(vendor, total_cost=root['Total Cost'], raw=raw)
+        _walk_postgres(root, plan)
+    else:
+        raw = queryset.explain()
+        plan = QueryPlan(vendor, raw=raw)
+        _parse_sqlite(raw, plan)
+    return plan
@@ -0,0 +1,95 @@
+"""
+Connection retry policy and pool metrics.
+
+``connect_with_retry`` applies settings.DATABASE_CONNECTION_RETRY to transient
+connect failures. ``pool_metrics`` reports psycopg_pool utilisation and
+checkout wait times for an alias (see DatabaseHealthView).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from phantom_apps.common import metrics
+
+logger = logging.getLogger('phantom_apps')
+
+class ConnectStats:
+    """Per-process connect attempt counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.retries = 0
+        self.failures = 0
+
+    def record(self, retries, failed=False):
+        with self._lock:
+            self.connects += 1
+            self.retries += retries
+            self.failures += int(failed)
+        metrics.count_connect(retries, failed)
+
+    def as_dict(self):
+        return {'connects': self.connects, 'retries': self.retries, 'failures': self.failures}
+
+connect_stats = ConnectStats()
+
+def connect_with_retry(connect, transient_errors, fatal_errors=(), retry_config=None, sleep=time.sleep):
+    """
+    Call ``connect()``, retrying ``transient_errors`` with exponential backoff.
+
+    ``fatal_errors`` (checked first) are re-raised immediately, e.g. a pool
+    checkout timeout, where retrying would only add load.
+    """
+    config = retry_config or settings.DATABASE_CONNECTION_RETRY
+    max_retries = config['MAX_RETRIES']
+    delay = config['RETRY_DELAY']
+
+    for attempt in range(max_retries + 1):
+        try:
+            connection = connect()
+        except fatal_errors:
+            connect_stats.record(attempt, failed=True)
+            raise
+        except transient_errors as e:
+            if attempt == max_retries:
+                connect_stats.record(attempt, failed=True)
+                logger.error(f"Database connect failed after {attempt + 1} attempts: {e}")
+                raise
+            logger.warning(f"Database connect failed ({e}), retrying in {delay:.1f}s")
+            sleep(delay)
+            delay *= config['BACKOFF_FACTOR']
+        else:
+            connect_stats.record(attempt)
+            return connection
+
+def pool_metrics(alias='default'):
+    """Utilisation and wait-time metrics of an alias' connection pool"""
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return {'enabled': False, 'connect': connect_stats.as_dict()}
+
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    available = stats.get('pool_available', 0)
+    queued = stats.get('requests_queued', 0)
+    return {
+        'enabled': True,
+        'min_size': stats.get('pool_min', pool.min_size),
+        'max_size': stats.get('pool_max', pool.max_size),
+        'size': size,
+        'in_use': size - available,
+        'available': available,
+        'utilisation': round((size - available) / pool.max_size, 3) if pool.max_size else 0.0,
+        'requests_waiting': stats.get('requests_waiting', 0),
+        'requests': stats.get('requests_num', 0),
+        'requests_queued': queued,
+        'requests_errors': stats.get('requests_errors', 0),
+        'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / queued, 2) if queued else 0.0,
+        'connections_errors': stats.get('connections_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'connect': connect_stats.as_dict(),
+    }
@@ -0,0 +1,143 @@
+"""
+Per-view query budgets.
+
+Viewsets declare the most queries each action may run, counted from the end
+of ``initial()`` (authentication, permissions, throttling) through the
+handler and its serialization, on every database alias. Transaction control
+statements (BEGIN, SAVEPOINT, ...) do not count.
+
+    class CustomerViewSet(QueryBudgetMixin, ...):
+        query_budgets = {'list': 3, 'retrieve': 2}
+
+QUERY_BUDGETS['MODE'] decides what happens to a request over budget:
+
+- ``off``   - budgets are not checked
+- ``log``   - a sample of requests (SAMPLE_RATE) is checked; overruns log a
+              JSON line with the most frequent SQL fingerprints and count in
+              the phantom_query_budget_exceeded_total metric
+- ``raise`` - every request is checked and overruns raise
+              QueryBudgetExceeded (tests)
+
+``query_budget(n)`` applies the same check to any block of code.
+"""
+import logging
+import random
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+import orjson
+from django.conf import settings
+from django.db import connections
+
+from phantom_apps.common import metrics
+
+logger = logging.getLogger('phantom_apps')
+
+OFF = 'off'
+LOG = 'log'
+RAISE = 'raise'
+MODES = (OFF, LOG, RAISE)
+
+TOP_FINGERPRINTS = 5
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s|\$\d+')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES \(([?, ]+)\)(?:, \(\1\))+', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+# Only some backends send these through execute()
+_TRANSACTION_CONTROL = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+class QueryBudgetExceeded(AssertionError):
+    """A view or block ran more queries than its budget"""
+
+def fingerprint(sql):
+    """SQL with literals, placeholders and value lists collapsed, for grouping"""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _VALUES_LIST.sub(r'VALUES (\1), ...', sql)
+
+class QueryRecorder:
+    """Execute wrapper keeping the SQL of every query it sees"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+            self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def top_fingerprints(self, limit=TOP_FINGERPRINTS):
+        counts = Counter(fingerprint(sql) for sql in self.statements)
+        return [{'sql': sql, 'count': count} for sql, count in counts.most_common(limit)]
+
+def report_overrun(name, budget, recorder, mode):
+    """Log or raise for a block that ran ``recorder.count`` queries against ``budget``"""
+    details = {
+        'event': 'query_budget_exceeded',
+        'view': name,
+        'budget': budget,
+        'queries': recorder.count,
+        'fingerprints': recorder.top_fingerprints(),
+    }
+    if mode == RAISE:
+        top = '\n'.join(f"  {item['count']}x {item['sql'][:200]}" for item in details['fingerprints'])
+        raise QueryBudgetExceeded(f"{name} ran {recorder.count} queries, budget {budget}:\n{top}")
+    metrics.count_query_budget_exceeded(name)
+    logger.warning(f"Query budget exceeded {orjson.dumps(details).decode()}")
+
+@contextmanager
+def query_budget(budget, name='block', mode=RAISE):
+    """Check that a block runs at most ``budget`` queries, on any database"""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+    if recorder.count > budget:
+        report_overrun(name, budget, recorder, mode)
+
+def should_check(mode, sample_rate):
+    if mode == RAISE:
+        return True
+    return mode == LOG and random.random() < sample_rate
+
+class QueryBudgetMixin:
+    """Check per-action query budgets of an APIView or ViewSet"""
+
+    query_budgets = {}
+
+    def get_query_budget(self, request):
+        """Declared budget of the current action, or None"""
+        return self.query_budgets.get(getattr(self, 'action', None) or request.method.lower())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        budget = self.get_query_budget(request)
+        config = settings.QUERY_BUDGETS
+        if budget is None or not should_check(config['MODE'], config['SAMPLE_RATE']):
+            return
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if handler is None:
+            return
+        view_name = f"{type(self).__name__}.{getattr(self, 'action', None) or method}"
+
+        @wraps(handler)
+        def handler_with_budget(*args, **kwargs):
+            with query_budget(budget, view_name, config['MODE']):
+                return handler(*args, **kwargs)
+
+        # Same per-instance handler binding DRF uses to map viewset actions
+        setattr(self, method, handler_with_budget)
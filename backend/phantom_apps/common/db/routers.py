@@ -0,0 +1,179 @@
+"""
+Primary/replica routing for read-heavy endpoints.
+
+Reads go to the primary unless a view opts in with ``@read_replica`` (function
+views / handler methods) or ``ReadReplicaMixin`` (viewsets). Even then the
+primary is used when:
+
+- the same request already wrote to the primary,
+- the user wrote within the last DATABASE_REPLICA_SETTINGS['STICKY_SECONDS']
+  (read-your-writes; marked by ReplicaStickinessMiddleware) or the cache
+  holding that marker is unreachable, or
+- no replica is within DATABASE_REPLICA_SETTINGS['MAX_LAG_SECONDS'].
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+logger = logging.getLogger('phantom_apps')
+
+PRIMARY = 'default'
+
+_read_alias = contextvars.ContextVar('phantom_db_read_alias', default=None)
+# None outside requests; False/True inside (see begin_request)
+_wrote_primary = contextvars.ContextVar('phantom_db_wrote_primary', default=None)
+
+def probe_replica_lag(alias):
+    """Replication lag of a replica in seconds (0 for non-PostgreSQL or caught-up replicas)"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() "
+            "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )
+        lag = cursor.fetchone()[0]
+    return float(lag or 0.0)
+
+class ReplicaLagMonitor:
+    """Per-process cache of replica lag so routing does not query on every request"""
+
+    def __init__(self, probe=probe_replica_lag):
+        self.probe = probe
+        self._checked = {}
+
+    def lag(self, alias):
+        interval = settings.DATABASE_REPLICA_SETTINGS['LAG_CHECK_INTERVAL']
+        now = time.monotonic()
+        checked = self._checked.get(alias)
+        if checked is not None and now - checked[0] < interval:
+            return checked[1]
+        try:
+            lag = self.probe(alias)
+        except Exception as e:
+            logger.warning(f"Replica {alias} lag check failed: {e}")
+            lag = float('inf')
+        self._checked[alias] = (now, lag)
+        return lag
+
+    def reset(self):
+        self._checked.clear()
+
+replica_lag_monitor = ReplicaLagMonitor()
+
+def healthy_replicas():
+    max_lag = settings.DATABASE_REPLICA_SETTINGS['MAX_LAG_SECONDS']
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if replica_lag_monitor.lag(alias) <= max_lag
+    ]
+
+def sticky_key(user_id):
+    return f"db:sticky:{user_id}"
+
+def mark_sticky(user_id):
+    """Pin a user's reads to the primary for STICKY_SECONDS after a write; never raises"""
+    try:
+        caches['default'].set(sticky_key(user_id), 1, settings.DATABASE_REPLICA_SETTINGS['STICKY_SECONDS'])
+    except Exception as e:
+        # The write has committed: a failed marker must not turn it into an error
+        logger.warning(f"Could not mark user {user_id} sticky: {e}")
+
+def is_sticky(user_id):
+    """Whether a user wrote recently; True when the cache cannot tell (read from the primary)"""
+    try:
+        return caches['default'].get(sticky_key(user_id)) is not None
+    except Exception as e:
+        logger.warning(f"Could not check stickiness of user {user_id}, reading from primary: {e}")
+        return True
+
+def choose_read_alias(user=None):
+    """Replica to read from for this user, or None for the primary"""
+    if not settings.DATABASE_REPLICAS or _wrote_primary.get():
+        return None
+    if user is not None and user.is_authenticated and is_sticky(user.pk):
+        return None
+    replicas = healthy_replicas()
+    if not replicas:
+        logger.warning("No replica within lag budget, reading from primary")
+        return None
+    return random.choice(replicas)
+
+@contextmanager
+def read_from_replica(user=None):
+    """Route reads inside the block to a replica when it is safe to do so"""
+    token = _read_alias.set(choose_read_alias(user))
+    try:
+        yield _read_alias.get()
+    finally:
+        _read_alias.reset(token)
+
+def _find_request(args):
+    for arg in args[:2]:
+        if hasattr(arg, 'method') and hasattr(arg, 'META'):
+            return arg
+    return None
+
+def read_replica(view_func):
+    """Mark a read-only view (or view method) as safe to serve from a replica"""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        request = _find_request(args)
+        with read_from_replica(getattr(request, 'user', None)):
+            return view_func(*args, **kwargs)
+    return wrapper
+
+class ReadReplicaMixin:
+    """Serve the listed viewset actions from a replica (after authentication)"""
+
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_token = _read_alias.set(choose_read_alias(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class PrimaryReplicaRouter:
+    """Database router honouring read_replica / ReadReplicaMixin"""
+
+    def db_for_read(self, model, **hints):
+        if _wrote_primary.get():
+            return PRIMARY
+        return _read_alias.get() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        if _wrote_primary.get() is False:
+            _wrote_primary.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+def begin_request():
+    """Reset per-request routing state; returns a token for end_request"""
+    return _wrote_primary.set(False)
+
+def end_request(token):
+    wrote = bool(_wrote_primary.get())
+    _wrote_primary.reset(token)
+    return wrote
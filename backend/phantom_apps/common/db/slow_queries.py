@@ -0,0 +1,205 @@
+"""
+Slow-query log.
+
+An execute wrapper installed on every connection as it is created keeps
+latency stats per SQL fingerprint (count, total, max and a latency
+histogram) in this worker's memory. Executions slower than
+SLOW_QUERIES['THRESHOLD_MS'] are counted as slow; a sample of them
+(EXPLAIN_SAMPLE_RATE, at most once per fingerprint every EXPLAIN_INTERVAL
+seconds) has its plan captured with ``EXPLAIN`` - never ANALYZE, so the
+statement is not run a second time - and logged as a JSON line.
+
+The admin-only /api/v1/slow-queries/ endpoint lists the worst fingerprints
+of the worker that serves it.
+"""
+import bisect
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+
+import orjson
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+
+from phantom_apps.common.db.query_budget import fingerprint
+
+logger = logging.getLogger('phantom_apps')
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+ORDERINGS = ('total', 'max', 'mean', 'slow', 'count')
+
+# Django issues the same SQL text with different parameters, so most lookups hit
+cached_fingerprint = lru_cache(maxsize=4096)(fingerprint)
+
+class FingerprintStats:
+    """Latency stats of one SQL fingerprint"""
+
+    __slots__ = ('fingerprint', 'count', 'total', 'max', 'slow', 'buckets', 'sample', 'plan', 'explained_at')
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.sample = None
+        self.plan = None
+        self.explained_at = 0.0
+
+    def record(self, elapsed_ms, slow):
+        self.count += 1
+        self.total += elapsed_ms
+        if elapsed_ms > self.max:
+            self.max = elapsed_ms
+        if slow:
+            self.slow += 1
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given percentile"""
+        target = self.count * fraction
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target and count:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max
+        return self.max
+
+    def sort_key(self, ordering):
+        return {
+            'total': self.total,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else 0.0,
+            'slow': self.slow,
+            'count': self.count,
+        }[ordering]
+
+    def as_dict(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'count': self.count,
+            'slow_count': self.slow,
+            'total_ms': round(self.total, 2),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 2),
+            'p95_ms': self.percentile(0.95),
+            'sample_sql': self.sample,
+            'plan': self.plan,
+            'explained_at': self.explained_at or None,
+        }
+
+class SlowQueryLog:
+    """Per-process fingerprint stats and the execute wrapper feeding them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.configure()
+
+    def configure(self):
+        config = settings.SLOW_QUERIES
+        self.threshold_ms = config['THRESHOLD_MS']
+        self.explain_sample_rate = config['EXPLAIN_SAMPLE_RATE']
+        self.explain_interval = config['EXPLAIN_INTERVAL']
+        self.max_fingerprints = config['MAX_FINGERPRINTS']
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        # Failed statements propagate without being recorded
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        slow = elapsed_ms >= self.threshold_ms
+        stats = self.record(sql, elapsed_ms, slow)
+        if slow and stats is not None and not many and self.should_explain(stats):
+            self.explain(stats, sql, params, context['connection'], elapsed_ms)
+        return result
+
+    def record(self, sql, elapsed_ms, slow):
+        key = cached_fingerprint(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    if not slow:
+                        return None
+                    # Make room for a slow newcomer by dropping the cheapest fingerprint
+                    del self._stats[min(self._stats.values(), key=lambda s: s.total).fingerprint]
+                stats = self._stats[key] = FingerprintStats(key)
+            stats.record(elapsed_ms, slow)
+            if slow:
+                # SQL text only: parameters (customer data) are never kept
+                stats.sample = sql
+        return stats
+
+    def should_explain(self, stats):
+        if not stats.fingerprint.upper().startswith(EXPLAINABLE):
+            return False
+        now = time.time()
+        if stats.plan is not None and now - stats.explained_at < self.explain_interval:
+            return False
+        return random.random() < self.explain_sample_rate
+
+    def explain(self, stats, sql, params, connection, elapsed_ms):
+        postgres = connection.vendor == 'postgresql'
+        prefix = 'EXPLAIN (ANALYZE off) ' if postgres else 'EXPLAIN QUERY PLAN '
+        # A failed statement aborts an open PostgreSQL transaction; keep it out of the caller's
+        savepoint = postgres and connection.in_atomic_block
+        # A backend cursor: not wrapped, so this does not re-enter the execute wrappers
+        cursor = connection.create_cursor()
+        try:
+            if savepoint:
+                cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                cursor.execute(prefix + sql, params)
+                plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+            except Exception as e:
+                if savepoint:
+                    cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                logger.warning(f"Could not EXPLAIN slow query: {e}")
+                return
+            if savepoint:
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        finally:
+            cursor.close()
+        stats.plan = plan
+        stats.explained_at = time.time()
+        line = {
+            'event': 'slow_query',
+            'alias': connection.alias,
+            'duration_ms': round(elapsed_ms, 2),
+            'fingerprint': stats.fingerprint,
+            'plan': plan,
+        }
+        logger.warning(f"Slow query {orjson.dumps(line).decode()}")
+
+    def top(self, limit=20, ordering='total'):
+        """The ``limit`` worst fingerprints by ``ordering`` (one of ORDERINGS)"""
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=lambda s: s.sort_key(ordering), reverse=True)[:limit]
+            return [stats.as_dict() for stats in ranked]
+
+slow_query_log = SlowQueryLog()
+
+def _install_wrapper(sender, connection, **kwargs):
+    # Inserted first: execute_wrapper() blocks pop the last wrapper when they exit
+    if slow_query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_log)
+
+def _settings_changed(setting, **kwargs):
+    if setting == 'SLOW_QUERIES':
+        slow_query_log.configure()
+
+def install():
+    """Install the execute wrapper (once, from CommonConfig.ready)"""
+    connection_created.connect(_install_wrapper, dispatch_uid='slow_query_log_wrapper')
+    setting_changed.connect(_settings_changed, dispatch_uid='slow_query_log_settings')
@@ -0,0 +1,131 @@
+"""
+Per-view transaction policies (replacing ATOMIC_REQUESTS).
+
+Each view action runs under one of:
+
+- ``read_only``  - no transaction; any INSERT/UPDATE/DELETE raises
+                   ReadOnlyViolation. Default for GET/HEAD/OPTIONS.
+- ``autocommit`` - no request transaction; the view (or the services it
+                   calls, e.g. post_transaction) opens its own tight
+                   ``transaction.atomic()`` blocks where needed.
+- ``atomic``     - the handler runs in one transaction, for views with
+                   several dependent writes.
+
+Declare policies with ``TransactionPolicyMixin.transaction_policies`` (by
+action or method name) or the ``@transaction_policy(...)`` decorator.
+Writing views without a policy run in autocommit mode and log a warning for
+every write outside an atomic block; ``manage.py check`` flags them too.
+"""
+import logging
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger('phantom_apps')
+
+READ_ONLY = 'read_only'
+AUTOCOMMIT = 'autocommit'
+ATOMIC = 'atomic'
+POLICIES = (READ_ONLY, AUTOCOMMIT, ATOMIC)
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+class ReadOnlyViolation(Exception):
+    """A read-only view attempted to write"""
+
+def is_write(sql):
+    return sql.lstrip()[:6].upper() in WRITE_STATEMENTS
+
+class ReadOnlyGuard:
+    """Execute wrapper rejecting writes"""
+
+    def __init__(self, view_name):
+        self.view_name = view_name
+
+    def __call__(self, execute, sql, params, many, context):
+        if is_write(sql):
+            raise ReadOnlyViolation(f"{self.view_name} is read-only but executed: {sql[:80]}")
+        return execute(sql, params, many, context)
+
+class UnprotectedWriteWarning:
+    """Execute wrapper logging writes made outside an atomic block"""
+
+    def __init__(self, view_name):
+        self.view_name = view_name
+
+    def __call__(self, execute, sql, params, many, context):
+        if is_write(sql) and not context['connection'].in_atomic_block:
+            logger.warning(
+                f"{self.view_name} wrote outside a transaction without a declared policy: {sql[:80]}"
+            )
+        return execute(sql, params, many, context)
+
+@contextmanager
+def apply_transaction_policy(policy, view_name='view', declared=True, using=DEFAULT_DB_ALIAS):
+    """Run a block under a transaction policy"""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown transaction policy: {policy}")
+
+    if policy == ATOMIC:
+        with transaction.atomic(using=using):
+            yield
+    elif policy == READ_ONLY:
+        with connections[using].execute_wrapper(ReadOnlyGuard(view_name)):
+            yield
+    elif declared:
+        yield
+    else:
+        with connections[using].execute_wrapper(UnprotectedWriteWarning(view_name)):
+            yield
+
+def transaction_policy(policy):
+    """Declare the transaction policy of a function view or view handler"""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown transaction policy: {policy}")
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            with apply_transaction_policy(policy, view_func.__qualname__):
+                return view_func(*args, **kwargs)
+        wrapper.transaction_policy = policy
+        return wrapper
+    return decorator
+
+class TransactionPolicyMixin:
+    """Apply per-action transaction policies to an APIView or ViewSet"""
+
+    transaction_policies = {}
+
+    def get_transaction_policy(self, request):
+        """Declared policy of the current action, or None"""
+        name = getattr(self, 'action', None) or request.method.lower()
+        policy = self.transaction_policies.get(name)
+        if policy is None:
+            handler = getattr(self, name, None)
+            policy = getattr(handler, 'transaction_policy', None)
+        return policy
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if handler is None or getattr(handler, 'transaction_policy', None):
+            # Decorated handlers apply their own policy
+            return
+
+        policy = self.get_transaction_policy(request)
+        declared = policy is not None
+        if not declared:
+            policy = READ_ONLY if request.method in SAFE_METHODS else AUTOCOMMIT
+        view_name = f"{type(self).__name__}.{getattr(self, 'action', None) or method}"
+
+        @wraps(handler)
+        def handler_with_policy(*args, **kwargs):
+            with apply_transaction_policy(policy, view_name, declared):
+                return handler(*args, **kwargs)
+
+        # Same per-instance handler binding DRF uses to map viewset actions
+        setattr(self, method, handler_with_policy)
@@ -38,6 +38,20 @@ class TransactionException(PhantomBankingException):
     """Exception for transaction-related operations"""
     pass
 
+class RiskBlockedException(TransactionException):
+    """Posting blocked by velocity scoring"""
+    
+    def __init__(self, decision):
+        super().__init__("Transaction blocked by risk checks")
+        self.decision = decision
+
 class PaymentChannelException(PhantomBankingException):
     """Exception for payment channel operations"""
     pass
+
+class ExternalServiceException(PhantomBankingException):
+    """Exception for calls to external systems such as FNB or mobile money"""
+    
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
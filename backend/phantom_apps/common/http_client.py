@@ -0,0 +1,340 @@
+"""
+Shared outbound HTTP client for bank and mobile money integrations.
+
+One client keeps a keep-alive connection pool per host, applies connect/read
+timeouts, retries transient failures within a retry budget and coalesces
+identical in-flight GET requests (e.g. concurrent balance lookups).
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import urllib3
+from django.conf import settings
+
+from . import metrics, tracing
+from .exceptions import ExternalServiceException
+
+logger = logging.getLogger('phantom_apps')
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRYABLE_STATUSES = frozenset([502, 503, 504])
+
+class ClientResponse:
+    """Immutable response shared between coalesced callers"""
+
+    __slots__ = ('status', 'headers', 'data', 'elapsed_ms')
+
+    def __init__(self, status, headers, data, elapsed_ms):
+        self.status = status
+        self.headers = headers
+        self.data = data
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        if not self.data:
+            return None
+        return json.loads(self.data)
+
+class RetryBudget:
+    """
+    Token bucket that caps retries to a fraction of recent traffic.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one, so
+    a failing host cannot be hammered with ``max_retries`` times the load.
+    ``min_per_second`` tokens are always available for low-traffic periods.
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=1.0, max_tokens=10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.max_tokens, self._tokens + elapsed * self.min_per_second)
+
+    def deposit(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+class _InFlightRequest:
+    """A GET request other callers can wait on instead of sending their own"""
+
+    __slots__ = ('event', 'response', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.error = None
+        self.waiters = 0
+
+class HostStats:
+    """Counters for a single upstream host"""
+
+    __slots__ = (
+        'requests', 'failures', 'retries', 'retries_denied',
+        'coalesced', 'total_latency_ms', 'max_latency_ms',
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.coalesced = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+class PooledHTTPClient:
+    """Thread-safe HTTP client with per-host keep-alive pools"""
+
+    def __init__(self, base_url='', headers=None, pool_maxsize=None, connect_timeout=None,
+                 read_timeout=None, max_retries=None, backoff_factor=None,
+                 retry_budget=None, coalesce_gets=True):
+        config = settings.OUTBOUND_HTTP_CLIENT
+        self.base_url = base_url.rstrip('/')
+        self.headers = dict(headers or {})
+        self.max_retries = config['MAX_RETRIES'] if max_retries is None else max_retries
+        self.backoff_factor = config['BACKOFF_FACTOR'] if backoff_factor is None else backoff_factor
+        self.timeout = urllib3.Timeout(
+            connect=config['CONNECT_TIMEOUT'] if connect_timeout is None else connect_timeout,
+            read=config['READ_TIMEOUT'] if read_timeout is None else read_timeout,
+        )
+        self.retry_budget = retry_budget or RetryBudget(
+            ratio=config['RETRY_BUDGET_RATIO'],
+            min_per_second=config['RETRY_BUDGET_MIN_PER_SECOND'],
+        )
+        self.coalesce_gets = coalesce_gets
+        self._pool_maxsize = config['POOL_MAXSIZE'] if pool_maxsize is None else pool_maxsize
+        self._num_pools = config['NUM_POOLS']
+        self._pool_timeout = config['POOL_TIMEOUT']
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self._pid = None
+        self._pool_manager = None
+
+    @property
+    def pool_manager(self):
+        # Pools must not be shared across a fork (e.g. gunicorn preload_app)
+        if self._pid != os.getpid():
+            self._pool_manager = urllib3.PoolManager(
+                num_pools=self._num_pools,
+                maxsize=self._pool_maxsize,
+                block=True,
+                timeout=self.timeout,
+                retries=False,
+                headers={'Connection': 'keep-alive'},
+            )
+            self._pid = os.getpid()
+        return self._pool_manager
+
+    def build_url(self, path, params=None):
+        url = path if path.startswith(('http://', 'https://')) else f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return url
+
+    def get(self, path, params=None, headers=None):
+        return self.request('GET', path, params=params, headers=headers)
+
+    def post(self, path, json_body=None, headers=None, idempotency_key=None):
+        return self.request('POST', path, json_body=json_body, headers=headers,
+                            idempotency_key=idempotency_key)
+
+    def request(self, method, path, params=None, json_body=None, headers=None, idempotency_key=None):
+        """Send a request, coalescing identical GETs that are already in flight"""
+        method = method.upper()
+        url = self.build_url(path, params)
+
+        if method != 'GET' or not self.coalesce_gets or headers:
+            return self._send(method, url, json_body, headers, idempotency_key)
+
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(url)
+            if in_flight is None:
+                in_flight = _InFlightRequest()
+                self._in_flight[url] = in_flight
+                leader = True
+            else:
+                in_flight.waiters += 1
+                leader = False
+
+        if not leader:
+            stats = self._host_stats(url)
+            with self._stats_lock:
+                stats.coalesced += 1
+            in_flight.event.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.response
+
+        try:
+            in_flight.response = self._send(method, url, None, None, None)
+            return in_flight.response
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(url, None)
+            in_flight.event.set()
+
+    def _send(self, method, url, json_body, headers, idempotency_key):
+        span = tracing.start_span(method, tracing.CLIENT)
+        if not span.recording:
+            return self._send_attempts(method, url, json_body, headers, idempotency_key)
+        with span:
+            parts = urlsplit(url)
+            span.set_attribute('http.request.method', method)
+            span.set_attribute('server.address', parts.hostname or '')
+            span.set_attribute('url.full', url)
+            response = self._send_attempts(method, url, json_body, headers, idempotency_key)
+            span.set_attribute('http.response.status_code', response.status)
+            if response.status >= 500:
+                span.set_error()
+            return response
+
+    def _send_attempts(self, method, url, json_body, headers, idempotency_key):
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        # The client span when sampled, else the caller's unsampled context
+        tracing.inject(request_headers)
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body, default=str).encode('utf-8')
+            request_headers['Content-Type'] = 'application/json'
+        if idempotency_key:
+            request_headers['Idempotency-Key'] = str(idempotency_key)
+
+        retryable = method in IDEMPOTENT_METHODS or bool(idempotency_key)
+        stats = self._host_stats(url)
+        self.retry_budget.deposit()
+        attempt = 0
+
+        while True:
+            start = time.perf_counter()
+            try:
+                raw = self.pool_manager.request(
+                    method, url, body=body, headers=request_headers, preload_content=True,
+                    pool_timeout=self._pool_timeout,
+                )
+                error = None
+            except urllib3.exceptions.HTTPError as e:
+                raw = None
+                error = e
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(stats, elapsed_ms, failed=error is not None or raw.status >= 500)
+            metrics.observe_outbound(
+                urlsplit(url).netloc, method, None if raw is None else raw.status, elapsed_ms / 1000
+            )
+
+            should_retry = error is not None or raw.status in RETRYABLE_STATUSES
+            if not should_retry:
+                return ClientResponse(raw.status, dict(raw.headers), raw.data, elapsed_ms)
+
+            if not retryable or attempt >= self.max_retries:
+                break
+            if not self.retry_budget.try_withdraw():
+                with self._stats_lock:
+                    stats.retries_denied += 1
+                logger.warning(f"Retry budget exhausted for {method} {urlsplit(url).netloc}")
+                break
+
+            attempt += 1
+            with self._stats_lock:
+                stats.retries += 1
+            tracing.current_span().set_attribute('http.request.resend_count', attempt)
+            time.sleep(self.backoff_factor * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+
+        if error is not None:
+            logger.error(f"Outbound {method} {url} failed after {attempt + 1} attempt(s): {error}")
+            raise ExternalServiceException(f"{method} {url} failed: {error}")
+        return ClientResponse(raw.status, dict(raw.headers), raw.data, elapsed_ms)
+
+    def _host_stats(self, url):
+        host = urlsplit(url).netloc
+        stats = self._stats.get(host)
+        if stats is None:
+            with self._stats_lock:
+                stats = self._stats.setdefault(host, HostStats())
+        return stats
+
+    def _record(self, stats, elapsed_ms, failed):
+        with self._stats_lock:
+            stats.requests += 1
+            stats.total_latency_ms += elapsed_ms
+            if elapsed_ms > stats.max_latency_ms:
+                stats.max_latency_ms = elapsed_ms
+            if failed:
+                stats.failures += 1
+
+    def pool_metrics(self):
+        """Per-host pool and request metrics for monitoring"""
+        pools = {}
+        manager = self._pool_manager
+        if manager is not None:
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                pools[f"{pool.host}:{pool.port}"] = pool
+                pools.setdefault(pool.host, pool)
+
+        metrics = {}
+        with self._stats_lock:
+            hosts = dict(self._stats)
+        for host, stats in hosts.items():
+            pool = pools.get(host)
+            connections_created = pool.num_connections if pool else 0
+            metrics[host] = {
+                'requests': stats.requests,
+                'failures': stats.failures,
+                'retries': stats.retries,
+                'retries_denied': stats.retries_denied,
+                'coalesced': stats.coalesced,
+                'avg_latency_ms': round(stats.total_latency_ms / stats.requests, 3) if stats.requests else 0.0,
+                'max_latency_ms': round(stats.max_latency_ms, 3),
+                'connections_created': connections_created,
+                'idle_connections': pool.pool.qsize() if pool and pool.pool else 0,
+                'pool_maxsize': self._pool_maxsize,
+                'connection_reuse_ratio': (
+                    round(1 - connections_created / stats.requests, 4) if stats.requests else 0.0
+                ),
+            }
+        metrics['_retry_budget'] = {'available_tokens': round(self.retry_budget.available, 3)}
+        return metrics
+
+    def close(self):
+        if self._pool_manager is not None:
+            self._pool_manager.clear()
@@ -0,0 +1,144 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from phantom_apps.common.ids import uuid7_at
+from phantom_apps.customers.models import Customer
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.transactions.models import Transaction
+from phantom_apps.wallets.models import Wallet
+
+DEFAULT_PREFIX = 'loadtest'
+LOADTEST_PASSWORD = 'loadtest-pass-123'
+# Seeded dates lead up to this moment, not to now, so reseeding gives identical rows
+DEFAULT_BASE_TIME = '2025-01-01T00:00:00+00:00'
+
+def seeded_users(prefix):
+    return User.objects.filter(username__startswith=f'{prefix}_')
+
+def delete_dataset(prefix):
+    """Delete a seeded dataset, children first so no cascade collects millions of rows"""
+    merchants = Merchant.objects.filter(user__in=seeded_users(prefix))
+    Transaction.objects.filter(merchant__in=merchants)._raw_delete(Transaction.objects.db)
+    Wallet.objects.filter(merchant__in=merchants)._raw_delete(Wallet.objects.db)
+    Customer.objects.filter(merchant__in=merchants)._raw_delete(Customer.objects.db)
+    seeded_users(prefix).delete()
+
+class Command(BaseCommand):
+    help = 'Seed a load test dataset: merchants with customers, wallets and transaction history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--merchants', type=int, default=100)
+        parser.add_argument('--wallets', type=int, default=10000, help='Total wallets (one customer each)')
+        parser.add_argument('--transactions-per-wallet', type=int, default=2)
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Username prefix of seeded merchants')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--reset', action='store_true', help='Delete an existing dataset with this prefix first')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for identical datasets across runs')
+        parser.add_argument('--base-time', default=DEFAULT_BASE_TIME,
+                            help='ISO 8601 time (with offset) seeded history leads up to')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        merchant_count = options['merchants']
+        wallet_count = options['wallets']
+        if merchant_count < 1 or wallet_count < merchant_count:
+            raise CommandError('--wallets must be at least --merchants, and --merchants at least 1')
+        try:
+            base_time = datetime.fromisoformat(options['base_time'])
+        except ValueError:
+            raise CommandError(f"--base-time is not an ISO 8601 time: {options['base_time']}")
+        if base_time.tzinfo is None:
+            raise CommandError('--base-time needs a UTC offset')
+
+        if seeded_users(prefix).exists():
+            if not options['reset']:
+                raise CommandError(f"A '{prefix}' dataset exists; pass --reset to replace it")
+            self.stdout.write(f"Deleting existing '{prefix}' dataset...")
+            delete_dataset(prefix)
+
+        started = time.perf_counter()
+        # Keys, references and dates all come from rng, so a seed reproduces the dataset
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        # Hashing once keeps seeding fast; every merchant can still log in
+        password = make_password(LOADTEST_PASSWORD)
+
+        users = [
+            User(username=f'{prefix}_{index:07d}', email=f'{prefix}{index}@loadtest.local', password=password)
+            for index in range(merchant_count)
+        ]
+        with transaction.atomic():
+            users = User.objects.bulk_create(users, batch_size=batch_size)
+            merchants = Merchant.objects.bulk_create([
+                Merchant(
+                    merchant_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    user=user,
+                    business_name=f'Load Test Merchant {index}',
+                    fnb_account_number=f'LT{index:010d}',
+                    contact_email=user.email,
+                    phone_number='+26770000000',
+                    business_registration=f'LTREG{index:08d}',
+                    api_key=f'lt_{rng.getrandbits(128):032x}',
+                )
+                for index, user in enumerate(users)
+            ], batch_size=batch_size)
+        self.stdout.write(f"{len(merchants)} merchants")
+
+        # Wallets are spread evenly; each batch commits on its own to bound memory
+        per_merchant, remainder = divmod(wallet_count, merchant_count)
+        created_wallets = created_transactions = 0
+        customers, wallets, transactions = [], [], []
+
+        def flush():
+            with transaction.atomic():
+                Customer.objects.bulk_create(customers, batch_size=batch_size)
+                Wallet.objects.bulk_create(wallets, batch_size=batch_size)
+                Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+            customers.clear()
+            wallets.clear()
+            transactions.clear()
+
+        for merchant_index, merchant in enumerate(merchants):
+            for index in range(per_merchant + (1 if merchant_index < remainder else 0)):
+                created_at = base_time - timedelta(minutes=rng.randrange(60 * 24 * 90))
+                customer = Customer(
+                    customer_id=uuid7_at(created_at, rng), merchant=merchant,
+                    first_name='Load', last_name=f'Test {index}',
+                    phone_number=f'+267{rng.randrange(10 ** 8):08d}', created_at=created_at,
+                )
+                customers.append(customer)
+                wallet = Wallet(
+                    wallet_id=uuid7_at(created_at, rng), customer=customer, merchant=merchant,
+                    balance=Decimal('1000000.00'), created_at=created_at,
+                )
+                wallets.append(wallet)
+                for _ in range(options['transactions_per_wallet']):
+                    transaction_at = created_at + timedelta(minutes=rng.randrange(60 * 24))
+                    transactions.append(Transaction(
+                        transaction_id=uuid7_at(transaction_at, rng),
+                        wallet=wallet, merchant=merchant, amount=Decimal(rng.randrange(100, 100000)) / 100,
+                        transaction_type=rng.choice(('credit', 'debit')), payment_channel='qr_code',
+                        status='completed', reference_number=f'LT-{rng.getrandbits(96):024x}',
+                        created_at=transaction_at,
+                    ))
+                created_wallets += 1
+                created_transactions += options['transactions_per_wallet']
+                if len(wallets) >= batch_size:
+                    flush()
+                    self.stdout.write(f"  {created_wallets}/{wallet_count} wallets")
+        if wallets:
+            flush()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {merchant_count} merchants, {created_wallets} wallets and {created_transactions} "
+            f"transactions up to {base_time.isoformat()} in {time.perf_counter() - started:.1f}s "
+            f"(password: {LOADTEST_PASSWORD})"
+        ))
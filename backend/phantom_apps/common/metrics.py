@@ -0,0 +1,168 @@
+"""
+Prometheus metrics.
+
+Under gunicorn every worker is a separate process, so metrics are written
+through prometheus_client's multiprocess mode: with PROMETHEUS_MULTIPROC_DIR
+set (gunicorn.conf.py does this) each process writes its samples to mmap
+files in that directory and the /api/v1/metrics view merges the files of all
+workers. Without it (runserver, tests) the in-process registry is served.
+
+Gauges declare how worker values combine (``multiprocess_mode``); counters
+and histograms are summed.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'phantom_http_request_duration_seconds',
+    'API request latency by route',
+    ['route', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    'phantom_db_queries_total', 'Database queries run while serving API requests', ['route'],
+)
+DB_QUERY_SECONDS = Counter(
+    'phantom_db_query_seconds_total', 'Time spent in database queries while serving API requests', ['route'],
+)
+CACHE_REQUESTS = Counter(
+    'phantom_cache_requests_total', 'Cache key lookups while serving API requests', ['result'],
+)
+CACHE_SECONDS = Counter(
+    'phantom_cache_seconds_total', 'Time spent in cache operations while serving API requests',
+)
+TRANSACTIONS = Counter(
+    'phantom_transactions_total', 'Transactions posted by payment channel', ['channel', 'type', 'outcome'],
+)
+OUTBOUND_REQUEST_DURATION = Histogram(
+    'phantom_outbound_request_duration_seconds',
+    'Outbound HTTP call latency by upstream host (every attempt, retries included)',
+    ['host', 'method', 'outcome'],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'phantom_db_pool_connections', 'Database pool connections by state', ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITING = Gauge(
+    'phantom_db_pool_requests_waiting', 'Requests waiting for a pooled database connection', ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_MAX = Gauge(
+    'phantom_db_pool_max_connections', 'Configured database pool size limit', ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_CONNECTS = Counter(
+    'phantom_db_connects_total', 'New database connections opened, by outcome', ['outcome'],
+)
+DB_CONNECT_RETRIES = Counter(
+    'phantom_db_connect_retries_total', 'Retried database connection attempts',
+)
+WORKER_STARTUP = Histogram(
+    'phantom_worker_startup_seconds',
+    'Process startup phases: import, warmup (before fork), first_request and fork_to_first_response',
+    ['phase'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    'phantom_query_budget_exceeded_total', 'Sampled requests that ran more queries than their budget', ['view'],
+)
+RISK_DECISIONS = Histogram(
+    'phantom_risk_scoring_seconds', 'Velocity scoring of postings, by decision and counter store',
+    ['decision', 'store'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+QR_IMAGES = Histogram(
+    'phantom_qr_image_seconds', 'QR payment image lookups, by where the PNG came from',
+    ['source'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+def multiprocess_enabled():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+def status_class(status_code):
+    return f"{status_code // 100}xx"
+
+def observe_request(route, method, status_code, seconds, timings=None):
+    """Record one API request; ``timings`` is the request's server_timing.RequestTimings"""
+    HTTP_REQUEST_DURATION.labels(route, method, status_class(status_code)).observe(seconds)
+    if timings is None:
+        return
+    if timings.db_count:
+        DB_QUERIES.labels(route).inc(timings.db_count)
+        DB_QUERY_SECONDS.labels(route).inc(timings.db_time)
+    if timings.cache_hits:
+        CACHE_REQUESTS.labels('hit').inc(timings.cache_hits)
+    if timings.cache_misses:
+        CACHE_REQUESTS.labels('miss').inc(timings.cache_misses)
+    if timings.cache_ops:
+        CACHE_SECONDS.inc(timings.cache_time)
+
+def observe_outbound(host, method, status_code, seconds):
+    """Record one outbound HTTP attempt (``status_code`` None when no response arrived)"""
+    outcome = 'error' if status_code is None else status_class(status_code)
+    OUTBOUND_REQUEST_DURATION.labels(host, method, outcome).observe(seconds)
+
+def count_connect(retries, failed):
+    DB_CONNECTS.labels('failed' if failed else 'ok').inc()
+    if retries:
+        DB_CONNECT_RETRIES.inc(retries)
+
+def count_transaction(channel, transaction_type, outcome, count=1):
+    TRANSACTIONS.labels(channel, transaction_type, outcome).inc(count)
+
+def count_query_budget_exceeded(view):
+    QUERY_BUDGET_EXCEEDED.labels(view).inc()
+
+def observe_startup(phase, seconds):
+    WORKER_STARTUP.labels(phase).observe(seconds)
+
+def observe_risk_decision(decision, store, seconds):
+    RISK_DECISIONS.labels(decision, store).observe(seconds)
+
+def observe_qr_image(source, seconds):
+    QR_IMAGES.labels(source).observe(seconds)
+
+class PoolSampler:
+    """Copies pool_metrics() into the pool gauges, at most once per interval"""
+
+    def __init__(self, alias='default', interval=5.0):
+        self.alias = alias
+        self.interval = interval
+        self._sampled_at = 0.0
+
+    def maybe_sample(self):
+        now = time.monotonic()
+        if now - self._sampled_at < self.interval:
+            return
+        self._sampled_at = now
+        self.sample()
+
+    def sample(self):
+        # Imported here: pool imports this module
+        from phantom_apps.common.db.pool import pool_metrics
+
+        stats = pool_metrics(self.alias)
+        if not stats['enabled']:
+            return
+        DB_POOL_MAX.labels(self.alias).set(stats['max_size'])
+        DB_POOL_CONNECTIONS.labels(self.alias, 'in_use').set(stats['in_use'])
+        DB_POOL_CONNECTIONS.labels(self.alias, 'available').set(stats['available'])
+        DB_POOL_WAITING.labels(self.alias).set(stats['requests_waiting'])
+
+def render_latest():
+    """Exposition text and content type for a scrape"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
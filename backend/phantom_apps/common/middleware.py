@@ -0,0 +1,186 @@
+import logging
+import time
+
+import orjson
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+
+from phantom_apps.common import metrics, server_timing, tracing
+from phantom_apps.common.db import routers
+
+logger = logging.getLogger('phantom_apps')
+
+SESSION_REFRESHED_AT_KEY = '_session_refreshed_at'
+
+class LazySessionMiddleware(SessionMiddleware):
+    """
+    Session middleware that only writes when it has to.
+
+    A session is saved when its data changed, or when it was used and its
+    sliding expiry was last extended more than SESSION_REFRESH_INTERVAL
+    seconds ago - instead of on every request (SESSION_SAVE_EVERY_REQUEST).
+    Bearer-token calls to SESSIONLESS_PATH_PREFIXES skip session handling
+    entirely: no load, no save, no cookie. Changes made to request.session
+    during such calls are not persisted.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.refresh_interval = settings.SESSION_REFRESH_INTERVAL
+        self.sessionless_prefixes = tuple(settings.SESSIONLESS_PATH_PREFIXES)
+
+    def is_token_request(self, request):
+        return (
+            request.path.startswith(self.sessionless_prefixes)
+            and request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer ')
+        )
+
+    def process_request(self, request):
+        # The session store is lazy: no cache round trip happens unless it is used
+        super().process_request(request)
+        request.session_skipped = self.is_token_request(request)
+
+    def process_response(self, request, response):
+        if getattr(request, 'session_skipped', False):
+            return response
+
+        session = getattr(request, 'session', None)
+        if session is not None and session.accessed and not session.is_empty():
+            now = time.time()
+            if session.modified:
+                session[SESSION_REFRESHED_AT_KEY] = now
+            elif now - session.get(SESSION_REFRESHED_AT_KEY, 0) >= self.refresh_interval:
+                # Extend the sliding expiry; marks the session modified so it is saved
+                session[SESSION_REFRESHED_AT_KEY] = now
+
+        return super().process_response(request, response)
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes for replica routing: a user whose request wrote to the
+    primary has their reads pinned to the primary for STICKY_SECONDS.
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routers.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.end_request(token)
+        # DRF copies the token-authenticated user onto the Django request
+        user = getattr(request, 'user', None)
+        if wrote and user is not None and user.is_authenticated:
+            routers.mark_sticky(user.pk)
+        return response
+
+class TracingMiddleware:
+    """
+    Root span of each request, continuing the caller's W3C traceparent.
+    Place it first so the span covers every other middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRACING['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        span = tracing.start_trace(request.method, request.META.get('HTTP_TRACEPARENT'), tracing.SERVER)
+        with span:
+            if span.recording:
+                span.set_attribute('http.request.method', request.method)
+                span.set_attribute('url.path', request.path)
+            response = self.get_response(request)
+            if span.recording:
+                match = request.resolver_match
+                if match is not None:
+                    # View names are the low-cardinality route labels used by the metrics too
+                    span.update_name(f'{request.method} {match.view_name}')
+                    span.set_attribute('http.route', '/' + match.route.replace('^', '').replace('$', ''))
+                span.set_attribute('http.response.status_code', response.status_code)
+                if response.status_code >= 500:
+                    span.set_error()
+        return response
+
+class ServerTimingMiddleware:
+    """
+    Records DB, cache, serializer and render time of each request, reports
+    them in a Server-Timing header (to staff users only unless
+    SERVER_TIMING['HEADER']) and logs a JSON line for requests slower
+    than their route's threshold (SERVER_TIMING['ROUTE_THRESHOLDS_MS'], keyed
+    by view name such as 'api_v1:wallets:wallets-list', else SLOW_REQUEST_MS). Place it right after
+    TracingMiddleware so the total covers the rest of the middleware.
+    """
+
+    def __init__(self, get_response):
+        config = settings.SERVER_TIMING
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = config['HEADER']
+        self.default_threshold = config['SLOW_REQUEST_MS'] / 1000
+        self.route_thresholds = {
+            name: threshold_ms / 1000 for name, threshold_ms in config['ROUTE_THRESHOLDS_MS'].items()
+        }
+
+    def __call__(self, request):
+        timings, token = server_timing.begin()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - start
+            server_timing.end(token)
+
+        # DRF copies the token-authenticated user onto the Django request
+        user = getattr(request, 'user', None)
+        if self.header or getattr(user, 'is_staff', False):
+            response['Server-Timing'] = timings.header_value(total)
+
+        match = request.resolver_match
+        route = match.view_name if match is not None else None
+        if total >= self.route_thresholds.get(route, self.default_threshold):
+            line = {
+                'event': 'slow_request',
+                'route': route,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **timings.as_dict(total),
+            }
+            logger.warning(f"Slow request {orjson.dumps(line).decode()}")
+        return response
+
+class PrometheusMetricsMiddleware:
+    """
+    Per-route latency histograms plus the request's DB and cache totals for
+    /api/v1/metrics. Place it right after ServerTimingMiddleware, whose
+    timings it reads; also samples the DB pool gauges every few seconds.
+    """
+
+    KNOWN_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+    def __init__(self, get_response):
+        config = settings.METRICS
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pool_sampler = metrics.PoolSampler(interval=config['POOL_SAMPLE_INTERVAL'])
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        # Label values stay bounded: unknown paths and methods share one series
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        method = request.method if request.method in self.KNOWN_METHODS else 'OTHER'
+        metrics.observe_request(route, method, response.status_code, elapsed, server_timing.current())
+        self.pool_sampler.maybe_sample()
+        return response
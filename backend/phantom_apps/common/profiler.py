@@ -0,0 +1,191 @@
+"""
+On-demand sampling profiler.
+
+SamplingProfiler reads the current frame of every thread of the worker
+(sys._current_frames) at a fixed rate and counts identical stacks. Nothing
+is hooked into the interpreter, so threads that are not being sampled run at
+full speed; the cost is one walk of each thread's stack per sample, under
+the GIL, spent in the sampling thread.
+
+Results are collapsed stacks - one ``thread;outer;...;leaf count`` line per
+distinct stack - which flamegraph.pl, speedscope and inferno read directly.
+
+The admin-only /api/v1/profile/ endpoint runs it in two ways:
+
+- GET ?seconds=N&rate=HZ samples for N seconds and returns the stacks. The
+  request occupies a worker thread, so this only shows other traffic with
+  GUNICORN_THREADS > 1.
+- POST starts a session in a background thread of the worker that receives
+  it and returns its id at once; the worker keeps serving requests while
+  it is sampled. The result is stored in the default cache, so
+  GET /api/v1/profile/<id>/ works from any worker.
+
+PROFILER['SAMPLE_RATE'] and PROFILER['MAX_DURATION'] cap what a request may
+ask for, and a worker runs at most one session at a time.
+"""
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger('phantom_apps')
+
+CACHE_PREFIX = 'profiler:'
+TRUNCATED = '[truncated]'
+
+class ProfilerBusy(Exception):
+    """This worker is already running a session"""
+
+class Profile:
+    """Stack counts of one session"""
+
+    def __init__(self, rate, max_depth):
+        self.rate = rate
+        self.max_depth = max_depth
+        self.counts = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self.overhead = 0.0
+        self._labels = {}
+        self._thread_names = {}
+
+    def label(self, frame):
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get('__name__', '?')
+            label = self._labels[code] = f"{module}:{code.co_qualname}".replace(';', ':').replace(' ', '_')
+        return label
+
+    def thread_name(self, ident):
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._thread_names.get(ident, f'thread-{ident}')
+            self._thread_names[ident] = name
+        return name
+
+    def sample(self, skip_ident):
+        """Count the current stack of every thread but ``skip_ident``"""
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            stack = []
+            while frame is not None:
+                if len(stack) == self.max_depth:
+                    stack.append(TRUNCATED)
+                    break
+                stack.append(self.label(frame))
+                frame = frame.f_back
+            self.counts[(ident, tuple(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """Flamegraph input: root-first frames separated by ';', then the count"""
+        lines = Counter()
+        for (ident, stack), count in self.counts.items():
+            thread = self.thread_name(ident).replace(';', ':').replace(' ', '_')
+            lines[';'.join((thread, *reversed(stack)))] += count
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(lines.items()))
+
+    def summary(self):
+        return {
+            'rate': self.rate,
+            'samples': self.samples,
+            'duration_s': round(self.duration, 3),
+            'overhead_ms': round(self.overhead * 1000, 2),
+            'stacks': len(self.counts),
+        }
+
+class SamplingProfiler:
+    """Samples the stacks of this process's threads, one session at a time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def limits(self, seconds, rate):
+        """Clamp the requested duration and rate to PROFILER's limits; raises ValueError for non-numbers"""
+        config = settings.PROFILER
+        seconds, rate = float(seconds), float(rate)
+        # NaN compares false both ways and would slip past the clamps
+        if not (math.isfinite(seconds) and math.isfinite(rate)):
+            raise ValueError('seconds and rate must be finite')
+        seconds = min(max(seconds, 0.1), config['MAX_DURATION'])
+        rate = min(max(rate, 1.0), config['SAMPLE_RATE'])
+        return seconds, rate
+
+    def run(self, seconds, rate):
+        """Sample every other thread for ``seconds`` at ``rate`` Hz; raises ProfilerBusy"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            return self._run(seconds, rate)
+        finally:
+            self._lock.release()
+
+    def _run(self, seconds, rate):
+        profile = Profile(rate, settings.PROFILER['MAX_DEPTH'])
+        own = threading.get_ident()
+        interval = 1.0 / rate
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_at = start
+        while True:
+            sampled_at = time.perf_counter()
+            if sampled_at >= deadline:
+                break
+            profile.sample(own)
+            profile.overhead += time.perf_counter() - sampled_at
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (a long GIL hold elsewhere): skip, don't burst
+                next_at = time.perf_counter()
+        profile.duration = time.perf_counter() - start
+        return profile
+
+    def start(self, seconds, rate):
+        """Run a session in a background thread; returns its id. Raises ProfilerBusy"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        profile_id = uuid.uuid4().hex
+        try:
+            store(profile_id, {'status': 'running', 'pid': os.getpid(), 'seconds': seconds, 'rate': rate})
+            thread = threading.Thread(
+                target=self._background, args=(profile_id, seconds, rate), name='sampling-profiler', daemon=True
+            )
+            thread.start()
+        except Exception:
+            self._lock.release()
+            raise
+        return profile_id
+
+    def _background(self, profile_id, seconds, rate):
+        try:
+            profile = self._run(seconds, rate)
+            store(profile_id, {
+                'status': 'done', 'pid': os.getpid(), **profile.summary(), 'collapsed': profile.collapsed(),
+            })
+            logger.info(f"Profile {profile_id} finished: {profile.samples} samples in {profile.duration:.1f}s")
+        except Exception as e:
+            logger.error(f"Profile {profile_id} failed: {e}")
+            store(profile_id, {'status': 'failed', 'pid': os.getpid(), 'error': str(e)})
+        finally:
+            self._lock.release()
+
+def store(profile_id, result):
+    caches['default'].set(CACHE_PREFIX + profile_id, result, settings.PROFILER['RESULT_TTL'])
+
+def fetch(profile_id):
+    return caches['default'].get(CACHE_PREFIX + profile_id)
+
+profiler = SamplingProfiler()
@@ -0,0 +1,222 @@
+"""
+Readiness checks.
+
+A background thread in each worker probes the database, Redis, the FNB API
+and the mobile money API every READINESS['INTERVAL'] seconds and publishes an
+immutable snapshot with the response bodies already rendered. The
+/api/v1/health/ready/ view only reads that snapshot, so load balancer probes
+cost microseconds however often they arrive, and never touch a dependency.
+
+The checker starts on the first readiness request of a worker (threads do not
+survive gunicorn's fork) and runs its first round synchronously. Readiness
+fails when a critical dependency (READINESS['CRITICAL']) failed its last
+probe, or when the snapshot is stale because the checker stopped.
+"""
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+import orjson
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger('phantom_apps')
+
+class ProbeResult:
+    """Outcome of one probe"""
+
+    __slots__ = ('ok', 'latency_ms', 'error', 'checked_at')
+
+    def __init__(self, ok, latency_ms, error, checked_at):
+        self.ok = ok
+        self.latency_ms = latency_ms
+        self.error = error
+        self.checked_at = checked_at
+
+class Snapshot:
+    """Readiness at the end of a round, with pre-rendered bodies"""
+
+    __slots__ = ('ready', 'built_at', 'body', 'verbose_body')
+
+    def __init__(self, ready, built_at, body, verbose_body):
+        self.ready = ready
+        self.built_at = built_at
+        self.body = body
+        self.verbose_body = verbose_body
+
+def probe_database():
+    with connections['default'].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+def probe_redis():
+    cache = caches['default']
+    client = getattr(cache, 'client', None)
+    if hasattr(client, 'get_client'):
+        client.get_client(write=True).ping()
+    else:
+        # Non-Redis backends (local development, tests)
+        cache.get('readiness:probe')
+
+_http_clients = {}
+
+def _downstream_client(name):
+    # Probe-only clients: short timeouts and no retries, separate from the
+    # pools serving real traffic
+    client = _http_clients.get(name)
+    if client is None:
+        timeout = settings.READINESS['TIMEOUT']
+        options = {'connect_timeout': timeout, 'read_timeout': timeout, 'max_retries': 0, 'coalesce_gets': False}
+        if name == 'fnb':
+            from phantom_apps.mock_systems.fnb.client import FNBClient
+            client = FNBClient(**options)
+        else:
+            from phantom_apps.mock_systems.mobile_money.client import MobileMoneyClient
+            client = MobileMoneyClient(**options)
+        _http_clients[name] = client
+    return client
+
+def probe_fnb():
+    _downstream_client('fnb').ping()
+
+def probe_mobile_money():
+    _downstream_client('mobile_money').ping()
+
+PROBES = {
+    'database': probe_database,
+    'redis': probe_redis,
+    'fnb': probe_fnb,
+    'mobile_money': probe_mobile_money,
+}
+
+class ReadinessChecker:
+    """Runs probes on an interval in a daemon thread and keeps the latest snapshot"""
+
+    def __init__(self, probes, interval=5.0, history=60, critical=()):
+        self.probes = dict(probes)
+        self.interval = interval
+        self.critical = frozenset(critical)
+        self.history = {name: deque(maxlen=history) for name in self.probes}
+        # A round may legitimately take a while; three missed intervals means the checker is gone
+        self.stale_after = interval * 3
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.run_once()
+            thread = threading.Thread(target=self._run, name='readiness-checker', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Readiness round failed: {e}")
+            finally:
+                # Hand this thread's pooled or broken connections back, as at the end of a request
+                close_old_connections()
+
+    def run_once(self):
+        """Probe every dependency once and publish a new snapshot"""
+        for name, probe in self.probes.items():
+            start = time.perf_counter()
+            try:
+                probe()
+                ok, error = True, None
+            except Exception as e:
+                ok, error = False, f"{type(e).__name__}: {e}"[:200]
+            latency_ms = round((time.perf_counter() - start) * 1000, 3)
+            self.history[name].append(ProbeResult(ok, latency_ms, error, time.time()))
+            if not ok:
+                logger.warning(f"Readiness probe {name} failed in {latency_ms}ms: {error}")
+        self._snapshot = self.build_snapshot()
+
+    def build_snapshot(self):
+        built_at = time.time()
+        dependencies = {}
+        verbose = {}
+        ready = True
+        for name, history in self.history.items():
+            last = history[-1]
+            critical = name in self.critical
+            if critical and not last.ok:
+                ready = False
+            latencies = [result.latency_ms for result in history]
+            dependencies[name] = {
+                'status': 'ok' if last.ok else 'failing',
+                'critical': critical,
+                'latency_ms': last.latency_ms,
+                'error': last.error,
+                'checked_at': last.checked_at,
+                'latency_p50_ms': round(statistics.median(latencies), 3),
+                'latency_max_ms': max(latencies),
+                'failures': sum(1 for result in history if not result.ok),
+                'samples': len(history),
+            }
+            verbose[name] = {
+                **dependencies[name],
+                'history': [
+                    {'checked_at': result.checked_at, 'latency_ms': result.latency_ms, 'ok': result.ok}
+                    for result in history
+                ],
+            }
+        status = 'ready' if ready else 'not_ready'
+        return Snapshot(
+            ready,
+            built_at,
+            orjson.dumps({'status': status, 'checked_at': built_at, 'dependencies': dependencies}),
+            orjson.dumps({'status': status, 'checked_at': built_at, 'dependencies': verbose}),
+        )
+
+    def current(self, verbose=False):
+        """(ready, body) from the latest snapshot"""
+        self.ensure_started()
+        snapshot = self._snapshot
+        if time.time() - snapshot.built_at > self.stale_after:
+            return False, orjson.dumps({'status': 'stale', 'checked_at': snapshot.built_at})
+        return snapshot.ready, snapshot.verbose_body if verbose else snapshot.body
+
+_checker = None
+_checker_lock = threading.Lock()
+
+def get_checker():
+    """This worker's checker, configured from READINESS"""
+    global _checker
+    if _checker is None:
+        with _checker_lock:
+            if _checker is None:
+                config = settings.READINESS
+                _checker = ReadinessChecker(
+                    {name: PROBES[name] for name in config['CHECKS']},
+                    interval=config['INTERVAL'],
+                    history=config['HISTORY'],
+                    critical=config['CRITICAL'],
+                )
+    return _checker
+
+def _settings_changed(setting, **kwargs):
+    global _checker
+    if setting == 'READINESS':
+        _http_clients.clear()
+        if _checker is not None:
+            _checker.stop()
+            _checker = None
+
+setting_changed.connect(_settings_changed, dispatch_uid='readiness_settings')
@@ -0,0 +1,200 @@
+"""
+Per-request performance instrumentation.
+
+ServerTimingMiddleware puts a RequestTimings in a context variable for the
+duration of a request. The hooks below add to it when one is active and
+return straight away otherwise, so code running outside a request (Celery,
+management commands) pays one context variable lookup per call:
+
+- DB: an execute wrapper installed on every connection as it is created
+  (query count and time)
+- Cache: InstrumentedRedisClient, a django_redis CLIENT_CLASS (hits, misses,
+  operations and time)
+- Serializers: BaseSerializer.data (to_representation of the outermost
+  serializer)
+- Rendering: TimedJSONRenderer
+
+The middleware reports the totals in a ``Server-Timing`` header and logs a
+JSON line when a request is slower than its route's threshold.
+"""
+import contextvars
+import time
+
+from django.db.backends.signals import connection_created
+from django_redis.client import DefaultClient
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import BaseSerializer
+
+_current = contextvars.ContextVar('server_timing', default=None)
+_MISSING = object()
+
+class RequestTimings:
+    """Counters and durations (seconds) recorded during one request"""
+
+    __slots__ = (
+        'db_count', 'db_time', 'cache_hits', 'cache_misses', 'cache_ops', 'cache_time',
+        'cache_depth', 'serialize_time', 'serializing', 'render_time',
+    )
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_ops = 0
+        self.cache_time = 0.0
+        self.cache_depth = 0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.render_time = 0.0
+
+    def header_value(self, total):
+        """Server-Timing header value"""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_count} queries"',
+            f'cache;dur={self.cache_time * 1000:.2f};desc="{self.cache_hits} hits {self.cache_misses} misses"',
+            f'serialize;dur={self.serialize_time * 1000:.2f}',
+            f'render;dur={self.render_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+    def as_dict(self, total):
+        return {
+            'total_ms': round(total * 1000, 2),
+            'db_queries': self.db_count,
+            'db_ms': round(self.db_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_ops': self.cache_ops,
+            'cache_ms': round(self.cache_time * 1000, 2),
+            'serialize_ms': round(self.serialize_time * 1000, 2),
+            'render_ms': round(self.render_time * 1000, 2),
+        }
+
+def begin():
+    """Start recording for the current request; pass the token to end()"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+def end(token):
+    _current.reset(token)
+
+def current():
+    """RequestTimings of the current request, or None"""
+    return _current.get()
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_count += 1
+        timings.db_time += time.perf_counter() - start
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    # execute_wrappers outlive reconnects of the same connection object
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, db_execute_wrapper)
+
+class InstrumentedRedisClient(DefaultClient):
+    """
+    django_redis client that records cache operations of the current request.
+
+    Calls made by other client methods (add -> set, set_many -> set) count
+    once, as the outer operation.
+    """
+
+    def _timed(self, method, *args, **kwargs):
+        timings = _current.get()
+        if timings is None or timings.cache_depth:
+            return method(*args, **kwargs)
+        timings.cache_depth += 1
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.cache_depth -= 1
+            timings.cache_ops += 1
+            timings.cache_time += time.perf_counter() - start
+
+    def get(self, key, default=None, version=None, client=None):
+        timings = _current.get()
+        if timings is None:
+            return super().get(key, default=default, version=version, client=client)
+        value = self._timed(super().get, key, default=_MISSING, version=version, client=client)
+        if value is _MISSING:
+            timings.cache_misses += 1
+            return default
+        timings.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None, client=None):
+        timings = _current.get()
+        if timings is None:
+            return super().get_many(keys, version=version, client=client)
+        keys = list(keys)
+        values = self._timed(super().get_many, keys, version=version, client=client)
+        timings.cache_hits += len(values)
+        timings.cache_misses += len(keys) - len(values)
+        return values
+
+    def set(self, *args, **kwargs):
+        return self._timed(super().set, *args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        return self._timed(super().set_many, *args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self._timed(super().add, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._timed(super().delete, *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self._timed(super().delete_many, *args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        return self._timed(super().incr, *args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        return self._timed(super().has_key, *args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        return self._timed(super().touch, *args, **kwargs)
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records render time of the current request"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings.render_time += time.perf_counter() - start
+
+def _timed_serializer_data(fget):
+    def data(self):
+        timings = _current.get()
+        if timings is None or timings.serializing:
+            return fget(self)
+        timings.serializing = True
+        start = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            timings.serializing = False
+            timings.serialize_time += time.perf_counter() - start
+    data.server_timing = True
+    return data
+
+def install():
+    """Install the DB and serializer hooks (once, from CommonConfig.ready)"""
+    connection_created.connect(_install_db_wrapper, dispatch_uid='server_timing_db_wrapper')
+    if not getattr(BaseSerializer.data.fget, 'server_timing', False):
+        BaseSerializer.data = property(_timed_serializer_data(BaseSerializer.data.fget))
@@ -0,0 +1,277 @@
+"""
+Worker startup.
+
+PRODUCTION_MODE keeps work out of every gunicorn worker's boot and first
+request:
+
+- The OpenAPI schema is built once, at build time, with
+      python manage.py spectacular --format openapi-json --file $OPENAPI_SCHEMA_FILE
+  and OpenAPISchemaView serves that file (from memory, with an ETag) instead
+  of generating the schema per request.
+- django_extensions is not installed and the admin uses SimpleAdminConfig;
+  the admin URLconf (core.admin_urls, which runs autodiscover) and the API
+  docs views are imported on their first request.
+- core.wsgi runs warm_up() while gunicorn preloads the app in the master, so
+  the URL resolvers, serializer fields, model metadata and translation
+  catalogs every worker needs are built once and shared by fork.
+
+instrument() wraps the WSGI application to report the import and warm-up
+time and, per worker, the latency of its first request (a log line and the
+phantom_worker_startup_seconds histogram).
+"""
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+
+import orjson
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.urls import URLResolver, get_resolver
+from django.urls.resolvers import RoutePattern
+from django.utils import translation
+from django.utils.module_loading import import_string
+from django.views import View
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from . import metrics
+
+logger = logging.getLogger('phantom_apps')
+
+SCHEMA_CONTENT_TYPE = 'application/vnd.oai.openapi+json'
+# gunicorn.conf.py sets this in post_fork (time.time() of the fork)
+FORKED_AT_ENV = 'PHANTOM_WORKER_FORKED_AT'
+
+def _is_loaded(resolver):
+    # lazy_include() resolvers hold a module name until their first use
+    return not isinstance(resolver.urlconf_name, str) or resolver.urlconf_name in sys.modules
+
+class LazyURLResolver(URLResolver):
+    """
+    Namespaced include whose URLconf module is imported on first use. The
+    root resolver populates every include as soon as anything is reversed;
+    this one waits until a URL under it is resolved or its namespace reversed.
+    """
+
+    def _populate(self):
+        if _is_loaded(self):
+            super()._populate()
+
+    @property
+    def reverse_dict(self):
+        self.url_patterns
+        return super().reverse_dict
+
+    @property
+    def namespace_dict(self):
+        self.url_patterns
+        return super().namespace_dict
+
+    @property
+    def app_dict(self):
+        self.url_patterns
+        return super().app_dict
+
+def lazy_include(route, urlconf_name, namespace):
+    """Like include((urlconf_name, namespace)) with the URLconf imported on first use"""
+    pattern = RoutePattern(route, is_endpoint=False)
+    return LazyURLResolver(pattern, urlconf_name, app_name=namespace, namespace=namespace)
+
+def lazy_view(dotted_path, **initkwargs):
+    """View imported (and as_view() built) on its first request"""
+    view = None
+    lock = threading.Lock()
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            with lock:
+                if view is None:
+                    view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    dispatch.lazy_view = dotted_path
+    return dispatch
+
+class SchemaFile:
+    """The precomputed schema, read once per process"""
+
+    def __init__(self, path):
+        self.path = path
+        self.body = None
+        self.etag = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self.body is None:
+            with self._lock:
+                if self.body is None:
+                    with open(self.path, 'rb') as f:
+                        body = f.read()
+                    self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                    self.body = body
+        return self.body
+
+_schema_file = None
+
+def get_schema_file():
+    global _schema_file
+    path = settings.STARTUP['SCHEMA_FILE']
+    if _schema_file is None or _schema_file.path != path:
+        _schema_file = SchemaFile(path)
+    return _schema_file
+
+class OpenAPISchemaView(View):
+    """
+    The precomputed schema file in PRODUCTION_MODE; otherwise the schema is
+    generated per request by drf_spectacular (imported on first use).
+    """
+
+    generated_view = None
+
+    def get(self, request, *args, **kwargs):
+        if not settings.PRODUCTION_MODE:
+            return self.generate(request, *args, **kwargs)
+        schema = get_schema_file()
+        try:
+            body = schema.load()
+        except OSError as e:
+            logger.error(f"Precomputed OpenAPI schema unavailable: {e}")
+            return JsonResponse({'error': 'OpenAPI schema has not been built'}, status=503)
+        if request.headers.get('If-None-Match') == schema.etag:
+            return HttpResponseNotModified(headers={'ETag': schema.etag})
+        response = HttpResponse(body, content_type=SCHEMA_CONTENT_TYPE)
+        response['ETag'] = schema.etag
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+    def generate(self, request, *args, **kwargs):
+        if OpenAPISchemaView.generated_view is None:
+            from drf_spectacular.views import SpectacularAPIView
+
+            OpenAPISchemaView.generated_view = SpectacularAPIView.as_view()
+        return OpenAPISchemaView.generated_view(request, *args, **kwargs)
+
+def _loaded_resolvers(resolver):
+    yield resolver
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver) and _is_loaded(pattern):
+            yield from _loaded_resolvers(pattern)
+
+def warm_urls():
+    """Import the URLconf, compile every loaded route and build the reverse lookups"""
+    for resolver in _loaded_resolvers(get_resolver()):
+        for pattern in resolver.url_patterns:
+            pattern.pattern.regex
+        # Populates the reverse and namespace dicts
+        resolver.reverse_dict
+
+def _serializer_classes(base=BaseSerializer):
+    for cls in base.__subclasses__():
+        yield cls
+        yield from _serializer_classes(cls)
+
+def warm_serializers():
+    """
+    Build the fields of every project serializer once; returns how many.
+    Fields are per instance, but building them fills the model metadata
+    caches and compiles the validators the first request would otherwise pay for.
+    """
+    warmed = 0
+    for cls in set(_serializer_classes()):
+        if not cls.__module__.startswith('phantom_apps.') or issubclass(cls, ListSerializer):
+            continue
+        try:
+            cls().fields
+            warmed += 1
+        except Exception as e:
+            logger.warning(f"Warm-up of {cls.__name__} failed: {e}")
+    return warmed
+
+def warm_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('This field is required.')
+
+def warm_up():
+    """Build per-process caches before forking; returns phase timings in ms"""
+    timings = {}
+    start = time.perf_counter()
+    warm_urls()
+    timings['urls_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    timings['serializers'] = warm_serializers()
+    timings['serializers_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    warm_translations()
+    if settings.PRODUCTION_MODE:
+        try:
+            get_schema_file().load()
+        except OSError as e:
+            logger.error(f"Precomputed OpenAPI schema unavailable: {e}")
+    timings['other_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    # Nothing above should connect, but connections must never cross a fork
+    connections.close_all()
+    return timings
+
+class StartupReporter:
+    """WSGI wrapper timing the first request this process serves"""
+
+    def __init__(self, application, report):
+        self.application = application
+        self.report = report
+        self.boot_pid = os.getpid()
+        self.reported = False
+
+    def __call__(self, environ, start_response):
+        if self.reported:
+            return self.application(environ, start_response)
+        self.reported = True
+        start = time.perf_counter()
+        try:
+            return self.application(environ, start_response)
+        finally:
+            self.report_first_request(environ, time.perf_counter() - start)
+
+    def report_first_request(self, environ, seconds):
+        line = {
+            'event': 'worker_startup',
+            'pid': os.getpid(),
+            # Loaded in the gunicorn master (preload_app) and inherited by fork
+            'preloaded': os.getpid() != self.boot_pid,
+            **self.report,
+            'first_request_ms': round(seconds * 1000, 2),
+            'first_request_path': environ.get('PATH_INFO', ''),
+        }
+        metrics.observe_startup('first_request', seconds)
+        forked_at = os.environ.get(FORKED_AT_ENV)
+        if forked_at:
+            fork_to_ready = time.time() - float(forked_at)
+            line['fork_to_first_response_ms'] = round(fork_to_ready * 1000, 2)
+            metrics.observe_startup('fork_to_first_response', fork_to_ready)
+        logger.info(f"Worker startup {orjson.dumps(line).decode()}")
+
+def instrument(application, import_seconds):
+    """Warm up (PRODUCTION_MODE) and report startup timings of ``application``"""
+    report = {'production_mode': settings.PRODUCTION_MODE, 'import_ms': round(import_seconds * 1000, 2)}
+    metrics.observe_startup('import', import_seconds)
+    if settings.PRODUCTION_MODE and settings.STARTUP['WARMUP']:
+        start = time.perf_counter()
+        report['warmup'] = warm_up()
+        warmup_seconds = time.perf_counter() - start
+        report['warmup_ms'] = round(warmup_seconds * 1000, 2)
+        metrics.observe_startup('warmup', warmup_seconds)
+    return StartupReporter(application, report)
+
+def _settings_changed(setting, **kwargs):
+    global _schema_file
+    if setting in ('STARTUP', 'PRODUCTION_MODE'):
+        _schema_file = None
+
+setting_changed.connect(_settings_changed, dispatch_uid='startup_settings')
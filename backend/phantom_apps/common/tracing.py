@@ -0,0 +1,552 @@
+"""
+Lightweight distributed tracing.
+
+Spans follow the OpenTelemetry data model and are exported as OTLP/JSON, so
+the output can be loaded by any OpenTelemetry collector or backend. Trace
+context travels in the W3C ``traceparent`` header: it is read from incoming
+requests and Celery task headers and injected into outbound HTTP calls and
+published tasks.
+
+Sampling is decided once, at the head of a trace: a ``traceparent`` with the
+sampled flag is always followed, a new trace is sampled with probability
+TRACING['SAMPLE_RATE']. An unsampled trace keeps a non-recording context so
+its ids still propagate downstream; every span below it is the shared
+NOOP_SPAN, which costs one context variable lookup.
+
+Instrumented here: requests (TracingMiddleware), queries (an execute
+wrapper), cache operations (TracedRedisClient), Celery tasks (signals) and,
+through ``start_span``, outbound HTTP calls. ``traced`` adds a span around
+any function. Finished spans are exported in batches from a background
+thread to a JSON-lines file, an OTLP/HTTP endpoint or memory (tests).
+"""
+import atexit
+import contextvars
+import logging
+import os
+import random
+import re
+import threading
+import time
+from functools import wraps
+
+import orjson
+import urllib3
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+
+from .server_timing import InstrumentedRedisClient
+
+logger = logging.getLogger('phantom_apps')
+
+# OTLP SpanKind and StatusCode values
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+PRODUCER = 4
+CONSUMER = 5
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+MAX_STATEMENT_LENGTH = 2048
+
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$')
+_INVALID_TRACE_ID = '0' * 32
+_INVALID_SPAN_ID = '0' * 16
+
+_current = contextvars.ContextVar('trace_span', default=None)
+
+def new_trace_id():
+    return f'{random.getrandbits(128) or 1:032x}'
+
+def new_span_id():
+    return f'{random.getrandbits(64) or 1:016x}'
+
+def parse_traceparent(value):
+    """(trace_id, parent_span_id, sampled) from a traceparent header, or None if invalid"""
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    # Future versions may append fields; version 00 may not
+    if version == 'ff' or (version == '00' and rest):
+        return None
+    if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+class _NoopSpan:
+    """Span API that records nothing"""
+
+    __slots__ = ()
+
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def update_name(self, name):
+        pass
+
+    def set_error(self, message=''):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class NonRecordingSpan(_NoopSpan):
+    """Context of an unsampled trace: propagated downstream, never exported"""
+
+    __slots__ = ('trace_id', 'span_id', '_token')
+
+    def __init__(self, trace_id, span_id):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+    @property
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-00'
+
+class Span:
+    """A sampled span; exported when it ends"""
+
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns',
+        'attributes', 'events', 'status', 'status_message', '_token',
+    )
+
+    recording = True
+
+    def __init__(self, name, trace_id, parent_id=None, kind=INTERNAL, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.events = []
+        self.status = STATUS_UNSET
+        self.status_message = ''
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_exception(exc)
+        self.end()
+        _current.reset(self._token)
+        return False
+
+    @property
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def update_name(self, name):
+        self.name = name
+
+    def set_error(self, message=''):
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def record_exception(self, exc):
+        self.events.append({
+            'name': 'exception',
+            'time_ns': time.time_ns(),
+            'attributes': {'exception.type': type(exc).__name__, 'exception.message': str(exc)[:500]},
+        })
+        self.set_error(f'{type(exc).__name__}: {exc}'[:200])
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        tracer.processor.on_end(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': otlp_attributes(self.attributes),
+            'status': {'code': self.status},
+        }
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        if self.events:
+            span['events'] = [
+                {
+                    'name': event['name'],
+                    'timeUnixNano': str(event['time_ns']),
+                    'attributes': otlp_attributes(event['attributes']),
+                }
+                for event in self.events
+            ]
+        return span
+
+def otlp_attributes(attributes):
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            value = {'boolValue': value}
+        elif isinstance(value, int):
+            value = {'intValue': str(value)}
+        elif isinstance(value, float):
+            value = {'doubleValue': value}
+        else:
+            value = {'stringValue': str(value)}
+        encoded.append({'key': key, 'value': value})
+    return encoded
+
+def encode_otlp(spans, resource):
+    """OTLP/JSON ExportTraceServiceRequest for a batch of spans"""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': otlp_attributes(resource)},
+            'scopeSpans': [{
+                'scope': {'name': 'phantom_apps.common.tracing'},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }],
+    }
+
+def current_span():
+    """The active sampled span, or NOOP_SPAN"""
+    span = _current.get()
+    return span if span is not None and span.recording else NOOP_SPAN
+
+def start_span(name, kind=INTERNAL, attributes=None):
+    """Child of the active span; NOOP_SPAN when the trace is unsampled or there is none"""
+    parent = _current.get()
+    if parent is None or not parent.recording:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+def start_trace(name, traceparent=None, kind=SERVER, attributes=None):
+    """
+    Root span of this service's part of a trace, continuing ``traceparent``
+    when it is valid. Unsampled traces get a NonRecordingSpan.
+    """
+    context = parse_traceparent(traceparent) if traceparent else None
+    if context is not None:
+        trace_id, parent_id, sampled = context
+    else:
+        trace_id, parent_id, sampled = new_trace_id(), None, random.random() < tracer.sample_rate
+    if not sampled:
+        # Nothing is recorded here, so downstream services see the caller as their parent
+        return NonRecordingSpan(trace_id, parent_id or new_span_id())
+    return Span(name, trace_id, parent_id, kind, attributes)
+
+def inject(headers):
+    """Add the active trace context to outgoing request or message headers"""
+    span = _current.get()
+    if span is not None:
+        headers['traceparent'] = span.traceparent
+
+def traced(name, kind=INTERNAL):
+    """Decorator: run the function in a child span of the active span"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None or not parent.recording:
+                return func(*args, **kwargs)
+            with Span(name, parent.trace_id, parent.span_id, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class FileExporter:
+    """Appends one OTLP/JSON line per batch (the collector file exporter format)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans, resource):
+        line = orjson.dumps(encode_otlp(spans, resource)) + b'\n'
+        # One append-mode write per batch, so workers sharing the file do not interleave lines
+        with open(self.path, 'ab') as f:
+            f.write(line)
+
+class OTLPHTTPExporter:
+    """POSTs OTLP/JSON batches to an OTLP/HTTP receiver (``<endpoint>/v1/traces``)"""
+
+    def __init__(self, endpoint, timeout=5.0):
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.timeout = timeout
+        self._pid = None
+        self._pool_manager = None
+
+    @property
+    def pool_manager(self):
+        if self._pid != os.getpid():
+            self._pool_manager = urllib3.PoolManager(num_pools=1, maxsize=1, retries=False, timeout=self.timeout)
+            self._pid = os.getpid()
+        return self._pool_manager
+
+    def export(self, spans, resource):
+        response = self.pool_manager.request(
+            'POST', self.url, body=orjson.dumps(encode_otlp(spans, resource)),
+            headers={'Content-Type': 'application/json'},
+        )
+        if response.status >= 300:
+            raise urllib3.exceptions.HTTPError(f"OTLP receiver returned {response.status}")
+
+class MemoryExporter:
+    """Keeps exported spans in memory (tests, debugging)"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans, resource):
+        self.spans.extend(spans)
+
+class NoneExporter:
+    def export(self, spans, resource):
+        pass
+
+def build_exporter(config):
+    kind = config['EXPORTER']
+    if kind == 'file':
+        return FileExporter(config['FILE_PATH'])
+    if kind == 'otlp':
+        return OTLPHTTPExporter(config['OTLP_ENDPOINT'])
+    if kind == 'memory':
+        return MemoryExporter()
+    if kind == 'none':
+        return NoneExporter()
+    raise ValueError(f"Unknown TRACING['EXPORTER']: {kind}")
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them in batches from a daemon thread"""
+
+    def __init__(self, exporter, resource, batch_size=512, max_queue=2048, interval=5.0):
+        self.exporter = exporter
+        self.resource = resource
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.interval = interval
+        self.dropped = 0
+        self._spans = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._pid = None
+
+    def on_end(self, span):
+        # The export thread does not survive gunicorn's fork
+        if self._pid != os.getpid():
+            self._start()
+        with self._lock:
+            if len(self._spans) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._spans.append(span)
+            full = len(self._spans) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Spans queued before a fork are the parent's to export
+            self._spans = []
+            threading.Thread(target=self._run, name='span-exporter', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+        try:
+            self.exporter.export(spans, self.resource)
+        except Exception as e:
+            logger.warning(f"Span export failed, dropped {len(spans)} spans: {e}")
+
+    def shutdown(self):
+        self._stopped = True
+        self._wakeup.set()
+        self.flush()
+
+class Tracer:
+    """Per-process sampling configuration and span processor"""
+
+    def __init__(self):
+        self.processor = None
+        self.configure()
+
+    def configure(self):
+        config = settings.TRACING
+        if self.processor is not None:
+            self.processor.shutdown()
+        self.sample_rate = config['SAMPLE_RATE']
+        resource = {'service.name': config['SERVICE_NAME'], 'process.pid': os.getpid()}
+        self.processor = BatchSpanProcessor(
+            build_exporter(config),
+            resource,
+            batch_size=config['BATCH_SIZE'],
+            max_queue=config['MAX_QUEUE'],
+            interval=config['EXPORT_INTERVAL'],
+        )
+
+    def force_flush(self):
+        self.processor.flush()
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+tracer = Tracer()
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    parent = _current.get()
+    if parent is None or not parent.recording:
+        return execute(sql, params, many, context)
+    connection = context['connection']
+    operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'QUERY'
+    # SQL text only: parameters (customer data) are never recorded
+    attributes = {
+        'db.system': connection.vendor,
+        'db.name': connection.alias,
+        'db.operation': operation,
+        'db.statement': sql[:MAX_STATEMENT_LENGTH],
+    }
+    if many:
+        attributes['db.executemany'] = True
+    with Span(f'db.{operation}', parent.trace_id, parent.span_id, CLIENT, attributes):
+        return execute(sql, params, many, context)
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, db_execute_wrapper)
+
+class TracedRedisClient(InstrumentedRedisClient):
+    """InstrumentedRedisClient that also records a span per cache operation of sampled traces"""
+
+    def _traced(self, operation, method, *args, **kwargs):
+        parent = _current.get()
+        if parent is None or not parent.recording:
+            return method(*args, **kwargs)
+        attributes = {'db.system': 'redis', 'db.operation': operation}
+        with Span(f'cache.{operation}', parent.trace_id, parent.span_id, CLIENT, attributes):
+            return method(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        return self._traced('get', super().get, *args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        return self._traced('get_many', super().get_many, *args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._traced('set', super().set, *args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        return self._traced('set_many', super().set_many, *args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        return self._traced('add', super().add, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._traced('delete', super().delete, *args, **kwargs)
+
+    def delete_many(self, *args, **kwargs):
+        return self._traced('delete_many', super().delete_many, *args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        return self._traced('incr', super().incr, *args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        return self._traced('has_key', super().has_key, *args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        return self._traced('touch', super().touch, *args, **kwargs)
+
+# Celery: publishers inject the context into the message headers; workers
+# start a CONSUMER span per task run. Eager tasks (apply()) publish nothing
+# and nest under the caller's span instead.
+_task_spans = {}
+
+def _task_traceparent(request):
+    traceparent = getattr(request, 'traceparent', None)
+    if traceparent is None and isinstance(getattr(request, 'headers', None), dict):
+        traceparent = request.headers.get('traceparent')
+    return traceparent
+
+def _before_task_publish(headers=None, **kwargs):
+    if headers is not None:
+        inject(headers)
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    name = f'celery.run {task.name}'
+    attributes = {'messaging.system': 'celery', 'celery.task_id': task_id}
+    traceparent = _task_traceparent(task.request)
+    if traceparent is None and _current.get() is not None:
+        span = start_span(name, CONSUMER, attributes)
+    else:
+        span = start_trace(name, traceparent, CONSUMER, attributes)
+    _task_spans[task_id] = span.__enter__()
+
+def _task_failure(task_id=None, exception=None, **kwargs):
+    span = _task_spans.get(task_id)
+    if span is not None and exception is not None:
+        span.record_exception(exception)
+
+def _task_postrun(task_id=None, state=None, **kwargs):
+    span = _task_spans.pop(task_id, None)
+    if span is None:
+        return
+    if state:
+        span.set_attribute('celery.state', state)
+    span.__exit__(None, None, None)
+
+def _settings_changed(setting, **kwargs):
+    if setting == 'TRACING':
+        tracer.configure()
+
+setting_changed.connect(_settings_changed, dispatch_uid='tracing_settings')
+
+def install():
+    """Install the DB and Celery hooks (once, from CommonConfig.ready)"""
+    from celery import signals
+
+    connection_created.connect(_install_db_wrapper, dispatch_uid='tracing_db_wrapper')
+    signals.before_task_publish.connect(_before_task_publish, dispatch_uid='tracing_task_publish')
+    signals.task_prerun.connect(_task_prerun, dispatch_uid='tracing_task_prerun')
+    signals.task_failure.connect(_task_failure, dispatch_uid='tracing_task_failure')
+    signals.task_postrun.connect(_task_postrun, dispatch_uid='tracing_task_postrun')
+    atexit.register(tracer.shutdown)
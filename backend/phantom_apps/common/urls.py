@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 app_name = 'common'
@@ -6,4 +6,9 @@ app_name = 'common'
 urlpatterns = [
     path('health/', views.HealthCheckView.as_view(), name='health'),
     path('health/database/', views.DatabaseHealthView.as_view(), name='database_health'),
+    path('health/ready/', views.ReadinessView.as_view(), name='readiness'),
+    re_path(r'^metrics/?$', views.MetricsView.as_view(), name='metrics'),
+    path('slow-queries/', views.SlowQueriesView.as_view(), name='slow_queries'),
+    path('profile/', views.ProfileView.as_view(), name='profile'),
+    path('profile/<str:profile_id>/', views.ProfileResultView.as_view(), name='profile_result'),
 ]
@@ -1,9 +1,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from django.db import connection
 from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from phantom_apps.common import metrics, readiness
+from phantom_apps.common.profiler import ProfilerBusy, fetch as fetch_profile, profiler
+from phantom_apps.common.db.pool import pool_metrics
+from phantom_apps.common.db.transactions import TransactionPolicyMixin, READ_ONLY
+from phantom_apps.common.db.slow_queries import ORDERINGS, slow_query_log
+import hmac
 import time
 import logging
 
@@ -39,6 +47,7 @@ class DatabaseHealthView(APIView):
                     'status': 'healthy',
                     'connection_time_ms': round(connection_time * 1000, 2),
                     'engine': settings.DATABASES['default']['ENGINE'],
+                    'pool': pool_metrics('default'),
                 }
             })
         except Exception as e:
@@ -49,3 +58,112 @@ class DatabaseHealthView(APIView):
                     'error': str(e)
                 }
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+class ReadinessView(View):
+    """Readiness from the background checker's snapshot (?verbose=1 adds latency history)"""
+    
+    def get(self, request):
+        ready, body = readiness.get_checker().current(verbose=request.GET.get('verbose') == '1')
+        return HttpResponse(body, status=200 if ready else 503, content_type='application/json')
+
+class MetricsView(View):
+    """Prometheus scrape endpoint (all gunicorn workers merged); needs METRICS['AUTH_TOKEN'] unless DEBUG"""
+    
+    def get(self, request):
+        token = settings.METRICS['AUTH_TOKEN']
+        if not token and not settings.DEBUG:
+            return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+        if token:
+            supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        body, content_type = metrics.render_latest()
+        return HttpResponse(body, content_type=content_type)
+
+class SlowQueriesView(APIView):
+    """Worst SQL fingerprints of this worker: ?limit=20&order=total|max|mean|slow|count"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        ordering = request.query_params.get('order', 'total')
+        if ordering not in ORDERINGS:
+            return Response(
+                {'error': f"order must be one of {', '.join(ORDERINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 200)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'enabled': settings.SLOW_QUERIES['ENABLED'],
+            'threshold_ms': slow_query_log.threshold_ms,
+            'order': ordering,
+            'results': slow_query_log.top(limit, ordering),
+        })
+
+def collapsed_response(collapsed, summary):
+    response = HttpResponse(collapsed, content_type='text/plain; charset=utf-8')
+    response['X-Profile-Samples'] = summary['samples']
+    response['X-Profile-Rate'] = summary['rate']
+    response['X-Profile-Duration'] = summary['duration_s']
+    response['X-Profile-Overhead-Ms'] = summary['overhead_ms']
+    return response
+
+class ProfileView(TransactionPolicyMixin, APIView):
+    """
+    Sampling profile of this worker as collapsed stacks.
+    GET ?seconds=5&rate=100 samples while the request waits; POST starts a
+    background session to fetch from /profile/<id>/.
+    """
+    permission_classes = [IsAdminUser]
+    # Starting a session only writes to the cache
+    transaction_policies = {'post': READ_ONLY}
+    
+    def limits(self, params):
+        return profiler.limits(params.get('seconds', 5), params.get('rate', settings.PROFILER['SAMPLE_RATE']))
+    
+    def get(self, request):
+        if not settings.PROFILER['ENABLED']:
+            return Response({'error': 'Profiler is disabled'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            seconds, rate = self.limits(request.query_params)
+        except ValueError:
+            return Response({'error': 'seconds and rate must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            profile = profiler.run(seconds, rate)
+        except ProfilerBusy:
+            return Response({'error': 'A profile is already running in this worker'}, status=status.HTTP_409_CONFLICT)
+        return collapsed_response(profile.collapsed(), profile.summary())
+    
+    def post(self, request):
+        if not settings.PROFILER['ENABLED']:
+            return Response({'error': 'Profiler is disabled'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            seconds, rate = self.limits(request.data)
+        except (TypeError, ValueError):
+            return Response({'error': 'seconds and rate must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            profile_id = profiler.start(seconds, rate)
+        except ProfilerBusy:
+            return Response({'error': 'A profile is already running in this worker'}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'profile_id': profile_id,
+            'seconds': seconds,
+            'rate': rate,
+            'result_url': request.build_absolute_uri(f'{profile_id}/'),
+        }, status=status.HTTP_202_ACCEPTED)
+
+class ProfileResultView(APIView):
+    """Result of a background profile: 202 while running, then collapsed stacks"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, profile_id):
+        result = fetch_profile(profile_id)
+        if result is None:
+            return Response({'error': 'Unknown or expired profile'}, status=status.HTTP_404_NOT_FOUND)
+        if result['status'] == 'running':
+            return Response(result, status=status.HTTP_202_ACCEPTED)
+        if result['status'] == 'failed':
+            return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return collapsed_response(result['collapsed'], result)
@@ -1,11 +1,11 @@
 from django.db import models
 from django.utils import timezone
-import uuid
+from phantom_apps.common.ids import uuid7
 
 class Customer(models.Model):
     """Customer model for phantom wallet users"""
     
-    customer_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    customer_id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     merchant = models.ForeignKey('merchants.Merchant', on_delete=models.CASCADE, related_name='customers')
     
     # Personal information
@@ -29,6 +29,9 @@ class Customer(models.Model):
         db_table = 'customers'
         ordering = ['-created_at']
         unique_together = ['merchant', 'phone_number']
+        indexes = [
+            models.Index(fields=['merchant', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
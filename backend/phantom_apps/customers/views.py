@@ -5,13 +5,32 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import Customer
 from .serializers import CustomerSerializer, CustomerCreateSerializer
 from ..common.permissions import IsMerchantOwner
+from ..common.db.routers import ReadReplicaMixin
+from ..common.db.transactions import TransactionPolicyMixin, AUTOCOMMIT
+from ..common.db.query_budget import QueryBudgetMixin
 import logging
 
 logger = logging.getLogger('phantom_apps')
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(QueryBudgetMixin, TransactionPolicyMixin, ReadReplicaMixin, viewsets.ModelViewSet):
     """ViewSet for customer operations"""
     
+    # Single-row writes commit on their own
+    transaction_policies = {
+        'create': AUTOCOMMIT,
+        'update': AUTOCOMMIT,
+        'partial_update': AUTOCOMMIT,
+        'destroy': AUTOCOMMIT,
+    }
+    # request.user.merchant is one query; destroy collects wallets and deletes their transactions
+    query_budgets = {
+        'list': 3,
+        'retrieve': 2,
+        'create': 2,
+        'update': 3,
+        'partial_update': 3,
+        'destroy': 6,
+    }
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
     
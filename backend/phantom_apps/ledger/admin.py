@@ -0,0 +1,30 @@
+from django.contrib import admin
+from .models import LedgerAccount, JournalEntry, BalanceSnapshot
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """The journal is append-only, also in the admin"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(LedgerAccount)
+class LedgerAccountAdmin(ReadOnlyAdmin):
+    list_display = ['code', 'account_type', 'currency', 'created_at']
+    list_filter = ['account_type']
+    search_fields = ['code']
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(ReadOnlyAdmin):
+    list_display = ['entry_id', 'journal_id', 'account', 'amount', 'transaction_id', 'created_at']
+    search_fields = ['journal_id', 'transaction_id', 'account__code']
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(ReadOnlyAdmin):
+    list_display = ['account', 'balance', 'as_of_entry_id', 'as_of']
+    search_fields = ['account__code']
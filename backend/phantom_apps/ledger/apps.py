@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+class LedgerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'phantom_apps.ledger'
+    verbose_name = 'Ledger'
@@ -0,0 +1,104 @@
+from django.db import models
+from django.utils import timezone
+import uuid
+
+class AppendOnlyQuerySet(models.QuerySet):
+    """Journal rows are never changed or removed once written"""
+    
+    def update(self, **kwargs):
+        raise TypeError(f"{self.model.__name__} is append-only")
+    
+    def delete(self):
+        raise TypeError(f"{self.model.__name__} is append-only")
+
+class LedgerAccount(models.Model):
+    """
+    An account in the double-entry journal.
+    
+    Accounts reference wallets and merchants by id only, so the journal
+    outlives (and is never cascaded by) changes to operational tables.
+    """
+    
+    ACCOUNT_TYPES = [
+        ('wallet', 'Customer wallet'),
+        ('merchant_float', 'Merchant float'),
+        ('merchant_fees', 'Merchant fees payable'),
+        ('fee_income', 'Platform fee income'),
+    ]
+    
+    account_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    code = models.CharField(max_length=64, unique=True)
+    account_type = models.CharField(max_length=20, choices=ACCOUNT_TYPES)
+    wallet_id = models.UUIDField(null=True, blank=True)
+    merchant_id = models.UUIDField(null=True, blank=True)
+    currency = models.CharField(max_length=3, default='BWP')
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'ledger_accounts'
+        ordering = ['code']
+    
+    def __str__(self):
+        return self.code
+
+class JournalEntry(models.Model):
+    """
+    One line of a journal posting.
+    
+    ``amount`` is signed: credits are positive, debits negative, so the lines
+    of every journal sum to zero and an account's balance is SUM(amount).
+    The auto-increment ``entry_id`` orders lines and bounds snapshot scans.
+    """
+    
+    entry_id = models.BigAutoField(primary_key=True)
+    journal_id = models.UUIDField()
+    account = models.ForeignKey(LedgerAccount, on_delete=models.PROTECT, related_name='entries')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    transaction_id = models.UUIDField(null=True, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    objects = AppendOnlyQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'ledger_journal_entries'
+        ordering = ['entry_id']
+        indexes = [
+            models.Index(fields=['account', 'entry_id']),
+            models.Index(fields=['journal_id']),
+            models.Index(fields=['transaction_id']),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("JournalEntry is append-only")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise TypeError("JournalEntry is append-only")
+    
+    def __str__(self):
+        return f"{self.account} {self.amount:+}"
+
+class BalanceSnapshot(models.Model):
+    """Balance of an account including every entry up to ``as_of_entry_id``"""
+    
+    snapshot_id = models.BigAutoField(primary_key=True)
+    account = models.ForeignKey(LedgerAccount, on_delete=models.PROTECT, related_name='snapshots')
+    as_of_entry_id = models.BigIntegerField()
+    as_of = models.DateTimeField()
+    balance = models.DecimalField(max_digits=17, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    objects = AppendOnlyQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'ledger_balance_snapshots'
+        ordering = ['-as_of_entry_id']
+        indexes = [
+            models.Index(fields=['account', 'as_of']),
+            models.Index(fields=['as_of_entry_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.account} {self.balance} @ {self.as_of_entry_id}"
@@ -0,0 +1,330 @@
+"""
+Append-only double-entry journal.
+
+Every posting writes balanced lines (they sum to zero) across the customer
+wallet, the merchant float and - when a fee applies - the merchant's fees
+payable and platform fee income accounts. A transfer moves the amount from
+one wallet account to the other (and between the two merchant floats when
+the wallets belong to different merchants). Amounts are signed: credits
+positive, debits negative.
+
+Lines of one posting are written with a single multi-row INSERT in the
+posting's DB transaction. Inside ``journal_batch()`` the lines of many
+postings are buffered and written with one INSERT per BATCH_SIZE lines when
+the block exits, inside the same DB transaction.
+
+Historical balances come from the latest BalanceSnapshot at or before the
+requested time plus the account's entries after it, so the scan is bounded
+by the snapshot interval rather than the account's age.
+"""
+import contextvars
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .models import LedgerAccount, JournalEntry, BalanceSnapshot
+
+logger = logging.getLogger('phantom_apps')
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+HALF_CENT = Decimal('0.005')
+FEE_INCOME_CODE = 'fee_income'
+POSTING_SIGN = {
+    'credit': 1,
+    'debit': -1,
+}
+
+class AccountIdCache:
+    """Per-worker LRU of account code -> pk, at most LEDGER_SETTINGS['ACCOUNT_CACHE_SIZE'] codes"""
+
+    def __init__(self):
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, codes):
+        found = {}
+        with self._lock:
+            for code in codes:
+                pk = self._ids.get(code)
+                if pk is not None:
+                    self._ids.move_to_end(code)
+                    found[code] = pk
+        return found
+
+    def update(self, ids):
+        max_size = settings.LEDGER_SETTINGS['ACCOUNT_CACHE_SIZE']
+        with self._lock:
+            for code, pk in ids.items():
+                self._ids[code] = pk
+                self._ids.move_to_end(code)
+            while len(self._ids) > max_size:
+                self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def __len__(self):
+        return len(self._ids)
+
+# Only filled once the account row is committed
+_account_ids = AccountIdCache()
+_batch = contextvars.ContextVar('ledger_journal_batch', default=None)
+
+class JournalBatch:
+    """Lines and account ids buffered by journal_batch()"""
+
+    def __init__(self):
+        self.lines = []
+        self.account_ids = {}
+
+def wallet_account_code(wallet_id):
+    return f"wallet:{wallet_id}"
+
+def float_account_code(merchant_id):
+    return f"float:{merchant_id}"
+
+def merchant_fees_account_code(merchant_id):
+    return f"fees:{merchant_id}"
+
+def resolve_accounts(specs):
+    """
+    Primary keys for ``{code: field defaults}``, creating missing accounts.
+
+    Uncached codes cost one SELECT (plus one INSERT and SELECT the first time
+    an account is used). Ids enter the process cache only after commit; a
+    batch also remembers them for the rest of its own transaction.
+    """
+    batch = _batch.get()
+    local = batch.account_ids if batch is not None else {}
+    cached = _account_ids.get_many(specs)
+    missing = [code for code in specs if code not in cached and code not in local]
+    if missing:
+        found = dict(LedgerAccount.objects.filter(code__in=missing).values_list('code', 'pk'))
+        to_create = [LedgerAccount(code=code, **specs[code]) for code in missing if code not in found]
+        if to_create:
+            LedgerAccount.objects.bulk_create(to_create, ignore_conflicts=True)
+            found.update(
+                LedgerAccount.objects.filter(code__in=[account.code for account in to_create])
+                .values_list('code', 'pk')
+            )
+        local.update(found)
+        transaction.on_commit(lambda: _account_ids.update(found))
+    return {code: cached.get(code) or local[code] for code in specs}
+
+def _wallet_spec(wallet_id, merchant_id, currency):
+    return {'account_type': 'wallet', 'currency': currency, 'wallet_id': wallet_id, 'merchant_id': merchant_id}
+
+def _float_spec(merchant_id, currency):
+    return {'account_type': 'merchant_float', 'currency': currency, 'merchant_id': merchant_id}
+
+def _journal_lines(posted, specs, legs):
+    """Fee legs (charged to the posting's merchant) added, account ids resolved"""
+    if posted.fees:
+        currency = posted.currency
+        fees_code = merchant_fees_account_code(posted.merchant_id)
+        specs[fees_code] = {'account_type': 'merchant_fees', 'currency': currency, 'merchant_id': posted.merchant_id}
+        specs[FEE_INCOME_CODE] = {'account_type': 'fee_income', 'currency': currency}
+        legs.append((fees_code, -posted.fees))
+        legs.append((FEE_INCOME_CODE, posted.fees))
+
+    account_ids = resolve_accounts(specs)
+    return [
+        JournalEntry(
+            journal_id=posted.transaction_id,
+            account_id=account_ids[code],
+            amount=amount,
+            transaction_id=posted.transaction_id,
+            description=posted.reference_number,
+        )
+        for code, amount in legs
+    ]
+
+def posting_lines(posted):
+    """Balanced journal lines for a posted wallet credit or debit"""
+    sign = POSTING_SIGN[posted.transaction_type]
+    currency = posted.currency
+    wallet_code = wallet_account_code(posted.wallet_id)
+    float_code = float_account_code(posted.merchant_id)
+
+    specs = {
+        wallet_code: _wallet_spec(posted.wallet_id, posted.merchant_id, currency),
+        float_code: _float_spec(posted.merchant_id, currency),
+    }
+    legs = [
+        (wallet_code, posted.amount * sign),
+        (float_code, -posted.amount * sign),
+    ]
+    return _journal_lines(posted, specs, legs)
+
+def transfer_lines(posted):
+    """Balanced journal lines for a transfer from ``posted.wallet`` to ``posted.destination_wallet``"""
+    currency = posted.currency
+    destination = posted.destination_wallet
+    source_code = wallet_account_code(posted.wallet_id)
+    destination_code = wallet_account_code(destination.pk)
+
+    specs = {
+        source_code: _wallet_spec(posted.wallet_id, posted.merchant_id, currency),
+        destination_code: _wallet_spec(destination.pk, destination.merchant_id, currency),
+    }
+    legs = [
+        (source_code, -posted.amount),
+        (destination_code, posted.amount),
+    ]
+    if destination.merchant_id != posted.merchant_id:
+        # Each float mirrors its own merchant's wallets
+        source_float = float_account_code(posted.merchant_id)
+        destination_float = float_account_code(destination.merchant_id)
+        specs[source_float] = _float_spec(posted.merchant_id, currency)
+        specs[destination_float] = _float_spec(destination.merchant_id, currency)
+        legs.append((source_float, posted.amount))
+        legs.append((destination_float, -posted.amount))
+    return _journal_lines(posted, specs, legs)
+
+def write_lines(lines):
+    """Write journal lines now, or buffer them when inside journal_batch()"""
+    batch = _batch.get()
+    if batch is not None:
+        batch.lines.extend(lines)
+        return
+    JournalEntry.objects.bulk_create(lines, batch_size=settings.LEDGER_SETTINGS['BATCH_SIZE'])
+
+def record_posting(posted):
+    """Journal a posted Transaction; call inside the posting's DB transaction"""
+    if posted.transaction_type == 'transfer':
+        write_lines(transfer_lines(posted))
+    else:
+        write_lines(posting_lines(posted))
+
+@contextmanager
+def journal_batch():
+    """
+    Buffer journal lines of every posting in the block and write them in bulk.
+
+    The block runs in one DB transaction, so postings and their lines commit
+    (or roll back) together.
+    """
+    if _batch.get() is not None:
+        # Already batching: the outer block flushes
+        yield
+        return
+
+    batch = JournalBatch()
+    token = _batch.set(batch)
+    try:
+        with transaction.atomic():
+            yield
+            if batch.lines:
+                JournalEntry.objects.bulk_create(batch.lines, batch_size=settings.LEDGER_SETTINGS['BATCH_SIZE'])
+    finally:
+        _batch.reset(token)
+
+def balance_at(account_id, at=None):
+    """Balance of an account at a point in time (now when ``at`` is None)"""
+    snapshots = BalanceSnapshot.objects.filter(account_id=account_id)
+    entries = JournalEntry.objects.filter(account_id=account_id)
+    if at is not None:
+        snapshots = snapshots.filter(as_of__lte=at)
+        entries = entries.filter(created_at__lte=at)
+
+    snapshot = snapshots.order_by('-as_of', '-as_of_entry_id').values('as_of_entry_id', 'balance').first()
+    opening = ZERO
+    if snapshot is not None:
+        opening = snapshot['balance']
+        entries = entries.filter(entry_id__gt=snapshot['as_of_entry_id'])
+    # Quantize: SQLite sums decimals as floats
+    return (opening + entries.aggregate(total=Sum('amount', default=ZERO))['total']).quantize(CENT)
+
+def wallet_balance_at(wallet_id, at=None):
+    """Journal balance of a wallet at a point in time"""
+    account_id = (
+        LedgerAccount.objects.filter(code=wallet_account_code(wallet_id))
+        .values_list('pk', flat=True)
+        .first()
+    )
+    return ZERO if account_id is None else balance_at(account_id, at)
+
+def unbalanced_journals(since_entry_id=0):
+    """Journal ids whose lines do not sum to zero (should always be empty)"""
+    return list(
+        JournalEntry.objects.filter(entry_id__gt=since_entry_id)
+        .values('journal_id')
+        .annotate(total=Sum('amount'))
+        .filter(Q(total__gte=HALF_CENT) | Q(total__lte=-HALF_CENT))
+        .order_by()
+        .values_list('journal_id', flat=True)
+    )
+
+def take_balance_snapshots(now=None, chunk_size=1000):
+    """
+    Snapshot every account with entries since the previous snapshot round.
+
+    Entries newer than SNAPSHOT_SETTLE_SECONDS are left for the next round,
+    so lines of still-open DB transactions (lower ids committed late) are
+    not skipped.
+    """
+    now = now or timezone.now()
+    # One round is all-or-nothing: the next round starts after its watermark
+    with transaction.atomic():
+        return _take_balance_snapshots(now, chunk_size)
+
+def _take_balance_snapshots(now, chunk_size):
+    cutoff = now - timedelta(seconds=settings.LEDGER_SETTINGS['SNAPSHOT_SETTLE_SECONDS'])
+    upto = (
+        JournalEntry.objects.filter(created_at__lt=cutoff)
+        .order_by('-entry_id')
+        .values_list('entry_id', flat=True)
+        .first()
+    )
+    since = (
+        BalanceSnapshot.objects.order_by('-as_of_entry_id')
+        .values_list('as_of_entry_id', flat=True)
+        .first()
+    ) or 0
+    if upto is None or upto <= since:
+        return 0
+
+    deltas = dict(
+        JournalEntry.objects.filter(entry_id__gt=since, entry_id__lte=upto)
+        .values('account_id')
+        .annotate(delta=Sum('amount'))
+        .order_by()
+        .values_list('account_id', 'delta')
+    )
+    account_ids = list(deltas)
+    created = 0
+    for start in range(0, len(account_ids), chunk_size):
+        chunk = account_ids[start:start + chunk_size]
+        previous = dict(
+            LedgerAccount.objects.filter(pk__in=chunk)
+            .annotate(last_balance=Subquery(
+                BalanceSnapshot.objects.filter(account=OuterRef('pk'))
+                .order_by('-as_of_entry_id')
+                .values('balance')[:1]
+            ))
+            .values_list('pk', 'last_balance')
+        )
+        snapshots = [
+            BalanceSnapshot(
+                account_id=account_id,
+                as_of_entry_id=upto,
+                as_of=cutoff,
+                balance=((previous.get(account_id) or ZERO) + deltas[account_id]).quantize(CENT),
+            )
+            for account_id in chunk
+        ]
+        BalanceSnapshot.objects.bulk_create(snapshots, batch_size=chunk_size)
+        created += len(snapshots)
+
+    logger.info(f"Ledger snapshots: {created} accounts up to entry {upto}")
+    return created
@@ -0,0 +1,10 @@
+from celery import shared_task
+from . import services
+import logging
+
+logger = logging.getLogger('phantom_apps')
+
+@shared_task
+def take_balance_snapshots():
+    """Periodic balance snapshots bounding historical balance scans"""
+    return services.take_balance_snapshots()
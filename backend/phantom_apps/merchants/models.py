@@ -52,6 +52,14 @@ class APICredential(models.Model):
     class Meta:
         db_table = 'api_credentials'
         ordering = ['-created_at']
+        indexes = [
+            # Active credentials of a merchant, newest first (partial: a boolean filter
+            # is a bare column test, which cannot be an index's equality prefix)
+            models.Index(
+                fields=['merchant', '-created_at'], condition=models.Q(is_active=True),
+                name='api_credentials_active_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.merchant.business_name} - {self.api_key[:8]}..."
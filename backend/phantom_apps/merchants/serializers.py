@@ -1,3 +1,4 @@
+import secrets
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Merchant, APICredential
@@ -36,8 +37,8 @@ class MerchantRegistrationSerializer(serializers.ModelSerializer):
             password=password
         )
         
-        # Create merchant
-        merchant = Merchant.objects.create(user=user, **validated_data)
+        # Create merchant (api_key is unique, so every merchant needs its own)
+        merchant = Merchant.objects.create(user=user, api_key=f"pk_{secrets.token_hex(24)}", **validated_data)
         return merchant
 
 class MerchantSerializer(serializers.ModelSerializer):
@@ -4,15 +4,35 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth import authenticate
+from phantom_apps.common.db.routers import read_replica
+from phantom_apps.common.db.transactions import TransactionPolicyMixin, AUTOCOMMIT, ATOMIC
+from phantom_apps.common.db.query_budget import QueryBudgetMixin
 from .models import Merchant, APICredential
 from .serializers import MerchantRegistrationSerializer, MerchantSerializer, APICredentialSerializer
 import logging
 
 logger = logging.getLogger('phantom_apps')
 
-class MerchantViewSet(viewsets.ModelViewSet):
+class MerchantViewSet(QueryBudgetMixin, TransactionPolicyMixin, viewsets.ModelViewSet):
     """ViewSet for merchant operations"""
     
+    transaction_policies = {
+        'create': AUTOCOMMIT,
+        'update': AUTOCOMMIT,
+        'partial_update': AUTOCOMMIT,
+        'destroy': AUTOCOMMIT,
+        'register': ATOMIC,  # User and merchant rows together
+        'generate_api_credentials': AUTOCOMMIT,
+    }
+    query_budgets = {
+        'list': 2,
+        'retrieve': 1,
+        'update': 2,
+        'partial_update': 2,
+        'register': 4,
+        'dashboard': 1,
+        'generate_api_credentials': 1,
+    }
     queryset = Merchant.objects.all()
     serializer_class = MerchantSerializer
     authentication_classes = [JWTAuthentication]
@@ -36,6 +56,7 @@ class MerchantViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
+    @read_replica
     def dashboard(self, request):
         """Get merchant dashboard data"""
         try:
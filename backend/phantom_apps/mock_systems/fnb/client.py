@@ -0,0 +1,74 @@
+"""
+Client for the (mock) FNB banking API.
+
+Uses the shared pooled HTTP client so connections to FNB are kept alive
+between calls instead of opening a new TLS connection per request.
+"""
+from decimal import Decimal
+from django.conf import settings
+from phantom_apps.common.exceptions import ExternalServiceException
+from phantom_apps.common.http_client import PooledHTTPClient
+
+class FNBClient:
+    """Thin API wrapper around the FNB endpoints we use"""
+    
+    def __init__(self, base_url=None, api_key=None, api_secret=None, http=None, **http_options):
+        config = settings.PHANTOM_BANKING_SETTINGS
+        self.http = http or PooledHTTPClient(
+            base_url=base_url or config['MOCK_FNB_BASE_URL'],
+            headers={
+                'X-API-Key': api_key or config['MOCK_FNB_API_KEY'],
+                'X-API-Secret': api_secret or config['MOCK_FNB_API_SECRET'],
+                'Accept': 'application/json',
+            },
+            **http_options,
+        )
+    
+    def ping(self):
+        """Raise ExternalServiceException unless the FNB API answers its health check"""
+        response = self.http.get('health/')
+        if not response.ok:
+            raise ExternalServiceException("FNB health check failed", status_code=response.status)
+    
+    def get_balance(self, account_number):
+        """Balance of an FNB account; identical concurrent lookups share one request"""
+        response = self.http.get(f"accounts/{account_number}/balance/")
+        if not response.ok:
+            raise ExternalServiceException(
+                f"FNB balance lookup failed for {account_number}",
+                status_code=response.status,
+            )
+        data = response.json()
+        data['balance'] = Decimal(str(data['balance']))
+        return data
+    
+    def credit_account(self, account_number, amount, reference, description=''):
+        """Credit an FNB account; the reference doubles as idempotency key so retries are safe"""
+        response = self.http.post(
+            'transfers/credit/',
+            json_body={
+                'account_number': account_number,
+                'amount': str(amount),
+                'reference': reference,
+                'description': description,
+            },
+            idempotency_key=reference,
+        )
+        if not response.ok:
+            raise ExternalServiceException(
+                f"FNB credit of {amount} to {account_number} failed",
+                status_code=response.status,
+            )
+        return response.json()
+    
+    def pool_metrics(self):
+        return self.http.pool_metrics()
+
+_client = None
+
+def get_fnb_client():
+    """Process-wide FNB client so every caller shares the same connection pool"""
+    global _client
+    if _client is None:
+        _client = FNBClient()
+    return _client
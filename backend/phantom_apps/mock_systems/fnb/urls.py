@@ -1,7 +1,10 @@
 from django.urls import path
+from . import views
 
 app_name = 'mock_fnb'
 
 urlpatterns = [
-    # Mock FNB URLs will be defined here
+    path('health/', views.MockFNBHealthView.as_view(), name='health'),
+    path('accounts/<str:account_number>/balance/', views.MockFNBAccountBalanceView.as_view(), name='account_balance'),
+    path('transfers/credit/', views.MockFNBCreditView.as_view(), name='credit'),
 ]
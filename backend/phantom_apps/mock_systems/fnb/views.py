@@ -0,0 +1,97 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import BasePermission
+from rest_framework import status
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from decimal import Decimal, InvalidOperation
+from phantom_apps.common.db.transactions import TransactionPolicyMixin, AUTOCOMMIT
+from .models import MockFNBAccount, MockFNBTransaction
+import logging
+
+logger = logging.getLogger('phantom_apps')
+
+class HasMockFNBCredentials(BasePermission):
+    """Server-to-server auth using the configured mock FNB API key/secret"""
+    
+    def has_permission(self, request, view):
+        config = settings.PHANTOM_BANKING_SETTINGS
+        return (
+            request.headers.get('X-API-Key') == config['MOCK_FNB_API_KEY']
+            and request.headers.get('X-API-Secret') == config['MOCK_FNB_API_SECRET']
+        )
+
+class MockFNBView(TransactionPolicyMixin, APIView):
+    """Base view for the mock FNB API"""
+    authentication_classes = []
+    permission_classes = [HasMockFNBCredentials]
+    throttle_classes = []
+
+class MockFNBHealthView(MockFNBView):
+    """Liveness of the mock FNB API, for readiness probes"""
+    
+    def get(self, request):
+        return Response({'status': 'ok'})
+
+class MockFNBAccountBalanceView(MockFNBView):
+    """Balance lookup for a mock FNB account"""
+    
+    def get(self, request, account_number):
+        account = (
+            MockFNBAccount.objects
+            .filter(account_number=account_number)
+            .values('account_number', 'balance', 'currency', 'is_active')
+            .first()
+        )
+        if account is None:
+            return Response(
+                {'error': 'Account not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(account)
+
+class MockFNBCreditView(MockFNBView):
+    """Credit a mock FNB account; idempotent on the transfer reference"""
+    
+    transaction_policies = {'post': AUTOCOMMIT}
+    
+    def post(self, request):
+        reference = request.data.get('reference') or request.headers.get('Idempotency-Key')
+        account_number = request.data.get('account_number')
+        try:
+            amount = Decimal(str(request.data.get('amount')))
+        except (InvalidOperation, TypeError):
+            return Response({'error': 'Invalid amount'}, status=status.HTTP_400_BAD_REQUEST)
+        if not reference or not account_number or amount <= 0:
+            return Response(
+                {'error': 'account_number, a positive amount and reference are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            account = MockFNBAccount.objects.select_for_update().filter(
+                account_number=account_number, is_active=True
+            ).first()
+            if account is None:
+                return Response({'error': 'Account not found'}, status=status.HTTP_404_NOT_FOUND)
+            
+            existing = MockFNBTransaction.objects.filter(account=account, reference=reference).first()
+            if existing is None:
+                existing = MockFNBTransaction.objects.create(
+                    account=account,
+                    amount=amount,
+                    transaction_type='credit',
+                    reference=reference,
+                    description=request.data.get('description', ''),
+                )
+                MockFNBAccount.objects.filter(pk=account.pk).update(balance=F('balance') + amount)
+                logger.info(f"Mock FNB credited {amount} to {account_number} ({reference})")
+        
+        return Response({
+            'transaction_id': existing.transaction_id,
+            'account_number': account_number,
+            'amount': existing.amount,
+            'reference': existing.reference,
+            'status': 'completed',
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,28 @@
+"""
+Client for the (mock) mobile money API.
+
+Only the health check exists so far; payment calls are added here as the
+mobile money integration lands, sharing the pooled HTTP client like FNBClient.
+"""
+from django.conf import settings
+from phantom_apps.common.exceptions import ExternalServiceException
+from phantom_apps.common.http_client import PooledHTTPClient
+
+class MobileMoneyClient:
+    """Thin API wrapper around the mobile money endpoints we use"""
+    
+    def __init__(self, base_url=None, http=None, **http_options):
+        self.http = http or PooledHTTPClient(
+            base_url=base_url or settings.PHANTOM_BANKING_SETTINGS['MOCK_MOBILE_MONEY_BASE_URL'],
+            headers={'Accept': 'application/json'},
+            **http_options,
+        )
+    
+    def ping(self):
+        """Raise ExternalServiceException unless the mobile money API answers its health check"""
+        response = self.http.get('health/')
+        if not response.ok:
+            raise ExternalServiceException("Mobile money health check failed", status_code=response.status)
+    
+    def pool_metrics(self):
+        return self.http.pool_metrics()
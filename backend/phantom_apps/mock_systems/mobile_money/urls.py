@@ -1,7 +1,8 @@
 from django.urls import path
+from . import views
 
 app_name = 'mock_mobile_money'
 
 urlpatterns = [
-    # Mock Mobile Money URLs will be defined here
+    path('health/', views.MockMobileMoneyHealthView.as_view(), name='health'),
 ]
@@ -0,0 +1,12 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+
+class MockMobileMoneyHealthView(APIView):
+    """Liveness of the mock mobile money API, for readiness probes"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = []
+    
+    def get(self, request):
+        return Response({'status': 'ok'})
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import SettlementRun, MerchantSettlement
+
+@admin.register(SettlementRun)
+class SettlementRunAdmin(admin.ModelAdmin):
+    list_display = ['settlement_date', 'status', 'payout_mode', 'shard_count', 'created_at', 'completed_at']
+    list_filter = ['status', 'payout_mode']
+    readonly_fields = ['run_id', 'created_at', 'completed_at']
+
+@admin.register(MerchantSettlement)
+class MerchantSettlementAdmin(admin.ModelAdmin):
+    list_display = ['merchant', 'run', 'status', 'transaction_count', 'fees', 'opening_balance', 'net_amount', 'paid_at']
+    list_filter = ['status', 'run']
+    search_fields = ['merchant__business_name', 'fnb_account_number', 'payout_reference']
+    readonly_fields = ['settlement_id', 'created_at', 'updated_at', 'paid_at']
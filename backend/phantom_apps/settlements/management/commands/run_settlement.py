@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import date
+from phantom_apps.settlements import services
+from phantom_apps.settlements.tasks import run_end_of_day_settlement
+
+class Command(BaseCommand):
+    help = 'Run (or resume) end-of-day merchant settlement'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Settlement date (YYYY-MM-DD), defaults to today')
+        parser.add_argument(
+            '--sync', action='store_true',
+            help='Process all shards in this process instead of queueing Celery tasks'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            settlement_date = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+        
+        if not options['sync']:
+            result = run_end_of_day_settlement.delay(settlement_date.isoformat())
+            self.stdout.write(f"Queued settlement for {settlement_date} (task {result.id})")
+            return
+        
+        run = services.start_settlement_run(settlement_date)
+        for shard in range(run.shard_count):
+            failures = services.settle_shard(run, shard)
+            if failures:
+                self.stderr.write(f"Shard {shard}: {len(failures)} payouts failed")
+        run = services.finalize_settlement_run(run)
+        self.stdout.write(self.style.SUCCESS(f"Settlement {settlement_date}: {run.status}"))
+        if run.eft_file_path:
+            self.stdout.write(f"EFT batch file: {run.eft_file_path}")
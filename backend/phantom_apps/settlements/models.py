@@ -0,0 +1,94 @@
+from django.db import models
+from django.utils import timezone
+from decimal import Decimal
+import uuid
+
+class SettlementRun(models.Model):
+    """One end-of-day settlement run across all merchants"""
+    
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    run_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    settlement_date = models.DateField(unique=True)
+    cutoff = models.DateTimeField()
+    shard_count = models.PositiveIntegerField()
+    payout_mode = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    
+    # Batch EFT output (payout_mode == 'eft_file')
+    eft_file_path = models.CharField(max_length=255, blank=True)
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'settlement_runs'
+        ordering = ['-settlement_date']
+    
+    def __str__(self):
+        return f"Settlement {self.settlement_date} ({self.status})"
+
+class MerchantSettlement(models.Model):
+    """
+    Netted position of one merchant within a settlement run.
+    
+    Also the checkpoint for that merchant: transactions are claimed in chunks
+    (Transaction.settlement) in the same DB transaction that adds them to the
+    running totals, so a crashed worker resumes after the last claimed chunk.
+    
+    A negative net is not paid out: it is carried forward and opens the
+    merchant's next settlement (opening_balance), which records the
+    settlements it absorbed through carried_into.
+    """
+    
+    STATUS_CHOICES = [
+        ('netting', 'Netting'),
+        ('netted', 'Netted'),
+        ('paid', 'Paid'),
+        ('exported', 'Exported to EFT file'),
+        ('skipped', 'Skipped'),
+        ('carried_forward', 'Carried forward'),
+        ('failed', 'Failed'),
+    ]
+    
+    settlement_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    run = models.ForeignKey(SettlementRun, on_delete=models.CASCADE, related_name='merchant_settlements')
+    merchant = models.ForeignKey('merchants.Merchant', on_delete=models.CASCADE, related_name='settlements')
+    shard = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='netting')
+    
+    # Running totals
+    transaction_count = models.PositiveIntegerField(default=0)
+    gross_credits = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    gross_debits = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    fees = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    # Deficits carried in from earlier runs (zero or negative)
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    net_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    
+    # Payout
+    fnb_account_number = models.CharField(max_length=20)
+    payout_reference = models.CharField(max_length=100, unique=True)
+    failure_reason = models.TextField(blank=True)
+    carried_into = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='carried_from'
+    )
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'merchant_settlements'
+        ordering = ['-created_at']
+        unique_together = ['run', 'merchant']
+        indexes = [
+            models.Index(fields=['run', 'shard', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.merchant} - {self.net_amount} ({self.status})"
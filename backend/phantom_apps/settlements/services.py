@@ -0,0 +1,276 @@
+"""
+End-of-day settlement of merchant collections to their FNB accounts.
+
+A run has three phases, each safe to repeat after a crash:
+
+1. plan   - one MerchantSettlement per merchant with unsettled completed
+            transactions, assigned to a shard
+2. net    - per merchant, claim transactions in chunks and add them to the
+            running totals in the same DB transaction (the checkpoint); a
+            negative net is carried forward into the merchant's next run
+3. payout - credit each merchant through the FNB client, or export all
+            netted merchants to a batch EFT file
+"""
+import csv
+import logging
+import os
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from phantom_apps.common import tracing
+from phantom_apps.common.exceptions import ExternalServiceException
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.transactions.fees import get_fee_schedule
+from phantom_apps.transactions.models import Transaction
+from .models import SettlementRun, MerchantSettlement
+
+logger = logging.getLogger('phantom_apps')
+
+ZERO = Decimal('0.00')
+SETTLED_TYPES = ['credit', 'debit']
+
+def merchant_shard(merchant_id, shard_count):
+    """Stable shard for a merchant, independent of worker count and ordering"""
+    return merchant_id.int % shard_count
+
+def settlement_cutoff(settlement_date):
+    """Transactions created before local midnight after the settlement date are included"""
+    next_day = datetime.combine(settlement_date + timedelta(days=1), time.min)
+    return timezone.make_aware(next_day)
+
+def unsettled_transactions(merchant_id, cutoff):
+    return Transaction.objects.filter(
+        merchant_id=merchant_id,
+        status='completed',
+        transaction_type__in=SETTLED_TYPES,
+        settlement__isnull=True,
+        created_at__lt=cutoff,
+    )
+
+def start_settlement_run(settlement_date, shard_count=None, payout_mode=None):
+    """Create (or resume) the run for a date and plan its merchant settlements"""
+    config = settings.SETTLEMENT_SETTINGS
+    run, created = SettlementRun.objects.get_or_create(
+        settlement_date=settlement_date,
+        defaults={
+            'cutoff': settlement_cutoff(settlement_date),
+            'shard_count': shard_count or config['SHARD_COUNT'],
+            'payout_mode': payout_mode or config['PAYOUT_MODE'],
+        },
+    )
+    if created:
+        logger.info(f"Settlement run {run.run_id} started for {settlement_date}")
+    else:
+        logger.info(f"Resuming settlement run {run.run_id} for {settlement_date}")
+
+    if run.status == 'running':
+        plan_merchant_settlements(run)
+    return run
+
+def plan_merchant_settlements(run):
+    """One MerchantSettlement per merchant with something to settle; re-planning is a no-op"""
+    merchant_ids = (
+        Transaction.objects.filter(
+            status='completed',
+            transaction_type__in=SETTLED_TYPES,
+            settlement__isnull=True,
+            created_at__lt=run.cutoff,
+        )
+        .values_list('merchant_id', flat=True)
+        .distinct()
+    )
+    merchants = Merchant.objects.filter(merchant_id__in=merchant_ids).values_list(
+        'merchant_id', 'fnb_account_number'
+    )
+
+    planned = [
+        MerchantSettlement(
+            run=run,
+            merchant_id=merchant_id,
+            shard=merchant_shard(merchant_id, run.shard_count),
+            fnb_account_number=account_number,
+            payout_reference=f"STL-{run.settlement_date:%Y%m%d}-{merchant_id.hex[:16]}",
+        )
+        for merchant_id, account_number in merchants.iterator(chunk_size=2000)
+    ]
+    MerchantSettlement.objects.bulk_create(planned, batch_size=1000, ignore_conflicts=True)
+    return len(planned)
+
+def net_merchant_settlement(settlement_id, chunk_size=None):
+    """Claim and net a merchant's transactions chunk by chunk, resuming from the last checkpoint"""
+    chunk_size = chunk_size or settings.SETTLEMENT_SETTINGS['CHUNK_SIZE']
+
+    while True:
+        with transaction.atomic():
+            merchant_settlement = (
+                MerchantSettlement.objects.select_for_update()
+                .select_related('run', 'merchant')
+                .get(pk=settlement_id)
+            )
+            if merchant_settlement.status != 'netting':
+                return merchant_settlement
+
+            chunk_ids = list(
+                unsettled_transactions(merchant_settlement.merchant_id, merchant_settlement.run.cutoff)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk_ids:
+                _close_netting(merchant_settlement)
+                return merchant_settlement
+
+            chunk = Transaction.objects.filter(pk__in=chunk_ids, settlement__isnull=True)
+            # Price the whole chunk in one vectorised pass and persist Transaction.fees
+            get_fee_schedule().apply_to_queryset(chunk)
+            totals = chunk.aggregate(
+                count=Count('pk'),
+                credits=Sum('amount', filter=Q(transaction_type='credit'), default=ZERO),
+                debits=Sum('amount', filter=Q(transaction_type='debit'), default=ZERO),
+                fees=Sum('fees', default=ZERO),
+            )
+            chunk.update(settlement=merchant_settlement)
+
+            merchant_settlement.transaction_count += totals['count']
+            merchant_settlement.gross_credits += totals['credits']
+            merchant_settlement.gross_debits += totals['debits']
+            merchant_settlement.fees += totals['fees']
+            merchant_settlement.save(update_fields=[
+                'transaction_count', 'gross_credits', 'gross_debits', 'fees', 'updated_at'
+            ])
+
+def _close_netting(merchant_settlement):
+    # Absorb deficits carried forward by earlier runs; their transactions are already claimed
+    carried = MerchantSettlement.objects.select_for_update().filter(
+        merchant_id=merchant_settlement.merchant_id,
+        status='carried_forward',
+        carried_into__isnull=True,
+        run__settlement_date__lt=merchant_settlement.run.settlement_date,
+    )
+    carried_ids = list(carried.values_list('pk', flat=True))
+    if carried_ids:
+        merchant_settlement.opening_balance = MerchantSettlement.objects.filter(pk__in=carried_ids).aggregate(
+            total=Sum('net_amount', default=ZERO)
+        )['total']
+        MerchantSettlement.objects.filter(pk__in=carried_ids).update(carried_into=merchant_settlement)
+
+    merchant_settlement.net_amount = (
+        merchant_settlement.opening_balance
+        + merchant_settlement.gross_credits - merchant_settlement.gross_debits - merchant_settlement.fees
+    )
+    if merchant_settlement.net_amount > 0:
+        merchant_settlement.status = 'netted'
+    elif merchant_settlement.net_amount < 0:
+        merchant_settlement.status = 'carried_forward'
+    else:
+        merchant_settlement.status = 'skipped'
+    merchant_settlement.save(update_fields=['opening_balance', 'net_amount', 'status', 'updated_at'])
+    logger.info(
+        f"Netted {merchant_settlement.transaction_count} transactions for {merchant_settlement.merchant}: "
+        f"net {merchant_settlement.net_amount} ({merchant_settlement.status})"
+    )
+
+@tracing.traced('settlements.pay_out')
+def pay_out_merchant_settlement(merchant_settlement, client=None):
+    """Credit the merchant's FNB account; the payout reference makes retries idempotent"""
+    if merchant_settlement.status != 'netted':
+        return merchant_settlement
+
+    if client is None:
+        from phantom_apps.mock_systems.fnb.client import get_fnb_client
+        client = get_fnb_client()
+
+    client.credit_account(
+        merchant_settlement.fnb_account_number,
+        merchant_settlement.net_amount,
+        merchant_settlement.payout_reference,
+        description=f"Phantom Banking settlement {merchant_settlement.run.settlement_date}",
+    )
+    merchant_settlement.status = 'paid'
+    merchant_settlement.paid_at = timezone.now()
+    merchant_settlement.failure_reason = ''
+    merchant_settlement.save(update_fields=['status', 'paid_at', 'failure_reason', 'updated_at'])
+    return merchant_settlement
+
+@tracing.traced('settlements.settle_shard')
+def settle_shard(run, shard, chunk_size=None, client=None):
+    """Net (and for fnb_api runs, pay out) every unfinished merchant in one shard"""
+    pending = (
+        MerchantSettlement.objects.filter(run=run, shard=shard, status__in=['netting', 'netted', 'failed'])
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    failures = []
+    for settlement_id in list(pending):
+        merchant_settlement = net_merchant_settlement(settlement_id, chunk_size)
+        if run.payout_mode != 'fnb_api':
+            continue
+        if merchant_settlement.status == 'failed':
+            merchant_settlement.status = 'netted'
+        try:
+            pay_out_merchant_settlement(merchant_settlement, client)
+        except ExternalServiceException as e:
+            logger.error(f"Settlement payout failed for {merchant_settlement.merchant}: {e}")
+            merchant_settlement.status = 'failed'
+            merchant_settlement.failure_reason = str(e)
+            merchant_settlement.save(update_fields=['status', 'failure_reason', 'updated_at'])
+            failures.append(settlement_id)
+    return failures
+
+def write_eft_batch_file(run):
+    """Export all netted merchants of a run to one EFT batch file (CSV)"""
+    output_dir = settings.SETTLEMENT_SETTINGS['EFT_OUTPUT_DIR']
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"eft_{run.settlement_date:%Y%m%d}_{run.run_id.hex[:8]}.csv")
+
+    rows = (
+        MerchantSettlement.objects.filter(run=run, status__in=['netted', 'exported'])
+        .select_related('merchant')
+        .order_by('payout_reference')
+    )
+    temp_path = f"{path}.tmp"
+    total = ZERO
+    count = 0
+    with open(temp_path, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['account_number', 'beneficiary', 'amount', 'currency', 'reference'])
+        for row in rows.iterator(chunk_size=1000):
+            writer.writerow([
+                row.fnb_account_number,
+                row.merchant.business_name,
+                f"{row.net_amount:.2f}",
+                settings.PHANTOM_BANKING_SETTINGS['DEFAULT_CURRENCY'],
+                row.payout_reference,
+            ])
+            total += row.net_amount
+            count += 1
+    # Atomic rename so a crash never leaves a half-written batch behind
+    os.replace(temp_path, path)
+
+    rows.filter(status='netted').update(status='exported', paid_at=timezone.now())
+    run.eft_file_path = path
+    run.save(update_fields=['eft_file_path'])
+    logger.info(f"EFT batch {path} written: {count} payments, total {total}")
+    return path
+
+def finalize_settlement_run(run):
+    """Produce the EFT file if needed and close the run once every merchant is done"""
+    if run.payout_mode == 'eft_file':
+        write_eft_batch_file(run)
+
+    unfinished = MerchantSettlement.objects.filter(
+        run=run, status__in=['netting', 'netted', 'failed']
+    ).count()
+    if unfinished:
+        logger.warning(f"Settlement run {run.run_id} has {unfinished} unfinished merchants")
+        return run
+
+    run.status = 'completed'
+    run.completed_at = timezone.now()
+    run.save(update_fields=['status', 'completed_at'])
+    logger.info(f"Settlement run {run.run_id} completed")
+    return run
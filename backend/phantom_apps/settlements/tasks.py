@@ -0,0 +1,42 @@
+from celery import shared_task, chord
+from django.utils import timezone
+from datetime import date
+from .models import SettlementRun
+from . import services
+import logging
+
+logger = logging.getLogger('phantom_apps')
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=60)
+def settle_merchant_shard(self, run_id, shard):
+    """Net and pay out one shard of merchants; safe to redeliver after a crash"""
+    run = SettlementRun.objects.get(pk=run_id)
+    failures = services.settle_shard(run, shard)
+    if failures:
+        raise self.retry(exc=RuntimeError(f"{len(failures)} payouts failed in shard {shard}"))
+    return shard
+
+@shared_task
+def finalize_settlement_run(results, run_id):
+    """Runs once every shard task has finished"""
+    run = services.finalize_settlement_run(SettlementRun.objects.get(pk=run_id))
+    return run.status
+
+@shared_task
+def run_end_of_day_settlement(settlement_date=None):
+    """Plan today's run and fan it out across workers by merchant shard"""
+    if settlement_date is None:
+        settlement_date = timezone.localdate()
+    elif isinstance(settlement_date, str):
+        settlement_date = date.fromisoformat(settlement_date)
+    
+    run = services.start_settlement_run(settlement_date)
+    if run.status != 'running':
+        logger.info(f"Settlement for {settlement_date} already {run.status}")
+        return str(run.run_id)
+    
+    run_id = str(run.run_id)
+    chord(
+        settle_merchant_shard.s(run_id, shard) for shard in range(run.shard_count)
+    )(finalize_settlement_run.s(run_id))
+    return run_id
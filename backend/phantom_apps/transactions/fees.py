@@ -0,0 +1,173 @@
+"""
+Fee and commission engine.
+
+A transaction's fee is the fixed fee of its channel tier plus a percentage of
+the amount (channel tier percentage, plus the merchant's commission_rate on
+collections), rounded half-up to the thebe.
+
+``FeeSchedule.price`` prices one transaction with Decimal arithmetic for use
+inline when posting. ``FeeSchedule.price_batch`` prices arrays of amounts in
+integer thebe with NumPy; the integer rounding is exact, so both paths agree
+to the cent (tests/components/test_fees.py checks this).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+NO_UPPER_BOUND = np.iinfo(np.int64).max
+COMMISSION_TYPES = ('credit',)
+
+def to_cents(amount):
+    """Decimal amount in Pula to integer thebe"""
+    return int(Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+def to_basis_points(percentage):
+    """Percentage with at most two decimals (e.g. 0.25%) to integer basis points"""
+    value = Decimal(str(percentage)).scaleb(2)
+    if value != value.to_integral_value():
+        raise ImproperlyConfigured(f"Fee percentage {percentage} has more than two decimal places")
+    return int(value)
+
+class FeeSchedule:
+    """Tiered fee schedule per payment channel"""
+
+    def __init__(self, schedules):
+        if 'default' not in schedules:
+            raise ImproperlyConfigured("TRANSACTION_FEE_SCHEDULES must define a 'default' channel")
+
+        self.channels = list(schedules)
+        self.channel_codes = {channel: code for code, channel in enumerate(self.channels)}
+        self._tiers = {}
+        for channel, tiers in schedules.items():
+            bounds, fixed, bps = [], [], []
+            for upper_bound, fixed_fee, percentage in tiers:
+                bounds.append(NO_UPPER_BOUND if upper_bound is None else to_cents(upper_bound))
+                fixed.append(to_cents(fixed_fee))
+                bps.append(to_basis_points(percentage))
+            if bounds != sorted(bounds) or bounds[-1] != NO_UPPER_BOUND:
+                raise ImproperlyConfigured(
+                    f"Fee tiers for '{channel}' must be ascending and end with an open (None) tier"
+                )
+            self._tiers[channel] = (
+                np.array(bounds, dtype=np.int64),
+                np.array(fixed, dtype=np.int64),
+                np.array(bps, dtype=np.int64),
+            )
+
+    def channel_code(self, channel):
+        return self.channel_codes.get(channel, self.channel_codes['default'])
+
+    def _tier(self, channel, amount_cents):
+        bounds, fixed, bps = self._tiers[self.channels[self.channel_code(channel)]]
+        index = int(np.searchsorted(bounds, amount_cents, side='left'))
+        return int(fixed[index]), int(bps[index])
+
+    def price(self, amount, channel, commission_rate=ZERO, transaction_type='credit'):
+        """Fee for a single transaction as a Decimal"""
+        amount = Decimal(amount)
+        fixed_cents, channel_bps = self._tier(channel, to_cents(amount))
+        percentage = Decimal(channel_bps) / 100
+        if transaction_type in COMMISSION_TYPES:
+            percentage += Decimal(commission_rate)
+        variable = (amount * percentage / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+        return Decimal(fixed_cents).scaleb(-2) + variable
+
+    def price_transaction(self, transaction):
+        return self.price(
+            transaction.amount,
+            transaction.payment_channel,
+            transaction.merchant.commission_rate,
+            transaction.transaction_type,
+        )
+
+    def price_batch(self, amount_cents, channel_codes, commission_bps=None, is_commissionable=None):
+        """
+        Fees in thebe for arrays of amounts (thebe) and channel codes.
+
+        ``commission_bps`` and ``is_commissionable`` are optional per-row arrays;
+        commission only applies where ``is_commissionable`` is true.
+        """
+        amount_cents = np.asarray(amount_cents, dtype=np.int64)
+        channel_codes = np.asarray(channel_codes, dtype=np.int64)
+        fixed = np.zeros_like(amount_cents)
+        bps = np.zeros_like(amount_cents)
+
+        for code, channel in enumerate(self.channels):
+            mask = channel_codes == code
+            if not mask.any():
+                continue
+            bounds, tier_fixed, tier_bps = self._tiers[channel]
+            tier_index = np.searchsorted(bounds, amount_cents[mask], side='left')
+            fixed[mask] = tier_fixed[tier_index]
+            bps[mask] = tier_bps[tier_index]
+
+        if commission_bps is not None:
+            commission = np.asarray(commission_bps, dtype=np.int64)
+            if is_commissionable is not None:
+                commission = np.where(np.asarray(is_commissionable, dtype=bool), commission, 0)
+            bps = bps + commission
+
+        # round_half_up(amount * bps / 10000) in integers: floor((2 * a * bps + 10000) / 20000)
+        variable = (2 * amount_cents * bps + 10000) // 20000
+        return fixed + variable
+
+    def price_many(self, amounts, channels, commission_rates=None, transaction_types=None):
+        """Batch-price Python values and return Decimals (convenience wrapper around price_batch)"""
+        amount_cents = np.fromiter((to_cents(a) for a in amounts), dtype=np.int64)
+        codes = np.fromiter((self.channel_code(c) for c in channels), dtype=np.int64)
+        commission_bps = None
+        is_commissionable = None
+        if commission_rates is not None:
+            commission_bps = np.fromiter((to_basis_points(r) for r in commission_rates), dtype=np.int64)
+        if transaction_types is not None:
+            is_commissionable = np.fromiter((t in COMMISSION_TYPES for t in transaction_types), dtype=bool)
+        fees = self.price_batch(amount_cents, codes, commission_bps, is_commissionable)
+        return [Decimal(int(fee)).scaleb(-2) for fee in fees]
+
+    def apply_to_queryset(self, queryset, batch_size=2000):
+        """
+        Price and persist fees for every transaction in a queryset, chunk by chunk.
+
+        Returns the total fees in thebe. Rows are read as plain tuples and written
+        back with one bulk UPDATE per chunk.
+        """
+        from .models import Transaction
+
+        total = 0
+        rows = queryset.order_by('pk').values_list(
+            'pk', 'amount', 'payment_channel', 'transaction_type', 'merchant__commission_rate'
+        )
+        chunk = []
+        for row in rows.iterator(chunk_size=batch_size):
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                total += self._apply_chunk(Transaction, chunk, batch_size)
+                chunk = []
+        if chunk:
+            total += self._apply_chunk(Transaction, chunk, batch_size)
+        return total
+
+    def _apply_chunk(self, model, chunk, batch_size):
+        pks, amounts, channels, types, rates = zip(*chunk)
+        fees = self.price_batch(
+            np.fromiter((to_cents(a) for a in amounts), dtype=np.int64, count=len(amounts)),
+            np.fromiter((self.channel_code(c) for c in channels), dtype=np.int64, count=len(channels)),
+            np.fromiter((to_basis_points(r) for r in rates), dtype=np.int64, count=len(rates)),
+            np.fromiter((t in COMMISSION_TYPES for t in types), dtype=bool, count=len(types)),
+        )
+        model.objects.bulk_update(
+            [model(pk=pk, fees=Decimal(int(fee)).scaleb(-2)) for pk, fee in zip(pks, fees)],
+            ['fees'],
+            batch_size=batch_size,
+        )
+        return int(fees.sum())
+
+@lru_cache(maxsize=1)
+def get_fee_schedule():
+    """Fee schedule built from settings.TRANSACTION_FEE_SCHEDULES"""
+    return FeeSchedule(settings.TRANSACTION_FEE_SCHEDULES)
@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from decimal import Decimal
-import uuid
+from phantom_apps.common.ids import uuid7
 
 class Transaction(models.Model):
     """Transaction model for all payment operations"""
@@ -17,6 +17,12 @@ class Transaction(models.Model):
         ('eft', 'EFT'),
         ('mobile_money', 'Mobile Money'),
         ('bank_transfer', 'Bank Transfer'),
+        ('wallet_transfer', 'Wallet Transfer'),
+    ]
+    
+    RISK_DECISIONS = [
+        ('allow', 'Allow'),
+        ('review', 'Review'),
     ]
     
     STATUS_CHOICES = [
@@ -27,9 +33,13 @@ class Transaction(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
-    transaction_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    transaction_id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     wallet = models.ForeignKey('wallets.Wallet', on_delete=models.CASCADE, related_name='transactions')
     merchant = models.ForeignKey('merchants.Merchant', on_delete=models.CASCADE, related_name='transactions')
+    # Transfers: ``wallet`` is the source (and ``merchant`` its merchant), this the destination
+    destination_wallet = models.ForeignKey(
+        'wallets.Wallet', on_delete=models.CASCADE, null=True, blank=True, related_name='incoming_transfers'
+    )
     
     # Transaction details
     amount = models.DecimalField(max_digits=15, decimal_places=2)
@@ -46,6 +56,14 @@ class Transaction(models.Model):
     # Fees and reconciliation
     fees = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     is_reconciled = models.BooleanField(default=False)
+    settlement = models.ForeignKey(
+        'settlements.MerchantSettlement', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='transactions'
+    )
+    
+    # Velocity scoring at posting time (blocked postings are not stored)
+    risk_decision = models.CharField(max_length=10, choices=RISK_DECISIONS, default='allow')
+    risk_score = models.PositiveSmallIntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -61,6 +79,7 @@ class Transaction(models.Model):
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['merchant', 'created_at']),
             models.Index(fields=['wallet', 'created_at']),
+            models.Index(fields=['merchant', 'status', 'settlement']),
         ]
     
     def __str__(self):
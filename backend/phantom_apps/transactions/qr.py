@@ -0,0 +1,241 @@
+"""
+Signed QR payment payloads and their images.
+
+A payload names the merchant a scanned code pays - optionally one of its
+wallets, a fixed amount and a reference - and when the code stops being
+valid. The QR code carries:
+
+    PB1:<base64 JSON>:<signature>
+
+The JSON is signed with django.core.signing under the 'phantom.qr' salt
+(HMAC-SHA256 keyed by SECRET_KEY; codes signed with a SECRET_KEY_FALLBACKS
+key still verify during a rotation), and the expiry is inside the signed
+part, so verify_payload() checks a scanned code with no database queries. It
+cannot see changes made after the code was issued - a wallet frozen in the
+meantime is caught when the payment posts.
+
+Images are PNGs drawn with Pillow from the qrcode package's module matrix.
+Encoding and drawing take tens of milliseconds, so rendered images are
+cached twice, keyed by payload digest and size: in a per-worker LRU bounded
+by QR_CODES['MEMORY_CACHE_BYTES'], then in the QR_CODES['ALIAS'] cache (raw
+bytes on Redis) until the payload expires. Only payloads that verify are
+rendered, so the caches hold nothing a client made up.
+"""
+import hashlib
+import io
+import logging
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+import orjson
+import qrcode
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from PIL import Image
+
+from phantom_apps.common import metrics
+
+logger = logging.getLogger('phantom_apps')
+
+PREFIX = 'PB1:'
+SALT = 'phantom.qr'
+CACHE_PREFIX = 'qr:png:'
+
+MEMORY = 'memory'
+CACHE = 'cache'
+RENDER = 'render'
+
+class InvalidPayload(Exception):
+    """A scanned payload is malformed or its signature does not match"""
+
+class ExpiredPayload(InvalidPayload):
+    """A genuine payload past its expiry"""
+
+class _CompactJSON:
+    """signing serializer: orjson, no whitespace"""
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+class QRPayment:
+    """The payment a payload asks for"""
+
+    __slots__ = ('merchant_id', 'wallet_id', 'amount', 'currency', 'reference', 'expires', 'nonce')
+
+    def __init__(self, merchant_id, wallet_id=None, amount=None, currency='BWP', reference='', expires=0, nonce=''):
+        self.merchant_id = merchant_id
+        self.wallet_id = wallet_id
+        self.amount = amount
+        self.currency = currency
+        self.reference = reference
+        self.expires = expires
+        self.nonce = nonce
+
+    @property
+    def expires_at(self):
+        return datetime.fromtimestamp(self.expires, tz=timezone.utc)
+
+    def expires_in(self, now=None):
+        return max(0, int(self.expires - (time.time() if now is None else now)))
+
+def _signer():
+    return signing.Signer(salt=SALT, algorithm='sha256')
+
+def issue_payload(merchant_id, wallet_id=None, amount=None, currency='BWP', reference='', ttl=None, now=None):
+    """(QR content, QRPayment) for a code valid for ``ttl`` seconds (QR_CODES['DEFAULT_TTL'])"""
+    config = settings.QR_CODES
+    ttl = config['DEFAULT_TTL'] if ttl is None else min(int(ttl), config['MAX_TTL'])
+    payment = QRPayment(
+        str(merchant_id),
+        None if wallet_id is None else str(wallet_id),
+        None if amount is None else Decimal(amount).quantize(Decimal('0.01')),
+        currency,
+        reference or '',
+        int(time.time() if now is None else now) + ttl,
+        # Two codes for the same payment still differ, and so do their digests
+        secrets.token_urlsafe(6),
+    )
+    # Ids as bare hex keep the code a few modules smaller
+    data = {'m': uuid.UUID(payment.merchant_id).hex, 'c': payment.currency, 'x': payment.expires, 'n': payment.nonce}
+    if payment.wallet_id:
+        data['w'] = uuid.UUID(payment.wallet_id).hex
+    if payment.amount is not None:
+        data['a'] = str(payment.amount)
+    if payment.reference:
+        data['r'] = payment.reference
+    return PREFIX + _signer().sign_object(data, serializer=_CompactJSON), payment
+
+def verify_payload(content, now=None):
+    """QRPayment of a scanned payload; raises InvalidPayload or ExpiredPayload. No DB queries"""
+    if not isinstance(content, str) or not content.startswith(PREFIX):
+        raise InvalidPayload('Not a Phantom Banking payment code')
+    try:
+        data = _signer().unsign_object(content[len(PREFIX):], serializer=_CompactJSON)
+        payment = QRPayment(
+            str(uuid.UUID(data['m'])), str(uuid.UUID(data['w'])) if 'w' in data else None,
+            Decimal(data['a']) if 'a' in data else None,
+            data['c'], data.get('r', ''), int(data['x']), data['n'],
+        )
+    except signing.BadSignature:
+        raise InvalidPayload('Payment code signature does not match')
+    except (KeyError, TypeError, ValueError, InvalidOperation, orjson.JSONDecodeError):
+        raise InvalidPayload('Malformed payment code')
+    if payment.expires <= (time.time() if now is None else now):
+        raise ExpiredPayload('Payment code has expired')
+    return payment
+
+def digest(content):
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+def render_png(content, size):
+    """PNG of ``content`` at most ``size`` pixels wide, whole pixels per module"""
+    config = settings.QR_CODES
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=config['BORDER'])
+    code.add_data(content)
+    code.make(fit=True)
+    matrix = code.get_matrix()
+    modules = len(matrix)
+    scale = max(1, size // modules)
+    pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+    image = Image.frombytes('L', (modules, modules), pixels)
+    image = image.resize((modules * scale, modules * scale), Image.Resampling.NEAREST)
+    buffer = io.BytesIO()
+    image.convert('1', dither=Image.Dither.NONE).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class ImageLRU:
+    """Per-worker LRU of rendered PNGs, bounded by total bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._images[key] = png
+            self.size += len(png)
+            while self.size > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._images)
+
+class QRImages:
+    """Rendered images through the worker LRU and the shared cache"""
+
+    def __init__(self, config):
+        self.memory = ImageLRU(config['MEMORY_CACHE_BYTES'])
+        self.cache = caches[config['ALIAS']]
+        # The Redis aliases' JSON serializer cannot hold bytes: talk to Redis directly
+        self.redis = self.cache.client.get_client(write=True) if hasattr(
+            getattr(self.cache, 'client', None), 'get_client'
+        ) else None
+
+    def _shared_get(self, key):
+        if self.redis is not None:
+            return self.redis.get(self.cache.make_key(key))
+        return self.cache.get(key)
+
+    def _shared_set(self, key, png, timeout):
+        if self.redis is not None:
+            self.redis.set(self.cache.make_key(key), png, ex=timeout)
+        else:
+            self.cache.set(key, png, timeout)
+
+    def get(self, content, payment, size):
+        """(PNG, source) for a verified payload; source is memory, cache or render"""
+        start = time.perf_counter()
+        key = f'{CACHE_PREFIX}{digest(content)}:{size}'
+        png, source = self.memory.get(key), MEMORY
+        if png is None:
+            try:
+                png, source = self._shared_get(key), CACHE
+            except Exception as e:
+                logger.warning(f"QR image cache read failed: {e}")
+                png = None
+            if png is None:
+                png, source = render_png(content, size), RENDER
+                try:
+                    self._shared_set(key, png, max(1, payment.expires_in()))
+                except Exception as e:
+                    logger.warning(f"QR image cache write failed: {e}")
+            self.memory.put(key, png)
+        metrics.observe_qr_image(source, time.perf_counter() - start)
+        return png, source
+
+@lru_cache(maxsize=1)
+def get_qr_images():
+    """Image cache built from settings.QR_CODES"""
+    return QRImages(settings.QR_CODES)
+
+def _settings_changed(setting, **kwargs):
+    if setting in ('QR_CODES', 'CACHES'):
+        get_qr_images.cache_clear()
+
+setting_changed.connect(_settings_changed, dispatch_uid='qr_settings')
@@ -0,0 +1,365 @@
+"""
+Velocity and fraud scoring.
+
+post_transaction scores every posting before it changes a balance. The
+scorer reads sliding-window counters for the wallet, the customer's phone
+number and the merchant - postings (count), amount (sum) and distinct
+counterparties - and adds up the score of every VELOCITY['RULES'] entry the
+posting would break. The decision is allow, review (posted, and flagged on
+the Transaction) or block (rejected with RiskBlockedException).
+
+Each rule's window is split into WINDOW_BUCKETS buckets, so a window slides
+in steps of a tenth of its length. Counters live in the Redis server behind
+the VELOCITY['ALIAS'] cache:
+
+    velocity:<dimension>:<id>:<bucket seconds>    hash: <bucket>c count, <bucket>s sum (thebe)
+    velocity:<dimension>:<id>:<bucket seconds>:<bucket>:d   HyperLogLog of counterparties
+
+Scoring is one pipelined round trip and the rule set is evaluated in
+process; counts and sums are recorded in a second round trip once the
+posting commits. Counterparties are added when a posting is scored, so a
+phone probing many wallets is counted even while its postings are blocked.
+Concurrent postings of one wallet may not see each other's counts: limits
+are approximate by design, not a replacement for the balance checks.
+Postings scored together in one DB transaction (a transfer batch) share a
+``pending`` dict instead, so each is scored as if the ones before it had
+already been recorded.
+
+When the alias is not Redis, or Redis fails, an in-process store with the
+same layout takes over (Redis is retried after VELOCITY['REDIS_RETRY']
+seconds); its counters are per worker.
+
+Counterparties: a wallet's are external references, a phone's are wallets
+and a merchant's are phone numbers.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import transaction
+
+from phantom_apps.common import metrics
+from .fees import to_cents
+
+logger = logging.getLogger('phantom_apps')
+
+ALLOW = 'allow'
+REVIEW = 'review'
+BLOCK = 'block'
+
+DIMENSIONS = ('wallet', 'phone', 'merchant')
+METRICS = ('count', 'sum', 'distinct', 'amount')
+WINDOW_BUCKETS = 10
+
+class Rule:
+    """One velocity limit: scores ``score`` when the posting takes ``metric`` over ``limit``"""
+
+    __slots__ = ('name', 'dimension', 'metric', 'window', 'limit', 'score', 'bucket_seconds')
+
+    def __init__(self, name, dimension, metric, window, limit, score):
+        if dimension not in DIMENSIONS or metric not in METRICS:
+            raise ImproperlyConfigured(f"Velocity rule '{name}' has an unknown dimension or metric")
+        if metric != 'amount' and window < WINDOW_BUCKETS:
+            raise ImproperlyConfigured(f"Velocity rule '{name}' needs a window of at least {WINDOW_BUCKETS}s")
+        self.name = name
+        self.dimension = dimension
+        self.metric = metric
+        self.window = int(window)
+        # Amounts are compared in thebe
+        self.limit = to_cents(limit) if metric in ('sum', 'amount') else int(limit)
+        self.score = int(score)
+        self.bucket_seconds = self.window // WINDOW_BUCKETS if metric != 'amount' else None
+
+class Series:
+    """The buckets of one entity at one bucket size"""
+
+    __slots__ = ('dimension', 'entity', 'bucket_seconds', 'counterparty', 'distinct', 'bucket')
+
+    def __init__(self, dimension, entity, bucket_seconds, counterparty, now):
+        self.dimension = dimension
+        self.entity = entity
+        self.bucket_seconds = bucket_seconds
+        self.counterparty = counterparty
+        self.distinct = False
+        self.bucket = int(now // bucket_seconds)
+
+    @property
+    def name(self):
+        return f"velocity:{self.dimension}:{self.entity}:{self.bucket_seconds}"
+
+    def buckets(self):
+        """Current bucket first, then the rest of the window"""
+        return range(self.bucket, self.bucket - WINDOW_BUCKETS, -1)
+
+class Decision:
+    """Outcome of scoring one posting"""
+
+    __slots__ = ('action', 'score', 'rules', 'store', 'elapsed_ms', 'series', 'amount_cents')
+
+    def __init__(self, action, score=0, rules=(), store=None, elapsed_ms=0.0, series=(), amount_cents=0):
+        self.action = action
+        self.score = score
+        self.rules = list(rules)
+        self.store = store
+        self.elapsed_ms = elapsed_ms
+        self.series = series
+        self.amount_cents = amount_cents
+
+    def as_dict(self):
+        return {
+            'decision': self.action,
+            'score': self.score,
+            'rules': self.rules,
+            'store': self.store,
+            'elapsed_ms': round(self.elapsed_ms, 3),
+        }
+
+UNSCORED = Decision(ALLOW)
+
+class RedisVelocityStore:
+    """Counters in Redis, one pipeline per read or write"""
+
+    name = 'redis'
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.client = cache.client.get_client(write=True)
+
+    def key(self, series):
+        return self.cache.make_key(series.name)
+
+    def read(self, series_list):
+        """[(count, sum_cents, distinct)] per series; adds the counterparties first"""
+        pipe = self.client.pipeline(transaction=False)
+        for series in series_list:
+            key = self.key(series)
+            fields = []
+            for bucket in series.buckets():
+                fields += (f'{bucket}c', f'{bucket}s')
+            pipe.hmget(key, fields)
+            if series.distinct:
+                if series.counterparty:
+                    current = f'{key}:{series.bucket}:d'
+                    pipe.pfadd(current, series.counterparty)
+                    pipe.expire(current, series.bucket_seconds * (WINDOW_BUCKETS + 1))
+                pipe.pfcount(*(f'{key}:{bucket}:d' for bucket in series.buckets()))
+        replies = iter(pipe.execute())
+
+        values = []
+        for series in series_list:
+            counters = next(replies)
+            count = sum(int(value) for value in counters[0::2] if value is not None)
+            total = sum(int(value) for value in counters[1::2] if value is not None)
+            distinct = 0
+            if series.distinct:
+                if series.counterparty:
+                    next(replies)
+                    next(replies)
+                distinct = next(replies)
+            values.append((count, total, distinct))
+        return values
+
+    def record(self, series_list, amount_cents):
+        pipe = self.client.pipeline(transaction=False)
+        for series in series_list:
+            key = self.key(series)
+            pipe.hincrby(key, f'{series.bucket}c', 1)
+            pipe.hincrby(key, f'{series.bucket}s', amount_cents)
+            # Trim the buckets that just left the window
+            stale = range(series.bucket - WINDOW_BUCKETS, series.bucket - 2 * WINDOW_BUCKETS - 1, -1)
+            pipe.hdel(key, *(f'{bucket}{field}' for bucket in stale for field in 'cs'))
+            pipe.expire(key, series.bucket_seconds * (WINDOW_BUCKETS + 1))
+        pipe.execute()
+
+class MemoryVelocityStore:
+    """The same counters in this process, least recently used series evicted first"""
+
+    name = 'memory'
+
+    def __init__(self, max_series=100000):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        # series name -> {bucket: [count, sum_cents, counterparties]}
+        self._series = OrderedDict()
+
+    def _buckets(self, series):
+        buckets = self._series.get(series.name)
+        if buckets is None:
+            buckets = self._series[series.name] = {}
+            if len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(series.name)
+            oldest = series.bucket - WINDOW_BUCKETS
+            for bucket in [bucket for bucket in buckets if bucket <= oldest]:
+                del buckets[bucket]
+        return buckets
+
+    def _bucket(self, buckets, series):
+        bucket = buckets.get(series.bucket)
+        if bucket is None:
+            bucket = buckets[series.bucket] = [0, 0, set()]
+        return bucket
+
+    def read(self, series_list):
+        values = []
+        with self._lock:
+            for series in series_list:
+                buckets = self._buckets(series)
+                if series.distinct and series.counterparty:
+                    self._bucket(buckets, series)[2].add(series.counterparty)
+                count = total = 0
+                counterparties = set()
+                for bucket in buckets.values():
+                    count += bucket[0]
+                    total += bucket[1]
+                    if series.distinct:
+                        counterparties |= bucket[2]
+                values.append((count, total, len(counterparties)))
+        return values
+
+    def record(self, series_list, amount_cents):
+        with self._lock:
+            for series in series_list:
+                bucket = self._bucket(self._buckets(series), series)
+                bucket[0] += 1
+                bucket[1] += amount_cents
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+class VelocityEngine:
+    """Scores postings against the rule set"""
+
+    def __init__(self, config):
+        self.rules = [Rule(*rule) for rule in config['RULES']]
+        self.review_score = config['REVIEW_SCORE']
+        self.block_score = config['BLOCK_SCORE']
+        self.redis_retry = config['REDIS_RETRY']
+        self.memory = MemoryVelocityStore(config['MAX_MEMORY_SERIES'])
+        cache = caches[config['ALIAS']]
+        self.redis = RedisVelocityStore(cache) if hasattr(getattr(cache, 'client', None), 'get_client') else None
+        self._redis_down_until = 0.0
+
+    def plan(self, wallet_id, phone, merchant_id, counterparty, now):
+        """The series the rules read, keyed by (dimension, bucket seconds)"""
+        entities = {'wallet': wallet_id, 'phone': phone, 'merchant': merchant_id}
+        counterparties = {'wallet': counterparty, 'phone': wallet_id, 'merchant': phone}
+        plan = {}
+        for rule in self.rules:
+            if rule.metric == 'amount':
+                continue
+            key = (rule.dimension, rule.bucket_seconds)
+            series = plan.get(key)
+            if series is None:
+                series = plan[key] = Series(
+                    rule.dimension, entities[rule.dimension], rule.bucket_seconds,
+                    counterparties[rule.dimension], now,
+                )
+            series.distinct = series.distinct or rule.metric == 'distinct'
+        return plan
+
+    def _call(self, method, *args):
+        store = self.memory
+        if self.redis is not None and time.monotonic() >= self._redis_down_until:
+            store = self.redis
+        try:
+            return store, getattr(store, method)(*args)
+        except Exception as e:
+            if store is self.memory:
+                raise
+            logger.warning(f"Velocity counters unavailable in Redis, using this worker's: {e}")
+            self._redis_down_until = time.monotonic() + self.redis_retry
+            return self.memory, getattr(self.memory, method)(*args)
+
+    def score(self, wallet_id, phone, merchant_id, amount, counterparty='', now=None, pending=None):
+        """
+        Decision for a posting of ``amount`` at ``now`` (default: the current time), not yet recorded.
+
+        ``pending`` (series name -> [count, sum_cents]) holds postings scored
+        earlier in the same DB transaction: they count towards the windows,
+        and this posting is added to it.
+        """
+        start = time.perf_counter()
+        amount_cents = to_cents(amount)
+        now = time.time() if now is None else now
+        plan = self.plan(str(wallet_id), phone, str(merchant_id), counterparty, now)
+        series_list = list(plan.values())
+        store, values = self._call('read', series_list)
+        windows = dict(zip(plan, values))
+        if pending is not None:
+            for key, series in plan.items():
+                count, total, distinct = windows[key]
+                earlier_count, earlier_total = pending.get(series.name, (0, 0))
+                windows[key] = (count + earlier_count, total + earlier_total, distinct)
+                counters = pending.setdefault(series.name, [0, 0])
+                counters[0] += 1
+                counters[1] += amount_cents
+
+        score = 0
+        matched = []
+        for rule in self.rules:
+            if rule.metric == 'amount':
+                value = amount_cents
+            else:
+                count, total, distinct = windows[(rule.dimension, rule.bucket_seconds)]
+                value = {'count': count + 1, 'sum': total + amount_cents, 'distinct': distinct}[rule.metric]
+            if value > rule.limit:
+                score += rule.score
+                matched.append(rule.name)
+
+        if score >= self.block_score:
+            action = BLOCK
+        elif score >= self.review_score:
+            action = REVIEW
+        else:
+            action = ALLOW
+        elapsed = time.perf_counter() - start
+        metrics.observe_risk_decision(action, store.name, elapsed)
+        return Decision(action, score, matched, store.name, elapsed * 1000, series_list, amount_cents)
+
+    def record(self, decision):
+        """Add a posted transaction to its windows"""
+        if decision.series:
+            self._call('record', decision.series, decision.amount_cents)
+
+@lru_cache(maxsize=1)
+def get_velocity_engine():
+    """Engine built from settings.VELOCITY"""
+    return VelocityEngine(settings.VELOCITY)
+
+def score_posting(wallet, amount, external_reference='', pending=None):
+    """Score a posting to ``wallet`` (with its customer loaded); never raises"""
+    if not settings.VELOCITY['ENABLED']:
+        return UNSCORED
+    try:
+        return get_velocity_engine().score(
+            wallet.pk, wallet.customer.phone_number, wallet.merchant_id, amount, external_reference,
+            pending=pending,
+        )
+    except Exception as e:
+        logger.error(f"Velocity scoring failed for wallet {wallet.pk}: {e}")
+        return UNSCORED
+
+def record_on_commit(decision):
+    """Count the posting in its windows once the surrounding transaction commits"""
+    if decision.series:
+        def record():
+            try:
+                get_velocity_engine().record(decision)
+            except Exception as e:
+                logger.error(f"Could not record velocity counters: {e}")
+        transaction.on_commit(record)
+
+def _settings_changed(setting, **kwargs):
+    if setting in ('VELOCITY', 'CACHES'):
+        get_velocity_engine.cache_clear()
+
+setting_changed.connect(_settings_changed, dispatch_uid='velocity_settings')
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from django.conf import settings
+from rest_framework import serializers
+from .models import Transaction
+
+MAX_BATCH_TRANSFERS = 500
+
+class TransactionSerializer(serializers.ModelSerializer):
+    """Serializer for transaction data"""
+    
+    class Meta:
+        model = Transaction
+        fields = [
+            'transaction_id', 'wallet', 'destination_wallet', 'amount', 'currency', 'transaction_type',
+            'payment_channel', 'status', 'reference_number', 'description',
+            'external_reference', 'fees', 'risk_decision', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+class TransactionCreateSerializer(serializers.Serializer):
+    """Serializer for posting a credit or debit to a wallet"""
+    
+    wallet_id = serializers.UUIDField()
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'))
+    transaction_type = serializers.ChoiceField(choices=['credit', 'debit'])
+    # Transfers go through their own endpoints
+    payment_channel = serializers.ChoiceField(
+        choices=[choice for choice in Transaction.PAYMENT_CHANNELS if choice[0] != 'wallet_transfer']
+    )
+    reference_number = serializers.CharField(max_length=100, required=False)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    external_reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
+class TransferSerializer(serializers.Serializer):
+    """Serializer for a transfer between two wallets"""
+    
+    source_wallet_id = serializers.UUIDField()
+    destination_wallet_id = serializers.UUIDField()
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'))
+    reference_number = serializers.CharField(max_length=100, required=False)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    external_reference = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    
+    def validate(self, data):
+        if data['source_wallet_id'] == data['destination_wallet_id']:
+            raise serializers.ValidationError("Source and destination wallets must differ")
+        return data
+
+class TransferBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of transfers, netted and posted together"""
+    
+    transfers = TransferSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_TRANSFERS)
+
+class QRPaymentRequestSerializer(serializers.Serializer):
+    """Serializer for issuing a QR payment code"""
+    
+    wallet_id = serializers.UUIDField(required=False)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'), required=False)
+    reference = serializers.CharField(max_length=64, required=False, allow_blank=True, default='')
+    expires_in = serializers.IntegerField(min_value=30, required=False)
+    
+    def validate_expires_in(self, value):
+        if value > settings.QR_CODES['MAX_TTL']:
+            raise serializers.ValidationError(f"At most {settings.QR_CODES['MAX_TTL']} seconds")
+        return value
+
+class QRPaymentSerializer(serializers.Serializer):
+    """What a verified QR payment code asks for"""
+    
+    merchant_id = serializers.UUIDField()
+    wallet_id = serializers.UUIDField(allow_null=True)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True)
+    currency = serializers.CharField()
+    reference = serializers.CharField(allow_blank=True)
+    expires_at = serializers.DateTimeField()
@@ -0,0 +1,262 @@
+"""
+Posting service: the only code path that changes wallet balances.
+
+A posting locks the wallet row, scores it against the velocity rules,
+prices the transaction, applies the balance change, records the Transaction
+with its balanced journal lines and - in commit hooks - invalidates the
+cached wallet balance and counts the posting in its velocity windows.
+
+A transfer moves money between two wallets in one DB transaction: one
+Transaction row (``wallet`` the source, ``destination_wallet`` the
+destination), both balance changes and the journal lines commit together or
+not at all. Every code path that locks more than one wallet goes through
+lock_wallets(), which locks them in primary key order with a single
+SELECT ... FOR UPDATE, so concurrent A->B and B->A transfers queue on the
+same first row instead of each holding the row the other waits for.
+
+post_transfers() nets a batch: it locks every wallet involved once, checks
+each wallet's net change against its balance and applies one balance update
+for the whole batch. Each transfer still gets its own Transaction row and
+journal lines.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from phantom_apps.common import metrics, tracing
+from phantom_apps.common.exceptions import RiskBlockedException, TransactionException, WalletException
+from phantom_apps.ledger.services import journal_batch, record_posting
+from phantom_apps.wallets.cache import wallet_balance_cache
+from phantom_apps.wallets.models import Wallet
+from . import risk
+from .fees import get_fee_schedule
+from .models import Transaction
+
+logger = logging.getLogger('phantom_apps')
+
+BALANCE_DIRECTION = {
+    'credit': 1,
+    'debit': -1,
+}
+TRANSFER = 'transfer'
+TRANSFER_CHANNEL = 'wallet_transfer'
+
+def generate_reference():
+    return f"TXN-{uuid.uuid4().hex[:20].upper()}"
+
+@tracing.traced('transactions.post_transaction')
+def post_transaction(wallet_id, amount, transaction_type, payment_channel,
+                     reference_number=None, description='', external_reference=''):
+    """Post a completed credit or debit against a wallet"""
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise TransactionException("Amount must be positive")
+    if transaction_type not in BALANCE_DIRECTION:
+        raise TransactionException(f"Unsupported transaction type: {transaction_type}")
+
+    try:
+        with transaction.atomic():
+            wallet = Wallet.objects.select_for_update().select_related('merchant', 'customer').get(pk=wallet_id)
+            if wallet.is_frozen or wallet.status != 'active':
+                raise WalletException(f"Wallet {wallet.wallet_id} is not active")
+
+            delta = amount * BALANCE_DIRECTION[transaction_type]
+            if wallet.balance + delta < 0:
+                raise WalletException("Insufficient wallet balance")
+
+            decision = risk.score_posting(wallet, amount, external_reference)
+            if decision.action == risk.BLOCK:
+                logger.warning(f"Blocked {transaction_type} of {amount} to wallet {wallet.wallet_id}: {decision.rules}")
+                raise RiskBlockedException(decision)
+
+            posted = Transaction(
+                wallet=wallet,
+                merchant=wallet.merchant,
+                amount=amount,
+                currency=wallet.currency,
+                transaction_type=transaction_type,
+                payment_channel=payment_channel,
+                status='completed',
+                reference_number=reference_number or generate_reference(),
+                description=description,
+                external_reference=external_reference,
+                completed_at=timezone.now(),
+                risk_decision=decision.action,
+                risk_score=decision.score,
+            )
+            posted.fees = get_fee_schedule().price_transaction(posted)
+            posted.save(force_insert=True)
+            record_posting(posted)
+
+            Wallet.objects.filter(pk=wallet.pk).update(
+                balance=F('balance') + delta,
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+            )
+            wallet_balance_cache.invalidate_on_commit([wallet.pk])
+            risk.record_on_commit(decision)
+            transaction.on_commit(
+                lambda: metrics.count_transaction(payment_channel, transaction_type, 'completed')
+            )
+    except (TransactionException, WalletException):
+        metrics.count_transaction(payment_channel, transaction_type, 'rejected')
+        raise
+
+    if decision.action == risk.REVIEW:
+        logger.warning(f"Posting {posted.reference_number} flagged for review: {decision.rules}")
+    logger.info(f"Posted {transaction_type} of {amount} to wallet {wallet.wallet_id} ({posted.reference_number})")
+    return posted
+
+def lock_wallets(wallet_ids):
+    """
+    Lock wallets (customer and merchant loaded) in primary key order; {wallet_id: Wallet}.
+
+    The ORDER BY sits below the row locks in the plan, so rows are locked in
+    key order whatever order the ids come in. Only the wallet rows are locked.
+    """
+    wallets = (
+        Wallet.objects.select_for_update(of=('self',))
+        .select_related('merchant', 'customer')
+        .filter(pk__in=set(wallet_ids))
+        .order_by('pk')
+    )
+    return {wallet.pk: wallet for wallet in wallets}
+
+def post_transfer(source_wallet_id, destination_wallet_id, amount,
+                  reference_number=None, description='', external_reference=''):
+    """Move ``amount`` from one wallet to another; both legs commit together"""
+    return post_transfers([{
+        'source_wallet_id': source_wallet_id,
+        'destination_wallet_id': destination_wallet_id,
+        'amount': amount,
+        'reference_number': reference_number,
+        'description': description,
+        'external_reference': external_reference,
+    }])[0]
+
+def _net_changes(transfers):
+    """Normalised transfers and the net balance change per wallet"""
+    normalised = []
+    net = defaultdict(Decimal)
+    for transfer in transfers:
+        amount = Decimal(transfer['amount'])
+        if amount <= 0:
+            raise TransactionException("Amount must be positive")
+        ends = []
+        for wallet_id in (transfer['source_wallet_id'], transfer['destination_wallet_id']):
+            try:
+                ends.append(uuid.UUID(str(wallet_id)))
+            except ValueError:
+                raise WalletException(f"Wallet {wallet_id} not found")
+        source, destination = ends
+        if source == destination:
+            raise TransactionException("Cannot transfer to the same wallet")
+        net[source] -= amount
+        net[destination] += amount
+        normalised.append({**transfer, 'source_wallet_id': source, 'destination_wallet_id': destination,
+                           'amount': amount})
+    return normalised, net
+
+@tracing.traced('transactions.post_transfers')
+def post_transfers(transfers):
+    """
+    Post transfers (dicts of post_transfer's arguments) in one DB transaction, netted per wallet.
+
+    All or nothing: an inactive wallet, a currency mismatch, a wallet whose
+    net change would take it below zero or a blocked velocity score rejects
+    the whole batch. Balances are checked after netting, so a wallet may pay
+    out within a batch what it receives in the same batch. Each transfer is
+    scored with the transfers before it in the batch added to its source's
+    velocity counters, so batching does not get round the limits.
+    Returns the Transactions in the order given.
+    """
+    transfers, net = _net_changes(transfers)
+    if not transfers:
+        return []
+
+    try:
+        with journal_batch():
+            wallets = lock_wallets(net)
+            for wallet_id in net:
+                wallet = wallets.get(wallet_id)
+                if wallet is None:
+                    raise WalletException(f"Wallet {wallet_id} not found")
+                if wallet.is_frozen or wallet.status != 'active':
+                    raise WalletException(f"Wallet {wallet_id} is not active")
+                if wallet.balance + net[wallet_id] < 0:
+                    raise WalletException(f"Insufficient wallet balance in {wallet_id}")
+
+            completed_at = timezone.now()
+            rows, decisions = [], []
+            pending = {}
+            for transfer in transfers:
+                source = wallets[transfer['source_wallet_id']]
+                destination = wallets[transfer['destination_wallet_id']]
+                if source.currency != destination.currency:
+                    raise TransactionException(
+                        f"Cannot transfer {source.currency} to a {destination.currency} wallet"
+                    )
+                decision = risk.score_posting(source, transfer['amount'], str(destination.pk), pending)
+                if decision.action == risk.BLOCK:
+                    logger.warning(
+                        f"Blocked transfer of {transfer['amount']} from wallet {source.pk}: {decision.rules}"
+                    )
+                    raise RiskBlockedException(decision)
+                decisions.append(decision)
+                rows.append(Transaction(
+                    wallet=source,
+                    destination_wallet=destination,
+                    merchant=source.merchant,
+                    amount=transfer['amount'],
+                    currency=source.currency,
+                    transaction_type=TRANSFER,
+                    payment_channel=TRANSFER_CHANNEL,
+                    status='completed',
+                    reference_number=transfer.get('reference_number') or generate_reference(),
+                    description=transfer.get('description', ''),
+                    external_reference=transfer.get('external_reference', ''),
+                    completed_at=completed_at,
+                    risk_decision=decision.action,
+                    risk_score=decision.score,
+                ))
+
+            fees = get_fee_schedule().price_many(
+                [row.amount for row in rows], [TRANSFER_CHANNEL] * len(rows),
+                [row.merchant.commission_rate for row in rows], [TRANSFER] * len(rows),
+            )
+            for row, fee in zip(rows, fees):
+                row.fees = fee
+            Transaction.objects.bulk_create(rows)
+            for row in rows:
+                record_posting(row)
+
+            changes = {wallet_id: delta for wallet_id, delta in net.items() if delta}
+            if changes:
+                Wallet.objects.filter(pk__in=changes).update(
+                    balance=F('balance') + Case(
+                        *(When(pk=wallet_id, then=Value(delta)) for wallet_id, delta in changes.items()),
+                        output_field=DecimalField(max_digits=15, decimal_places=2),
+                    ),
+                    version=F('version') + 1,
+                    updated_at=completed_at,
+                )
+                wallet_balance_cache.invalidate_on_commit(changes)
+            for decision in decisions:
+                risk.record_on_commit(decision)
+            transaction.on_commit(lambda: metrics.count_transaction(
+                TRANSFER_CHANNEL, TRANSFER, 'completed', len(rows)
+            ))
+    except (TransactionException, WalletException):
+        metrics.count_transaction(TRANSFER_CHANNEL, TRANSFER, 'rejected')
+        raise
+
+    for row in rows:
+        if row.risk_decision == risk.REVIEW:
+            logger.warning(f"Transfer {row.reference_number} flagged for review")
+    logger.info(f"Posted {len(rows)} transfer(s) across {len(net)} wallets ({len(changes)} balance changes)")
+    return rows
@@ -1,7 +1,12 @@
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import TransactionViewSet
+
+router = DefaultRouter()
+router.register(r'', TransactionViewSet, basename='transactions')
 
 app_name = 'transactions'
 
 urlpatterns = [
-    # Transaction URLs will be defined here
+    path('', include(router.urls)),
 ]
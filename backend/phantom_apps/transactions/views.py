@@ -0,0 +1,195 @@
+from urllib.parse import urlencode
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import HttpResponse, HttpResponseNotModified
+from phantom_apps.common.db.routers import ReadReplicaMixin
+from phantom_apps.common.db.transactions import TransactionPolicyMixin, AUTOCOMMIT, READ_ONLY
+from phantom_apps.common.db.query_budget import QueryBudgetMixin
+from phantom_apps.common.exceptions import RiskBlockedException, TransactionException, WalletException
+from phantom_apps.wallets.cache import wallet_balance_cache
+from phantom_apps.wallets.models import Wallet
+from . import qr
+from .models import Transaction
+from .serializers import (
+    TransactionSerializer, TransactionCreateSerializer, TransferSerializer, TransferBatchSerializer,
+    QRPaymentRequestSerializer, QRPaymentSerializer,
+)
+from .services import post_transaction, post_transfers
+import logging
+
+logger = logging.getLogger('phantom_apps')
+
+class TransactionViewSet(QueryBudgetMixin, TransactionPolicyMixin, ReadReplicaMixin, mixins.CreateModelMixin,
+                         viewsets.ReadOnlyModelViewSet):
+    """ViewSet for transaction operations"""
+    
+    serializer_class = TransactionSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    # post_transaction holds the only transaction, around lock, insert and balance update;
+    # issuing and verifying QR codes are POSTs that never write
+    transaction_policies = {
+        'create': AUTOCOMMIT, 'transfer': AUTOCOMMIT, 'transfers': AUTOCOMMIT,
+        'issue_qr': READ_ONLY, 'verify_qr': READ_ONLY,
+    }
+    # create: merchant, wallet check, then post_transaction's lock, insert, journal and balance
+    # update (ledger accounts already cached by the worker). Transfers likewise, whatever the
+    # batch size; large batches may split the journal INSERT. issue_qr: merchant, plus the wallet
+    # on a balance cache miss. Scanned codes are checked from their signature alone.
+    query_budgets = {
+        'list': 3, 'retrieve': 2, 'create': 6, 'transfer': 6, 'transfers': 8,
+        'issue_qr': 2, 'verify_qr': 0, 'render_qr': 0,
+    }
+    
+    def get_queryset(self):
+        """Filter transactions by merchant"""
+        try:
+            return Transaction.objects.filter(merchant=self.request.user.merchant)
+        except:
+            return Transaction.objects.none()
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return TransactionCreateSerializer
+        return TransactionSerializer
+    
+    def create(self, request, *args, **kwargs):
+        """Post a credit or debit to one of the merchant's wallets"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        merchant = getattr(request.user, 'merchant', None)
+        if merchant is None or not Wallet.objects.filter(
+            wallet_id=data['wallet_id'], merchant=merchant
+        ).exists():
+            return Response({'error': 'Wallet not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            posted = post_transaction(**data)
+        except RiskBlockedException as e:
+            return Response(
+                {'error': str(e), 'risk': {'decision': e.decision.action, 'score': e.decision.score}},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        except (TransactionException, WalletException) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response({'error': 'Duplicate reference number'}, status=status.HTTP_409_CONFLICT)
+        return Response(TransactionSerializer(posted).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def transfer(self, request):
+        """Move money between two of the merchant's wallets"""
+        serializer = TransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self._post_transfers(request, [serializer.validated_data], many=False)
+    
+    @action(detail=False, methods=['post'])
+    def transfers(self, request):
+        """Post a batch of transfers between the merchant's wallets, netted per wallet: all or nothing"""
+        serializer = TransferBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self._post_transfers(request, serializer.validated_data['transfers'], many=True)
+    
+    def _post_transfers(self, request, transfers, many):
+        wallet_ids = {
+            transfer[key] for transfer in transfers for key in ('source_wallet_id', 'destination_wallet_id')
+        }
+        merchant = getattr(request.user, 'merchant', None)
+        if merchant is None or Wallet.objects.filter(
+            wallet_id__in=wallet_ids, merchant=merchant
+        ).count() != len(wallet_ids):
+            return Response({'error': 'Wallet not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            posted = post_transfers(transfers)
+        except RiskBlockedException as e:
+            return Response(
+                {'error': str(e), 'risk': {'decision': e.decision.action, 'score': e.decision.score}},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        except (TransactionException, WalletException) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response({'error': 'Duplicate reference number'}, status=status.HTTP_409_CONFLICT)
+        if many:
+            return Response({'results': TransactionSerializer(posted, many=True).data}, status=status.HTTP_201_CREATED)
+        return Response(TransactionSerializer(posted[0]).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='qr')
+    def issue_qr(self, request):
+        """Issue a signed, expiring QR payment code for the merchant or one of its wallets"""
+        serializer = QRPaymentRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        merchant = getattr(request.user, 'merchant', None)
+        if merchant is None:
+            return Response({'error': 'Merchant not found'}, status=status.HTTP_404_NOT_FOUND)
+        currency = 'BWP'
+        wallet_id = data.get('wallet_id')
+        if wallet_id is not None:
+            wallet = wallet_balance_cache.get(wallet_id)
+            if wallet is None or wallet['merchant_id'] != str(merchant.merchant_id):
+                return Response({'error': 'Wallet not found'}, status=status.HTTP_404_NOT_FOUND)
+            if wallet['status'] != 'active' or wallet['is_frozen']:
+                return Response({'error': 'Wallet cannot receive payments'}, status=status.HTTP_400_BAD_REQUEST)
+            currency = wallet['currency']
+        
+        content, payment = qr.issue_payload(
+            merchant.merchant_id, wallet_id, data.get('amount'), currency, data['reference'], data.get('expires_in')
+        )
+        return Response({
+            'payload': content,
+            **QRPaymentSerializer(payment).data,
+            'image_url': request.build_absolute_uri('image/?' + urlencode({'payload': content})),
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='qr/verify',
+            authentication_classes=[JWTStatelessUserAuthentication])
+    def verify_qr(self, request):
+        """Check a scanned QR payment code: signature and expiry, no database queries"""
+        try:
+            payment = qr.verify_payload(request.data.get('payload'))
+        except qr.ExpiredPayload as e:
+            return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+        except qr.InvalidPayload as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({**QRPaymentSerializer(payment).data, 'expires_in': payment.expires_in()})
+    
+    @action(detail=False, methods=['get'], url_path='qr/image', authentication_classes=[],
+            permission_classes=[AllowAny])
+    def render_qr(self, request):
+        """PNG of a valid QR payment code (?payload=...&size=...), served from the image caches"""
+        config = settings.QR_CODES
+        size = request.query_params.get('size', str(config['DEFAULT_SIZE']))
+        if not size.isdigit() or int(size) not in config['SIZES']:
+            return Response(
+                {'error': f"size must be one of {', '.join(map(str, config['SIZES']))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        size = int(size)
+        content = request.query_params.get('payload', '')
+        try:
+            payment = qr.verify_payload(content)
+        except qr.ExpiredPayload as e:
+            return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+        except qr.InvalidPayload as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        etag = f'"{qr.digest(content)}-{size}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified(headers={'ETag': etag})
+        png, source = qr.get_qr_images().get(content, payment, size)
+        response = HttpResponse(png, content_type='image/png')
+        response['ETag'] = etag
+        # The image never changes; it is only worth keeping while the code is valid
+        response['Cache-Control'] = f'public, max-age={payment.expires_in()}, immutable'
+        response['X-QR-Cache'] = source
+        return response
@@ -0,0 +1,215 @@
+"""
+Read-through cache for wallet balance and status.
+
+Each cached entry carries the generation it was read under. Postings bump a
+per-wallet generation counter in an on_commit hook, so an entry filled from
+a read that raced with a commit is never served afterwards: after a commit a
+reader either sees the new generation (and refills) or the fresh entry.
+
+    payload key:    wallet:balance:<id>  -> {'g': generation, 'b': balance, ...}
+    generation key: wallet:gen:<id>      -> int (no expiry)
+
+The cache is never the source of truth: if it cannot be reached, reads go
+to the database, and a posting that committed is never reported as failed.
+A failed invalidation is kept pending in the process and retried before its
+next cache read or invalidation; until it succeeds this process reads those
+wallets from the database. Other workers see the bump once it lands.
+"""
+import logging
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger('phantom_apps')
+
+BALANCE_FIELDS = ('wallet_id', 'merchant_id', 'balance', 'currency', 'status', 'is_frozen', 'version')
+
+class CacheStats:
+    """Per-process hit/miss counters and latency totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lookup_time = 0.0
+        self.lookups = 0
+        self.fill_time = 0.0
+        self.fills = 0
+
+    def record_lookup(self, hits, misses, elapsed):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.lookups += 1
+            self.lookup_time += elapsed
+
+    def record_fill(self, elapsed):
+        with self._lock:
+            self.fills += 1
+            self.fill_time += elapsed
+
+    def record_invalidation(self, count):
+        with self._lock:
+            self.invalidations += count
+
+    def as_dict(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / requests, 4) if requests else 0.0,
+                'avg_lookup_ms': round(self.lookup_time / self.lookups * 1000, 3) if self.lookups else 0.0,
+                'avg_db_fill_ms': round(self.fill_time / self.fills * 1000, 3) if self.fills else 0.0,
+            }
+
+class WalletBalanceCache:
+    """Versioned read-through cache of Wallet balance/status"""
+
+    def __init__(self, alias=None, timeout=None):
+        config = settings.WALLET_BALANCE_CACHE
+        self.alias = alias or config['ALIAS']
+        self.timeout = config['TIMEOUT'] if timeout is None else timeout
+        self.stats = CacheStats()
+        # Wallet ids whose generation bump failed, retried before the next cache call
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def payload_key(wallet_id):
+        return f"wallet:balance:{wallet_id}"
+
+    @staticmethod
+    def generation_key(wallet_id):
+        return f"wallet:gen:{wallet_id}"
+
+    def get(self, wallet_id):
+        """Balance/status of one wallet, or None if it does not exist"""
+        return self.get_many([wallet_id]).get(str(wallet_id))
+
+    def get_many(self, wallet_ids):
+        """Balances for many wallets with one cache round trip and at most one DB query"""
+        start = time.perf_counter()
+        wallet_ids = list(dict.fromkeys(str(wallet_id) for wallet_id in wallet_ids))
+        if self._pending:
+            self.invalidate(())
+            stale = self._pending & set(wallet_ids)
+            if stale:
+                # Still not invalidated: their cached entries may predate a commit
+                results = self._fill(dict.fromkeys(wallet_ids, 0), store=False)
+                self.stats.record_lookup(0, len(wallet_ids), time.perf_counter() - start)
+                return results
+        keys = []
+        for wallet_id in wallet_ids:
+            keys.append(self.payload_key(wallet_id))
+            keys.append(self.generation_key(wallet_id))
+        try:
+            cached = self.cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Wallet balance cache read failed, reading from the database: {e}")
+            cached = None
+
+        if cached is None:
+            results = self._fill(dict.fromkeys(wallet_ids, 0), store=False)
+            self.stats.record_lookup(0, len(wallet_ids), time.perf_counter() - start)
+            return results
+
+        results = {}
+        missing = {}
+        for wallet_id in wallet_ids:
+            payload = cached.get(self.payload_key(wallet_id))
+            generation = cached.get(self.generation_key(wallet_id), 0)
+            if payload is not None and payload['g'] == generation:
+                results[wallet_id] = self._from_payload(payload)
+            else:
+                missing[wallet_id] = generation
+
+        if missing:
+            results.update(self._fill(missing))
+        self.stats.record_lookup(len(wallet_ids) - len(missing), len(missing), time.perf_counter() - start)
+        return results
+
+    def _fill(self, missing, store=True):
+        from .models import Wallet
+
+        start = time.perf_counter()
+        rows = Wallet.objects.filter(pk__in=list(missing)).order_by().values(*BALANCE_FIELDS)
+        results = {}
+        to_cache = {}
+        for row in rows:
+            wallet_id = str(row['wallet_id'])
+            payload = {
+                'g': missing[wallet_id],
+                'm': str(row['merchant_id']),
+                'b': str(row['balance']),
+                'c': row['currency'],
+                's': row['status'],
+                'f': row['is_frozen'],
+                'v': row['version'],
+            }
+            to_cache[self.payload_key(wallet_id)] = payload
+            results[wallet_id] = self._from_payload(payload)
+        if to_cache and store:
+            try:
+                self.cache.set_many(to_cache, timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"Wallet balance cache write failed: {e}")
+        self.stats.record_fill(time.perf_counter() - start)
+        return results
+
+    @staticmethod
+    def _from_payload(payload):
+        return {
+            'merchant_id': payload['m'],
+            'balance': Decimal(payload['b']),
+            'currency': payload['c'],
+            'status': payload['s'],
+            'is_frozen': payload['f'],
+            'version': payload['v'],
+        }
+
+    def invalidate(self, wallet_ids):
+        """Bump the generation of each wallet (and of pending ones) so older cached entries are ignored"""
+        with self._pending_lock:
+            wallet_ids = sorted({str(wallet_id) for wallet_id in wallet_ids} | self._pending)
+            self._pending.clear()
+        if not wallet_ids:
+            return
+        cache = self.cache
+        try:
+            for wallet_id in wallet_ids:
+                key = self.generation_key(wallet_id)
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    # First invalidation (or the counter was evicted): start a new generation
+                    if not cache.add(key, 1, timeout=None):
+                        cache.incr(key)
+            cache.delete_many([self.payload_key(wallet_id) for wallet_id in wallet_ids])
+        except Exception as e:
+            # Runs after the posting committed: the caller must not see a failure for money that moved
+            logger.warning(f"Wallet balance cache invalidation failed for {len(wallet_ids)} wallet(s), will retry: {e}")
+            with self._pending_lock:
+                self._pending.update(wallet_ids)
+            return
+        self.stats.record_invalidation(len(wallet_ids))
+
+    def invalidate_on_commit(self, wallet_ids, using=None):
+        """Invalidate once the surrounding posting transaction commits"""
+        wallet_ids = list(wallet_ids)
+        transaction.on_commit(lambda: self.invalidate(wallet_ids), using=using, robust=True)
+
+wallet_balance_cache = WalletBalanceCache()
@@ -1,12 +1,12 @@
 from django.db import models
 from django.utils import timezone
 from decimal import Decimal
-import uuid
+from phantom_apps.common.ids import uuid7
 
 class Wallet(models.Model):
     """Phantom wallet model"""
     
-    wallet_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    wallet_id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     customer = models.OneToOneField('customers.Customer', on_delete=models.CASCADE, related_name='wallet')
     merchant = models.ForeignKey('merchants.Merchant', on_delete=models.CASCADE, related_name='wallets')
     
@@ -24,9 +24,17 @@ class Wallet(models.Model):
     status = models.CharField(max_length=20, default='active')
     is_frozen = models.BooleanField(default=False)
     
+    # Incremented on every balance change; used as the version stamp of cached balances
+    version = models.PositiveBigIntegerField(default=0)
+    
     class Meta:
         db_table = 'wallets'
         ordering = ['-created_at']
+        indexes = [
+            # Merchant wallet lists, newest first, optionally by status
+            models.Index(fields=['merchant', 'created_at']),
+            models.Index(fields=['merchant', 'status', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Wallet {self.wallet_id} - {self.customer.first_name} {self.customer.last_name}"
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from .models import Wallet
+
+class WalletSerializer(serializers.ModelSerializer):
+    """Serializer for wallet data"""
+    
+    class Meta:
+        model = Wallet
+        fields = [
+            'wallet_id', 'customer', 'balance', 'currency',
+            'daily_limit', 'monthly_limit', 'status', 'is_frozen',
+            'version', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+class WalletBalanceSerializer(serializers.Serializer):
+    """Cached balance view of a wallet"""
+    
+    wallet_id = serializers.UUIDField()
+    balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    currency = serializers.CharField()
+    status = serializers.CharField()
+    is_frozen = serializers.BooleanField()
+    version = serializers.IntegerField()
@@ -1,7 +1,12 @@
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import WalletViewSet
+
+router = DefaultRouter()
+router.register(r'', WalletViewSet, basename='wallets')
 
 app_name = 'wallets'
 
 urlpatterns = [
-    # Wallet URLs will be defined here
+    path('', include(router.urls)),
 ]
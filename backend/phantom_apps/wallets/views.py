@@ -0,0 +1,81 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from phantom_apps.common.db.routers import ReadReplicaMixin
+from phantom_apps.common.db.transactions import TransactionPolicyMixin, READ_ONLY
+from phantom_apps.common.db.query_budget import QueryBudgetMixin
+from .models import Wallet
+from .serializers import WalletSerializer, WalletBalanceSerializer
+from .cache import wallet_balance_cache
+import logging
+import uuid
+
+logger = logging.getLogger('phantom_apps')
+
+MAX_BULK_BALANCES = 500
+
+class WalletViewSet(QueryBudgetMixin, TransactionPolicyMixin, ReadReplicaMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for wallet operations"""
+    
+    # Bulk balance lookup is a POST but never writes
+    transaction_policies = {'balances': READ_ONLY}
+    # Balance reads: request.user.merchant, plus one query on a cache miss
+    query_budgets = {'list': 3, 'retrieve': 2, 'balance': 2, 'balances': 2}
+    serializer_class = WalletSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Filter wallets by merchant"""
+        try:
+            return Wallet.objects.filter(merchant=self.request.user.merchant)
+        except:
+            return Wallet.objects.none()
+    
+    @staticmethod
+    def _valid_ids(wallet_ids):
+        valid = []
+        for wallet_id in wallet_ids:
+            try:
+                valid.append(str(uuid.UUID(str(wallet_id))))
+            except ValueError:
+                continue
+        return valid
+    
+    def _merchant_id(self, request):
+        merchant = getattr(request.user, 'merchant', None)
+        return str(merchant.merchant_id) if merchant else None
+    
+    @action(detail=True, methods=['get'])
+    def balance(self, request, pk=None):
+        """Balance and status from the read-through cache"""
+        wallet_ids = self._valid_ids([pk])
+        cached = wallet_balance_cache.get(wallet_ids[0]) if wallet_ids else None
+        if cached is None or cached['merchant_id'] != self._merchant_id(request):
+            return Response({'error': 'Wallet not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(WalletBalanceSerializer({'wallet_id': wallet_ids[0], **cached}).data)
+    
+    @action(detail=False, methods=['post'])
+    def balances(self, request):
+        """Bulk balance lookup for dashboards: {"wallet_ids": [...]}"""
+        wallet_ids = request.data.get('wallet_ids')
+        if not isinstance(wallet_ids, list) or len(wallet_ids) > MAX_BULK_BALANCES:
+            return Response(
+                {'error': f'wallet_ids must be a list of at most {MAX_BULK_BALANCES} ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        merchant_id = self._merchant_id(request)
+        cached = wallet_balance_cache.get_many(self._valid_ids(wallet_ids))
+        balances = [
+            {'wallet_id': wallet_id, **values}
+            for wallet_id, values in cached.items()
+            if values['merchant_id'] == merchant_id
+        ]
+        return Response({'results': WalletBalanceSerializer(balances, many=True).data})
+    
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Hit ratio and latency of this worker's wallet balance cache"""
+        return Response(wallet_balance_cache.stats.as_dict())
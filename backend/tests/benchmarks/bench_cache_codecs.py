@@ -0,0 +1,117 @@
+"""
+Cache serializer/compressor benchmark on our real cache payload shapes
+
+Measures encode+decode time and stored size per payload for the old
+JSONSerializer+ZlibCompressor pair and the orjson + threshold codecs.
+No Redis needed: this isolates the CPU spent in the codec.
+
+Usage:
+    python tests/benchmarks/bench_cache_codecs.py [--iterations 20000] [--min-length 1024]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+from pathlib import Path
+from decimal import Decimal
+from datetime import datetime, timezone
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from django_redis.compressors.identity import IdentityCompressor
+from django_redis.compressors.zlib import ZlibCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.json import JSONSerializer
+from phantom_apps.common.cache_codecs import (
+    ORJSONSerializer, Lz4ThresholdCompressor, ZstdThresholdCompressor, ZlibThresholdCompressor,
+)
+
+def wallet_balance_payload():
+    """Entry written by phantom_apps.wallets.cache"""
+    return {'g': 3, 'm': str(uuid.uuid4()), 'b': '1520.75', 'c': 'BWP', 's': 'active', 'f': False, 'v': 17}
+
+def payload_shapes():
+    rng = random.Random(7)
+    now = time.time()
+    return {
+        # DRF throttle history for one user: list of request timestamps
+        'throttle_history': [now - rng.random() * 3600 for _ in range(40)],
+        # Authenticated admin session
+        'session': {
+            '_auth_user_id': '42',
+            '_auth_user_backend': 'django.contrib.auth.backends.ModelBackend',
+            '_auth_user_hash': 'a' * 64,
+            '_session_touched_at': now,
+        },
+        'wallet_balance': wallet_balance_payload(),
+        # Serialized merchant dashboard block
+        'merchant': {
+            'merchant_id': str(uuid.uuid4()),
+            'business_name': 'Kgosi General Dealer',
+            'fnb_account_number': '62012345678',
+            'contact_email': 'owner@kgosi.co.bw',
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'commission_rate': Decimal('0.50'),
+            'total_volume': Decimal('125000.00'),
+        },
+        # Dashboard bulk balance page (100 wallets)
+        'dashboard_balances': [wallet_balance_payload() for _ in range(100)],
+    }
+
+def make_codecs(min_length):
+    options = {'COMPRESS_MIN_LENGTH': min_length}
+    return {
+        'json+zlib (before)': (JSONSerializer({}), ZlibCompressor({})),
+        'orjson (no compression)': (ORJSONSerializer({}), IdentityCompressor({})),
+        f'orjson+lz4 >{min_length}B': (ORJSONSerializer({}), Lz4ThresholdCompressor(options)),
+        f'orjson+zstd >{min_length}B': (ORJSONSerializer({}), ZstdThresholdCompressor(options)),
+        f'orjson+zlib >{min_length}B': (ORJSONSerializer({}), ZlibThresholdCompressor(options)),
+    }
+
+def roundtrip(serializer, compressor, value):
+    """Same steps as django_redis DefaultClient.encode/decode"""
+    encoded = compressor.compress(serializer.dumps(value))
+    stored = encoded
+    try:
+        encoded = compressor.decompress(encoded)
+    except CompressorError:
+        pass
+    serializer.loads(encoded)
+    return stored
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--min-length', type=int, default=1024)
+    args = parser.parse_args()
+
+    print("🏁 Cache Codec Benchmark")
+    print("=" * 78)
+    shapes = payload_shapes()
+    codecs = make_codecs(args.min_length)
+
+    for shape, value in shapes.items():
+        print(f"\n{shape}")
+        print(f"  {'codec':<28}{'µs/roundtrip':>14}{'stored bytes':>14}{'vs before':>12}")
+        baseline = None
+        for name, (serializer, compressor) in codecs.items():
+            stored = roundtrip(serializer, compressor, value)
+            iterations = args.iterations if shape != 'dashboard_balances' else args.iterations // 20
+            start = time.perf_counter()
+            for _ in range(iterations):
+                roundtrip(serializer, compressor, value)
+            micros = (time.perf_counter() - start) / iterations * 1e6
+            if baseline is None:
+                baseline = micros
+            print(f"  {name:<28}{micros:>14.2f}{len(stored):>14}{baseline / micros:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
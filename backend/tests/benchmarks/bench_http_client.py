@@ -0,0 +1,158 @@
+"""
+Outbound HTTP client benchmark against the mock FNB server
+
+Compares a new connection per call with the shared keep-alive pool and
+shows request coalescing for concurrent identical balance lookups.
+
+Usage:
+    python tests/benchmarks/bench_http_client.py [--requests 500] [--threads 32] [--base-url URL]
+
+Without --base-url an in-process threaded server (HTTP/1.1, keep-alive) is
+started on a free local port. Point --base-url at a gunicorn instance to
+include real worker/TLS costs.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+import urllib3
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from phantom_apps.common.http_client import PooledHTTPClient
+from phantom_apps.mock_systems.fnb.client import FNBClient
+from phantom_apps.mock_systems.fnb.models import MockFNBAccount
+
+ACCOUNT_NUMBER = 'BENCH000001'
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        # The dev server writes headers and body separately; without NODELAY
+        # keep-alive connections stall on delayed ACKs like no real server would
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    """Serve the Django app on a free local port in a background thread"""
+    httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+    httpd.set_app(get_wsgi_application())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address
+    return httpd, f"http://{host}:{port}/api/v1/mock-fnb"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name, samples, wall_time):
+    print(f"  {name}")
+    print(f"    requests: {len(samples)}  throughput: {len(samples) / wall_time:,.0f} req/s")
+    print(
+        f"    p50: {percentile(samples, 50):.3f} ms  p95: {percentile(samples, 95):.3f} ms  "
+        f"p99: {percentile(samples, 99):.3f} ms  mean: {statistics.mean(samples):.3f} ms"
+    )
+
+def bench_new_connection_per_call(base_url, headers, count):
+    """Baseline: a fresh pool (and so a fresh TCP/TLS connection) for every call"""
+    samples = []
+    url = f"{base_url}/accounts/{ACCOUNT_NUMBER}/balance/"
+    start_all = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        manager = urllib3.PoolManager()
+        response = manager.request('GET', url, headers=headers)
+        assert response.status == 200, response.status
+        manager.clear()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, time.perf_counter() - start_all
+
+def bench_pooled(client, count):
+    samples = []
+    start_all = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get_balance(ACCOUNT_NUMBER)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, time.perf_counter() - start_all
+
+def bench_concurrent(client, count, threads):
+    samples = []
+    lock = threading.Lock()
+
+    def call(_):
+        start = time.perf_counter()
+        client.get_balance(ACCOUNT_NUMBER)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append(elapsed)
+
+    start_all = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(count)))
+    return samples, time.perf_counter() - start_all
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--base-url', default=None)
+    args = parser.parse_args()
+
+    print("🏁 Outbound HTTP Client Benchmark")
+    print("=" * 60)
+
+    account, _ = MockFNBAccount.objects.get_or_create(
+        account_number=ACCOUNT_NUMBER,
+        defaults={'account_holder_name': 'Benchmark Merchant', 'balance': Decimal('1000.00')},
+    )
+    httpd = None
+    base_url = args.base_url
+    if base_url is None:
+        httpd, base_url = start_server()
+    print(f"Target: {base_url}")
+
+    config = settings.PHANTOM_BANKING_SETTINGS
+    headers = {'X-API-Key': config['MOCK_FNB_API_KEY'], 'X-API-Secret': config['MOCK_FNB_API_SECRET']}
+
+    try:
+        report('New connection per call', *bench_new_connection_per_call(base_url, headers, args.requests))
+
+        pooled = FNBClient(http=PooledHTTPClient(base_url=base_url, headers=headers, coalesce_gets=False))
+        report('Shared keep-alive pool', *bench_pooled(pooled, args.requests))
+        host_metrics = next(v for k, v in pooled.pool_metrics().items() if not k.startswith('_'))
+        print(f"    connections created: {host_metrics['connections_created']}  "
+              f"reuse ratio: {host_metrics['connection_reuse_ratio']:.2%}")
+
+        for coalesce in (False, True):
+            client = FNBClient(http=PooledHTTPClient(base_url=base_url, headers=headers, coalesce_gets=coalesce))
+            label = f"{args.threads} threads, coalescing {'on' if coalesce else 'off'}"
+            report(label, *bench_concurrent(client, args.requests, args.threads))
+            host_metrics = next(v for k, v in client.pool_metrics().items() if not k.startswith('_'))
+            print(f"    upstream requests: {host_metrics['requests']}  coalesced: {host_metrics['coalesced']}")
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+        account.delete()
+
+if __name__ == "__main__":
+    main()
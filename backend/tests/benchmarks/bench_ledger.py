@@ -0,0 +1,134 @@
+"""
+Journal benchmark: posting throughput and historical balance queries
+
+Posts the same workload three ways - without the journal, journaling each
+posting with one multi-row INSERT, and inside journal_batch() - and reports
+postings/s and SQL statements per posting. Then times balance_at() for a
+busy account with and without a balance snapshot.
+
+Usage:
+    python tests/benchmarks/bench_ledger.py [--postings 2000] [--history 20000]
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Postings are scored as usual, but never flagged or blocked
+os.environ.setdefault('VELOCITY_REVIEW_SCORE', '1000000')
+os.environ.setdefault('VELOCITY_BLOCK_SCORE', '1000000')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions import services as posting
+from phantom_apps.ledger import services as ledger
+from phantom_apps.ledger.models import JournalEntry, LedgerAccount
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+def seed():
+    User.objects.filter(username='benchledger').delete()
+    user = User.objects.create_user(username='benchledger', password='benchpass123')
+    merchant = Merchant.objects.create(
+        user=user, business_name='Bench Ledger', fnb_account_number='BENCHLED01',
+        contact_email='bench@ledger.test', phone_number='+26770000001',
+        business_registration='BENCHLED', api_key='bench-ledger',
+    )
+    customer = Customer.objects.create(merchant=merchant, first_name='Bench', last_name='Ledger', phone_number='+26771000001')
+    wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('0.00'))
+    return user, wallet
+
+def post_many(wallet, count, mode):
+    counter = StatementCounter()
+    record_posting = posting.record_posting
+    if mode == 'no journal':
+        posting.record_posting = lambda posted: None
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counter):
+            if mode == 'batched':
+                with ledger.journal_batch():
+                    for _ in range(count):
+                        posting.post_transaction(wallet.wallet_id, Decimal('1.00'), 'credit', 'mobile_money')
+            else:
+                with transaction.atomic():
+                    for _ in range(count):
+                        posting.post_transaction(wallet.wallet_id, Decimal('1.00'), 'credit', 'mobile_money')
+    finally:
+        posting.record_posting = record_posting
+    return time.perf_counter() - start, counter.count
+
+def time_balance_at(account_id, at, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        balance = ledger.balance_at(account_id, at)
+    return (time.perf_counter() - start) / repeat, balance
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--postings', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=20000)
+    args = parser.parse_args()
+
+    print("🏁 Journal Benchmark")
+    print("=" * 72)
+    print(f"{args.postings} postings per mode, database: {connection.vendor}")
+
+    # Posting goes through the balance cache invalidation; keep Redis out of it
+    with override_settings(CACHES={alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES}):
+        user, wallet = seed()
+        try:
+            print(f"\n  {'mode':<16}{'postings/s':>12}{'stmts/posting':>15}")
+            for mode in ('no journal', 'per posting', 'batched'):
+                elapsed, statements = post_many(wallet, args.postings, mode)
+                print(f"  {mode:<16}{args.postings / elapsed:>12.0f}{statements / args.postings:>15.2f}")
+
+            # Historical balance of a busy account
+            account = LedgerAccount.objects.get(code=ledger.wallet_account_code(wallet.wallet_id))
+            float_account = LedgerAccount.objects.get(code=ledger.float_account_code(wallet.merchant_id))
+            old = timezone.now() - timedelta(days=30)
+            history = []
+            for _ in range(args.history):
+                # Balanced filler journals, so the journal stays auditable
+                journal_id = uuid.uuid4()
+                history.append(JournalEntry(journal_id=journal_id, account=account, amount=Decimal('0.01'), created_at=old))
+                history.append(JournalEntry(journal_id=journal_id, account=float_account, amount=Decimal('-0.01'), created_at=old))
+            JournalEntry.objects.bulk_create(history, batch_size=settings.LEDGER_SETTINGS['BATCH_SIZE'])
+            at = timezone.now()
+
+            full_scan, full_balance = time_balance_at(account.pk, at)
+            ledger.take_balance_snapshots(now=at + timedelta(seconds=settings.LEDGER_SETTINGS['SNAPSHOT_SETTLE_SECONDS']))
+            with_snapshot, snapshot_balance = time_balance_at(account.pk, at)
+            assert full_balance == snapshot_balance, (full_balance, snapshot_balance)
+
+            print(f"\n  balance_at over {account.entries.count()} entries")
+            print(f"  {'full scan':<16}{full_scan * 1000:>10.2f} ms")
+            print(f"  {'with snapshot':<16}{with_snapshot * 1000:>10.2f} ms")
+        finally:
+            user.delete()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+HTTP load test: API scenarios under concurrency, reported as JSON
+
+Drives each scenario against the real WSGI app - served in-process on a
+free local port, or any running server via --base-url (gunicorn, uvicorn
+with core.asgi) - from --concurrency threads for --duration seconds, and
+reports throughput and p50/p95/p99 latency per scenario.
+
+Scenarios:
+    register         POST /api/v1/merchants/register/
+    customer_create  POST /api/v1/customers/
+    balance_read     GET  /api/v1/wallets/<id>/balance/
+    payout           POST /api/v1/transactions/ (debit, bank_transfer)
+    statement        GET  /api/v1/transactions/?page=N (transaction history pages)
+
+The dataset comes from ``manage.py seed_loadtest``; pass --seed-merchants /
+--seed-wallets to (re)seed before running. Seeding is reproducible: the same
+--seed and --seed-base-time give the same rows, keys and dates. The JSON
+report records the git commit, dataset size and time span, and run
+parameters; --compare prints the change against an earlier report and warns
+when the two runs are not comparable.
+
+Usage:
+    python tests/benchmarks/bench_load.py [--scenarios balance_read,payout] [--concurrency 8]
+        [--duration 10] [--output report.json] [--compare baseline.json]
+        [--seed-merchants 10000 --seed-wallets 1000000] [--seed-base-time 2025-01-01T00:00:00+00:00]
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import statistics
+import subprocess
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# The in-process server must not throttle the load generator
+os.environ.setdefault('THROTTLE_RATE_ANON', '1000000/second')
+os.environ.setdefault('THROTTLE_RATE_USER', '1000000/second')
+# Postings are scored as usual, but never flagged or blocked
+os.environ.setdefault('VELOCITY_REVIEW_SCORE', '1000000')
+os.environ.setdefault('VELOCITY_BLOCK_SCORE', '1000000')
+
+import django
+django.setup()
+
+import urllib3
+from django.core.management import call_command
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.models import Max
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common.management.commands.seed_loadtest import DEFAULT_BASE_TIME, DEFAULT_PREFIX, seeded_users
+from phantom_apps.customers.models import Customer
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.transactions.models import Transaction
+from phantom_apps.wallets.models import Wallet
+
+SCENARIOS = ('register', 'customer_create', 'balance_read', 'payout', 'statement')
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    """Serve the Django app on a free local port in a background thread"""
+    httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+    httpd.set_app(get_wsgi_application())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address
+    return httpd, f"http://{host}:{port}"
+
+def git_revision():
+    def git(*args):
+        result = subprocess.run(['git', *args], cwd=project_root, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    return {'sha': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+class LoadContext:
+    """Seeded merchants (with access tokens) and their wallets, sampled once per run"""
+
+    def __init__(self, prefix, sample_merchants, wallets_per_merchant, run_tag):
+        self.prefix = prefix
+        self.run_tag = run_tag
+        merchants = list(
+            Merchant.objects.filter(user__in=seeded_users(prefix))
+            .select_related('user').order_by('user__username')[:sample_merchants]
+        )
+        if not merchants:
+            raise SystemExit(f"No '{prefix}' dataset: run manage.py seed_loadtest or pass --seed-merchants")
+        self.tokens = [str(RefreshToken.for_user(merchant.user).access_token) for merchant in merchants]
+        self.wallets = []
+        for token, merchant in zip(self.tokens, merchants):
+            wallet_ids = Wallet.objects.filter(merchant=merchant).order_by('pk').values_list('pk', flat=True)
+            self.wallets.extend((token, str(wallet_id)) for wallet_id in wallet_ids[:wallets_per_merchant])
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+def auth(token):
+    return {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+
+def build_request(scenario, ctx, rng):
+    """(method, path, headers, body) for one request of a scenario"""
+    if scenario == 'register':
+        number = ctx.next_id()
+        username = f'{ctx.run_tag}_{number}'
+        return 'POST', '/api/v1/merchants/register/', {'Content-Type': 'application/json'}, {
+            'username': username,
+            'password': 'loadtest-pass-123',
+            'password_confirm': 'loadtest-pass-123',
+            'business_name': f'Load Registration {number}',
+            'fnb_account_number': f'{ctx.run_tag[-8:]}{number:08d}',
+            'contact_email': f'{username}@loadtest.local',
+            'phone_number': '+26770000000',
+            'business_registration': f'{ctx.run_tag}R{number}',
+        }
+    if scenario == 'customer_create':
+        return 'POST', '/api/v1/customers/', auth(rng.choice(ctx.tokens)), {
+            'first_name': 'Load', 'last_name': ctx.run_tag, 'phone_number': f'+267{rng.randrange(10 ** 8):08d}',
+        }
+    if scenario == 'balance_read':
+        token, wallet_id = rng.choice(ctx.wallets)
+        return 'GET', f'/api/v1/wallets/{wallet_id}/balance/', auth(token), None
+    if scenario == 'payout':
+        token, wallet_id = rng.choice(ctx.wallets)
+        return 'POST', '/api/v1/transactions/', auth(token), {
+            'wallet_id': wallet_id, 'amount': '1.00', 'transaction_type': 'debit',
+            'payment_channel': 'bank_transfer', 'description': ctx.run_tag,
+        }
+    if scenario == 'statement':
+        return 'GET', f'/api/v1/transactions/?page={rng.randint(1, 5)}', auth(rng.choice(ctx.tokens)), None
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+def run_scenario(scenario, ctx, base_url, concurrency, duration, warmup, seed):
+    http = urllib3.PoolManager(maxsize=concurrency, block=True, retries=False)
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def worker(worker_index):
+        rng = random.Random(f'{seed}:{scenario}:{worker_index}')
+        local_latencies, local_statuses = [], {}
+        # Warm-up requests (connections, caches, first-call imports) are not measured
+        for _ in range(warmup):
+            method, path, headers, body = build_request(scenario, ctx, rng)
+            http.request(method, base_url + path, headers=headers, body=json.dumps(body) if body else None)
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            method, path, headers, body = build_request(scenario, ctx, rng)
+            start = time.perf_counter()
+            try:
+                status = http.request(
+                    method, base_url + path, headers=headers, body=json.dumps(body) if body else None,
+                ).status
+            except urllib3.exceptions.HTTPError:
+                status = 'error'
+            local_latencies.append((time.perf_counter() - start) * 1000)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status == 'error' or status >= 400)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'error_rate': round(errors / len(latencies), 4) if latencies else None,
+        'throughput_rps': round(len(latencies) / duration, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(statistics.mean(latencies), 3) if latencies else None,
+        'max_ms': round(latencies[-1], 3) if latencies else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'wall_time_s': round(wall_time, 2),
+    }
+
+def dataset_summary(prefix):
+    merchants = Merchant.objects.filter(user__in=seeded_users(prefix))
+    transactions = Transaction.objects.filter(merchant__in=merchants)
+    latest = transactions.aggregate(latest=Max('created_at'))['latest']
+    return {
+        'prefix': prefix,
+        'merchants': merchants.count(),
+        'wallets': Wallet.objects.filter(merchant__in=merchants).count(),
+        'transactions': transactions.count(),
+        # Follows the seed base time, so datasets seeded at different times differ here
+        'latest_transaction_at': latest and latest.isoformat(),
+    }
+
+def cleanup(ctx):
+    """Remove rows the write scenarios created"""
+    Transaction.objects.filter(description=ctx.run_tag).delete()
+    Customer.objects.filter(last_name=ctx.run_tag).delete()
+    seeded_users(ctx.run_tag).delete()
+
+def compare(report, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\n  vs {baseline['git']['sha'] and baseline['git']['sha'][:10]} ({baseline_path})")
+    for key in ('dataset', 'config'):
+        if baseline[key] != report[key]:
+            print(f"  ⚠️  {key} differs from the baseline, results are not directly comparable")
+    print(f"  {'scenario':<17}{'rps':>10}{'p95':>10}{'p99':>10}")
+    for name, result in report['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before:
+            continue
+
+        def delta(field):
+            if not before.get(field) or result.get(field) is None:
+                return 'n/a'
+            return f"{(result[field] - before[field]) / before[field] * 100:+.1f}%"
+
+        print(f"  {name:<17}{delta('throughput_rps'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per thread')
+    parser.add_argument('--base-url', default=None, help='Target server (default: in-process WSGI server)')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+    parser.add_argument('--sample-merchants', type=int, default=200)
+    parser.add_argument('--wallets-per-merchant', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--seed-merchants', type=int, default=None, help='Seed (replacing) a dataset first')
+    parser.add_argument('--seed-wallets', type=int, default=None)
+    parser.add_argument('--seed-base-time', default=DEFAULT_BASE_TIME, help='Seeded history leads up to this time')
+    parser.add_argument('--output', default=None, help='Write the JSON report here')
+    parser.add_argument('--compare', default=None, help='Earlier JSON report to compare against')
+    parser.add_argument('--keep', action='store_true', help='Keep rows created by write scenarios')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    print("🏁 HTTP Load Test")
+    print("=" * 72)
+
+    if args.seed_merchants:
+        call_command(
+            'seed_loadtest', merchants=args.seed_merchants, wallets=args.seed_wallets or args.seed_merchants * 100,
+            prefix=args.prefix, reset=True, seed=args.seed, base_time=args.seed_base_time,
+        )
+
+    httpd = None
+    base_url = args.base_url
+    if base_url is None:
+        httpd, base_url = start_server()
+    base_url = base_url.rstrip('/')
+
+    run_tag = f"lt{int(time.time())}"
+    ctx = LoadContext(args.prefix, args.sample_merchants, args.wallets_per_merchant, run_tag)
+    report = {
+        'git': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'server': 'in-process wsgiref' if httpd else base_url,
+            'cpus': os.cpu_count(),
+        },
+        'dataset': dataset_summary(args.prefix),
+        'config': {
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'warmup_per_thread': args.warmup,
+            'sample_merchants': len(ctx.tokens),
+            'sample_wallets': len(ctx.wallets),
+            'seed': args.seed,
+            'seed_base_time': args.seed_base_time,
+        },
+        'scenarios': {},
+    }
+    print(f"Target: {base_url}  dataset: {report['dataset']}")
+    print(f"\n  {'scenario':<17}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+
+    try:
+        for scenario in scenarios:
+            result = run_scenario(
+                scenario, ctx, base_url, args.concurrency, args.duration, args.warmup, args.seed,
+            )
+            report['scenarios'][scenario] = result
+            print(
+                f"  {scenario:<17}{result['requests']:>9}{result['errors']:>8}{result['throughput_rps']:>9.1f}"
+                f"{result['p50_ms'] or 0:>9.2f}{result['p95_ms'] or 0:>9.2f}{result['p99_ms'] or 0:>9.2f}"
+            )
+    finally:
+        if not args.keep:
+            cleanup(ctx)
+        if httpd is not None:
+            httpd.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + '\n')
+        print(f"\n📝 Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
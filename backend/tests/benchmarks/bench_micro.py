@@ -0,0 +1,324 @@
+"""
+Microbenchmarks for serializer, auth, error handling, model save, scoring and QR code hot paths
+
+Each benchmark prepares its inputs once and returns the function to time.
+The runner calibrates how many calls make up a round (at least
+--min-round-ms), runs --rounds rounds and reports the median and fastest
+per-call time. With --check it compares against micro_baselines.json and
+exits non-zero when a benchmark's median and fastest round are both more
+than --threshold percent (default MICROBENCH_THRESHOLD or 20) slower than
+the baseline; requiring both keeps a noisy neighbour from failing the run.
+
+Baselines depend on the machine: record them with --update-baselines on
+the machine that runs --check (the recording machine is stored alongside).
+
+Usage:
+    python tests/benchmarks/bench_micro.py [--check] [--update-baselines] [--filter jwt]
+        [--threshold 20] [--rounds 15] [--json results.json]
+"""
+import os
+import sys
+import json
+import gc
+import time
+import logging
+import itertools
+import argparse
+import platform
+import statistics
+from decimal import Decimal
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Production-like: no SQL logging or connection.queries bookkeeping
+os.environ.setdefault('DEBUG', 'False')
+# Postings are scored as usual, but never flagged or blocked
+os.environ.setdefault('VELOCITY_REVIEW_SCORE', '1000000')
+os.environ.setdefault('VELOCITY_BLOCK_SCORE', '1000000')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import override_settings
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common import tracing
+from phantom_apps.common.authentication import CustomJWTAuthentication
+from phantom_apps.common.exceptions import custom_exception_handler
+from phantom_apps.customers.models import Customer
+from phantom_apps.customers.serializers import CustomerSerializer
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.merchants.serializers import MerchantRegistrationSerializer
+from phantom_apps.transactions import qr, risk, services as posting
+from phantom_apps.transactions.models import Transaction
+from phantom_apps.wallets.models import Wallet
+
+BASELINES_FILE = Path(__file__).parent / 'micro_baselines.json'
+BENCH_PREFIX = 'microbench'
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Register ``setup(fixtures) -> callable``; only the callable is timed"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+class Fixtures:
+    """Rows shared by the DB-backed benchmarks, created once per run"""
+
+    def __init__(self):
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        self.user = User.objects.create_user(username=f'{BENCH_PREFIX}merchant', password='benchpass123')
+        self.merchant = Merchant.objects.create(
+            user=self.user, business_name='Micro Bench', fnb_account_number='MICROBENCH1',
+            contact_email='micro@bench.test', phone_number='+26770000002',
+            business_registration='MICROBENCH', api_key='micro-bench',
+        )
+        self.customer = Customer.objects.create(
+            merchant=self.merchant, first_name='Micro', last_name='Bench', phone_number='+26771000002',
+            email='micro.bench@example.com', identity_number='123456789',
+        )
+        self.wallet = Wallet.objects.create(
+            customer=self.customer, merchant=self.merchant, balance=Decimal('100000000.00'),
+        )
+        self.factory = APIRequestFactory()
+
+    def close(self):
+        Transaction.objects.filter(merchant=self.merchant).delete()
+        self.user.delete()
+
+@benchmark('customer_serializer.one')
+def bench_customer_serializer_one(fx):
+    return lambda: CustomerSerializer(fx.customer).data
+
+@benchmark('customer_serializer.page_of_20')
+def bench_customer_serializer_page(fx):
+    customers = [
+        Customer(merchant=fx.merchant, first_name='Page', last_name=str(index), phone_number='+26771000003')
+        for index in range(20)
+    ]
+    return lambda: CustomerSerializer(customers, many=True).data
+
+@benchmark('merchant_registration_serializer.is_valid')
+def bench_registration_validation(fx):
+    data = {
+        'username': 'microregister', 'password': 'benchpass123', 'password_confirm': 'benchpass123',
+        'business_name': 'Micro Register', 'fnb_account_number': 'MICROREG01', 'contact_email': 'reg@bench.test',
+        'phone_number': '+26770000003', 'business_registration': 'MICROREG01',
+        'webhook_url': 'https://merchant.example.com/hooks',
+    }
+
+    def validate():
+        serializer = MerchantRegistrationSerializer(data=data)
+        assert serializer.is_valid(), serializer.errors
+    return validate
+
+@benchmark('jwt_authentication.authenticate')
+def bench_jwt_authenticate(fx):
+    token = str(RefreshToken.for_user(fx.user).access_token)
+    request = fx.factory.get('/api/v1/wallets/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    authentication = CustomJWTAuthentication()
+    return lambda: authentication.authenticate(request)
+
+@benchmark('exception_handler.validation_error')
+def bench_exception_handler_validation(fx):
+    exc = exceptions.ValidationError({'amount': ['Ensure this value is greater than or equal to 0.01.']})
+    context = {'view': None, 'request': fx.factory.post('/api/v1/transactions/')}
+    return lambda: custom_exception_handler(exc, context)
+
+@benchmark('exception_handler.not_found')
+def bench_exception_handler_not_found(fx):
+    exc = exceptions.NotFound()
+    context = {'view': None, 'request': fx.factory.get('/api/v1/wallets/missing/')}
+    return lambda: custom_exception_handler(exc, context)
+
+@benchmark('model_save.customer_insert')
+def bench_customer_insert(fx):
+    # Phone numbers are unique per merchant
+    numbers = itertools.count(72000000)
+
+    def insert():
+        Customer(merchant=fx.merchant, first_name='Save', last_name='Path', phone_number=f'+267{next(numbers)}').save()
+    return insert
+
+@benchmark('model_save.wallet_update')
+def bench_wallet_update(fx):
+    return lambda: fx.wallet.save()
+
+@benchmark('model_save.transaction_insert')
+def bench_transaction_insert(fx):
+    def insert():
+        Transaction(
+            wallet=fx.wallet, merchant=fx.merchant, amount=Decimal('1.00'), transaction_type='credit',
+            payment_channel='qr_code', status='completed', reference_number=posting.generate_reference(),
+        ).save(force_insert=True)
+    return insert
+
+@benchmark('post_transaction.credit')
+def bench_post_transaction(fx):
+    return lambda: posting.post_transaction(fx.wallet.wallet_id, Decimal('1.00'), 'credit', 'qr_code')
+
+@benchmark('velocity.score')
+def bench_velocity_score(fx):
+    # Per-worker counters (the benchmark runs with dummy caches): the rule set, not the Redis round trip
+    engine = risk.VelocityEngine(settings.VELOCITY)
+    phones = itertools.cycle([f'+26773{index:06d}' for index in range(100)])
+    for index in range(1000):
+        engine.record(engine.score(fx.wallet.wallet_id, next(phones), fx.merchant.pk, '25.00', f'REF-{index % 7}'))
+    return lambda: engine.score(fx.wallet.wallet_id, next(phones), fx.merchant.pk, '25.00', 'REF-1')
+
+@benchmark('qr.verify')
+def bench_qr_verify(fx):
+    content, _ = qr.issue_payload(fx.merchant.pk, fx.wallet.wallet_id, '25.00', reference='INV-1')
+    return lambda: qr.verify_payload(content)
+
+@benchmark('qr.image_memory_hit')
+def bench_qr_image_memory_hit(fx):
+    # Verified payload to PNG from the worker LRU: digest, lookup and metric
+    images = qr.QRImages(settings.QR_CODES)
+    content, payment = qr.issue_payload(fx.merchant.pk, fx.wallet.wallet_id, '25.00')
+    images.get(content, payment, settings.QR_CODES['DEFAULT_SIZE'])
+    return lambda: images.get(content, payment, settings.QR_CODES['DEFAULT_SIZE'])
+
+@benchmark('tracing.unsampled_span')
+def bench_unsampled_span(fx):
+    def span():
+        with tracing.start_span('db.SELECT', tracing.CLIENT):
+            pass
+    return span
+
+def calibrate(fn, min_round_seconds):
+    """Calls per round so that one round takes at least ``min_round_seconds``"""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_seconds:
+            return iterations
+        iterations = max(iterations * 2, int(iterations * min_round_seconds / max(elapsed, 1e-9)))
+
+def measure(fn, rounds, min_round_seconds):
+    fn()  # Warm caches and lazy imports
+    iterations = calibrate(fn, min_round_seconds)
+    per_call = []
+    # Like timeit: a collection landing in one round would skew it
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            per_call.append((time.perf_counter() - start) / iterations * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        'median_us': round(statistics.median(per_call), 3),
+        'min_us': round(min(per_call), 3),
+        'stdev_us': round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+        'rounds': rounds,
+        'iterations': iterations,
+    }
+
+def machine():
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+    }
+
+def regressions(results, baselines, threshold):
+    """Benchmarks whose median and fastest round are both ``threshold`` slower"""
+    found = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        limit = 1 + threshold / 100
+        if result['median_us'] > baseline['median_us'] * limit and result['min_us'] > baseline['min_us'] * limit:
+            found.append((name, result['median_us'] / baseline['median_us'] - 1))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--rounds', type=int, default=15)
+    parser.add_argument('--min-round-ms', type=float, default=20.0)
+    parser.add_argument('--threshold', type=float, default=float(os.environ.get('MICROBENCH_THRESHOLD', 20)),
+                        help='Allowed slowdown in percent before --check fails')
+    parser.add_argument('--check', action='store_true', help='Exit 1 on a regression against the baselines')
+    parser.add_argument('--update-baselines', action='store_true')
+    parser.add_argument('--json', default=None, help='Write results to this file')
+    args = parser.parse_args()
+
+    stored = json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {}
+    baselines = stored.get('benchmarks', {})
+
+    print("🏁 Microbenchmarks")
+    print("=" * 78)
+    if stored.get('machine') and stored['machine'] != machine():
+        print(f"⚠️  Baselines were recorded on {stored['machine']}")
+
+    # Logs still go to the log files (their cost is part of the path); keep the console readable
+    app_logger = logging.getLogger('phantom_apps')
+    console = [handler for handler in app_logger.handlers if type(handler) is logging.StreamHandler]
+    for handler in console:
+        app_logger.removeHandler(handler)
+
+    print(f"  {'benchmark':<44}{'median µs':>11}{'min µs':>10}{'baseline':>10}{'change':>9}")
+    results = {}
+    # Posting goes through the balance cache invalidation; keep Redis out of it
+    dummy_caches = {alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES}
+    with override_settings(CACHES=dummy_caches):
+        fx = Fixtures()
+        try:
+            for name, setup in BENCHMARKS.items():
+                if args.filter not in name:
+                    continue
+                # Writes are rolled back so every round sees the same tables
+                with transaction.atomic():
+                    result = measure(setup(fx), args.rounds, args.min_round_ms / 1000)
+                    transaction.set_rollback(True)
+                results[name] = result
+                baseline = baselines.get(name)
+                change = f"{(result['median_us'] / baseline['median_us'] - 1) * 100:+.1f}%" if baseline else ''
+                baseline_text = f"{baseline['median_us']:.1f}" if baseline else '-'
+                print(f"  {name:<44}{result['median_us']:>11.1f}{result['min_us']:>10.1f}{baseline_text:>10}{change:>9}")
+        finally:
+            fx.close()
+            for handler in console:
+                app_logger.addHandler(handler)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({'machine': machine(), 'benchmarks': results}, indent=2) + '\n')
+    if args.update_baselines:
+        updated = {**baselines, **results}
+        BASELINES_FILE.write_text(json.dumps(
+            {'machine': machine(), 'benchmarks': dict(sorted(updated.items()))}, indent=2,
+        ) + '\n')
+        print(f"\n📝 Baselines written to {BASELINES_FILE.name}")
+
+    if args.check:
+        found = regressions(results, baselines, args.threshold)
+        if found:
+            print(f"\n❌ Regressions above {args.threshold:.0f}%:")
+            for name, change in found:
+                print(f"   {name}: {change * 100:+.1f}%")
+            sys.exit(1)
+        print(f"\n✅ No regressions above {args.threshold:.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Session persistence benchmark: save-every-request vs LazySessionMiddleware
+
+Drives a realistic request mix through each session middleware with a
+counting in-memory cache standing in for Redis, and reports session cache
+reads/writes per request and middleware time.
+
+Usage:
+    python tests/benchmarks/bench_sessions.py [--requests 20000] [--token-share 0.8] [--write-share 0.02]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from phantom_apps.common.middleware import LazySessionMiddleware
+
+class CountingLocMemCache(LocMemCache):
+    """LocMemCache that counts round trips the way Redis would see them"""
+
+    reads = 0
+    writes = 0
+
+    def get(self, *args, **kwargs):
+        CountingLocMemCache.reads += 1
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        CountingLocMemCache.writes += 1
+        return super().set(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        CountingLocMemCache.writes += 1
+        return super().add(*args, **kwargs)
+
+def view(request):
+    """Browser views read the session; a few write to it; token API calls never touch it"""
+    action = request.META.get('HTTP_X_BENCH_ACTION')
+    if action == 'read':
+        request.session.get('cart')
+    elif action == 'write':
+        request.session['cart'] = random.randint(1, 1000)
+    return HttpResponse('ok')
+
+def build_requests(count, token_share, write_share, sessions=200):
+    rng = random.Random(11)
+    factory = RequestFactory()
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < token_share:
+            request = factory.get('/api/v1/wallets/', HTTP_AUTHORIZATION='Bearer token')
+            request.META['HTTP_X_BENCH_ACTION'] = 'none'
+        else:
+            request = factory.get('/admin/')
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = f"bench{rng.randrange(sessions):028d}"
+            request.META['HTTP_X_BENCH_ACTION'] = 'write' if roll > 1 - write_share else 'read'
+        requests.append(request)
+    return requests
+
+def run(middleware_class, save_every_request, requests):
+    with override_settings(
+        SESSION_SAVE_EVERY_REQUEST=save_every_request,
+        SESSION_CACHE_ALIAS='bench_sessions',
+        CACHES={**settings.CACHES, 'bench_sessions': {
+            'BACKEND': f'{__name__}.CountingLocMemCache', 'LOCATION': middleware_class.__name__,
+        }},
+    ):
+        caches['bench_sessions'].clear()
+        middleware = middleware_class(view)
+        # Seed every session once so reads hit existing data
+        for request in requests:
+            if settings.SESSION_COOKIE_NAME in request.COOKIES:
+                key = request.COOKIES[settings.SESSION_COOKIE_NAME]
+                caches['bench_sessions'].set(f"django.contrib.sessions.cache{key}", {'cart': 1, '_session_refreshed_at': time.time()})
+        CountingLocMemCache.reads = CountingLocMemCache.writes = 0
+
+        start = time.perf_counter()
+        for request in requests:
+            if hasattr(request, 'session'):
+                del request.session
+            middleware(request)
+        elapsed = time.perf_counter() - start
+        return CountingLocMemCache.reads, CountingLocMemCache.writes, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--token-share', type=float, default=0.8)
+    parser.add_argument('--write-share', type=float, default=0.02)
+    args = parser.parse_args()
+
+    print("🏁 Session Persistence Benchmark")
+    print("=" * 72)
+    print(f"{args.requests} requests, {args.token_share:.0%} bearer-token API calls, "
+          f"{args.write_share:.0%} session writes")
+    requests = build_requests(args.requests, args.token_share, args.write_share)
+
+    results = {
+        'SessionMiddleware, save every request': run(SessionMiddleware, True, requests),
+        'LazySessionMiddleware': run(LazySessionMiddleware, False, requests),
+    }
+    print(f"\n  {'middleware':<40}{'reads':>9}{'writes':>9}{'µs/req':>10}")
+    for name, (reads, writes, elapsed) in results.items():
+        print(f"  {name:<40}{reads:>9}{writes:>9}{elapsed / args.requests * 1e6:>10.1f}")
+
+    before = results['SessionMiddleware, save every request'][1]
+    after = results['LazySessionMiddleware'][1]
+    if before:
+        print(f"\n  Session writes reduced by {1 - after / before:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Worker startup benchmark: development vs PRODUCTION_MODE
+
+Boots core.wsgi in a fresh interpreter per mode and run (as a gunicorn
+worker without preload would) and reports the import time, the warm-up
+time, the latency of the first /health/ and /api/schema/ requests and how
+many modules were loaded. PRODUCTION_MODE needs the precomputed schema; it
+is built into a temporary file with the spectacular command unless
+--schema-file points at one.
+
+Usage:
+    python tests/benchmarks/bench_startup.py [--runs 3] [--schema-file openapi/schema.json] [--json results.json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+PATHS = ['/health/', '/api/schema/']
+# Modules PRODUCTION_MODE keeps out of a worker until they are needed
+DEFERRED = ['drf_spectacular.openapi', 'drf_spectacular.views', 'django_extensions', 'core.admin_urls']
+
+def child():
+    """Runs in the subprocess: boot, serve the first requests, print JSON"""
+    import time
+    from wsgiref.util import setup_testing_defaults
+
+    sys.path.insert(0, str(project_root))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    from core.wsgi import application
+
+    from django.conf import settings
+    result = {
+        'import_ms': application.report['import_ms'],
+        'warmup_ms': application.report.get('warmup_ms', 0.0),
+        'modules': len(sys.modules),
+        'deferred_loaded': [name for name in DEFERRED if name in sys.modules],
+    }
+    host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+    for path in PATHS:
+        environ = {'PATH_INFO': path, 'HTTP_HOST': host, 'HTTPS': 'on', 'wsgi.url_scheme': 'https'}
+        setup_testing_defaults(environ)
+        status = []
+        start = time.perf_counter()
+        response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+        body = b''.join(response)
+        response.close()
+        result[path] = {'ms': (time.perf_counter() - start) * 1000, 'status': status[0], 'bytes': len(body)}
+    print(json.dumps(result))
+
+def boot(production_mode, schema_file):
+    env = {
+        **os.environ, 'DEBUG': 'False', 'PRODUCTION_MODE': str(production_mode),
+        'OPENAPI_SCHEMA_FILE': schema_file, 'PYTHONDONTWRITEBYTECODE': '1',
+    }
+    output = subprocess.run(
+        [sys.executable, '-W', 'ignore', __file__, '--child'],
+        env=env, cwd=project_root, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def build_schema(path):
+    env = {**os.environ, 'PRODUCTION_MODE': 'False'}
+    subprocess.run(
+        [sys.executable, 'manage.py', 'spectacular', '--format', 'openapi-json', '--file', path],
+        env=env, cwd=project_root, capture_output=True, check=True,
+    )
+
+def summarize(runs):
+    median = lambda values: round(statistics.median(values), 2)
+    summary = {
+        'import_ms': median([run['import_ms'] for run in runs]),
+        'warmup_ms': median([run['warmup_ms'] for run in runs]),
+        'modules': runs[-1]['modules'],
+        'deferred_loaded': runs[-1]['deferred_loaded'],
+    }
+    for path in PATHS:
+        summary[path] = {'ms': median([run[path]['ms'] for run in runs]), 'status': runs[-1][path]['status']}
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--schema-file', default=None)
+    parser.add_argument('--json', default=None, help='Write the results to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    print("🏁 Worker Startup Benchmark")
+    print("=" * 78)
+    with tempfile.TemporaryDirectory() as tmp:
+        schema_file = args.schema_file
+        if schema_file is None:
+            schema_file = os.path.join(tmp, 'schema.json')
+            build_schema(schema_file)
+        results = {
+            mode: summarize([boot(mode == 'production', schema_file) for _ in range(args.runs)])
+            for mode in ('development', 'production')
+        }
+
+    print(f"  {'mode':<14}{'import ms':>11}{'warm-up ms':>12}{'/health/ ms':>13}{'/api/schema/ ms':>17}{'modules':>9}")
+    for mode, summary in results.items():
+        print(
+            f"  {mode:<14}{summary['import_ms']:>11.1f}{summary['warmup_ms']:>12.1f}"
+            f"{summary['/health/']['ms']:>13.1f}{summary['/api/schema/']['ms']:>17.1f}{summary['modules']:>9}"
+        )
+    for mode, summary in results.items():
+        statuses = ', '.join(f"{path} {summary[path]['status']}" for path in PATHS)
+        deferred = ', '.join(summary['deferred_loaded']) or 'none'
+        print(f"\n  {mode}: {statuses}; loaded at boot: {deferred}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Transaction policy benchmark: ATOMIC_REQUESTS vs per-view policies
+
+Drives a read-heavy API mix (wallet/transaction lists and details plus a
+share of postings) through the full request stack twice - once with
+ATOMIC_REQUESTS enabled, once with the per-view transaction policies - and
+reports transactions, BEGIN/COMMIT round trips and latency per request.
+
+Usage:
+    python tests/benchmarks/bench_transaction_policy.py [--requests 2000] [--write-share 0.1]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from decimal import Decimal
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Postings are scored as usual, but never flagged or blocked
+os.environ.setdefault('VELOCITY_REVIEW_SCORE', '1000000')
+os.environ.setdefault('VELOCITY_BLOCK_SCORE', '1000000')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+
+class TransactionCounter:
+    """Counts commits/rollbacks on the default connection; each implies a BEGIN"""
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.statements = 0
+
+    def install(self):
+        commit, rollback = connection._commit, connection._rollback
+
+        def counted_commit():
+            self.commits += 1
+            return commit()
+
+        def counted_rollback():
+            self.rollbacks += 1
+            return rollback()
+
+        connection._commit = counted_commit
+        connection._rollback = counted_rollback
+        return connection.execute_wrapper(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def transactions(self):
+        return self.commits + self.rollbacks
+
+def seed(wallets=20):
+    User.objects.filter(username='benchpolicy').delete()
+    user = User.objects.create_user(username='benchpolicy', password='benchpass123')
+    merchant = Merchant.objects.create(
+        user=user, business_name='Bench Policy', fnb_account_number='BENCHPOL01',
+        contact_email='bench@policy.test', phone_number='+26770000000', business_registration='BENCHPOL'
+    )
+    wallet_ids = []
+    for index in range(wallets):
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Bench', last_name=str(index), phone_number=f'+2677100{index:04d}'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('1000.00'))
+        wallet_ids.append(str(wallet.wallet_id))
+    return user, wallet_ids
+
+def build_plan(count, write_share, wallet_ids):
+    rng = random.Random(7)
+    plan = []
+    for _ in range(count):
+        roll = rng.random()
+        wallet_id = rng.choice(wallet_ids)
+        if roll < write_share:
+            plan.append(('post', '/api/v1/transactions/', {
+                'wallet_id': wallet_id, 'amount': '1.00',
+                'transaction_type': 'credit', 'payment_channel': 'qr_code',
+            }))
+        elif roll < 0.4:
+            plan.append(('get', '/api/v1/wallets/', None))
+        elif roll < 0.7:
+            plan.append(('get', f'/api/v1/wallets/{wallet_id}/', None))
+        else:
+            plan.append(('get', '/api/v1/transactions/', None))
+    return plan
+
+def run(plan, token, atomic_requests):
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+    counter = TransactionCounter()
+    original = connection.settings_dict['ATOMIC_REQUESTS']
+    connection.settings_dict['ATOMIC_REQUESTS'] = atomic_requests
+    latencies = []
+    try:
+        with counter.install():
+            for method, path, data in plan:
+                start = time.perf_counter()
+                if method == 'post':
+                    response = client.post(path, data, content_type='application/json')
+                else:
+                    response = client.get(path)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code < 400, (path, response.status_code, response.content[:200])
+    finally:
+        connection.settings_dict['ATOMIC_REQUESTS'] = original
+        del connection._commit, connection._rollback
+    latencies.sort()
+    return counter, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--write-share', type=float, default=0.1)
+    args = parser.parse_args()
+
+    print("🏁 Transaction Policy Benchmark")
+    print("=" * 72)
+    print(f"{args.requests} requests, {args.write_share:.0%} postings, database: {connection.vendor}")
+
+    # Throttling and caches are out of scope: a dummy cache never throttles
+    with override_settings(
+        ALLOWED_HOSTS=['testserver'],
+        CACHES={alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES},
+    ):
+        user, wallet_ids = seed()
+        token = str(AccessToken.for_user(user))
+        plan = build_plan(args.requests, args.write_share, wallet_ids)
+        try:
+            results = {
+                'ATOMIC_REQUESTS': run(plan, token, True),
+                'Per-view policies': run(plan, token, False),
+            }
+        finally:
+            user.delete()
+
+    print(f"\n  {'mode':<20}{'txns':>8}{'round trips':>13}{'stmts':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, (counter, latencies) in results.items():
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+        print(f"  {name:<20}{counter.transactions:>8}{counter.transactions * 2:>13}"
+              f"{counter.statements:>8}{p50:>9.2f}{p95:>9.2f}")
+
+    before = results['ATOMIC_REQUESTS'][0].transactions
+    after = results['Per-view policies'][0].transactions
+    print(f"\n  BEGIN/COMMIT round trips saved: {(before - after) * 2} "
+          f"({(before - after) * 2 / args.requests:.2f} per request)")
+
+if __name__ == "__main__":
+    main()
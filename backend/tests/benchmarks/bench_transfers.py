@@ -0,0 +1,209 @@
+"""
+Transfer benchmark: concurrent opposite transfers and batch netting
+
+Stress: --threads threads post --transfers transfers between a few hot
+wallets, in both directions, twice - with post_transfer (wallets locked in
+key order in one statement) and with a naive transfer that locks the source
+and then the destination. Reports transfers/s, latency, deadlocks and other
+errors, then checks no money was created or lost and every journal balances.
+Row locks need PostgreSQL; SQLite serialises writers on the database lock.
+
+Netting: posts --batch transfers among --wallets wallets one by one and
+with post_transfers(), and reports transfers/s and SQL statements per
+transfer.
+
+Usage:
+    python tests/benchmarks/bench_transfers.py [--threads 8] [--transfers 2000] [--hot-wallets 4]
+        [--batch 500] [--wallets 20] [--hold-ms 1]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import statistics
+from decimal import Decimal
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Transfers are scored as usual, but never flagged or blocked
+os.environ.setdefault('VELOCITY_REVIEW_SCORE', '1000000')
+os.environ.setdefault('VELOCITY_BLOCK_SCORE', '1000000')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import F, Sum
+from django.test import override_settings
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.ledger.models import JournalEntry
+from phantom_apps.ledger.services import unbalanced_journals
+from phantom_apps.transactions import services as posting
+
+OPENING_BALANCE = Decimal('1000000.00')
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+def seed(count):
+    User.objects.filter(username='benchtransfers').delete()
+    user = User.objects.create_user(username='benchtransfers', password='benchpass123')
+    merchant = Merchant.objects.create(
+        user=user, business_name='Bench Transfers', fnb_account_number='BENCHTRF01',
+        contact_email='bench@transfers.test', phone_number='+26770000002',
+        business_registration='BENCHTRF', api_key='bench-transfers',
+    )
+    wallets = []
+    for index in range(count):
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Bench', last_name=f'Transfer{index}', phone_number=f'+26771200{index:03d}'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('0.00'))
+        posting.post_transaction(wallet.wallet_id, OPENING_BALANCE, 'credit', 'eft')
+        wallets.append(wallet.wallet_id)
+    return user, wallets
+
+def naive_transfer(source_id, destination_id, amount, hold):
+    """Lock the source, then the destination: opposite transfers can each hold the row the other needs"""
+    with transaction.atomic():
+        source = Wallet.objects.select_for_update().get(pk=source_id)
+        time.sleep(hold)
+        Wallet.objects.select_for_update().get(pk=destination_id)
+        if source.balance < amount:
+            raise ValueError("Insufficient wallet balance")
+        Wallet.objects.filter(pk=source_id).update(balance=F('balance') - amount)
+        Wallet.objects.filter(pk=destination_id).update(balance=F('balance') + amount)
+
+def ordered_transfer(source_id, destination_id, amount, hold):
+    posting.post_transfer(source_id, destination_id, amount)
+
+def is_deadlock(error):
+    # PostgreSQL: SQLSTATE 40P01
+    cause = getattr(error, '__cause__', None)
+    return getattr(cause, 'sqlstate', None) == '40P01' or 'deadlock' in str(error).lower()
+
+def stress(mode, transfer, wallets, args):
+    per_thread = args.transfers // args.threads
+    latencies, deadlocks, errors = [], [], []
+    lock = threading.Lock()
+    start_line = threading.Barrier(args.threads)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local_latencies, local_deadlocks, local_errors = [], 0, []
+        try:
+            start_line.wait()
+            for _ in range(per_thread):
+                source, destination = rng.sample(wallets, 2)
+                started = time.perf_counter()
+                try:
+                    transfer(source, destination, Decimal('1.00'), args.hold_ms / 1000)
+                    local_latencies.append(time.perf_counter() - started)
+                except DatabaseError as e:
+                    if is_deadlock(e):
+                        local_deadlocks += 1
+                    else:
+                        local_errors.append(str(e)[:80])
+        finally:
+            connections.close_all()
+            with lock:
+                latencies.extend(local_latencies)
+                deadlocks.append(local_deadlocks)
+                errors.extend(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    median = statistics.median(latencies) if latencies else 0.0
+    print(
+        f"  {mode:<10}{len(latencies):>8}{len(latencies) / elapsed:>12.0f}{median * 1000:>10.2f}{p99 * 1000:>10.2f}"
+        f"{sum(deadlocks):>11}{len(errors):>8}"
+    )
+    if errors:
+        print(f"    e.g. {errors[0]}")
+
+def check_conservation(wallets):
+    total = Wallet.objects.filter(pk__in=wallets).aggregate(total=Sum('balance'))['total']
+    expected = OPENING_BALANCE * len(wallets)
+    assert total == expected, f"balances sum to {total}, expected {expected}"
+
+def netting(wallets, args):
+    rng = random.Random(7)
+    batch = []
+    for _ in range(args.batch):
+        source, destination = rng.sample(wallets, 2)
+        batch.append({'source_wallet_id': source, 'destination_wallet_id': destination,
+                      'amount': Decimal(rng.randint(1, 5000)) / 100})
+
+    print(f"\n  {args.batch} transfers among {len(wallets)} wallets")
+    print(f"  {'mode':<16}{'transfers/s':>12}{'stmts/transfer':>16}")
+    for mode in ('one by one', 'netted batch'):
+        counter = StatementCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            if mode == 'netted batch':
+                posting.post_transfers(batch)
+            else:
+                for transfer in batch:
+                    posting.post_transfer(**transfer)
+        elapsed = time.perf_counter() - started
+        print(f"  {mode:<16}{args.batch / elapsed:>12.0f}{counter.count / args.batch:>16.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--transfers', type=int, default=2000)
+    parser.add_argument('--hot-wallets', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--wallets', type=int, default=20)
+    parser.add_argument('--hold-ms', type=float, default=1.0, help='naive mode: pause between its two locks')
+    args = parser.parse_args()
+
+    print("🏁 Transfer Benchmark")
+    print("=" * 72)
+    print(f"{args.threads} threads, {args.transfers} transfers among {args.hot_wallets} hot wallets, "
+          f"database: {connection.vendor}")
+    if not connection.features.has_select_for_update:
+        print("  (no row locks on this database: writers queue on the database lock instead)")
+
+    # Transfers go through the balance cache invalidation; keep Redis out of it
+    with override_settings(CACHES={alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES}):
+        user, wallets = seed(max(args.hot_wallets, args.wallets))
+        try:
+            since = JournalEntry.objects.order_by('-entry_id').values_list('entry_id', flat=True).first() or 0
+            hot = wallets[:args.hot_wallets]
+            print(f"\n  {'mode':<10}{'done':>8}{'transfers/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'deadlocks':>11}{'errors':>8}")
+            for mode, transfer in (('naive', naive_transfer), ('ordered', ordered_transfer)):
+                stress(mode, transfer, hot, args)
+                check_conservation(hot)
+
+            netting(wallets, args)
+            check_conservation(wallets)
+            assert unbalanced_journals(since) == [], 'unbalanced journals'
+            print("\n  balances conserved, journals balanced")
+        finally:
+            user.delete()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Primary key benchmark: random uuid4 against time-ordered uuid7
+
+Inserts the same rows into a scratch table shaped like our UUID-keyed
+tables, once per key generator, and reports insert throughput (overall and
+for the last batches, once the index no longer fits the hot pages) and the
+size of the primary key index afterwards. The scratch table is dropped at
+the end.
+
+Usage:
+    python tests/benchmarks/bench_uuid_keys.py [--rows 500000] [--batch 1000]
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from django.db import connection, transaction
+from phantom_apps.common.ids import uuid7
+
+TABLE = 'bench_uuid_keys'
+
+def create_table():
+    key_type = 'uuid' if connection.vendor == 'postgresql' else 'char(32)'
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (id {key_type} NOT NULL PRIMARY KEY, amount numeric(15, 2) NOT NULL, '
+            f'reference varchar(100) NOT NULL)'
+        )
+
+def drop_table():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+def key_value(key):
+    # Stored the way Django's UUIDField stores it on each backend
+    return key if connection.vendor == 'postgresql' else key.hex
+
+def index_size():
+    """Bytes used by the primary key index"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"SELECT pg_relation_size('{TABLE}_pkey')")
+        else:
+            cursor.execute(f"SELECT SUM(pgsize) FROM dbstat WHERE name = 'sqlite_autoindex_{TABLE}_1'")
+        return cursor.fetchone()[0] or 0
+
+def insert_rows(generate, rows, batch):
+    """Insert in committed batches; returns per-batch durations"""
+    sql = f'INSERT INTO {TABLE} (id, amount, reference) VALUES (%s, %s, %s)'
+    durations = []
+    for start in range(0, rows, batch):
+        values = [(key_value(generate()), '10.00', f'REF-{start + offset}') for offset in range(batch)]
+        began = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, values)
+        durations.append(time.perf_counter() - began)
+    return durations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    print("🏁 UUID Primary Key Benchmark")
+    print("=" * 72)
+    print(f"{args.rows} rows in batches of {args.batch}, database: {connection.vendor}")
+    print(f"\n  {'key':<8}{'rows/s':>12}{'last 10% rows/s':>18}{'pk index MB':>14}{'bytes/row':>12}")
+
+    results = {}
+    try:
+        for name, generate in (('uuid4', uuid.uuid4), ('uuid7', uuid7)):
+            create_table()
+            durations = insert_rows(generate, args.rows, args.batch)
+            tail = durations[-max(1, len(durations) // 10):]
+            size = index_size()
+            results[name] = size
+            print(
+                f"  {name:<8}{args.rows / sum(durations):>12.0f}"
+                f"{len(tail) * args.batch / sum(tail):>18.0f}"
+                f"{size / 1024 / 1024:>14.1f}{size / args.rows:>12.1f}"
+            )
+    finally:
+        drop_table()
+
+    if results.get('uuid4'):
+        print(f"\n  pk index size uuid7/uuid4: {results['uuid7'] / results['uuid4']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -39,7 +39,24 @@ def main():
         'test_customers.py',
         'test_wallets.py',
         'test_transactions.py',
-        'test_mock_systems.py'
+        'test_mock_systems.py',
+        'test_settlements.py',
+        'test_fees.py',
+        'test_db_routing.py',
+        'test_db_pool.py',
+        'test_query_plans.py',
+        'test_ledger.py',
+        'test_server_timing.py',
+        'test_metrics.py',
+        'test_query_budgets.py',
+        'test_slow_queries.py',
+        'test_readiness.py',
+        'test_tracing.py',
+        'test_startup.py',
+        'test_profiler.py',
+        'test_velocity.py',
+        'test_qr_codes.py',
+        'test_transfers.py'
     ]
     
     passed = 0
@@ -0,0 +1,98 @@
+"""
+Fee engine component tests
+"""
+import os
+import sys
+import random
+import django
+from pathlib import Path
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from phantom_apps.transactions.fees import FeeSchedule, get_fee_schedule
+
+TEST_SCHEDULES = {
+    'default': [(None, '0.50', '0.00')],
+    'qr_code': [('100.00', '0.00', '0.00'), ('5000.00', '0.50', '0.25'), (None, '1.00', '0.50')],
+    'mobile_money': [('500.00', '1.00', '1.00'), (None, '2.00', '0.75')],
+}
+
+def test_fee_tiers():
+    """Test tier selection and half-up rounding on the scalar path"""
+    print("🧪 Testing fee tiers...")
+    
+    try:
+        schedule = FeeSchedule(TEST_SCHEDULES)
+        
+        # Upper bounds are inclusive
+        assert schedule.price(Decimal('100.00'), 'qr_code') == Decimal('0.00')
+        assert schedule.price(Decimal('100.01'), 'qr_code') == Decimal('0.75')
+        assert schedule.price(Decimal('6000.00'), 'qr_code') == Decimal('31.00')
+        # 0.50 + 102.00 * 0.25% = 0.50 + 0.255 -> 0.76 (half-up)
+        assert schedule.price(Decimal('102.00'), 'qr_code') == Decimal('0.76')
+        # Unknown channels fall back to the default schedule
+        assert schedule.price(Decimal('10.00'), 'bank_transfer') == Decimal('0.50')
+        # Merchant commission only applies to collections
+        assert schedule.price(Decimal('1000.00'), 'mobile_money', Decimal('0.50'), 'credit') == Decimal('14.50')
+        assert schedule.price(Decimal('1000.00'), 'mobile_money', Decimal('0.50'), 'debit') == Decimal('9.50')
+        
+        print("✅ Fee tiers test passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Fee tiers test failed: {e}")
+        return False
+
+def test_batch_matches_scalar():
+    """Test that vectorised batch pricing matches the scalar Decimal path exactly"""
+    print("🧪 Testing batch vs scalar fee pricing...")
+    
+    try:
+        rng = random.Random(42)
+        schedules = [FeeSchedule(TEST_SCHEDULES), get_fee_schedule()]
+        channels = ['qr_code', 'eft', 'mobile_money', 'bank_transfer', 'default']
+        rates = [Decimal('0.00'), Decimal('0.50'), Decimal('1.25'), Decimal('2.99')]
+        
+        amounts = [Decimal(rng.randint(1, 2_000_000)).scaleb(-2) for _ in range(20000)]
+        # Tier boundaries and amounts that land exactly on half a thebe
+        amounts += [Decimal('100.00'), Decimal('100.01'), Decimal('500.00'), Decimal('5000.00'),
+                    Decimal('5000.01'), Decimal('102.00'), Decimal('0.02'), Decimal('9999999999999.99')]
+        row_channels = [rng.choice(channels) for _ in amounts]
+        row_rates = [rng.choice(rates) for _ in amounts]
+        row_types = [rng.choice(['credit', 'debit']) for _ in amounts]
+        
+        for schedule in schedules:
+            batch = schedule.price_many(amounts, row_channels, row_rates, row_types)
+            for index, amount in enumerate(amounts):
+                scalar = schedule.price(amount, row_channels[index], row_rates[index], row_types[index])
+                assert scalar == batch[index], (
+                    f"{amount} {row_channels[index]} {row_rates[index]}: {scalar} != {batch[index]}"
+                )
+        
+        print("✅ Batch vs scalar fee pricing test passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batch vs scalar fee pricing test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("💸 Testing Fee Engine Components")
+    print("=" * 40)
+    
+    tests = [
+        test_fee_tiers,
+        test_batch_matches_scalar
+    ]
+    
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+    
+    print(f"\n📊 Fee Engine Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,214 @@
+"""
+Ledger component tests
+"""
+import os
+import sys
+import django
+from pathlib import Path
+from datetime import timedelta
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions.services import post_transaction
+from phantom_apps.ledger.models import JournalEntry, LedgerAccount
+from phantom_apps.ledger import services as ledger
+
+def create_wallet(suffix, balance=Decimal('0.00')):
+    user = User.objects.create_user(username=f'ledgermerchant{suffix}', password='testpass123')
+    merchant = Merchant.objects.create(
+        user=user,
+        business_name=f'Ledger Business {suffix}',
+        fnb_account_number=f'LEDGER{suffix}',
+        contact_email=f'ledger{suffix}@merchant.com',
+        phone_number='+26771230000',
+        business_registration=f'LEDGERREG{suffix}',
+        api_key=f'ledger-test-{suffix}',
+    )
+    customer = Customer.objects.create(
+        merchant=merchant, first_name='Lee', last_name='Dger', phone_number=f'+2677123{suffix}'
+    )
+    wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=balance)
+    return user, wallet
+
+def test_postings_are_balanced():
+    """Test that postings write balanced, append-only journal lines"""
+    print("🧪 Testing balanced journal postings...")
+
+    try:
+        user, wallet = create_wallet('0001')
+        start = JournalEntry.objects.order_by('-entry_id').values_list('entry_id', flat=True).first() or 0
+
+        credit = post_transaction(wallet.wallet_id, Decimal('200.00'), 'credit', 'mobile_money')
+        post_transaction(wallet.wallet_id, Decimal('50.00'), 'debit', 'qr_code')
+
+        lines = JournalEntry.objects.filter(transaction_id=credit.transaction_id)
+        assert sum(line.amount for line in lines) == 0
+        assert {line.account.account_type for line in lines} >= {'wallet', 'merchant_float'}
+        if credit.fees:
+            assert lines.filter(account__code=ledger.FEE_INCOME_CODE, amount=credit.fees).exists()
+        assert ledger.unbalanced_journals(start) == []
+
+        # The journal agrees with the operational balance
+        wallet.refresh_from_db()
+        assert ledger.wallet_balance_at(wallet.wallet_id) == wallet.balance == Decimal('150.00')
+
+        # Lines can never be changed or removed
+        line = lines.first()
+        for mutate in (line.save, line.delete, lambda: lines.update(amount=0), lines.delete):
+            try:
+                mutate()
+                raise AssertionError("journal line was mutated")
+            except TypeError:
+                pass
+
+        print("✅ Balanced journal postings test passed")
+
+        # Clean up (the journal itself is kept)
+        wallet.delete()
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Balanced journal postings test failed: {e}")
+        return False
+
+def test_balance_at_with_snapshots():
+    """Test historical balances from a snapshot plus a bounded delta scan"""
+    print("🧪 Testing balance snapshots...")
+
+    try:
+        user, wallet = create_wallet('0002')
+        post_transaction(wallet.wallet_id, Decimal('100.00'), 'credit', 'eft')
+        before_snapshot = timezone.now()
+
+        # Take the snapshot as if SNAPSHOT_SETTLE_SECONDS had already passed
+        settle = timedelta(seconds=settings.LEDGER_SETTINGS['SNAPSHOT_SETTLE_SECONDS'])
+        assert ledger.take_balance_snapshots(now=timezone.now() + settle) >= 1
+        account = LedgerAccount.objects.get(code=ledger.wallet_account_code(wallet.wallet_id))
+        snapshot = account.snapshots.get()
+        assert snapshot.balance == Decimal('100.00')
+
+        post_transaction(wallet.wallet_id, Decimal('30.00'), 'debit', 'eft')
+
+        assert ledger.balance_at(account.pk, snapshot.as_of) == Decimal('100.00')
+        assert ledger.balance_at(account.pk, before_snapshot) == Decimal('100.00')
+        assert ledger.balance_at(account.pk) == Decimal('70.00')
+        assert ledger.balance_at(account.pk, before_snapshot - timedelta(days=1)) == Decimal('0.00')
+
+        print("✅ Balance snapshots test passed")
+
+        # Clean up
+        wallet.delete()
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Balance snapshots test failed: {e}")
+        return False
+
+def test_journal_batch():
+    """Test that batched postings write their lines in bulk, atomically"""
+    print("🧪 Testing batched journal writes...")
+
+    try:
+        user, wallet = create_wallet('0003')
+        before = JournalEntry.objects.count()
+
+        with ledger.journal_batch():
+            for _ in range(5):
+                post_transaction(wallet.wallet_id, Decimal('10.00'), 'credit', 'bank_transfer')
+            # Lines are buffered until the batch closes
+            assert JournalEntry.objects.count() == before
+        assert JournalEntry.objects.count() > before
+
+        # A failing batch rolls back postings and lines together
+        written = JournalEntry.objects.count()
+        try:
+            with ledger.journal_batch():
+                post_transaction(wallet.wallet_id, Decimal('10.00'), 'credit', 'bank_transfer')
+                raise RuntimeError("abort batch")
+        except RuntimeError:
+            pass
+        assert JournalEntry.objects.count() == written
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('50.00')
+        assert ledger.wallet_balance_at(wallet.wallet_id) == wallet.balance
+
+        print("✅ Batched journal writes test passed")
+
+        # Clean up
+        wallet.delete()
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Batched journal writes test failed: {e}")
+        return False
+
+def test_account_id_cache_is_bounded():
+    """Test the per-worker account id cache drops the least recently used codes"""
+    print("🧪 Testing bounded account id cache...")
+
+    try:
+        with override_settings(LEDGER_SETTINGS={**settings.LEDGER_SETTINGS, 'ACCOUNT_CACHE_SIZE': 2}):
+            cache = ledger.AccountIdCache()
+            cache.update({'a': 1, 'b': 2})
+            assert cache.get_many(['a']) == {'a': 1}
+            cache.update({'c': 3})
+            # 'a' was used last, so 'b' went
+            assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3} and len(cache) == 2
+
+            # Postings still resolve their four accounts when most ids were evicted
+            user, wallet = create_wallet('0004')
+            ledger._account_ids.clear()
+            for _ in range(2):
+                posted = post_transaction(wallet.wallet_id, Decimal('10.00'), 'credit', 'bank_transfer')
+                assert len(ledger._account_ids) <= 2
+            assert JournalEntry.objects.filter(journal_id=posted.transaction_id).count() >= 2
+            assert ledger.wallet_balance_at(wallet.wallet_id) == Decimal('20.00')
+            assert ledger.unbalanced_journals() == []
+
+        print("✅ Bounded account id cache test passed")
+
+        # Clean up
+        wallet.delete()
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Bounded account id cache test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("📒 Testing Ledger Components")
+    print("=" * 40)
+
+    tests = [
+        test_postings_are_balanced,
+        test_balance_at_with_snapshots,
+        test_journal_batch,
+        test_account_id_cache_is_bounded
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Ledger Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,202 @@
+"""
+Prometheus metrics tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import subprocess
+import django
+from pathlib import Path
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+from django.conf import settings
+from prometheus_client.parser import text_string_to_metric_families
+from phantom_apps.common import metrics
+from phantom_apps.common.checks import check_metrics_token
+from phantom_apps.common.http_client import PooledHTTPClient
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions.services import post_transaction
+
+WORKER_SCRIPT = """
+import os, sys
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+import django
+django.setup()
+from phantom_apps.common import metrics
+metrics.count_transaction('qr_code', 'credit', 'completed')
+metrics.observe_request('api_v1:wallets:wallets-list', 'GET', 200, 0.02)
+"""
+
+class OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format, *args):
+        pass
+
+SCRAPE_TOKEN = 's3cret'
+
+def scrape(client=None, **headers):
+    headers.setdefault('HTTP_AUTHORIZATION', f'Bearer {SCRAPE_TOKEN}')
+    response = (client or Client()).get('/api/v1/metrics', **headers)
+    assert response.status_code == 200, response.status_code
+    return {family.name: family for family in text_string_to_metric_families(response.content.decode())}
+
+def sample_value(families, family, sample_name, **labels):
+    for sample in families[family].samples:
+        if sample.name == sample_name and all(sample.labels.get(k) == v for k, v in labels.items()):
+            return sample.value
+    return 0.0
+
+@override_settings(METRICS={**settings.METRICS, 'AUTH_TOKEN': SCRAPE_TOKEN})
+def test_metrics_endpoint():
+    """Test route latency, transaction and outbound call metrics in the scrape"""
+    print("🧪 Testing metrics endpoint...")
+
+    httpd = None
+    try:
+        client = Client()
+        before = scrape(client)
+        health_before = sample_value(
+            before, 'phantom_http_request_duration_seconds', 'phantom_http_request_duration_seconds_count',
+            route='api_v1:common:health', method='GET', status='2xx',
+        )
+        client.get('/api/v1/health/')
+
+        # Transactions by channel, completed and rejected
+        user = User.objects.create_user(username='metricsmerchant', password='testpass123')
+        merchant = Merchant.objects.create(
+            user=user, business_name='Metrics Business', fnb_account_number='METRICS001',
+            contact_email='metrics@merchant.com', phone_number='+26771238000',
+            business_registration='METRICSREG', api_key='metrics-test-key',
+        )
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Met', last_name='Rics', phone_number='+26771238001'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('0.00'))
+        post_transaction(wallet.wallet_id, Decimal('20.00'), 'credit', 'mobile_money')
+        try:
+            post_transaction(wallet.wallet_id, Decimal('50.00'), 'debit', 'mobile_money')
+        except Exception:
+            pass
+
+        # Outbound calls through the shared HTTP client
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        host, port = httpd.server_address
+        PooledHTTPClient(base_url=f'http://{host}:{port}').get('/status')
+
+        after = scrape(client)
+        health_after = sample_value(
+            after, 'phantom_http_request_duration_seconds', 'phantom_http_request_duration_seconds_count',
+            route='api_v1:common:health', method='GET', status='2xx',
+        )
+        assert health_after == health_before + 1, (health_before, health_after)
+        assert sample_value(
+            after, 'phantom_transactions', 'phantom_transactions_total',
+            channel='mobile_money', type='credit', outcome='completed',
+        ) - sample_value(
+            before, 'phantom_transactions', 'phantom_transactions_total',
+            channel='mobile_money', type='credit', outcome='completed',
+        ) == 1
+        assert sample_value(
+            after, 'phantom_transactions', 'phantom_transactions_total',
+            channel='mobile_money', type='debit', outcome='rejected',
+        ) >= 1
+        assert sample_value(
+            after, 'phantom_outbound_request_duration_seconds', 'phantom_outbound_request_duration_seconds_count',
+            host=f'{host}:{port}', method='GET', outcome='2xx',
+        ) == 1
+
+        # Bearer token, required outside DEBUG
+        assert Client().get('/api/v1/metrics').status_code == 401
+        assert Client().get('/api/v1/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 401
+        with override_settings(METRICS={**settings.METRICS, 'AUTH_TOKEN': ''}, DEBUG=False):
+            assert Client().get('/api/v1/metrics').status_code == 403
+            assert [error.id for error in check_metrics_token(None)] == ['phantom.W004']
+
+        print("✅ Metrics endpoint test passed")
+
+        # Clean up
+        wallet.delete()
+        customer.delete()
+        merchant.delete()
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Metrics endpoint test failed: {e}")
+        return False
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+
+def test_multiprocess_aggregation():
+    """Test that samples written by separate worker processes are merged"""
+    print("🧪 Testing multiprocess aggregation...")
+
+    previous = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory}
+            script = WORKER_SCRIPT.format(root=str(project_root))
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', script], env=env, check=True, capture_output=True)
+
+            os.environ['PROMETHEUS_MULTIPROC_DIR'] = directory
+            body, content_type = metrics.render_latest()
+            families = {family.name: family for family in text_string_to_metric_families(body.decode())}
+
+            assert sample_value(
+                families, 'phantom_transactions', 'phantom_transactions_total',
+                channel='qr_code', type='credit', outcome='completed',
+            ) == 2
+            assert sample_value(
+                families, 'phantom_http_request_duration_seconds', 'phantom_http_request_duration_seconds_bucket',
+                route='api_v1:wallets:wallets-list', le='0.025',
+            ) == 2
+
+        print("✅ Multiprocess aggregation test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Multiprocess aggregation test failed: {e}")
+        return False
+    finally:
+        if previous is None:
+            os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        else:
+            os.environ['PROMETHEUS_MULTIPROC_DIR'] = previous
+
+if __name__ == "__main__":
+    print("📈 Testing Metrics Components")
+    print("=" * 40)
+
+    tests = [
+        test_metrics_endpoint,
+        test_multiprocess_aggregation
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Metrics Tests: {passed}/{len(tests)} passed")
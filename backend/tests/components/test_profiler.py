@@ -0,0 +1,168 @@
+"""
+Sampling profiler tests
+"""
+import os
+import sys
+import time
+import threading
+import django
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common.profiler import ProfilerBusy, profiler
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+def spin_until(stop):
+    while not stop.is_set():
+        sum(range(200))
+
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin_until, args=(stop,), name='profiled worker', daemon=True)
+    thread.start()
+    return thread, stop
+
+def parse_collapsed(text):
+    stacks = {}
+    for line in text.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        stacks[stack] = int(count)
+    return stacks
+
+def test_sampling_profiler():
+    """Test sampled stacks, the collapsed format, limits and the one-session rule"""
+    print("🧪 Testing sampling profiler...")
+
+    thread, stop = busy_thread()
+    try:
+        profile = profiler.run(0.5, 100)
+        stacks = parse_collapsed(profile.collapsed())
+        summary = profile.summary()
+        assert 35 <= summary['samples'] <= 55, summary
+        # Samples every thread but its own
+        assert not any('SamplingProfiler._run' in stack for stack in stacks), list(stacks)
+        spinning = [stack for stack in stacks if stack.startswith('profiled_worker;')]
+        assert spinning, list(stacks)
+        assert all(':spin_until' in stack for stack in spinning), spinning
+        assert sum(stacks[stack] for stack in spinning) >= summary['samples'] * 0.9, stacks
+        assert summary['overhead_ms'] < summary['duration_s'] * 1000 * 0.5, summary
+
+        with override_settings(PROFILER={**settings.PROFILER, 'MAX_DEPTH': 3}):
+            stacks = parse_collapsed(profiler.run(0.05, 100).collapsed())
+            deep = [stack for stack in stacks if stack.startswith('profiled_worker;')]
+            assert deep and all(stack.split(';')[1] == '[truncated]' for stack in deep), deep
+
+        with override_settings(PROFILER={**settings.PROFILER, 'SAMPLE_RATE': 50.0, 'MAX_DURATION': 2.0}):
+            assert profiler.limits(600, 1000) == (2.0, 50.0)
+            assert profiler.limits('0', '0') == (0.1, 1.0)
+            for seconds, rate in (('nan', 10), (1, 'nan'), ('inf', 10), (1, '-inf')):
+                try:
+                    profiler.limits(seconds, rate)
+                    raise AssertionError(f'accepted {seconds}, {rate}')
+                except ValueError:
+                    pass
+
+        runner = threading.Thread(target=profiler.run, args=(0.3, 50))
+        runner.start()
+        time.sleep(0.05)
+        try:
+            profiler.run(0.1, 50)
+            raise AssertionError('second session was allowed')
+        except ProfilerBusy:
+            pass
+        runner.join()
+
+        print("✅ Sampling profiler test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Sampling profiler test failed: {e}")
+        return False
+    finally:
+        stop.set()
+        thread.join()
+
+def test_profile_endpoint():
+    """Test the admin-only blocking and background profile endpoints"""
+    print("🧪 Testing profile endpoint...")
+
+    thread, stop = busy_thread()
+    try:
+        admin = User.objects.create_user(username='profileradmin', password='testpass123', is_staff=True)
+        member = User.objects.create_user(username='profilermember', password='testpass123')
+        admin_client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        member_client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(member).access_token}')
+
+        with override_settings(CACHES=LOCAL_CACHES):
+            response = admin_client.get('/api/v1/profile/', {'seconds': '0.2', 'rate': '50'})
+            assert response.status_code == 200, response.content
+            assert response['Content-Type'].startswith('text/plain')
+            assert int(response['X-Profile-Samples']) >= 5, response.headers
+            assert any(stack.startswith('profiled_worker;') for stack in parse_collapsed(response.content.decode()))
+
+            response = admin_client.post('/api/v1/profile/', {'seconds': 0.3, 'rate': 50}, content_type='application/json')
+            assert response.status_code == 202, response.content
+            result_url = response.json()['result_url']
+            assert result_url.endswith(f"/api/v1/profile/{response.json()['profile_id']}/"), result_url
+            assert admin_client.get(result_url).status_code == 202
+            # The worker runs one session at a time
+            assert admin_client.get('/api/v1/profile/', {'seconds': '0.1'}).status_code == 409
+            time.sleep(0.5)
+            response = admin_client.get(result_url)
+            assert response.status_code == 200, response.content
+            assert ':spin_until' in response.content.decode()
+
+            assert admin_client.get('/api/v1/profile/0123abcd/').status_code == 404
+            assert admin_client.get('/api/v1/profile/', {'seconds': 'soon'}).status_code == 400
+            assert admin_client.get('/api/v1/profile/', {'seconds': 'nan'}).status_code == 400
+            assert admin_client.get('/api/v1/profile/', {'rate': 'nan'}).status_code == 400
+            assert admin_client.post('/api/v1/profile/', {'seconds': 'inf'},
+                                     content_type='application/json').status_code == 400
+            assert member_client.get('/api/v1/profile/').status_code == 403
+            assert Client().post('/api/v1/profile/').status_code == 401
+            with override_settings(PROFILER={**settings.PROFILER, 'ENABLED': False}):
+                assert admin_client.get('/api/v1/profile/').status_code == 404
+
+        print("✅ Profile endpoint test passed")
+
+        # Clean up
+        admin.delete()
+        member.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Profile endpoint test failed: {e}")
+        return False
+    finally:
+        stop.set()
+        thread.join()
+
+if __name__ == "__main__":
+    print("🔥 Testing Profiler Components")
+    print("=" * 40)
+
+    tests = [
+        test_sampling_profiler,
+        test_profile_endpoint
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Profiler Tests: {passed}/{len(tests)} passed")
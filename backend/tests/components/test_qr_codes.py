@@ -0,0 +1,258 @@
+"""
+QR payment code tests
+"""
+import io
+import os
+import sys
+import time
+import statistics
+import django
+from pathlib import Path
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions import qr
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+MERCHANT_ID = '3f8e9c5a-2b1d-4e6f-9a7c-0d1e2f3a4b5c'
+WALLET_ID = '01926b3e-7c4a-7d2e-8f1a-2b3c4d5e6f70'
+
+def test_payload_signing():
+    """Test payloads round-trip, and tampered, expired and foreign codes are rejected"""
+    print("🧪 Testing QR payload signing...")
+
+    try:
+        content, issued = qr.issue_payload(MERCHANT_ID, WALLET_ID, '25.5', reference='INV-7', ttl=300)
+        assert content.startswith(qr.PREFIX), content
+        payment = qr.verify_payload(content)
+        assert (payment.merchant_id, payment.wallet_id) == (MERCHANT_ID, WALLET_ID)
+        assert payment.amount == Decimal('25.50') and payment.reference == 'INV-7', payment.amount
+        assert payment.expires == issued.expires and 295 <= payment.expires_in() <= 300
+
+        # Open amount, merchant only; two codes for one payment differ
+        first, _ = qr.issue_payload(MERCHANT_ID)
+        second, _ = qr.issue_payload(MERCHANT_ID)
+        assert first != second
+        payment = qr.verify_payload(first)
+        assert payment.wallet_id is None and payment.amount is None and payment.reference == ''
+
+        body, signature = content.rsplit(':', 1)
+        tampered = f"{body[:-1]}{'B' if body[-1] == 'A' else 'A'}:{signature}"
+        for bad in ('', 'https://example.com/pay', tampered, f'{body}:{signature[::-1]}', content[len(qr.PREFIX):]):
+            try:
+                qr.verify_payload(bad)
+                raise AssertionError(f'accepted {bad!r}')
+            except qr.ExpiredPayload:
+                raise AssertionError(f'{bad!r} reported as expired')
+            except qr.InvalidPayload:
+                pass
+
+        try:
+            qr.verify_payload(content, now=issued.expires)
+            raise AssertionError('expired code was accepted')
+        except qr.ExpiredPayload:
+            pass
+
+        # Codes survive a key rotation while the old key is a fallback
+        with override_settings(SECRET_KEY='rotated-key-' + 'x' * 40, SECRET_KEY_FALLBACKS=[settings.SECRET_KEY]):
+            assert qr.verify_payload(content).merchant_id == MERCHANT_ID
+        with override_settings(SECRET_KEY='rotated-key-' + 'x' * 40, SECRET_KEY_FALLBACKS=[]):
+            try:
+                qr.verify_payload(content)
+                raise AssertionError('code signed with a retired key was accepted')
+            except qr.InvalidPayload:
+                pass
+
+        timings = []
+        for _ in range(2000):
+            start = time.perf_counter()
+            qr.verify_payload(content)
+            timings.append(time.perf_counter() - start)
+        p99 = sorted(timings)[int(len(timings) * 0.99)]
+        assert p99 < 0.001, f"p99 {p99 * 1e6:.0f}µs"
+        print(f"   verify median {statistics.median(timings) * 1e6:.0f}µs, p99 {p99 * 1e6:.0f}µs")
+
+        print("✅ QR payload signing test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ QR payload signing test failed: {e}")
+        return False
+
+def test_image_cache():
+    """Test rendered images, the byte-bounded LRU and the shared cache"""
+    print("🧪 Testing QR image cache...")
+
+    try:
+        content, payment = qr.issue_payload(MERCHANT_ID, WALLET_ID, '10.00')
+        image = Image.open(io.BytesIO(qr.render_png(content, 512)))
+        width, height = image.size
+        assert width == height and 400 < width <= 512, image.size
+        # Every module is a whole block of pixels, dark where the QR matrix is
+        code = qr.qrcode.QRCode(error_correction=qr.qrcode.constants.ERROR_CORRECT_M,
+                                border=settings.QR_CODES['BORDER'])
+        code.add_data(content)
+        matrix = code.get_matrix()
+        scale = width // len(matrix)
+        assert width == scale * len(matrix), (width, len(matrix))
+        pixels = image.convert('L')
+        for row, cells in enumerate(matrix):
+            for column, dark in enumerate(cells):
+                centre = (column * scale + scale // 2, row * scale + scale // 2)
+                assert pixels.getpixel(centre) == (0 if dark else 255), (row, column)
+
+        lru = qr.ImageLRU(max_bytes=100)
+        for key in ('a', 'b', 'c'):
+            lru.put(key, b'x' * 40)
+        assert lru.get('a') is None and lru.get('b') and len(lru) == 2 and lru.size == 80
+        lru.put('d', b'x' * 40)
+        # 'b' was used last, so 'c' went
+        assert lru.get('c') is None and lru.get('b') and lru.get('d')
+        lru.put('huge', b'x' * 101)
+        assert lru.get('huge') is None and lru.size == 80
+
+        with override_settings(CACHES=LOCAL_CACHES):
+            images = qr.get_qr_images()
+            assert images.redis is None
+            png, source = images.get(content, payment, 256)
+            assert source == qr.RENDER and png.startswith(b'\x89PNG'), source
+            assert images.get(content, payment, 256) == (png, qr.MEMORY)
+            # Another worker: its own LRU is empty, the shared cache is not
+            assert qr.QRImages(settings.QR_CODES).get(content, payment, 256) == (png, qr.CACHE)
+            assert images.get(content, payment, 512)[1] == qr.RENDER
+
+        print("✅ QR image cache test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ QR image cache test failed: {e}")
+        return False
+
+def test_qr_endpoints():
+    """Test issuing, verifying (no queries) and image endpoints"""
+    print("🧪 Testing QR endpoints...")
+
+    try:
+        user = User.objects.create_user(username='qrmerchant', password='testpass123')
+        merchant = Merchant.objects.create(
+            user=user, business_name='QR Business', fnb_account_number='QRCODE01',
+            contact_email='qr@merchant.com', phone_number='+26771450000',
+            business_registration='QRCODEREG', api_key='qr-test-key',
+        )
+        other_user = User.objects.create_user(username='qrother', password='testpass123')
+        Merchant.objects.create(
+            user=other_user, business_name='QR Other', fnb_account_number='QRCODE02',
+            contact_email='qr@other.com', phone_number='+26771450001',
+            business_registration='QRCODEREG2', api_key='qr-other-key',
+        )
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Cue', last_name='Arr', phone_number='+26771450002'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('0.00'))
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        other_client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(other_user).access_token}')
+        budgets = {**settings.QUERY_BUDGETS, 'MODE': 'raise'}
+
+        with override_settings(CACHES=LOCAL_CACHES, QUERY_BUDGETS=budgets):
+            response = client.post('/api/v1/transactions/qr/', {
+                'wallet_id': str(wallet.wallet_id), 'amount': '45.00', 'reference': 'TABLE-4', 'expires_in': 120,
+            }, content_type='application/json')
+            assert response.status_code == 201, response.content
+            issued = response.json()
+            assert issued['merchant_id'] == str(merchant.merchant_id), issued
+            assert issued['wallet_id'] == str(wallet.wallet_id) and issued['amount'] == '45.00', issued
+            image_url = issued['image_url']
+            assert '/api/v1/transactions/qr/image/?payload=' in image_url, image_url
+
+            # Verification: signature and expiry only
+            with CaptureQueriesContext(connection) as queries:
+                response = other_client.post(
+                    '/api/v1/transactions/qr/verify/', {'payload': issued['payload']}, content_type='application/json'
+                )
+            assert response.status_code == 200, response.content
+            assert len(queries) == 0, [query['sql'] for query in queries]
+            verified = response.json()
+            assert verified['reference'] == 'TABLE-4' and 110 <= verified['expires_in'] <= 120, verified
+
+            response = client.post('/api/v1/transactions/qr/verify/', {'payload': issued['payload'] + 'x'},
+                                   content_type='application/json')
+            assert response.status_code == 400, response.content
+            expired, _ = qr.issue_payload(merchant.merchant_id, ttl=60, now=time.time() - 120)
+            response = client.post('/api/v1/transactions/qr/verify/', {'payload': expired},
+                                   content_type='application/json')
+            assert response.status_code == 410, response.content
+            assert Client().post('/api/v1/transactions/qr/verify/', {'payload': expired},
+                                 content_type='application/json').status_code == 401
+
+            # Images need no credentials, only a valid code
+            anonymous = Client()
+            with CaptureQueriesContext(connection) as queries:
+                response = anonymous.get(image_url)
+            assert response.status_code == 200 and response['Content-Type'] == 'image/png', response.content
+            assert len(queries) == 0, [query['sql'] for query in queries]
+            assert response['X-QR-Cache'] == qr.RENDER and 'max-age=' in response['Cache-Control']
+            assert Image.open(io.BytesIO(response.content)).size[0] <= settings.QR_CODES['DEFAULT_SIZE']
+            etag = response['ETag']
+            assert anonymous.get(image_url)['X-QR-Cache'] == qr.MEMORY
+            assert anonymous.get(image_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+            assert anonymous.get(image_url + '&size=1024')['ETag'] != etag
+            assert anonymous.get(image_url + '&size=300').status_code == 400
+            assert anonymous.get('/api/v1/transactions/qr/image/', {'payload': expired}).status_code == 410
+            assert anonymous.get('/api/v1/transactions/qr/image/', {'payload': 'PB1:forged'}).status_code == 400
+
+            # Only the merchant's own active wallets
+            response = other_client.post('/api/v1/transactions/qr/', {'wallet_id': str(wallet.wallet_id)},
+                                         content_type='application/json')
+            assert response.status_code == 404, response.content
+            response = client.post('/api/v1/transactions/qr/', {'expires_in': 10 ** 6},
+                                   content_type='application/json')
+            assert response.status_code == 400, response.content
+            response = client.post('/api/v1/transactions/qr/', {}, content_type='application/json')
+            assert response.status_code == 201 and response.json()['wallet_id'] is None, response.content
+
+        print("✅ QR endpoints test passed")
+
+        # Clean up
+        user.delete()
+        other_user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ QR endpoints test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("📱 Testing QR Code Components")
+    print("=" * 40)
+
+    tests = [
+        test_payload_signing,
+        test_image_cache,
+        test_qr_endpoints
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 QR Code Tests: {passed}/{len(tests)} passed")
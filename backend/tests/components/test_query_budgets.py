@@ -0,0 +1,213 @@
+"""
+Query budget tests
+"""
+import os
+import sys
+import logging
+import django
+from pathlib import Path
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common.db.query_budget import QueryBudgetExceeded, fingerprint, query_budget
+from phantom_apps.customers.views import CustomerViewSet
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions.services import post_transaction
+
+ENFORCED = {'MODE': 'raise', 'SAMPLE_RATE': 1.0}
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def create_merchant(username, suffix):
+    user = User.objects.create_user(username=username, password='testpass123')
+    merchant = Merchant.objects.create(
+        user=user, business_name=f'Budget Business {suffix}', fnb_account_number=f'BUDGET{suffix}',
+        contact_email=f'budget{suffix}@merchant.com', phone_number='+26771239000',
+        business_registration=f'BUDGETREG{suffix}', api_key=f'budget-test-key-{suffix}',
+    )
+    return user, merchant
+
+def test_sql_fingerprints():
+    """Test that queries differing only in literals share a fingerprint"""
+    print("🧪 Testing SQL fingerprints...")
+
+    try:
+        assert fingerprint(
+            'SELECT "wallets"."balance" FROM "wallets" WHERE "wallets"."wallet_id" = %s LIMIT 21'
+        ) == fingerprint(
+            "SELECT \"wallets\".\"balance\"\n  FROM \"wallets\" WHERE \"wallets\".\"wallet_id\" = 'abc''d' LIMIT 1"
+        ) == 'SELECT "wallets"."balance" FROM "wallets" WHERE "wallets"."wallet_id" = ? LIMIT ?'
+        assert fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)') == fingerprint(
+            'SELECT 1 FROM t WHERE id IN (%s)'
+        ) == 'SELECT ? FROM t WHERE id IN (...)'
+        assert fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)') == 'INSERT INTO t (a, b) VALUES (?, ?), ...'
+        # Digits inside identifiers are kept
+        assert fingerprint('SELECT "t1"."col2" FROM t1') == 'SELECT "t1"."col2" FROM t1'
+
+        print("✅ SQL fingerprint test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ SQL fingerprint test failed: {e}")
+        return False
+
+def check_viewset_budgets():
+    """Call each budgeted action once as a merchant (budgets enforced by the caller)"""
+    user, merchant = create_merchant('budgetmerchant', '001')
+    customers = [
+        Customer.objects.create(
+            merchant=merchant, first_name='Budget', last_name=str(index), phone_number=f'+2677124000{index}'
+        )
+        for index in range(5)
+    ]
+    wallets = [Wallet.objects.create(customer=c, merchant=merchant, balance=Decimal('100.00')) for c in customers]
+    posted = [post_transaction(w.wallet_id, Decimal('5.00'), 'credit', 'qr_code') for w in wallets][0]
+
+    token = str(RefreshToken.for_user(user).access_token)
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+    calls = [
+        ('get', '/api/v1/customers/', None),
+        ('get', f'/api/v1/customers/{customers[0].customer_id}/', None),
+        ('post', '/api/v1/customers/', {'first_name': 'New', 'last_name': 'One', 'phone_number': '+26771241000'}),
+        ('patch', f'/api/v1/customers/{customers[1].customer_id}/', {'first_name': 'Renamed'}),
+        ('put', f'/api/v1/customers/{customers[1].customer_id}/',
+         {'first_name': 'Put', 'last_name': 'One', 'phone_number': '+26771240001'}),
+        ('delete', f'/api/v1/customers/{customers[4].customer_id}/', None),
+        ('get', '/api/v1/merchants/', None),
+        ('get', f'/api/v1/merchants/{merchant.merchant_id}/', None),
+        ('patch', f'/api/v1/merchants/{merchant.merchant_id}/', {'business_name': 'Budget Renamed'}),
+        ('get', '/api/v1/merchants/dashboard/', None),
+        ('post', '/api/v1/merchants/generate_api_credentials/', {}),
+        ('get', '/api/v1/transactions/', None),
+        ('get', f'/api/v1/transactions/{posted.transaction_id}/', None),
+        ('post', '/api/v1/transactions/',
+         {'wallet_id': str(wallets[0].wallet_id), 'amount': '1.00', 'transaction_type': 'credit',
+          'payment_channel': 'qr_code'}),
+        ('get', '/api/v1/wallets/', None),
+        ('get', f'/api/v1/wallets/{wallets[0].wallet_id}/', None),
+        ('get', f'/api/v1/wallets/{wallets[0].wallet_id}/balance/', None),
+        ('post', '/api/v1/wallets/balances/', {'wallet_ids': [str(w.wallet_id) for w in wallets[:4]]}),
+    ]
+    for method, path, data in calls:
+        kwargs = {'data': data, 'content_type': 'application/json'} if data is not None else {}
+        response = getattr(client, method)(path, **kwargs)
+        assert response.status_code < 400, (method, path, response.status_code)
+
+    registration = {
+        'username': 'budgetregister', 'password': 'Str0ng-pass-123', 'password_confirm': 'Str0ng-pass-123',
+        'business_name': 'Budget Register', 'fnb_account_number': 'BUDGETREG01',
+        'contact_email': 'register@budget.com', 'phone_number': '+26771239001',
+        'business_registration': 'BUDGETREG01',
+    }
+    response = Client().post('/api/v1/merchants/register/', registration, content_type='application/json')
+    assert response.status_code == 201, response.content
+
+def test_viewset_actions_within_budget():
+    """Test every budgeted API action against its declared query budget"""
+    print("🧪 Testing viewset query budgets...")
+
+    try:
+        with override_settings(QUERY_BUDGETS=ENFORCED, CACHES=LOCAL_CACHES):
+            check_viewset_budgets()
+
+        print("✅ Viewset query budget test passed")
+
+        # Clean up
+        User.objects.filter(username__in=['budgetmerchant', 'budgetregister']).delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Viewset query budget test failed: {e}")
+        return False
+
+def test_budget_overrun_reported():
+    """Test that an N+1 overrun raises in tests and logs fingerprints at runtime"""
+    print("🧪 Testing query budget overruns...")
+
+    handler = CapturingHandler()
+    app_logger = logging.getLogger('phantom_apps')
+    app_logger.addHandler(handler)
+    original = CustomerViewSet.query_budgets
+    try:
+        user, merchant = create_merchant('budgetoverrun', '002')
+        for index in range(3):
+            Customer.objects.create(
+                merchant=merchant, first_name='Loop', last_name=str(index), phone_number=f'+2677125000{index}'
+            )
+
+        # A serializer walking a relation once per row
+        try:
+            with query_budget(2, 'n_plus_one'):
+                for customer in Customer.objects.filter(merchant=merchant):
+                    customer.merchant.business_name
+            raise AssertionError("budget of 2 was not enforced")
+        except QueryBudgetExceeded as e:
+            message = str(e)
+            assert message.startswith('n_plus_one ran 4 queries, budget 2'), message
+            assert '3x SELECT "merchants"' in message, message
+
+        token = str(RefreshToken.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        CustomerViewSet.query_budgets = {**original, 'list': 1}
+        with override_settings(QUERY_BUDGETS={'MODE': 'log', 'SAMPLE_RATE': 1.0}):
+            assert client.get('/api/v1/customers/').status_code == 200
+        logged = [message for message in handler.messages if message.startswith('Query budget exceeded')]
+        assert len(logged) == 1, handler.messages
+        assert '"view":"CustomerViewSet.list"' in logged[0] and '"queries":3' in logged[0], logged[0]
+        assert 'SELECT COUNT(*)' in logged[0], logged[0]
+
+        with override_settings(QUERY_BUDGETS={'MODE': 'off', 'SAMPLE_RATE': 1.0}):
+            assert client.get('/api/v1/customers/').status_code == 200
+        assert len([m for m in handler.messages if m.startswith('Query budget exceeded')]) == 1
+
+        print("✅ Query budget overrun test passed")
+
+        # Clean up
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Query budget overrun test failed: {e}")
+        return False
+    finally:
+        CustomerViewSet.query_budgets = original
+        app_logger.removeHandler(handler)
+
+if __name__ == "__main__":
+    print("📏 Testing Query Budget Components")
+    print("=" * 40)
+
+    tests = [
+        test_sql_fingerprints,
+        test_viewset_actions_within_budget,
+        test_budget_overrun_reported
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Query Budget Tests: {passed}/{len(tests)} passed")
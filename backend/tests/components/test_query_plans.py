@@ -0,0 +1,189 @@
+"""
+Query plan regression tests
+
+Seeds a large dataset, EXPLAINs the querysets behind each list endpoint and
+fails on sequential scans of the large tables, on new unindexed sorts, or
+(PostgreSQL) on an estimated cost above the stored baseline.
+
+Run with UPDATE_QUERY_PLAN_BASELINES=1 to record new baselines after an
+intended change. QUERY_PLAN_SEED_MERCHANTS controls the dataset size.
+"""
+import os
+import sys
+import json
+import uuid
+import django
+from pathlib import Path
+from datetime import timedelta
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from phantom_apps.common.db.explain import explain
+from phantom_apps.merchants.models import Merchant, APICredential
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions.models import Transaction
+from phantom_apps.customers.views import CustomerViewSet
+from phantom_apps.transactions.views import TransactionViewSet
+from phantom_apps.wallets.views import WalletViewSet
+
+BASELINES_FILE = Path(__file__).parent / 'query_plan_baselines.json'
+LARGE_TABLES = {'merchants', 'api_credentials', 'customers', 'wallets', 'transactions'}
+COST_TOLERANCE = 0.20
+SEED_PREFIX = 'planseed'
+
+def seed_dataset(merchants=None, customers_per_merchant=100, transactions_per_wallet=2):
+    """Bulk-insert merchants with customers, wallets, credentials and transactions"""
+    merchants = merchants or int(os.environ.get('QUERY_PLAN_SEED_MERCHANTS', 100))
+    now = timezone.now()
+    users = User.objects.bulk_create([
+        User(username=f'{SEED_PREFIX}{index:05d}', password='!') for index in range(merchants)
+    ])
+    merchant_rows = Merchant.objects.bulk_create([
+        Merchant(
+            user=user,
+            business_name=f'Plan Seed {index}',
+            fnb_account_number=f'PS{index:08d}',
+            contact_email=f'{user.username}@seed.test',
+            phone_number='+26770000000',
+            business_registration=f'PSREG{index:06d}',
+            api_key=f'ps_{uuid.uuid4().hex}',
+        )
+        for index, user in enumerate(users)
+    ], batch_size=1000)
+
+    credentials, customers, wallets, transactions = [], [], [], []
+    for merchant in merchant_rows:
+        # Two active keys (mid-rotation) and a revoked one
+        for index in range(3):
+            credentials.append(APICredential(
+                merchant=merchant, api_key=f'psc_{uuid.uuid4().hex}', api_secret_hash='!',
+                is_active=index < 2, created_at=now - timedelta(days=index),
+            ))
+        for index in range(customers_per_merchant):
+            created_at = now - timedelta(minutes=index)
+            customer = Customer(
+                merchant=merchant, first_name='Seed', last_name=str(index),
+                phone_number=f'+267{index:08d}', created_at=created_at,
+            )
+            customers.append(customer)
+            wallet = Wallet(
+                customer=customer, merchant=merchant, balance=Decimal('100.00'),
+                status='active' if index % 10 else 'suspended', created_at=created_at,
+            )
+            wallets.append(wallet)
+            for sequence in range(transactions_per_wallet):
+                transactions.append(Transaction(
+                    wallet=wallet, merchant=merchant, amount=Decimal('10.00'),
+                    transaction_type='credit', payment_channel='qr_code', status='completed',
+                    reference_number=f'PS-{uuid.uuid4().hex[:24]}',
+                    created_at=created_at + timedelta(seconds=sequence),
+                ))
+
+    APICredential.objects.bulk_create(credentials, batch_size=2000)
+    Customer.objects.bulk_create(customers, batch_size=2000)
+    Wallet.objects.bulk_create(wallets, batch_size=2000)
+    Transaction.objects.bulk_create(transactions, batch_size=2000)
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return merchant_rows
+
+def endpoint_querysets(merchant):
+    """The page querysets each list endpoint runs for one merchant"""
+    factory = APIRequestFactory()
+
+    def page(viewset, action='list', **filters):
+        request = factory.get('/')
+        request.user = merchant.user
+        view = viewset(request=request, format_kwarg=None, action=action, kwargs={})
+        return view.filter_queryset(view.get_queryset()).filter(**filters)[:20]
+
+    wallet_ids = list(Wallet.objects.filter(merchant=merchant).values_list('pk', flat=True)[:50])
+    return {
+        'wallets.list': page(WalletViewSet),
+        'wallets.list_by_status': page(WalletViewSet, status='active'),
+        'wallets.balances': Wallet.objects.filter(pk__in=wallet_ids).order_by(),  # Balance cache fill
+        'customers.list': page(CustomerViewSet),
+        'transactions.list': page(TransactionViewSet),
+        'merchants.active_credentials': APICredential.objects.filter(
+            merchant=merchant, is_active=True
+        ).order_by('-created_at'),
+    }
+
+def check_plan(name, plan, baseline):
+    """Problems with a plan compared to its baseline"""
+    problems = [f"{name}: sequential scan of {table}" for table in plan.seq_scans_of(LARGE_TABLES)]
+    if baseline is None:
+        return problems
+    if plan.sorts > baseline['sorts']:
+        problems.append(f"{name}: {plan.sorts} unindexed sorts (baseline {baseline['sorts']})")
+    if plan.total_cost is not None and baseline.get('total_cost') is not None:
+        limit = baseline['total_cost'] * (1 + COST_TOLERANCE)
+        if plan.total_cost > limit:
+            problems.append(f"{name}: estimated cost {plan.total_cost} above baseline {baseline['total_cost']}")
+    return problems
+
+def cleanup_dataset():
+    User.objects.filter(username__startswith=SEED_PREFIX).delete()
+
+def test_endpoint_query_plans():
+    """Test that endpoint querysets use indexes and do not regress"""
+    print("🧪 Testing endpoint query plans...")
+
+    try:
+        cleanup_dataset()
+        merchants = seed_dataset()
+        plans = {
+            name: explain(queryset)
+            for name, queryset in endpoint_querysets(merchants[len(merchants) // 2]).items()
+        }
+
+        baselines = json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {}
+        vendor_baselines = baselines.get(connection.vendor, {})
+
+        if os.environ.get('UPDATE_QUERY_PLAN_BASELINES'):
+            baselines[connection.vendor] = {name: plan.as_dict() for name, plan in plans.items()}
+            BASELINES_FILE.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+            print(f"📝 Baselines for {connection.vendor} written to {BASELINES_FILE.name}")
+
+        problems = []
+        for name, plan in plans.items():
+            problems.extend(check_plan(name, plan, vendor_baselines.get(name)))
+        assert not problems, '; '.join(problems)
+
+        print("✅ Endpoint query plans test passed")
+
+        # Clean up
+        cleanup_dataset()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Endpoint query plans test failed: {e}")
+        cleanup_dataset()
+        return False
+
+if __name__ == "__main__":
+    print("🔍 Testing Query Plans")
+    print("=" * 40)
+
+    tests = [
+        test_endpoint_query_plans
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Query Plan Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,143 @@
+"""
+Readiness check tests
+"""
+import os
+import sys
+import time
+import django
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import orjson
+from django.conf import settings
+from django.test import Client, override_settings
+from phantom_apps.common import readiness
+from phantom_apps.common.readiness import ReadinessChecker
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+class FlakyProbe:
+    """Probe whose outcome the test flips"""
+
+    def __init__(self):
+        self.failing = False
+
+    def __call__(self):
+        if self.failing:
+            raise ConnectionError('connection refused')
+
+def test_checker_snapshots():
+    """Test critical vs non-critical failures, history and stale snapshots"""
+    print("🧪 Testing readiness checker snapshots...")
+
+    try:
+        database, partner = FlakyProbe(), FlakyProbe()
+        checker = ReadinessChecker({'database': database, 'partner': partner}, history=3, critical=['database'])
+
+        checker.run_once()
+        body = orjson.loads(checker._snapshot.body)
+        assert checker._snapshot.ready and body['status'] == 'ready', body
+        assert body['dependencies']['database']['critical'] is True, body
+        assert body['dependencies']['partner']['critical'] is False, body
+
+        # A failing non-critical dependency is reported but keeps the worker ready
+        partner.failing = True
+        checker.run_once()
+        body = orjson.loads(checker._snapshot.body)
+        assert checker._snapshot.ready, body
+        assert body['dependencies']['partner']['status'] == 'failing', body
+        assert 'ConnectionError: connection refused' in body['dependencies']['partner']['error'], body
+
+        database.failing = True
+        checker.run_once()
+        checker.run_once()
+        snapshot = checker._snapshot
+        body = orjson.loads(snapshot.body)
+        assert not snapshot.ready and body['status'] == 'not_ready', body
+        # History is bounded; the first (passing) partner probe has rolled out
+        assert body['dependencies']['partner']['samples'] == 3, body
+        assert body['dependencies']['partner']['failures'] == 3, body
+        assert 'history' not in body['dependencies']['database'], body
+        verbose = orjson.loads(snapshot.verbose_body)
+        assert [item['ok'] for item in verbose['dependencies']['database']['history']] == [True, False, False], verbose
+
+        # Served from the snapshot, not by probing again
+        checker._pid = os.getpid()
+        database.failing = False
+        ready, _ = checker.current()
+        assert not ready
+
+        snapshot.built_at = time.time() - checker.stale_after - 1
+        ready, body = checker.current()
+        assert not ready and orjson.loads(body)['status'] == 'stale', body
+
+        print("✅ Readiness checker test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Readiness checker test failed: {e}")
+        return False
+
+def test_readiness_endpoint():
+    """Test the readiness endpoint with the downstream mocks unreachable"""
+    print("🧪 Testing readiness endpoint...")
+
+    try:
+        config = {**settings.READINESS, 'INTERVAL': 60.0, 'TIMEOUT': 0.5}
+        with override_settings(CACHES=LOCAL_CACHES, READINESS=config):
+            try:
+                client = Client()
+                response = client.get('/api/v1/health/ready/')
+                body = response.json()
+                # No server for the FNB and mobile money mocks here: failing, but not critical
+                assert response.status_code == 200, body
+                assert body['status'] == 'ready', body
+                assert body['dependencies']['database']['status'] == 'ok', body
+                assert body['dependencies']['redis']['status'] == 'ok', body
+                assert body['dependencies']['fnb']['status'] == 'failing', body
+                assert body['dependencies']['fnb']['critical'] is False, body
+
+                # Later probes read the cached snapshot
+                checked_at = body['checked_at']
+                assert client.get('/api/v1/health/ready/').json()['checked_at'] == checked_at
+
+                verbose = client.get('/api/v1/health/ready/', {'verbose': '1'}).json()
+                assert len(verbose['dependencies']['database']['history']) == 1, verbose
+
+                with override_settings(READINESS={**config, 'CRITICAL': ['database', 'fnb']}):
+                    response = client.get('/api/v1/health/ready/')
+                    assert response.status_code == 503, response.content
+                    assert response.json()['status'] == 'not_ready'
+            finally:
+                readiness.get_checker().stop()
+
+        print("✅ Readiness endpoint test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Readiness endpoint test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🚦 Testing Readiness Components")
+    print("=" * 40)
+
+    tests = [
+        test_checker_snapshots,
+        test_readiness_endpoint
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Readiness Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,185 @@
+"""
+Server-Timing instrumentation tests
+"""
+import os
+import sys
+import time
+import logging
+import django
+from pathlib import Path
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common import server_timing
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def parse_server_timing(value):
+    """{'db': {'dur': '1.23', 'desc': '"3 queries"'}, ...}"""
+    metrics = {}
+    for metric in value.split(','):
+        name, *params = [part.strip() for part in metric.split(';')]
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+def has_timings(response):
+    # debug-toolbar (DEBUG) sends a Server-Timing header of its own
+    return 'Server-Timing' in response and 'total' in parse_server_timing(response['Server-Timing'])
+
+def test_server_timing_header():
+    """Test that API responses carry DB, serializer and total timings"""
+    print("🧪 Testing Server-Timing header...")
+
+    try:
+        user = User.objects.create_user(username='timingmerchant', password='testpass123')
+        merchant = Merchant.objects.create(
+            user=user,
+            business_name='Timing Business',
+            fnb_account_number='TIMING0001',
+            contact_email='timing@merchant.com',
+            phone_number='+26771239000',
+            business_registration='TIMINGREG1',
+            api_key='timing-test-key'
+        )
+        for index in range(3):
+            customer = Customer.objects.create(
+                merchant=merchant, first_name='Tim', last_name=str(index), phone_number=f'+2677123900{index}'
+            )
+            Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('10.00'))
+
+        token = str(RefreshToken.for_user(user).access_token)
+        hidden = {**settings.SERVER_TIMING, 'HEADER': False}
+        with override_settings(SERVER_TIMING=hidden):
+            # Off by default outside DEBUG: timings are for staff only
+            response = Client().get('/api/v1/wallets/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            assert response.status_code == 200, response.status_code
+            assert not has_timings(response), response['Server-Timing']
+            assert not has_timings(Client().get('/api/v1/wallets/'))
+
+            User.objects.filter(pk=user.pk).update(is_staff=True)
+            response = Client().get('/api/v1/wallets/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            assert response.status_code == 200, response.status_code
+
+        metrics = parse_server_timing(response['Server-Timing'])
+        assert set(metrics) == {'db', 'cache', 'serialize', 'render', 'total'}
+        assert int(metrics['db']['desc'].strip('"').split()[0]) >= 1
+        assert float(metrics['serialize']['dur']) > 0
+        assert float(metrics['render']['dur']) > 0
+        assert float(metrics['total']['dur']) >= float(metrics['db']['dur'])
+
+        # The Redis client records cache traffic (throttle history at least)
+        if isinstance(getattr(caches['default'], 'client', None), server_timing.InstrumentedRedisClient):
+            assert 'hits' in metrics['cache']['desc']
+            assert float(metrics['cache']['dur']) > 0
+
+        # Nothing leaks into code running after the request
+        assert server_timing.current() is None
+
+        print("✅ Server-Timing header test passed")
+
+        # Clean up
+        Wallet.objects.filter(merchant=merchant).delete()
+        Customer.objects.filter(merchant=merchant).delete()
+        merchant.delete()
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Server-Timing header test failed: {e}")
+        return False
+
+def test_slow_request_log():
+    """Test the structured log line for requests above their route threshold"""
+    print("🧪 Testing slow request log...")
+
+    handler = CapturingHandler()
+    logger = logging.getLogger('phantom_apps')
+    logger.addHandler(handler)
+    try:
+        config = dict(settings.SERVER_TIMING)
+        config['ROUTE_THRESHOLDS_MS'] = {'api_v1:common:health': 0}
+        with override_settings(SERVER_TIMING=config):
+            client = Client()
+            client.get('/api/v1/health/')
+            slow = [message for message in handler.messages if message.startswith('Slow request')]
+            assert len(slow) == 1, handler.messages
+            assert '"route":"api_v1:common:health"' in slow[0] and '"db_queries"' in slow[0]
+
+            # Routes without their own threshold use SLOW_REQUEST_MS
+            client.get('/')
+            assert len([message for message in handler.messages if message.startswith('Slow request')]) == 1
+
+        print("✅ Slow request log test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Slow request log test failed: {e}")
+        return False
+    finally:
+        logger.removeHandler(handler)
+
+def test_overhead_outside_requests():
+    """Test that the hooks cost next to nothing when no request is recorded"""
+    print("🧪 Testing instrumentation overhead...")
+
+    try:
+        def execute(sql, params, many, context):
+            return None
+
+        iterations = 200000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            execute('SELECT 1', None, False, None)
+        bare = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(iterations):
+            server_timing.db_execute_wrapper(execute, 'SELECT 1', None, False, None)
+        wrapped = time.perf_counter() - start
+
+        overhead_us = (wrapped - bare) / iterations * 1e6
+        print(f"   DB wrapper overhead outside a request: {overhead_us:.3f} µs/query")
+        assert overhead_us < 2, overhead_us
+
+        print("✅ Instrumentation overhead test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Instrumentation overhead test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("⏱️ Testing Server-Timing Components")
+    print("=" * 40)
+
+    tests = [
+        test_server_timing_header,
+        test_slow_request_log,
+        test_overhead_outside_requests
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Server-Timing Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,218 @@
+"""
+Settlement component tests
+"""
+import os
+import sys
+import django
+import tempfile
+from pathlib import Path
+from decimal import Decimal
+from datetime import date, datetime
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions.models import Transaction
+from phantom_apps.settlements.models import SettlementRun, MerchantSettlement
+from phantom_apps.settlements import services
+
+SETTLEMENT_DATE = date(2025, 6, 17)
+
+def create_merchant_with_transactions(suffix, amounts):
+    """Merchant with one wallet and completed transactions (negative amounts are debits)"""
+    user = User.objects.create_user(
+        username=f'settlemerchant{suffix}',
+        email=f'settle{suffix}@merchant.com',
+        password='testpass123'
+    )
+    merchant = Merchant.objects.create(
+        user=user,
+        business_name=f'Settlement Business {suffix}',
+        fnb_account_number=f'62000000{suffix}',
+        contact_email=f'settle{suffix}@merchant.com',
+        phone_number='+26771234567',
+        business_registration=f'SETTLE{suffix}',
+        commission_rate=Decimal('1.00')
+    )
+    customer = Customer.objects.create(
+        merchant=merchant,
+        first_name='John',
+        last_name='Doe',
+        phone_number=f'+2677123{suffix}'
+    )
+    wallet = Wallet.objects.create(customer=customer, merchant=merchant)
+    created_at = timezone.make_aware(datetime(2025, 6, 17, 12, 0))
+    for index, amount in enumerate(amounts):
+        Transaction.objects.create(
+            wallet=wallet,
+            merchant=merchant,
+            amount=abs(amount),
+            transaction_type='credit' if amount > 0 else 'debit',
+            payment_channel='qr_code',
+            status='completed',
+            reference_number=f'STL-{suffix}-{index}',
+            created_at=created_at,
+        )
+    return user, merchant
+
+def test_settlement_netting_is_chunked_and_resumable():
+    """Test netting in small chunks and resuming a partially netted merchant"""
+    print("🧪 Testing chunked, resumable settlement netting...")
+    
+    try:
+        user, merchant = create_merchant_with_transactions(
+            '0001', [Decimal('100.00'), Decimal('50.00'), Decimal('-30.00'), Decimal('20.00'), Decimal('10.00')]
+        )
+        run = services.start_settlement_run(SETTLEMENT_DATE, shard_count=4, payout_mode='eft_file')
+        merchant_settlement = MerchantSettlement.objects.get(run=run, merchant=merchant)
+        assert merchant_settlement.shard == services.merchant_shard(merchant.merchant_id, 4)
+        
+        # Simulate a crash after the first chunk was checkpointed
+        first_chunk = list(
+            services.unsettled_transactions(merchant.merchant_id, run.cutoff)
+            .order_by('pk').values_list('pk', flat=True)[:2]
+        )
+        Transaction.objects.filter(pk__in=first_chunk).update(settlement=merchant_settlement)
+        claimed = Transaction.objects.filter(pk__in=first_chunk)
+        merchant_settlement.transaction_count = 2
+        merchant_settlement.gross_credits = sum(t.amount for t in claimed if t.transaction_type == 'credit')
+        merchant_settlement.gross_debits = sum(t.amount for t in claimed if t.transaction_type == 'debit')
+        merchant_settlement.save()
+        
+        # Re-planning must not duplicate the merchant, resuming must not double count
+        assert services.plan_merchant_settlements(run) >= 1
+        assert MerchantSettlement.objects.filter(run=run, merchant=merchant).count() == 1
+        merchant_settlement = services.net_merchant_settlement(merchant_settlement.pk, chunk_size=2)
+        
+        assert merchant_settlement.status == 'netted'
+        assert merchant_settlement.transaction_count == 5
+        assert merchant_settlement.gross_credits == Decimal('180.00')
+        assert merchant_settlement.gross_debits == Decimal('30.00')
+        assert merchant_settlement.net_amount == (
+            merchant_settlement.gross_credits - merchant_settlement.gross_debits - merchant_settlement.fees
+        )
+        assert merchant.transactions.filter(settlement__isnull=True).count() == 0
+        
+        print("✅ Chunked, resumable settlement netting test passed")
+        
+        # Clean up
+        run.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Chunked, resumable settlement netting test failed: {e}")
+        return False
+
+def test_settlement_eft_batch_file():
+    """Test a full run producing a batch EFT file"""
+    print("🧪 Testing settlement EFT batch file...")
+    
+    try:
+        user, merchant = create_merchant_with_transactions('0002', [Decimal('200.00'), Decimal('-50.00')])
+        settings.SETTLEMENT_SETTINGS['EFT_OUTPUT_DIR'] = tempfile.mkdtemp()
+        
+        run = services.start_settlement_run(SETTLEMENT_DATE, shard_count=2, payout_mode='eft_file')
+        for shard in range(run.shard_count):
+            services.settle_shard(run, shard)
+        run = services.finalize_settlement_run(run)
+        
+        merchant_settlement = MerchantSettlement.objects.get(run=run, merchant=merchant)
+        assert run.status == 'completed'
+        assert merchant_settlement.status == 'exported'
+        
+        with open(run.eft_file_path) as handle:
+            lines = handle.read().splitlines()
+        assert lines[0].startswith('account_number')
+        assert any(
+            merchant.fnb_account_number in line and f"{merchant_settlement.net_amount:.2f}" in line
+            for line in lines[1:]
+        )
+        
+        print("✅ Settlement EFT batch file test passed")
+        
+        # Clean up
+        run.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Settlement EFT batch file test failed: {e}")
+        return False
+
+def test_settlement_deficit_is_carried_forward():
+    """Test a merchant with more debits than credits is not written off"""
+    print("🧪 Testing settlement deficit carry-forward...")
+    
+    try:
+        user, merchant = create_merchant_with_transactions('0003', [Decimal('40.00'), Decimal('-100.00')])
+        first_run = services.start_settlement_run(date(2025, 6, 20), shard_count=1, payout_mode='eft_file')
+        services.settle_shard(first_run, 0)
+        first = MerchantSettlement.objects.get(run=first_run, merchant=merchant)
+        assert first.status == 'carried_forward', first.status
+        assert first.net_amount == Decimal('-60.00') - first.fees, first.net_amount
+        assert merchant.transactions.filter(settlement__isnull=True).count() == 0
+        
+        # The next day's collections pay off the deficit before anything is paid out
+        wallet = merchant.wallets.get()
+        Transaction.objects.create(
+            wallet=wallet, merchant=merchant, amount=Decimal('150.00'), transaction_type='credit',
+            payment_channel='qr_code', status='completed', reference_number='STL-0003-next',
+            created_at=timezone.make_aware(datetime(2025, 6, 21, 12, 0)),
+        )
+        second_run = services.start_settlement_run(date(2025, 6, 21), shard_count=1, payout_mode='eft_file')
+        services.settle_shard(second_run, 0)
+        second = MerchantSettlement.objects.get(run=second_run, merchant=merchant)
+        first.refresh_from_db()
+        assert first.carried_into_id == second.pk
+        assert second.opening_balance == first.net_amount
+        assert second.status == 'netted'
+        assert second.net_amount == first.net_amount + Decimal('150.00') - second.fees, second.net_amount
+        
+        # Absorbed once only
+        third_run = services.start_settlement_run(date(2025, 6, 22), shard_count=1, payout_mode='eft_file')
+        assert not MerchantSettlement.objects.filter(run=third_run, merchant=merchant).exists()
+        
+        print("✅ Settlement deficit carry-forward test passed")
+        
+        # Clean up
+        for run in (first_run, second_run, third_run):
+            run.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Settlement deficit carry-forward test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🏦 Testing Settlement Components")
+    print("=" * 40)
+    
+    tests = [
+        test_settlement_netting_is_chunked_and_resumable,
+        test_settlement_eft_batch_file,
+        test_settlement_deficit_is_carried_forward
+    ]
+    
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+    
+    print(f"\n📊 Settlement Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,132 @@
+"""
+Slow-query log tests
+"""
+import os
+import sys
+import logging
+import django
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common.db.slow_queries import slow_query_log
+from phantom_apps.customers.models import Customer
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def everything_slow(**overrides):
+    return override_settings(SLOW_QUERIES={
+        **settings.SLOW_QUERIES, 'THRESHOLD_MS': 0.0, 'EXPLAIN_SAMPLE_RATE': 1.0, **overrides,
+    })
+
+def stats_for(table, phrase):
+    for stats in slow_query_log.top(limit=1000):
+        if f'FROM "{table}"' in stats['fingerprint'] and phrase in stats['fingerprint']:
+            return stats
+    return None
+
+def test_fingerprint_stats_and_explain():
+    """Test per-fingerprint stats and sampled EXPLAIN capture of slow queries"""
+    print("🧪 Testing slow query stats and EXPLAIN capture...")
+
+    handler = CapturingHandler()
+    app_logger = logging.getLogger('phantom_apps')
+    app_logger.addHandler(handler)
+    try:
+        slow_query_log.reset()
+        with everything_slow():
+            Customer.objects.filter(phone_number='+26779990001').first()
+            Customer.objects.filter(phone_number='+26779990002').first()
+
+        stats = stats_for('customers', '"customers"."phone_number" = ?')
+        assert stats is not None, slow_query_log.top()
+        assert stats['count'] == 2 and stats['slow_count'] == 2, stats
+        assert stats['max_ms'] >= stats['mean_ms'] > 0, stats
+        assert '%s' in stats['sample_sql'] and '+26779990001' not in stats['sample_sql'], stats
+        assert stats['plan'], stats
+        # Explained once; the second execution falls inside EXPLAIN_INTERVAL
+        logged = [m for m in handler.messages if m.startswith('Slow query') and 'phone_number\\" = ?' in m]
+        assert len(logged) == 1, logged
+
+        # Below the threshold: counted, not slow, not explained
+        slow_query_log.reset()
+        with everything_slow(THRESHOLD_MS=60000.0):
+            Customer.objects.filter(phone_number='+26779990003').exists()
+        stats = stats_for('customers', '"customers"."phone_number" = ?')
+        assert stats['count'] == 1 and stats['slow_count'] == 0 and stats['plan'] is None, stats
+
+        print("✅ Slow query stats test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Slow query stats test failed: {e}")
+        return False
+    finally:
+        app_logger.removeHandler(handler)
+
+def test_slow_queries_endpoint():
+    """Test the admin-only top-N endpoint"""
+    print("🧪 Testing slow queries endpoint...")
+
+    try:
+        admin = User.objects.create_user(username='slowqueryadmin', password='testpass123', is_staff=True)
+        member = User.objects.create_user(username='slowquerymember', password='testpass123')
+        admin_client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        member_client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(member).access_token}')
+
+        slow_query_log.reset()
+        with everything_slow():
+            for index in range(3):
+                Customer.objects.filter(last_name=f'Slow {index}').count()
+
+        response = admin_client.get('/api/v1/slow-queries/', {'order': 'count', 'limit': 2})
+        assert response.status_code == 200, response.status_code
+        body = response.json()
+        assert body['order'] == 'count' and len(body['results']) <= 2, body
+        assert body['results'][0]['count'] >= 3, body['results']
+
+        assert admin_client.get('/api/v1/slow-queries/', {'order': 'nope'}).status_code == 400
+        assert member_client.get('/api/v1/slow-queries/').status_code == 403
+        assert Client().get('/api/v1/slow-queries/').status_code == 401
+
+        print("✅ Slow queries endpoint test passed")
+
+        # Clean up
+        admin.delete()
+        member.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Slow queries endpoint test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🐢 Testing Slow Query Components")
+    print("=" * 40)
+
+    tests = [
+        test_fingerprint_stats_and_explain,
+        test_slow_queries_endpoint
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Slow Query Tests: {passed}/{len(tests)} passed")
@@ -0,0 +1,167 @@
+"""
+Worker startup tests
+"""
+import os
+import sys
+import json
+import logging
+import time
+import tempfile
+import subprocess
+import django
+from pathlib import Path
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client, override_settings
+from phantom_apps.common import startup
+
+SCHEMA = b'{"openapi": "3.0.3", "info": {"title": "Phantom Banking API"}, "paths": {}}'
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def test_precomputed_schema():
+    """Test the schema file is served with an ETag, 304s and a 503 when missing"""
+    print("🧪 Testing precomputed schema...")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'schema.json')
+            with open(path, 'wb') as f:
+                f.write(SCHEMA)
+
+            client = Client()
+            with override_settings(PRODUCTION_MODE=True, STARTUP={**settings.STARTUP, 'SCHEMA_FILE': path}):
+                response = client.get('/api/schema/')
+                assert response.status_code == 200, response.content
+                assert response.content == SCHEMA
+                assert response['Content-Type'] == startup.SCHEMA_CONTENT_TYPE
+                etag = response['ETag']
+                assert etag.startswith('"') and len(etag) == 34, etag
+
+                response = client.get('/api/schema/', HTTP_IF_NONE_MATCH=etag)
+                assert response.status_code == 304 and response['ETag'] == etag
+
+                # Read once per process, not per request
+                os.remove(path)
+                assert client.get('/api/schema/').status_code == 200
+
+            missing = os.path.join(tmp, 'missing.json')
+            with override_settings(PRODUCTION_MODE=True, STARTUP={**settings.STARTUP, 'SCHEMA_FILE': missing}):
+                response = client.get('/api/schema/')
+                assert response.status_code == 503, response.content
+                assert 'not been built' in response.json()['error']
+
+        print("✅ Precomputed schema test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Precomputed schema test failed: {e}")
+        return False
+
+def test_warm_up_and_report():
+    """Test warm-up timings and the one-off first request report"""
+    print("🧪 Testing warm-up and startup report...")
+
+    handler = RecordingHandler()
+    logger = logging.getLogger('phantom_apps')
+    logger.addHandler(handler)
+    previous_level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        timings = startup.warm_up()
+        assert set(timings) == {'urls_ms', 'serializers', 'serializers_ms', 'other_ms'}, timings
+        assert timings['serializers'] > 0, timings
+        assert all(conn.connection is None for conn in connections.all()), 'connection left open'
+
+        calls = []
+
+        def application(environ, start_response):
+            calls.append(environ['PATH_INFO'])
+            start_response('200 OK', [])
+            return [b'ok']
+
+        os.environ[startup.FORKED_AT_ENV] = repr(time.time())
+        wrapped = startup.instrument(application, 0.25)
+        for path in ('/health/', '/api/v1/health/'):
+            assert wrapped({'PATH_INFO': path}, lambda *args: None) == [b'ok']
+        assert calls == ['/health/', '/api/v1/health/'], calls
+
+        lines = [message for message in handler.messages if message.startswith('Worker startup ')]
+        assert len(lines) == 1, lines
+        report = json.loads(lines[0][len('Worker startup '):])
+        assert report['import_ms'] == 250.0 and report['first_request_path'] == '/health/', report
+        assert report['preloaded'] is False and 'fork_to_first_response_ms' in report, report
+
+        print("✅ Warm-up and startup report test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Warm-up and startup report test failed: {e}")
+        return False
+    finally:
+        os.environ.pop(startup.FORKED_AT_ENV, None)
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+
+def test_production_mode_imports():
+    """Test a PRODUCTION_MODE worker defers the admin, docs and schema generation imports"""
+    print("🧪 Testing production mode imports...")
+
+    try:
+        code = (
+            "import sys, json\n"
+            "from core.wsgi import application\n"
+            "from django.urls import reverse\n"
+            "deferred = ['drf_spectacular.openapi', 'drf_spectacular.views', 'django_extensions', 'core.admin_urls']\n"
+            "loaded = [name for name in deferred if name in sys.modules]\n"
+            "print(json.dumps({'loaded': loaded, 'admin': reverse('admin:index'),"
+            " 'admin_loaded': 'core.admin_urls' in sys.modules, 'warmup': 'warmup' in application.report}))\n"
+        )
+        env = {**os.environ, 'PRODUCTION_MODE': 'True', 'DEBUG': 'False'}
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', code],
+            env=env, cwd=project_root, capture_output=True, text=True, timeout=120,
+        )
+        assert output.returncode == 0, output.stderr[-2000:]
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        assert result['loaded'] == [], result
+        assert result['warmup'], result
+        # Reversing into the admin namespace imports it on demand
+        assert result['admin'] == '/admin/' and result['admin_loaded'], result
+
+        print("✅ Production mode imports test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Production mode imports test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Testing Startup Components")
+    print("=" * 40)
+
+    tests = [
+        test_precomputed_schema,
+        test_warm_up_and_report,
+        test_production_mode_imports
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Startup Tests: {passed}/{len(tests)} passed")
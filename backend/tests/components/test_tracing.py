@@ -0,0 +1,255 @@
+"""
+Distributed tracing tests
+"""
+import os
+import sys
+import threading
+import time
+import django
+from pathlib import Path
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from celery import shared_task, signals
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common import tracing
+from phantom_apps.common.http_client import PooledHTTPClient
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+def tracing_settings(**overrides):
+    return override_settings(TRACING={
+        **settings.TRACING, 'ENABLED': True, 'EXPORTER': 'memory', 'SAMPLE_RATE': 0.0, **overrides,
+    })
+
+def exported_spans():
+    tracing.tracer.force_flush()
+    return tracing.tracer.processor.exporter.spans
+
+class HeaderRecorder(BaseHTTPRequestHandler):
+    received = []
+
+    def do_GET(self):
+        HeaderRecorder.received.append(dict(self.headers))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"status": "ok"}')
+
+    def log_message(self, *args):
+        pass
+
+@shared_task(name='tests.tracing.echo')
+def echo_task(value):
+    return value
+
+def test_traceparent_and_sampling():
+    """Test traceparent parsing and head sampling decisions"""
+    print("🧪 Testing traceparent parsing and sampling...")
+
+    try:
+        assert tracing.parse_traceparent(f'00-{TRACE_ID}-{PARENT_ID}-01') == (TRACE_ID, PARENT_ID, True)
+        assert tracing.parse_traceparent(f'00-{TRACE_ID}-{PARENT_ID}-00') == (TRACE_ID, PARENT_ID, False)
+        # Newer versions may carry extra fields
+        assert tracing.parse_traceparent(f'01-{TRACE_ID}-{PARENT_ID}-01-extra')[2] is True
+        for invalid in (
+            'garbage', f'ff-{TRACE_ID}-{PARENT_ID}-01', f'00-{"0" * 32}-{PARENT_ID}-01',
+            f'00-{TRACE_ID}-{"0" * 16}-01', f'00-{TRACE_ID}-{PARENT_ID}-01-extra',
+        ):
+            assert tracing.parse_traceparent(invalid) is None, invalid
+
+        with tracing_settings(SAMPLE_RATE=0.0):
+            # The caller's decision wins over the local sample rate
+            root = tracing.start_trace('GET', f'00-{TRACE_ID}-{PARENT_ID}-01')
+            assert root.recording and root.trace_id == TRACE_ID and root.parent_id == PARENT_ID
+
+            root = tracing.start_trace('GET')
+            assert not root.recording
+            with root:
+                assert tracing.start_span('child') is tracing.NOOP_SPAN
+                headers = {}
+                tracing.inject(headers)
+                assert headers['traceparent'] == f'00-{root.trace_id}-{root.span_id}-00', headers
+
+        with tracing_settings(SAMPLE_RATE=1.0):
+            root = tracing.start_trace('GET', f'00-{TRACE_ID}-{PARENT_ID}-00')
+            assert not root.recording and root.span_id == PARENT_ID
+            assert tracing.start_trace('GET').recording
+
+        print("✅ Traceparent and sampling test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Traceparent and sampling test failed: {e}")
+        return False
+
+def test_request_trace():
+    """Test the request, posting service and query spans of a sampled API call"""
+    print("🧪 Testing request traces...")
+
+    try:
+        user = User.objects.create_user(username='tracingmerchant', password='testpass123')
+        merchant = Merchant.objects.create(
+            user=user, business_name='Tracing Business', fnb_account_number='TRACE001',
+            contact_email='tracing@merchant.com', phone_number='+26771339000',
+            business_registration='TRACEREG001', api_key='tracing-test-key',
+        )
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Trace', last_name='Customer', phone_number='+26771339001'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('100.00'))
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        payload = {
+            'wallet_id': str(wallet.wallet_id), 'amount': '5.00', 'transaction_type': 'credit',
+            'payment_channel': 'qr_code',
+        }
+
+        with tracing_settings(), override_settings(CACHES=LOCAL_CACHES):
+            tracing.install()
+            # The execute wrapper is added to connections as they are created
+            connection.close()
+
+            response = client.post(
+                '/api/v1/transactions/', payload, content_type='application/json',
+                HTTP_TRACEPARENT=f'00-{TRACE_ID}-{PARENT_ID}-01',
+            )
+            assert response.status_code == 201, response.content
+            spans = exported_spans()
+            assert spans and all(span.trace_id == TRACE_ID for span in spans), spans
+            by_name = {span.name: span for span in spans}
+            root = by_name['POST api_v1:transactions:transactions-list']
+            assert root.parent_id == PARENT_ID and root.kind == tracing.SERVER, root.to_otlp()
+            assert root.attributes['http.response.status_code'] == 201, root.attributes
+            assert root.attributes['http.route'] == '/api/v1/transactions/', root.attributes
+            posting = by_name['transactions.post_transaction']
+            queries = [span for span in spans if span.name.startswith('db.')]
+            assert any(span.parent_id == posting.span_id for span in queries), [s.name for s in spans]
+            assert all('+26771339001' not in span.attributes['db.statement'] for span in queries)
+            otlp = tracing.encode_otlp([root], {'service.name': 'phantom-banking'})
+            assert otlp['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['parentSpanId'] == PARENT_ID
+
+            # Unsampled callers are followed too: nothing is recorded
+            count = len(exported_spans())
+            response = client.post(
+                '/api/v1/transactions/', payload, content_type='application/json',
+                HTTP_TRACEPARENT=f'00-{TRACE_ID}-{PARENT_ID}-00',
+            )
+            assert response.status_code == 201, response.content
+            assert len(exported_spans()) == count
+
+        print("✅ Request trace test passed")
+
+        # Clean up
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Request trace test failed: {e}")
+        return False
+
+def test_outbound_and_task_propagation():
+    """Test traceparent injection into outbound HTTP calls and Celery tasks"""
+    print("🧪 Testing trace propagation...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), HeaderRecorder)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        http = PooledHTTPClient(base_url=f'http://127.0.0.1:{server.server_port}', coalesce_gets=False)
+        HeaderRecorder.received = []
+        with tracing_settings():
+            with tracing.start_trace('job', f'00-{TRACE_ID}-{PARENT_ID}-01', tracing.INTERNAL):
+                assert http.get('health/').ok
+                headers = {}
+                signals.before_task_publish.send(sender='tests.tracing.echo', headers=headers, body=None)
+            spans = exported_spans()
+            outbound = next(span for span in spans if span.kind == tracing.CLIENT)
+            assert outbound.name == 'GET' and outbound.attributes['http.response.status_code'] == 200
+            traceparent = HeaderRecorder.received[-1].get('traceparent')
+            assert traceparent == f'00-{TRACE_ID}-{outbound.span_id}-01', traceparent
+            job = next(span for span in spans if span.name == 'job')
+            assert headers['traceparent'] == f'00-{TRACE_ID}-{job.span_id}-01', headers
+
+            # The task run continues the published context
+            assert echo_task.apply(args=('ok',), headers=headers).get() == 'ok'
+            run = next(span for span in exported_spans() if span.name == 'celery.run tests.tracing.echo')
+            assert run.trace_id == TRACE_ID and run.parent_id == job.span_id, run.to_otlp()
+            assert run.kind == tracing.CONSUMER and run.attributes['celery.state'] == 'SUCCESS'
+
+            # Unsampled: the context still propagates, no spans are recorded
+            count = len(exported_spans())
+            with tracing.start_trace('job', f'00-{TRACE_ID}-{PARENT_ID}-00', tracing.INTERNAL):
+                assert http.get('health/').ok
+            assert HeaderRecorder.received[-1].get('traceparent') == f'00-{TRACE_ID}-{PARENT_ID}-00'
+            assert len(exported_spans()) == count
+
+        print("✅ Trace propagation test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Trace propagation test failed: {e}")
+        return False
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_unsampled_span_overhead():
+    """Test that spans of unsampled traces cost under a microsecond"""
+    print("🧪 Testing unsampled span overhead...")
+
+    try:
+        iterations = 100000
+        best = None
+        with tracing_settings(SAMPLE_RATE=0.0), tracing.start_trace('GET'):
+            for _ in range(5):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    with tracing.start_span('db.SELECT', tracing.CLIENT):
+                        pass
+                elapsed = (time.perf_counter() - start) / iterations
+                best = elapsed if best is None else min(best, elapsed)
+        assert best < 1e-6, f"{best * 1e9:.0f}ns per span"
+        print(f"   {best * 1e9:.0f}ns per unsampled span")
+
+        print("✅ Unsampled span overhead test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Unsampled span overhead test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🛰️ Testing Tracing Components")
+    print("=" * 40)
+
+    tests = [
+        test_traceparent_and_sampling,
+        test_request_trace,
+        test_outbound_and_task_propagation,
+        test_unsampled_span_overhead
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Tracing Tests: {passed}/{len(tests)} passed")
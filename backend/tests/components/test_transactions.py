@@ -6,6 +6,7 @@ import sys
 import django
 from pathlib import Path
 from decimal import Decimal
+from datetime import timedelta
 
 # Setup Django
 project_root = Path(__file__).parent.parent.parent
@@ -14,10 +15,17 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from django.contrib.auth.models import User
+from django.utils import timezone
 from phantom_apps.merchants.models import Merchant
 from phantom_apps.customers.models import Customer
 from phantom_apps.wallets.models import Wallet
 from phantom_apps.transactions.models import Transaction
+from phantom_apps.transactions.views import TransactionViewSet
+from phantom_apps.common.checks import check_view_transaction_policies
+from phantom_apps.common.db.transactions import apply_transaction_policy, ReadOnlyViolation
+from phantom_apps.common.ids import uuid7, uuid7_range, uuid7_datetime
+from phantom_apps.transactions.services import post_transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
 
 def test_transaction_creation():
     """Test transaction model creation"""
@@ -169,13 +177,157 @@ def test_transaction_relationships():
         print(f"❌ Transaction relationships test failed: {e}")
         return False
 
+def test_transaction_policies():
+    """Test per-view transaction policies"""
+    print("🧪 Testing transaction policies...")
+    
+    try:
+        user = User.objects.create_user(
+            username='policymerchant',
+            email='policy@merchant.com',
+            password='testpass123'
+        )
+        
+        # Read-only views cannot write
+        try:
+            with apply_transaction_policy('read_only', 'test'):
+                User.objects.filter(pk=user.pk).update(first_name='Changed')
+            raise AssertionError("read-only policy allowed a write")
+        except ReadOnlyViolation:
+            pass
+        
+        # Atomic views roll back all their writes together
+        try:
+            with apply_transaction_policy('atomic', 'test'):
+                User.objects.filter(pk=user.pk).update(first_name='Changed')
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        user.refresh_from_db()
+        assert user.first_name == ''
+        
+        # Every writing API view declares a policy
+        warnings = [w for w in check_view_transaction_policies(None) if w.id.startswith('phantom.')]
+        assert warnings == [], warnings
+        
+        # Posting through the API: autocommit view, atomic posting service
+        merchant = Merchant.objects.create(
+            user=user,
+            business_name='Policy Business',
+            fnb_account_number='1234567892',
+            contact_email='policy@merchant.com',
+            phone_number='+26771234571',
+            business_registration='TEST125'
+        )
+        customer = Customer.objects.create(
+            merchant=merchant,
+            first_name='Pat',
+            last_name='Policy',
+            phone_number='+26771234572'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('10.00'))
+        
+        factory = APIRequestFactory()
+        request = factory.post('/api/v1/transactions/', {
+            'wallet_id': str(wallet.wallet_id),
+            'amount': '5.00',
+            'transaction_type': 'credit',
+            'payment_channel': 'qr_code',
+        }, format='json')
+        force_authenticate(request, user=user)
+        response = TransactionViewSet.as_view({'post': 'create'})(request)
+        assert response.status_code == 201, response.data
+        
+        request = factory.get(f"/api/v1/transactions/{response.data['transaction_id']}/")
+        force_authenticate(request, user=user)
+        detail = TransactionViewSet.as_view({'get': 'retrieve'})(request, pk=response.data['transaction_id'])
+        assert detail.status_code == 200
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('15.00')
+        
+        print("✅ Transaction policies test passed")
+        
+        # Clean up
+        wallet.delete()
+        customer.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Transaction policies test failed: {e}")
+        return False
+
+def test_time_ordered_keys():
+    """Test UUIDv7 keys: increasing in creation order and range-scannable by time"""
+    print("🧪 Testing time-ordered keys...")
+    
+    try:
+        # Monotonic within the process, even inside one millisecond
+        keys = [uuid7() for _ in range(5000)]
+        assert keys == sorted(keys) and len(set(keys)) == len(keys)
+        assert all(key.version == 7 for key in keys[:10])
+        
+        user = User.objects.create_user(username='uuid7merchant', password='testpass123')
+        merchant = Merchant.objects.create(
+            user=user,
+            business_name='Ordered Keys Business',
+            fnb_account_number='1234567893',
+            contact_email='uuid7@merchant.com',
+            phone_number='+26771234573',
+            business_registration='TEST126',
+            api_key='uuid7-test-key'
+        )
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Ord', last_name='Ered', phone_number='+26771234574'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('0.00'))
+        assert customer.customer_id.version == wallet.wallet_id.version == 7
+        
+        start = timezone.now()
+        posted = [
+            post_transaction(wallet.wallet_id, Decimal('1.00'), 'credit', 'qr_code') for _ in range(3)
+        ]
+        end = timezone.now() + timedelta(milliseconds=1)
+        
+        # Primary key order is creation order
+        ids = list(wallet.transactions.order_by('pk').values_list('pk', flat=True))
+        assert ids == [transaction.transaction_id for transaction in posted]
+        
+        # A key range is a creation-time range
+        low, high = uuid7_range(start, end)
+        in_range = Transaction.objects.filter(pk__gte=low, pk__lt=high, wallet=wallet)
+        assert in_range.count() == 3
+        earlier_low, earlier_high = uuid7_range(start - timedelta(hours=1), start - timedelta(minutes=59))
+        assert not Transaction.objects.filter(pk__gte=earlier_low, pk__lt=earlier_high, wallet=wallet).exists()
+        
+        embedded = uuid7_datetime(posted[0].transaction_id)
+        assert abs(embedded - posted[0].created_at) < timedelta(seconds=1)
+        
+        print("✅ Time-ordered keys test passed")
+        
+        # Clean up
+        wallet.delete()
+        customer.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Time-ordered keys test failed: {e}")
+        return False
+
 if __name__ == "__main__":
     print("💳 Testing Transaction Components")
     print("=" * 40)
     
     tests = [
         test_transaction_creation,
-        test_transaction_relationships
+        test_transaction_relationships,
+        test_transaction_policies,
+        test_time_ordered_keys
     ]
     
     passed = 0
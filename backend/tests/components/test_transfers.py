@@ -0,0 +1,334 @@
+"""
+Wallet-to-wallet transfer tests
+"""
+import os
+import sys
+import threading
+import django
+from pathlib import Path
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.common.exceptions import RiskBlockedException, TransactionException, WalletException
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.ledger.models import JournalEntry
+from phantom_apps.ledger.services import unbalanced_journals, wallet_balance_at
+from phantom_apps.transactions import services
+from phantom_apps.transactions.models import Transaction
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+def no_velocity():
+    return {**settings.VELOCITY, 'ENABLED': False}
+
+def create_merchant(name, wallets, opening='100.00'):
+    """Merchant with funded wallets (credits posted, so the journal matches)"""
+    user = User.objects.create_user(username=f'transfer{name}', password='testpass123')
+    merchant = Merchant.objects.create(
+        user=user, business_name=f'Transfer {name}', fnb_account_number=f'TRANSFER{name}'.upper()[:20],
+        contact_email=f'{name}@transfer.com', phone_number=f'+2677146{len(name):04d}',
+        business_registration=f'TRANSFERREG{name}'.upper(), api_key=f'transfer-{name}-key',
+    )
+    created = []
+    for index in range(wallets):
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Trans', last_name=f'Fer{index}', phone_number=f'+26771470{index:03d}'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('0.00'))
+        services.post_transaction(wallet.wallet_id, opening, 'credit', 'eft')
+        created.append(wallet)
+    return user, merchant, created
+
+def balances(wallets):
+    return [Wallet.objects.get(pk=wallet.pk).balance for wallet in wallets]
+
+def test_transfer_legs():
+    """Test both legs commit together, with journal lines, and rejected transfers change nothing"""
+    print("🧪 Testing transfer legs...")
+
+    try:
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=no_velocity()):
+            user, merchant, (first, second) = create_merchant('legs', 2)
+            other_user, _, (foreign,) = create_merchant('legsother', 1)
+
+            posted = services.post_transfer(first.wallet_id, second.wallet_id, '30.00', description='Rent share')
+            assert posted.transaction_type == 'transfer' and posted.payment_channel == 'wallet_transfer'
+            assert (posted.wallet_id, posted.destination_wallet_id) == (first.pk, second.pk)
+            assert balances([first, second]) == [Decimal('70.00'), Decimal('130.00')]
+            lines = JournalEntry.objects.filter(journal_id=posted.transaction_id)
+            assert sorted(line.amount for line in lines) == [Decimal('-30.00'), Decimal('30.00')], list(lines)
+
+            # Another merchant's wallet: the floats move too
+            posted = services.post_transfer(second.wallet_id, foreign.wallet_id, '10.00')
+            assert JournalEntry.objects.filter(journal_id=posted.transaction_id).count() == 4
+            for wallet in (first, second, foreign):
+                assert wallet_balance_at(wallet.pk) == Wallet.objects.get(pk=wallet.pk).balance, wallet.pk
+            assert unbalanced_journals() == []
+
+            count = Transaction.objects.filter(transaction_type='transfer').count()
+            rejected = [
+                (lambda: services.post_transfer(first.wallet_id, second.wallet_id, '70.01'), WalletException),
+                (lambda: services.post_transfer(first.wallet_id, first.wallet_id, '1.00'), TransactionException),
+                (lambda: services.post_transfer(first.wallet_id, second.wallet_id, '0'), TransactionException),
+                (lambda: services.post_transfer(first.wallet_id, 'not-a-wallet', '1.00'), WalletException),
+            ]
+            Wallet.objects.filter(pk=second.pk).update(is_frozen=True)
+            rejected.append((lambda: services.post_transfer(first.wallet_id, second.wallet_id, '1.00'), WalletException))
+            for attempt, expected in rejected:
+                try:
+                    attempt()
+                    raise AssertionError('transfer was accepted')
+                except expected:
+                    pass
+            assert Transaction.objects.filter(transaction_type='transfer').count() == count
+            assert balances([first, foreign]) == [Decimal('70.00'), Decimal('110.00')]
+
+        print("✅ Transfer legs test passed")
+
+        # Clean up
+        user.delete()
+        other_user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Transfer legs test failed: {e}")
+        return False
+
+def test_batch_netting():
+    """Test a batch is netted per wallet, locked in key order and applied all or nothing"""
+    print("🧪 Testing batch netting...")
+
+    try:
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=no_velocity()):
+            user, _, wallets = create_merchant('netting', 3)
+            a, b, c = wallets
+
+            # a pays out more than it holds, but receives enough in the same batch
+            batch = [
+                {'source_wallet_id': a.wallet_id, 'destination_wallet_id': b.wallet_id, 'amount': '150.00'},
+                {'source_wallet_id': b.wallet_id, 'destination_wallet_id': c.wallet_id, 'amount': '150.00'},
+                {'source_wallet_id': c.wallet_id, 'destination_wallet_id': a.wallet_id, 'amount': '100.00'},
+                {'source_wallet_id': c.wallet_id, 'destination_wallet_id': a.wallet_id, 'amount': '25.00'},
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                posted = services.post_transfers(batch)
+            assert [row.amount for row in posted] == [Decimal(t['amount']) for t in batch]
+            assert balances(wallets) == [Decimal('75.00'), Decimal('100.00'), Decimal('125.00')], balances(wallets)
+            statements = [query['sql'] for query in queries]
+            # b nets to zero: one UPDATE, for a and c only
+            updates = [sql for sql in statements if sql.startswith('UPDATE "wallets"')]
+            assert len(updates) == 1 and str(b.wallet_id).replace('-', '') not in updates[0], updates
+            locks = [sql for sql in statements if sql.startswith('SELECT') and 'FROM "wallets"' in sql]
+            assert len(locks) == 1 and 'ORDER BY "wallets"."wallet_id" ASC' in locks[0], locks
+            if connection.features.has_select_for_update_of:
+                assert 'FOR UPDATE OF "wallets"' in locks[0], locks[0]
+            assert len(statements) <= 7, statements
+            for wallet in wallets:
+                assert wallet_balance_at(wallet.pk) == Wallet.objects.get(pk=wallet.pk).balance, wallet.pk
+            assert unbalanced_journals() == []
+
+            # One transfer the net balance cannot cover rejects the whole batch
+            count = Transaction.objects.filter(transaction_type='transfer').count()
+            try:
+                services.post_transfers(batch[:3] + [
+                    {'source_wallet_id': b.wallet_id, 'destination_wallet_id': a.wallet_id, 'amount': '100.01'},
+                ])
+                raise AssertionError('uncovered batch was accepted')
+            except WalletException as e:
+                assert str(b.wallet_id) in str(e), e
+            assert Transaction.objects.filter(transaction_type='transfer').count() == count
+            assert balances(wallets) == [Decimal('75.00'), Decimal('100.00'), Decimal('125.00')]
+
+            # Locks are taken in key order whatever order the ids come in
+            assert list(services.lock_wallets([c.pk, a.pk, b.pk])) == sorted([a.pk, b.pk, c.pk])
+
+        print("✅ Batch netting test passed")
+
+        # Clean up
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Batch netting test failed: {e}")
+        return False
+
+def test_batch_velocity():
+    """Test transfers in one batch count towards each other's velocity limits"""
+    print("🧪 Testing batch velocity scoring...")
+    
+    try:
+        # wallet_burst allows 10 postings a minute
+        velocity = {**settings.VELOCITY, 'ENABLED': True, 'REVIEW_SCORE': 50, 'BLOCK_SCORE': 100}
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=velocity):
+            user, _, (a, b) = create_merchant('velocity', 2)
+            batch = [
+                {'source_wallet_id': a.wallet_id, 'destination_wallet_id': b.wallet_id, 'amount': '1.00'}
+            ] * 12
+            posted = services.post_transfers(batch)
+            # The opening credit was the first posting of the minute
+            assert [row.risk_decision for row in posted] == ['allow'] * 9 + ['review'] * 3, [
+                row.risk_decision for row in posted
+            ]
+            
+            # Blocked outright once the burst alone is enough
+            with override_settings(VELOCITY={**velocity, 'BLOCK_SCORE': 50}):
+                count = Transaction.objects.filter(transaction_type='transfer').count()
+                try:
+                    services.post_transfers([
+                        {'source_wallet_id': b.wallet_id, 'destination_wallet_id': a.wallet_id, 'amount': '1.00'}
+                    ] * 11)
+                    raise AssertionError('burst batch was not blocked')
+                except RiskBlockedException:
+                    pass
+                assert Transaction.objects.filter(transaction_type='transfer').count() == count
+            assert balances([a, b]) == [Decimal('88.00'), Decimal('112.00')], balances([a, b])
+        
+        print("✅ Batch velocity scoring test passed")
+        
+        # Clean up
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batch velocity scoring test failed: {e}")
+        return False
+
+def test_concurrent_transfers():
+    """Test opposite transfers between two wallets from several threads never deadlock"""
+    print("🧪 Testing concurrent opposite transfers...")
+
+    if not connection.features.has_select_for_update:
+        print("⏭️  Database has no row locks, concurrent transfers skipped (see bench_transfers.py)")
+        return True
+
+    try:
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=no_velocity()):
+            user, _, (a, b) = create_merchant('concurrent', 2, opening='1000.00')
+            errors = []
+
+            def worker(source, destination):
+                try:
+                    for _ in range(40):
+                        services.post_transfer(source.wallet_id, destination.wallet_id, '1.00')
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    connections.close_all()
+
+            threads = [
+                threading.Thread(target=worker, args=(a, b) if index % 2 else (b, a)) for index in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert not errors, errors
+            assert balances([a, b]) == [Decimal('1000.00'), Decimal('1000.00')], balances([a, b])
+            assert Transaction.objects.filter(wallet__in=[a, b], transaction_type='transfer').count() == 160
+
+        print("✅ Concurrent transfers test passed")
+
+        # Clean up
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Concurrent transfers test failed: {e}")
+        return False
+
+def test_transfer_endpoints():
+    """Test the single and batch transfer endpoints"""
+    print("🧪 Testing transfer endpoints...")
+
+    try:
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=no_velocity()):
+            user, _, (a, b) = create_merchant('api', 2)
+            other_user, _, (foreign,) = create_merchant('apiother', 1)
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+            def transfer(source, destination, amount):
+                return {'source_wallet_id': str(source.wallet_id), 'destination_wallet_id': str(destination.wallet_id),
+                        'amount': amount}
+
+            response = client.post('/api/v1/transactions/transfer/', transfer(a, b, '40.00'),
+                                   content_type='application/json')
+            assert response.status_code == 201, response.content
+            body = response.json()
+            assert body['transaction_type'] == 'transfer' and body['destination_wallet'] == str(b.wallet_id), body
+
+            response = client.post('/api/v1/transactions/transfers/', {'transfers': [
+                transfer(b, a, '100.00'), transfer(a, b, '5.00'),
+            ]}, content_type='application/json')
+            assert response.status_code == 201, response.content
+            assert len(response.json()['results']) == 2
+            assert balances([a, b]) == [Decimal('155.00'), Decimal('45.00')], balances([a, b])
+
+            # Only between the merchant's own wallets
+            response = client.post('/api/v1/transactions/transfer/', transfer(a, foreign, '1.00'),
+                                   content_type='application/json')
+            assert response.status_code == 404, response.content
+            response = client.post('/api/v1/transactions/transfer/', transfer(a, b, '500.00'),
+                                   content_type='application/json')
+            assert response.status_code == 400 and 'Insufficient' in response.json()['error'], response.content
+            response = client.post('/api/v1/transactions/transfer/', transfer(a, a, '1.00'),
+                                   content_type='application/json')
+            assert response.status_code == 400, response.content
+            response = client.post('/api/v1/transactions/transfers/', {'transfers': []},
+                                   content_type='application/json')
+            assert response.status_code == 400, response.content
+            response = client.post('/api/v1/transactions/', {
+                'wallet_id': str(a.wallet_id), 'amount': '1.00', 'transaction_type': 'credit',
+                'payment_channel': 'wallet_transfer',
+            }, content_type='application/json')
+            assert response.status_code == 400, response.content
+
+        print("✅ Transfer endpoints test passed")
+
+        # Clean up
+        user.delete()
+        other_user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Transfer endpoints test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🔁 Testing Transfer Components")
+    print("=" * 40)
+
+    tests = [
+        test_transfer_legs,
+        test_batch_netting,
+        test_batch_velocity,
+        test_concurrent_transfers,
+        test_transfer_endpoints
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Transfer Tests: {passed}/{len(tests)} passed")
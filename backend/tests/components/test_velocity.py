@@ -0,0 +1,240 @@
+"""
+Velocity scoring tests
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+import django
+from pathlib import Path
+from decimal import Decimal
+
+# Setup Django
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from phantom_apps.merchants.models import Merchant
+from phantom_apps.customers.models import Customer
+from phantom_apps.wallets.models import Wallet
+from phantom_apps.transactions import risk
+from phantom_apps.transactions.models import Transaction
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+RULES = [
+    ('burst', 'wallet', 'count', 60, 3, 50),
+    ('hourly_amount', 'wallet', 'sum', 3600, '100.00', 50),
+    ('counterparties', 'wallet', 'distinct', 3600, 2, 50),
+    ('phone_wallets', 'phone', 'distinct', 86400, 2, 100),
+    ('large', 'wallet', 'amount', 0, '500.00', 50),
+]
+
+def velocity_config(**overrides):
+    return {**settings.VELOCITY, 'RULES': RULES, 'REVIEW_SCORE': 50, 'BLOCK_SCORE': 100, **overrides}
+
+def score_and_record(engine, wallet_id, phone, amount, counterparty='', now=None):
+    decision = engine.score(wallet_id, phone, 'merchant-1', amount, counterparty, now=now)
+    if decision.action != risk.BLOCK:
+        engine.record(decision)
+    return decision
+
+def check_rules(engine):
+    """The rule scenarios, run against whichever store ``engine`` uses"""
+    start = time.time()
+    wallet, phone = uuid.uuid4().hex, f'+2677{uuid.uuid4().int % 10 ** 7:07d}'
+
+    # Three postings fit the burst limit; the fourth within the minute is flagged
+    for _ in range(3):
+        assert score_and_record(engine, wallet, phone, '10.00', now=start).action == risk.ALLOW
+    decision = score_and_record(engine, wallet, phone, '10.00', now=start)
+    assert decision.action == risk.REVIEW and decision.rules == ['burst'], decision.as_dict()
+
+    # Two minutes on the burst window has slid past them; the hourly sum has not
+    decision = score_and_record(engine, wallet, phone, '70.00', now=start + 120)
+    assert decision.action == risk.REVIEW and decision.rules == ['hourly_amount'], decision.as_dict()
+    decision = engine.score(wallet, phone, 'merchant-1', '600.00', now=start + 120)
+    assert decision.action == risk.BLOCK and decision.rules == ['hourly_amount', 'large'], decision.as_dict()
+    # Three hours later the wallet is clean again
+    assert engine.score(wallet, phone, 'merchant-1', '10.00', now=start + 3 * 3600).action == risk.ALLOW
+
+    # Distinct counterparties: repeats of one reference do not count twice
+    other, other_phone = uuid.uuid4().hex, phone + '9'
+    for reference, at in (('MM-1', start), ('MM-1', start), ('MM-2', start + 120)):
+        assert score_and_record(engine, other, other_phone, '1.00', reference, now=at).action == risk.ALLOW
+    decision = score_and_record(engine, other, other_phone, '1.00', 'MM-3', now=start + 120)
+    assert decision.rules == ['counterparties'], decision.as_dict()
+
+    # One phone paying into a third wallet within a day is blocked
+    assert score_and_record(engine, uuid.uuid4().hex, phone, '1.00', now=start).action == risk.ALLOW
+    decision = score_and_record(engine, uuid.uuid4().hex, phone, '1.00', now=start)
+    assert decision.action == risk.BLOCK and decision.rules == ['phone_wallets'], decision.as_dict()
+
+def test_rules_and_windows():
+    """Test count, sum, distinct and amount rules over sliding windows in the in-process store"""
+    print("🧪 Testing velocity rules and windows...")
+
+    try:
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=velocity_config()):
+            engine = risk.get_velocity_engine()
+            assert engine.redis is None
+            check_rules(engine)
+            assert {rule.name for rule in engine.rules} == {rule[0] for rule in RULES}
+
+            # Least recently used series go first
+            store = risk.MemoryVelocityStore(max_series=2)
+            for wallet in ('a', 'b', 'c'):
+                series = risk.Series('wallet', wallet, 6, '', time.time())
+                store.record([series], 100)
+            assert list(store._series) == ['velocity:wallet:b:6', 'velocity:wallet:c:6'], list(store._series)
+
+        try:
+            risk.Rule('bad', 'wallet', 'count', 5, 1, 1)
+            raise AssertionError('window shorter than its buckets was accepted')
+        except ImproperlyConfigured:
+            pass
+
+        print("✅ Velocity rules test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Velocity rules test failed: {e}")
+        return False
+
+def test_redis_store():
+    """Test the same rules against Redis, or the fallback when Redis is unreachable"""
+    print("🧪 Testing Redis velocity counters...")
+
+    try:
+        with override_settings(VELOCITY=velocity_config()):
+            engine = risk.get_velocity_engine()
+            if engine.redis is None:
+                print("⏭️  Default cache is not Redis, Redis counters skipped")
+                return True
+            decision = engine.score(uuid.uuid4().hex, '+26770000000', 'merchant-1', '1.00')
+            if decision.store == 'memory':
+                # Unreachable: the worker keeps scoring with its own counters until the retry
+                assert engine._redis_down_until > time.monotonic(), engine._redis_down_until
+                assert engine.score(uuid.uuid4().hex, '+26770000000', 'merchant-1', '1.00').store == 'memory'
+                print("⏭️  Redis unreachable, fallback checked, Redis counters skipped")
+            else:
+                check_rules(engine)
+                client = engine.redis.client
+                keys = client.keys(engine.redis.cache.make_key('velocity:*'))
+                assert keys and all(client.ttl(key) > 0 for key in keys), keys
+
+        print("✅ Redis velocity counters test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Redis velocity counters test failed: {e}")
+        return False
+
+def test_posting_decisions():
+    """Test postings are allowed, flagged for review or blocked through the API"""
+    print("🧪 Testing posting decisions...")
+
+    try:
+        user = User.objects.create_user(username='velocitymerchant', password='testpass123')
+        merchant = Merchant.objects.create(
+            user=user, business_name='Velocity Business', fnb_account_number='VELOCITY01',
+            contact_email='velocity@merchant.com', phone_number='+26771440000',
+            business_registration='VELOCITYREG', api_key='velocity-test-key',
+        )
+        customer = Customer.objects.create(
+            merchant=merchant, first_name='Velo', last_name='City', phone_number='+26771440001'
+        )
+        wallet = Wallet.objects.create(customer=customer, merchant=merchant, balance=Decimal('1000.00'))
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        def post(amount):
+            return client.post('/api/v1/transactions/', {
+                'wallet_id': str(wallet.wallet_id), 'amount': amount, 'transaction_type': 'debit',
+                'payment_channel': 'qr_code',
+            }, content_type='application/json')
+
+        with override_settings(CACHES=LOCAL_CACHES, VELOCITY=velocity_config()):
+            response = post('40.00')
+            assert response.status_code == 201 and response.json()['risk_decision'] == 'allow', response.content
+
+            # Over the hourly sum: posted, flagged for review
+            response = post('70.00')
+            assert response.status_code == 201, response.content
+            flagged = Transaction.objects.get(reference_number=response.json()['reference_number'])
+            assert flagged.risk_decision == 'review' and flagged.risk_score == 50, flagged.risk_score
+
+            # Over the hourly sum and the single amount limit: blocked, nothing posted
+            response = post('600.00')
+            assert response.status_code == 403, response.content
+            assert response.json()['risk'] == {'decision': 'block', 'score': 100}, response.json()
+            wallet.refresh_from_db()
+            assert wallet.balance == Decimal('890.00'), wallet.balance
+            assert Transaction.objects.filter(wallet=wallet).count() == 2
+
+            with override_settings(VELOCITY={**velocity_config(), 'ENABLED': False}):
+                assert post('600.00').status_code == 201
+
+        print("✅ Posting decisions test passed")
+
+        # Clean up
+        user.delete()
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Posting decisions test failed: {e}")
+        return False
+
+def test_scoring_latency():
+    """Test the default rule set scores a posting in well under a millisecond"""
+    print("🧪 Testing scoring latency...")
+
+    try:
+        with override_settings(CACHES=LOCAL_CACHES):
+            engine = risk.get_velocity_engine()
+            wallets = [uuid.uuid4().hex for _ in range(50)]
+            timings = []
+            for index in range(2000):
+                wallet = wallets[index % len(wallets)]
+                start = time.perf_counter()
+                decision = engine.score(wallet, f'+26772{index % 40:06d}', 'merchant-1', '25.00', f'REF-{index % 7}')
+                timings.append(time.perf_counter() - start)
+                engine.record(decision)
+        median = statistics.median(timings)
+        p99 = sorted(timings)[int(len(timings) * 0.99)]
+        assert p99 < 0.001, f"p99 {p99 * 1e6:.0f}µs"
+        print(f"   median {median * 1e6:.0f}µs, p99 {p99 * 1e6:.0f}µs per posting")
+
+        print("✅ Scoring latency test passed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Scoring latency test failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🚨 Testing Velocity Components")
+    print("=" * 40)
+
+    tests = [
+        test_rules_and_windows,
+        test_redis_store,
+        test_posting_decisions,
+        test_scoring_latency
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+
+    print(f"\n📊 Velocity Tests: {passed}/{len(tests)} passed")
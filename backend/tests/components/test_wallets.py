@@ -4,6 +4,7 @@ Wallet component tests
 import os
 import sys
 import django
+from unittest import mock
 from pathlib import Path
 from decimal import Decimal
 
@@ -13,10 +14,15 @@ sys.path.insert(0, str(project_root))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
 from phantom_apps.merchants.models import Merchant
 from phantom_apps.customers.models import Customer
 from phantom_apps.wallets.models import Wallet
+from phantom_apps.wallets.cache import wallet_balance_cache
+from phantom_apps.transactions.services import post_transaction
 
 def test_wallet_creation():
     """Test wallet model creation"""
@@ -131,13 +137,231 @@ def test_wallet_relationships():
         print(f"❌ Wallet relationships test failed: {e}")
         return False
 
+def test_wallet_balance_cache():
+    """Test read-through balance cache and invalidation on posting"""
+    print("🧪 Testing wallet balance cache...")
+    
+    try:
+        # Create test data
+        user = User.objects.create_user(
+            username='testmerchant3',
+            email='test3@merchant.com',
+            password='testpass123'
+        )
+        
+        merchant = Merchant.objects.create(
+            user=user,
+            business_name='Test Business 3',
+            fnb_account_number='1234567892',
+            contact_email='test3@merchant.com',
+            phone_number='+26771234571',
+            business_registration='TEST125'
+        )
+        
+        customer = Customer.objects.create(
+            merchant=merchant,
+            first_name='Kabo',
+            last_name='Molefe',
+            phone_number='+26771234572'
+        )
+        
+        wallet = Wallet.objects.create(
+            customer=customer,
+            merchant=merchant,
+            balance=Decimal('100.00')
+        )
+        
+        hits_before = wallet_balance_cache.stats.hits
+        cached = wallet_balance_cache.get(wallet.wallet_id)
+        assert cached['balance'] == Decimal('100.00')
+        assert cached['merchant_id'] == str(merchant.merchant_id)
+        
+        # Second read is served from cache
+        assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('100.00')
+        assert wallet_balance_cache.stats.hits == hits_before + 1
+        
+        # A committed posting is visible immediately, with a new version stamp
+        post_transaction(wallet.wallet_id, Decimal('25.00'), 'credit', 'qr_code')
+        cached = wallet_balance_cache.get(wallet.wallet_id)
+        assert cached['balance'] == Decimal('125.00')
+        assert cached['version'] == 1
+        
+        # Bulk lookup ignores unknown wallets
+        balances = wallet_balance_cache.get_many([wallet.wallet_id, '00000000-0000-0000-0000-000000000000'])
+        assert list(balances) == [str(wallet.wallet_id)]
+        
+        print("✅ Wallet balance cache test passed")
+        
+        # Clean up
+        wallet.delete()
+        customer.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Wallet balance cache test failed: {e}")
+        return False
+
+def test_wallet_balance_cache_outage():
+    """Test postings and balance reads still work when the cache cannot be reached"""
+    print("🧪 Testing wallet balance cache outage...")
+    
+    # Nothing listens on port 1: every cache call fails
+    unreachable = {
+        alias: {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:1/0',
+            'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.1, 'SOCKET_TIMEOUT': 0.1},
+        }
+        for alias in settings.CACHES
+    }
+    
+    try:
+        user = User.objects.create_user(
+            username='testmerchant4',
+            email='test4@merchant.com',
+            password='testpass123'
+        )
+        
+        merchant = Merchant.objects.create(
+            user=user,
+            business_name='Test Business 4',
+            fnb_account_number='1234567893',
+            contact_email='test4@merchant.com',
+            phone_number='+26771234573',
+            business_registration='TEST126'
+        )
+        
+        customer = Customer.objects.create(
+            merchant=merchant,
+            first_name='Lesego',
+            last_name='Dintwe',
+            phone_number='+26771234574'
+        )
+        
+        wallet = Wallet.objects.create(
+            customer=customer,
+            merchant=merchant,
+            balance=Decimal('100.00')
+        )
+        
+        with override_settings(CACHES=unreachable, VELOCITY={**settings.VELOCITY, 'ENABLED': False}):
+            # The posting commits and is reported as posted, not as an error
+            post_transaction(wallet.wallet_id, Decimal('10.00'), 'credit', 'qr_code')
+            assert Wallet.objects.get(pk=wallet.pk).balance == Decimal('110.00')
+            
+            # Reads fall back to the database
+            assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('110.00')
+            assert list(wallet_balance_cache.get_many([wallet.wallet_id])) == [str(wallet.wallet_id)]
+        
+        print("✅ Wallet balance cache outage test passed")
+        
+        # Clean up
+        wallet.delete()
+        customer.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Wallet balance cache outage test failed: {e}")
+        return False
+
+def test_wallet_balance_cache_retries_invalidation():
+    """Test a failed invalidation never lets a stale balance be served"""
+    print("🧪 Testing wallet balance cache invalidation retry...")
+    
+    local = {alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'} for alias in settings.CACHES}
+    real_incr = LocMemCache.incr
+    failures = [ConnectionError('network blip')]
+    
+    def flaky_incr(cache, *args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return real_incr(cache, *args, **kwargs)
+    
+    try:
+        user = User.objects.create_user(
+            username='testmerchant5',
+            email='test5@merchant.com',
+            password='testpass123'
+        )
+        
+        merchant = Merchant.objects.create(
+            user=user,
+            business_name='Test Business 5',
+            fnb_account_number='1234567894',
+            contact_email='test5@merchant.com',
+            phone_number='+26771234575',
+            business_registration='TEST127'
+        )
+        
+        customer = Customer.objects.create(
+            merchant=merchant,
+            first_name='Neo',
+            last_name='Kgosi',
+            phone_number='+26771234576'
+        )
+        
+        wallet = Wallet.objects.create(
+            customer=customer,
+            merchant=merchant,
+            balance=Decimal('100.00')
+        )
+        
+        with override_settings(CACHES=local, VELOCITY={**settings.VELOCITY, 'ENABLED': False}):
+            assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('100.00')
+            
+            # The bump after commit fails once: the old entry is still in the cache
+            with mock.patch.object(LocMemCache, 'incr', flaky_incr):
+                post_transaction(wallet.wallet_id, Decimal('10.00'), 'credit', 'qr_code')
+                assert not failures
+                
+                # The next read retries the bump and comes from the database
+                misses = wallet_balance_cache.stats.misses
+                assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('110.00')
+                assert wallet_balance_cache.stats.misses == misses + 1
+            
+            # Retried, so the cache serves again
+            hits = wallet_balance_cache.stats.hits
+            assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('110.00')
+            assert wallet_balance_cache.stats.hits == hits + 1
+            
+            # While the retry keeps failing, reads bypass the cache
+            failures.extend([ConnectionError('still down')] * 2)
+            with mock.patch.object(LocMemCache, 'incr', flaky_incr):
+                post_transaction(wallet.wallet_id, Decimal('5.00'), 'credit', 'qr_code')
+                assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('115.00')
+                assert not failures
+            assert wallet_balance_cache.get(wallet.wallet_id)['balance'] == Decimal('115.00')
+        
+        print("✅ Wallet balance cache invalidation retry test passed")
+        
+        # Clean up
+        wallet.delete()
+        customer.delete()
+        merchant.delete()
+        user.delete()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Wallet balance cache invalidation retry test failed: {e}")
+        return False
+
 if __name__ == "__main__":
     print("💰 Testing Wallet Components")
     print("=" * 40)
     
     tests = [
         test_wallet_creation,
-        test_wallet_relationships
+        test_wallet_relationships,
+        test_wallet_balance_cache,
+        test_wallet_balance_cache_outage,
+        test_wallet_balance_cache_retries_invalidation
     ]
     
     passed = 0